@@ -49,6 +49,9 @@ InfraMonitoredStack(
     project_name=PROJECT_NAME,
     stage_name=STAGE_NAME,
     settings=settings,
+    monitored_environment_name=settings.get_monitored_environment_name(
+        current_account, current_region
+    ),
 )
 
 app.synth()
@@ -3,11 +3,13 @@ from aws_cdk import (
     aws_iam as iam,
     aws_events as events,
     aws_events_targets as targets,
+    aws_logs as cloudwatch_logs,
+    custom_resources as cr,
 )
 from constructs import Construct
 
 from lib.aws.aws_naming import AWSNaming
-from lib.core.constants import CDKResourceNames
+from lib.core.constants import CDKResourceNames, LambdaLogsSubscriptionConfigs
 from lib.settings import Settings
 
 
@@ -16,6 +18,7 @@ class InfraMonitoredStack(Stack):
         self.stage_name = kwargs.pop("stage_name", None)
         self.project_name = kwargs.pop("project_name", None)
         self.settings: Settings = kwargs.pop("settings", None)
+        self.monitored_environment_name = kwargs.pop("monitored_environment_name", None)
 
         (
             self.tooling_account_id,
@@ -35,6 +38,10 @@ class InfraMonitoredStack(Stack):
 
         metrics_extract_role = self.create_metrics_extract_iam_role()
 
+        lambda_logs_subscription_filters = (
+            self.create_lambda_logs_subscription_filters()
+        )
+
     def create_cross_account_event_bus_role(self):
         # General settings config
         cross_account_bus_role = iam.Role(
@@ -123,6 +130,62 @@ class InfraMonitoredStack(Stack):
             emr_serverless_alerting_event_rule,
         ]
 
+    def create_lambda_logs_subscription_filters(self):
+        """
+        Subscribes the log groups of the monitored Lambda functions (see Settings.lambda_logs_subscriptions)
+        to the Logs destination in the tooling account, so their invocations are ingested in real time.
+        The log groups have to exist (i.e. the functions have to be deployed) before the stack.
+        The log group of each function is looked up on deployment, since it can be a custom one (LoggingConfig),
+        which the invocations are mapped back from by their log stream names (see LambdaLogsBatch.function_name).
+        """
+        function_names = self.settings.lambda_logs_subscriptions.get(
+            self.monitored_environment_name, []
+        )
+        if not function_names:
+            return []
+
+        destination_name = AWSNaming.LogsDestination(
+            self, CDKResourceNames.LOGS_DESTINATION_LAMBDA_LOGS
+        )
+        destination_arn = AWSNaming.Arn_LogsDestination(
+            self,
+            self.tooling_account_region,
+            self.tooling_account_id,
+            destination_name,
+        )
+
+        subscription_filters = []
+        for function_name in function_names:
+            function_configuration = cr.AwsCustomResource(
+                self,
+                f"salmonLambdaLogGroupLookup-{function_name}",
+                on_update=cr.AwsSdkCall(
+                    service="Lambda",
+                    action="getFunctionConfiguration",
+                    parameters={"FunctionName": function_name},
+                    physical_resource_id=cr.PhysicalResourceId.of(function_name),
+                    output_paths=["LoggingConfig.LogGroup"],
+                ),
+                policy=cr.AwsCustomResourcePolicy.from_sdk_calls(
+                    resources=[
+                        f"arn:aws:lambda:{self.region}:{self.account}:function:{function_name}"
+                    ]
+                ),
+            )
+            subscription_filters.append(
+                cloudwatch_logs.CfnSubscriptionFilter(
+                    self,
+                    f"salmonLambdaLogsSubscriptionFilter-{function_name}",
+                    filter_name=AWSNaming.LogsSubscriptionFilter(self, "lambda-logs"),
+                    log_group_name=function_configuration.get_response_field(
+                        "LoggingConfig.LogGroup"
+                    ),
+                    filter_pattern=LambdaLogsSubscriptionConfigs.FILTER_PATTERN,
+                    destination_arn=destination_arn,
+                )
+            )
+        return subscription_filters
+
     def create_metrics_extract_iam_role(self):
         """
         Creates an IAM Role allowing Tooling Account's MetricsExtractor and Digest Lambdas
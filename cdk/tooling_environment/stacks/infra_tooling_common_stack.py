@@ -16,7 +16,7 @@ from aws_cdk import (
 from constructs import Construct
 import os
 
-from lib.core.constants import CDKDeployExclusions
+from lib.core.constants import CDKDeployExclusions, NotificationPayloadConfigs
 from lib.aws.aws_naming import AWSNaming
 from lib.aws.aws_common_resources import (
     AWSCommonResources,
@@ -37,7 +37,7 @@ class InfraToolingCommonStack(NestedStack):
         create_timestream_db(): Creates Timestream database for events and metrics
         create_timestream_tables(timestream.CfnDatabase): Creates necessary tables in Timestream DB
         create_settings_bucket(): Creates Settings files storage and uploads files to it
-        create_notification_lambda(sns.Topic, sqs.Queue): Creates Lambda function for notification functionality
+        create_notification_lambda(sns.Topic, sqs.Queue, s3.Bucket): Creates Lambda function for notification functionality
     """
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
@@ -81,7 +81,7 @@ class InfraToolingCommonStack(NestedStack):
         )
 
         notification_lambda = self.create_notification_lambda(
-            self.internal_error_topic, self.notification_queue
+            self.internal_error_topic, self.notification_queue, self.settings_bucket
         )
 
     def create_timestream_db(self) -> tuple[timestream.CfnDatabase, kms.Key]:
@@ -122,6 +122,15 @@ class InfraToolingCommonStack(NestedStack):
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
             removal_policy=RemovalPolicy.DESTROY,
             auto_delete_objects=True,
+            lifecycle_rules=[
+                # notification message bodies offloaded by the digest (claim check)
+                s3.LifecycleRule(
+                    prefix=f"{NotificationPayloadConfigs.S3_PREFIX}/",
+                    expiration=Duration.days(
+                        NotificationPayloadConfigs.EXPIRATION_DAYS
+                    ),
+                )
+            ],
         )
 
         s3deploy.BucketDeployment(
@@ -136,13 +145,17 @@ class InfraToolingCommonStack(NestedStack):
         return settings_bucket
 
     def create_notification_lambda(
-        self, internal_error_topic: sns.Topic, notification_queue: sqs.Queue
+        self,
+        internal_error_topic: sns.Topic,
+        notification_queue: sqs.Queue,
+        settings_bucket: s3.Bucket,
     ) -> lambda_.Function:
         """Creates Lambda function for notification functionality
 
         Args:
             internal_error_topic (sns.Topic): SNS Topic for DLQ alerts
             notification_queue (sqs.Queue): SQS queue as the input for notification lambda
+            settings_bucket (s3.Bucket): Settings S3 Bucket storing the offloaded message bodies
 
         Returns:
             lambda_.Function: Notification Lambda
@@ -211,6 +224,17 @@ class InfraToolingCommonStack(NestedStack):
             )
         )
 
+        notification_lambda_role.add_to_policy(
+            # to be able to read the offloaded message bodies
+            iam.PolicyStatement(
+                actions=["s3:GetObject"],
+                effect=iam.Effect.ALLOW,
+                resources=[
+                    f"{settings_bucket.bucket_arn}/{NotificationPayloadConfigs.S3_PREFIX}/*"
+                ],
+            )
+        )
+
         notification_lambda_role.add_to_policy(
             iam.PolicyStatement(
                 actions=["secretsmanager:GetSecretValue"],
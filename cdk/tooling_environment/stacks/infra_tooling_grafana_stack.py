@@ -79,7 +79,7 @@ class InfraToolingGrafanaStack(NestedStack):
             self,
             "salmonAlertEventsLogGroup",
             log_group_name=AWSNaming.LogGroupName(self, "alert-events"),
-        )        
+        )
 
         (
             grafana_vpc_id,
@@ -117,7 +117,7 @@ class InfraToolingGrafanaStack(NestedStack):
         )
         # Add dependencies so that the Grafana instance is created only after all S3 deployments
         for deployment in s3_deployments:
-            self.grafana_instance.node.add_dependency(deployment)        
+            self.grafana_instance.node.add_dependency(deployment)
 
     def create_grafana_admin_secret(self) -> secretsmanager.Secret:
         """
@@ -193,6 +193,9 @@ class InfraToolingGrafanaStack(NestedStack):
                 resource_type=resource_type,
                 timestream_database_name=timestream_database_name,
                 timestream_table_name=metric_table_names[resource_type],
+                timestream_rollup_table_name=AWSNaming.TimestreamRollupTable(
+                    None, resource_type
+                ),
             )
             if dashboard_data:
                 sources = [
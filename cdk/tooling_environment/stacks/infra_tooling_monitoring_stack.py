@@ -6,21 +6,33 @@ from aws_cdk import (
     aws_events_targets as targets,
     aws_lambda as lambda_,
     aws_lambda_destinations as lambda_destiantions,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_iam as iam,
     aws_sns as sns,
     aws_sqs as sqs,
     aws_kms as kms,
     aws_timestream as timestream,
+    aws_kinesis as kinesis,
+    aws_logs as cloudwatch_logs,
     Duration,
 )
 from constructs import Construct
 import os
+import json
 
 from lib.core.constants import CDKDeployExclusions, CDKResourceNames
 from lib.aws.aws_naming import AWSNaming
 from lib.aws.aws_common_resources import AWSCommonResources
 from lib.settings.settings import Settings
-from lib.core.constants import CDKResourceNames, TimestreamRetention, SettingConfigs
+from lib.core.constants import (
+    CDKResourceNames,
+    TimestreamRetention,
+    SettingConfigs,
+    ExtractMetricsConfigs,
+    LambdaLogsSubscriptionConfigs,
+    NotificationPayloadConfigs,
+    MetricsRollupConfigs,
+)
 
 
 class InfraToolingMonitoringStack(NestedStack):
@@ -35,6 +47,8 @@ class InfraToolingMonitoringStack(NestedStack):
         get_common_stack_references(): Retrieves references to artifacts created in common stack (like S3 bucket, SNS topic, ...)
         create_extract_metrics_lambdas(settings_bucket, internal_error_topic, timestream_database_arn):
             Creates Lambda functions for extracting metrics.
+        create_lambda_logs_ingestion(...):
+            Creates Logs destination, Kinesis stream and Lambda function ingesting the pushed Lambda logs.
     """
 
     def __init__(
@@ -116,6 +130,16 @@ class InfraToolingMonitoringStack(NestedStack):
         )
         digest_rule.add_target(targets.LambdaFunction(digest_lambda))
 
+        if self.settings.lambda_logs_subscriptions:
+            ingest_lambda_logs_lambda = self.create_lambda_logs_ingestion(
+                settings_bucket=self.settings_bucket,
+                internal_error_topic=self.internal_error_topic,
+                timestream_database_name=input_timestream_database_name,
+                alerting_bus_arn=input_alerting_bus_arn,
+                extract_metrics_lambda_role=extract_metrics_lambda.role,
+                powertools_layer=powertools_layer,
+            )
+
         # Create table for metrics storage (1 per service)
         self.create_metrics_tables(
             timestream_database_name=input_timestream_database_name
@@ -189,6 +213,40 @@ class InfraToolingMonitoringStack(NestedStack):
                 resources=[f"{settings_bucket.bucket_arn}/*"],
             )
         )
+        tooling_acc_inline_policy.add_statements(
+            # to be able to cache resource names listed for settings wildcards replacement
+            # and the counts of the Glue Data Catalog tables
+            iam.PolicyStatement(
+                actions=["s3:PutObject"],
+                effect=iam.Effect.ALLOW,
+                resources=[f"{settings_bucket.bucket_arn}/cache/*"],
+            )
+        )
+        tooling_acc_inline_policy.add_statements(
+            # to be able to keep the rollup refreshes which failed (retried by the next run)
+            # and the partial Lambda invocations (extracted by the scheduled run)
+            iam.PolicyStatement(
+                actions=["s3:PutObject", "s3:DeleteObject"],
+                effect=iam.Effect.ALLOW,
+                resources=[
+                    f"{settings_bucket.bucket_arn}/{MetricsRollupConfigs.PENDING_S3_PREFIX}/*",
+                    f"{settings_bucket.bucket_arn}/{LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_S3_PREFIX}/*",
+                ],
+            ),
+            iam.PolicyStatement(
+                actions=["s3:ListBucket"],
+                effect=iam.Effect.ALLOW,
+                resources=[settings_bucket.bucket_arn],
+                conditions={
+                    "StringLike": {
+                        "s3:prefix": [
+                            f"{MetricsRollupConfigs.PENDING_S3_PREFIX}/*",
+                            f"{LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_S3_PREFIX}/*",
+                        ]
+                    }
+                },
+            ),
+        )
         tooling_acc_inline_policy.add_statements(
             # to be able to throw internal Salmon errors
             iam.PolicyStatement(
@@ -290,9 +348,16 @@ class InfraToolingMonitoringStack(NestedStack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             environment={
                 "SETTINGS_S3_PATH": f"s3://{settings_bucket.bucket_name}/settings/",
+                "RESOURCE_NAMES_CACHE_S3_PATH": f"s3://{settings_bucket.bucket_name}/cache/resource_names.json",
+                "CATALOG_COUNTS_CACHE_S3_PATH": f"s3://{settings_bucket.bucket_name}/cache/catalog_counts/",
+                "PENDING_ROLLUPS_S3_PATH": f"s3://{settings_bucket.bucket_name}/{MetricsRollupConfigs.PENDING_S3_PREFIX}/",
                 "IAMROLE_MONITORED_ACC_EXTRACT_METRICS": extr_metr_role_name,
                 "METRICS_DB_NAME": timestream_database_name,
                 "ALERTS_EVENT_BUS_NAME": alerting_bus.event_bus_name,
+                "EXTRACT_METRICS_MAX_WORKERS": str(ExtractMetricsConfigs.MAX_WORKERS),
+                "EXTRACT_METRICS_MAX_WORKERS_PER_ACCOUNT": str(
+                    ExtractMetricsConfigs.MAX_WORKERS_PER_ACCOUNT
+                ),
             },
             role=extract_metrics_lambda_role,
             layers=[powertools_layer],
@@ -324,9 +389,16 @@ class InfraToolingMonitoringStack(NestedStack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             environment={
                 "SETTINGS_S3_PATH": f"s3://{settings_bucket.bucket_name}/settings/",
+                "RESOURCE_NAMES_CACHE_S3_PATH": f"s3://{settings_bucket.bucket_name}/cache/resource_names.json",
                 "IAMROLE_MONITORED_ACC_EXTRACT_METRICS": extr_metr_role_name,
                 "LAMBDA_EXTRACT_METRICS_NAME": extract_metrics_lambda.function_name,
                 "METRICS_DB_NAME": timestream_database_name,
+                "EXTRACT_METRICS_MAX_CONCURRENT_INVOCATIONS": str(
+                    ExtractMetricsConfigs.MAX_CONCURRENT_INVOCATIONS
+                ),
+                "EXTRACT_METRICS_MAX_RESOURCES_PER_WORK_UNIT": str(
+                    ExtractMetricsConfigs.MAX_RESOURCES_PER_WORK_UNIT
+                ),
             },
             role=extract_metrics_lambda_role,
             layers=[powertools_layer],
@@ -341,6 +413,145 @@ class InfraToolingMonitoringStack(NestedStack):
             powertools_layer,
         )
 
+    def create_lambda_logs_ingestion(
+        self,
+        settings_bucket: s3.Bucket,
+        internal_error_topic: sns.Topic,
+        timestream_database_name: str,
+        alerting_bus_arn: str,
+        extract_metrics_lambda_role: iam.IRole,
+        powertools_layer: lambda_.LayerVersion,
+    ) -> lambda_.Function:
+        """
+        Creates the CloudWatch Logs destination (backed by Kinesis stream) the monitored environments
+        subscribe their Lambda log groups to and AWS Lambda function ingesting the pushed logs
+        (writes the invocations to Timestream and sends the alerts in real time). The partial invocations
+        are extracted from the CloudWatch logs of the monitored accounts by the scheduled run of the Lambda.
+
+        Parameters:
+            settings_bucket (s3.Bucket): The S3 bucket containing settings.
+            internal_error_topic (sns.Topic): The SNS topic for internal error notifications.
+            timestream_database_name (str): The Timestream database name.
+            alerting_bus_arn (str): The ARN of the alerting Event Bus.
+            extract_metrics_lambda_role (iam.IRole): Role of the extract-metrics Lambda (the same permissions required).
+            powertools_layer (lambda_.LayerVersion): Lambda layer.
+
+        Returns:
+            lambda_.Function: The ingesting Lambda function.
+        """
+        current_region = NestedStack.of(self).region
+        current_account = NestedStack.of(self).account
+
+        # Kinesis stream is the target of the cross-account Logs destination (Lambda can't be its target)
+        lambda_logs_stream = kinesis.Stream(
+            self,
+            "LambdaLogsStream",
+            stream_name=AWSNaming.KinesisStream(self, "lambda-logs"),
+            stream_mode=kinesis.StreamMode.ON_DEMAND,
+            encryption=kinesis.StreamEncryption.MANAGED,
+        )
+
+        logs_destination_role = iam.Role(
+            self,
+            "LambdaLogsDestinationRole",
+            role_name=AWSNaming.IAMRole(self, "lambda-logs-destination"),
+            assumed_by=iam.ServicePrincipal("logs.amazonaws.com"),
+        )
+        lambda_logs_stream.grant_write(logs_destination_role)
+
+        destination_name = AWSNaming.LogsDestination(
+            self, CDKResourceNames.LOGS_DESTINATION_LAMBDA_LOGS
+        )
+        logs_destination = cloudwatch_logs.CfnDestination(
+            self,
+            "LambdaLogsDestination",
+            destination_name=destination_name,
+            role_arn=logs_destination_role.role_arn,
+            target_arn=lambda_logs_stream.stream_arn,
+            destination_policy=json.dumps(
+                {
+                    "Version": "2012-10-17",
+                    "Statement": [
+                        {
+                            "Effect": "Allow",
+                            "Principal": {
+                                "AWS": sorted(self.settings.get_monitored_account_ids())
+                            },
+                            "Action": "logs:PutSubscriptionFilter",
+                            "Resource": AWSNaming.Arn_LogsDestination(
+                                self, current_region, current_account, destination_name
+                            ),
+                        }
+                    ],
+                }
+            ),
+        )
+        # the destination checks it can write to the stream on creation
+        logs_destination.node.add_dependency(logs_destination_role)
+
+        ingest_lambda_logs_lambda_path = os.path.join("../../src/")
+        ingest_lambda_logs_lambda = lambda_.Function(
+            self,
+            "salmonIngestLambdaLogsLambda",
+            function_name=AWSNaming.LambdaFunction(self, "ingest-lambda-logs"),
+            code=lambda_.Code.from_asset(
+                ingest_lambda_logs_lambda_path,
+                exclude=CDKDeployExclusions.LAMBDA_ASSET_EXCLUSIONS,
+                ignore_mode=IgnoreMode.GIT,
+            ),
+            handler="lambda_ingest_lambda_logs.lambda_handler",
+            timeout=Duration.seconds(300),
+            runtime=lambda_.Runtime.PYTHON_3_13,
+            environment={
+                "SETTINGS_S3_PATH": f"s3://{settings_bucket.bucket_name}/settings/",
+                "PENDING_ROLLUPS_S3_PATH": f"s3://{settings_bucket.bucket_name}/{MetricsRollupConfigs.PENDING_S3_PREFIX}/",
+                "PARTIAL_INVOCATIONS_S3_PATH": f"s3://{settings_bucket.bucket_name}/{LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_S3_PREFIX}/",
+                "IAMROLE_MONITORED_ACC_EXTRACT_METRICS": AWSNaming.IAMRole(
+                    self, CDKResourceNames.IAMROLE_MONITORED_ACC_EXTRACT_METRICS
+                ),
+                "METRICS_DB_NAME": timestream_database_name,
+                "ALERTS_EVENT_BUS_NAME": events.EventBus.from_event_bus_arn(
+                    self, "salmonLambdaLogsAlertingEventBus", alerting_bus_arn
+                ).event_bus_name,
+            },
+            role=extract_metrics_lambda_role,
+            layers=[powertools_layer],
+        )
+        ingest_lambda_logs_lambda.add_event_source(
+            lambda_event_sources.KinesisEventSource(
+                lambda_logs_stream,
+                starting_position=lambda_.StartingPosition.LATEST,
+                batch_size=LambdaLogsSubscriptionConfigs.BATCH_SIZE,
+                max_batching_window=Duration.seconds(
+                    LambdaLogsSubscriptionConfigs.MAX_BATCHING_WINDOW_SECONDS
+                ),
+                retry_attempts=2,
+                on_failure=lambda_event_sources.SnsDlq(internal_error_topic),
+            )
+        )
+
+        # the partial invocations (whose status is unknown) are extracted from the CloudWatch logs
+        partial_invocations_rule = events.Rule(
+            self,
+            "PartialInvocationsScheduleRule",
+            schedule=events.Schedule.rate(
+                Duration.minutes(
+                    LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_SCHEDULE_MINUTES
+                )
+            ),
+            rule_name=AWSNaming.EventBusRule(self, "lambda-partial-invocations"),
+        )
+        partial_invocations_rule.add_target(
+            targets.LambdaFunction(
+                ingest_lambda_logs_lambda,
+                event=events.RuleTargetInput.from_object(
+                    {LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_EVENT_KEY: True}
+                ),
+            )
+        )
+
+        return ingest_lambda_logs_lambda
+
     def create_digest_lambda(
         self,
         settings_bucket: s3.Bucket,
@@ -391,6 +602,24 @@ class InfraToolingMonitoringStack(NestedStack):
                 resources=[f"{settings_bucket.bucket_arn}/*"],
             )
         )
+        digest_lambda_role.add_to_policy(
+            # to be able to cache resource names listed for settings wildcards replacement
+            iam.PolicyStatement(
+                actions=["s3:PutObject"],
+                effect=iam.Effect.ALLOW,
+                resources=[f"{settings_bucket.bucket_arn}/cache/*"],
+            )
+        )
+        digest_lambda_role.add_to_policy(
+            # to be able to offload the oversized digest message bodies
+            iam.PolicyStatement(
+                actions=["s3:PutObject"],
+                effect=iam.Effect.ALLOW,
+                resources=[
+                    f"{settings_bucket.bucket_arn}/{NotificationPayloadConfigs.S3_PREFIX}/*"
+                ],
+            )
+        )
         digest_lambda_role.add_to_policy(
             # to be able to throw internal Salmon errors
             iam.PolicyStatement(
@@ -453,10 +682,12 @@ class InfraToolingMonitoringStack(NestedStack):
             runtime=lambda_.Runtime.PYTHON_3_13,
             environment={
                 "SETTINGS_S3_PATH": f"s3://{settings_bucket.bucket_name}/settings/",
+                "RESOURCE_NAMES_CACHE_S3_PATH": f"s3://{settings_bucket.bucket_name}/cache/resource_names.json",
                 "IAMROLE_MONITORED_ACC_EXTRACT_METRICS": AWSNaming.IAMRole(
                     self, CDKResourceNames.IAMROLE_MONITORED_ACC_EXTRACT_METRICS
                 ),
                 "NOTIFICATION_QUEUE_URL": notification_queue.queue_url,
+                "NOTIFICATION_PAYLOADS_S3_PATH": f"s3://{settings_bucket.bucket_name}/{NotificationPayloadConfigs.S3_PREFIX}/",
                 "METRICS_DB_NAME": timestream_database_name,
                 "DIGEST_REPORT_PERIOD_HOURS": str(digest_report_period_hours),
             },
@@ -470,7 +701,7 @@ class InfraToolingMonitoringStack(NestedStack):
 
     def create_metrics_tables(self, timestream_database_name):
         """
-        Creates Timestream tables for storing metrics for each service.
+        Creates Timestream tables for storing metrics (and their rollups) for each service.
 
         Parameters:
             timestream_database_arn (str): The ARN of the Timestream database for storing metrics.
@@ -494,3 +725,11 @@ class InfraToolingMonitoringStack(NestedStack):
                 retention_properties=retention_properties_property,
                 table_name=metric_table_names[resource_type],
             )
+            # hourly rollups of the runs (see MetricsRollup), read by the digest and the dashboards
+            timestream.CfnTable(
+                self,
+                f"RollupTable{resource_type}",
+                database_name=timestream_database_name,
+                retention_properties=retention_properties_property,
+                table_name=AWSNaming.TimestreamRollupTable(None, resource_type),
+            )
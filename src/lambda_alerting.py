@@ -6,7 +6,7 @@ from lib.aws.sqs_manager import SQSQueueSender
 from lib.event_mapper.event_mapper_provider import EventMapperProvider
 from lib.event_mapper.resource_type_resolver import ResourceTypeResolver
 from lib.settings import Settings
-from lib.core.constants import EventResult
+from lib.core.constants import EventResult, SettingsCacheConfigs
 from lib.alerting_service import DeliveryOptionsResolver, CloudWatchAlertWriter
 
 logger = logging.getLogger()
@@ -52,7 +52,14 @@ def lambda_handler(event, context):
     logger.info(f"event = {event}")
 
     settings_s3_path = os.environ["SETTINGS_S3_PATH"]
-    settings = Settings.from_s3_path(settings_s3_path)
+    settings_max_age_seconds = int(
+        os.environ.get(
+            "SETTINGS_MAX_AGE_SECONDS", SettingsCacheConfigs.SETTINGS_MAX_AGE_SECONDS
+        )
+    )
+    settings = Settings.from_s3_path(
+        settings_s3_path, max_age_seconds=settings_max_age_seconds
+    )
 
     resource_type = ResourceTypeResolver.resolve(event)
     if not resource_type:
@@ -69,14 +76,10 @@ def lambda_handler(event, context):
     resource_name = mapper.get_resource_name()
 
     # do alerts / CW notification only if resource is in any monitoring group
-    resource_in_scope: bool = (
-        len(
-            settings.get_monitoring_groups(
-                resource_type=resource_type, resources=[resource_name]
-            )
-        )
-        > 0
+    monitoring_groups = settings.get_monitoring_groups(
+        resource_type=resource_type, resources=[resource_name]
     )
+    resource_in_scope: bool = len(monitoring_groups) > 0
 
     if not (resource_in_scope):
         return {
@@ -96,7 +99,7 @@ def lambda_handler(event, context):
         if event_is_alertable:
             message = mapper.to_message()
             delivery_options = DeliveryOptionsResolver.get_delivery_options(
-                settings, resource_type, resource_name
+                settings, resource_type, resource_name, monitoring_groups
             )
 
             notification_messages = map_to_notification_messages(
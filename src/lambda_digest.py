@@ -1,11 +1,20 @@
 import os
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import boto3
 
-from lib.core.constants import SettingConfigs, NotificationType
+from lib.core.constants import (
+    SettingConfigs,
+    NotificationType,
+    SettingsCacheConfigs,
+    DigestSettings,
+)
 from lib.aws.aws_naming import AWSNaming
 from lib.aws.sqs_manager import SQSQueueSender
+from lib.aws.s3_manager import S3Manager
+from lib.notification_service.payload_store import NotificationPayloadStore
 from lib.settings.settings import Settings
 from lib.digest_service import (
     DigestDataExtractorProvider,
@@ -24,6 +33,7 @@ logger.setLevel(logging.INFO)
 
 lambda_client = boto3.client("lambda")
 sqs_client = boto3.client("sqs")
+s3_client = boto3.client("s3")
 
 
 def extend_resources_config(settings: Settings, configs: dict) -> list:
@@ -72,12 +82,69 @@ def group_recipients(recipients: list, settings: Settings) -> list:
     return list(grouped_recipients.values())
 
 
+def get_sla_thresholds(
+    settings: Settings, monitoring_groups: list, resource_type: str
+) -> list:
+    """Returns the unique SLA thresholds (in seconds) configured for the resources of the given type."""
+    return sorted(
+        {
+            config.get("sla_seconds")
+            for monitoring_group in monitoring_groups
+            for config in settings.get_monitoring_group_content(monitoring_group).get(
+                resource_type, []
+            )
+            if config.get("sla_seconds")
+        }
+    )
+
+
+def extract_digest_data(
+    resource_type: str,
+    monitoring_groups: list,
+    settings: Settings,
+    metrics_storage: BaseMetricsStorage,
+    digest_start_time: datetime,
+    digest_end_time: datetime,
+) -> tuple[dict, bool]:
+    """
+    Extracts runs of the resource type for the digest period.
+    Runs are aggregated in the metrics storage if the extractor supports it
+    (so only O(resources) rows are returned).
+
+    Returns:
+        tuple[dict, bool]: Extracted runs and whether they are aggregated (see append_digest_data).
+    """
+    started_at = time.perf_counter()
+    digest_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=resource_type,
+        metrics_storage=metrics_storage,
+    )
+    logger.info(f"Created digest extractor of type {type(digest_extractor)}")
+
+    aggregated = digest_extractor.supports_aggregated_queries
+    if aggregated:
+        extracted_runs = digest_extractor.extract_runs_summaries(
+            digest_start_time,
+            digest_end_time,
+            get_sla_thresholds(settings, monitoring_groups, resource_type),
+        )
+    else:
+        query = digest_extractor.get_query(digest_start_time, digest_end_time)
+        extracted_runs = digest_extractor.extract_runs(query)
+
+    logger.info(
+        f"Extracted {resource_type} digest data in {time.perf_counter() - started_at:.2f} sec"
+    )
+    return extracted_runs, aggregated
+
+
 def append_digest_data(
     digest_data: list,
     monitoring_groups: list,
     resource_type: str,
     settings: Settings,
     extracted_runs: dict,
+    aggregated: bool = False,
 ):
     """
     For each monitoring group and resource type, an item is added to the digest list.
@@ -94,7 +161,17 @@ def append_digest_data(
             }
         }
     }
+
+    If aggregated is True, extracted_runs contain the runs summarized by the metrics storage
+    (see BaseDigestDataExtractor.extract_runs_summaries).
     """
+    # runs are grouped by resource name once and shared by all the monitoring groups
+    index_builder = DigestDataAggregatorProvider.get_aggregator_provider(resource_type)
+    if aggregated:
+        summaries_index = index_builder.get_summaries_index(extracted_runs)
+    else:
+        runs_index = index_builder.get_runs_index(extracted_runs)
+
     for monitoring_group in monitoring_groups:
         logger.info(
             f"Processing {resource_type} for the monitoring group: {monitoring_group}"
@@ -109,9 +186,14 @@ def append_digest_data(
         digest_aggregator = DigestDataAggregatorProvider.get_aggregator_provider(
             resource_type
         )
-        aggregated_runs = digest_aggregator.get_aggregated_runs(
-            extracted_runs, resources_config
-        )
+        if aggregated:
+            aggregated_runs = digest_aggregator.get_aggregated_runs_from_summaries(
+                extracted_runs, resources_config, summaries_index=summaries_index
+            )
+        else:
+            aggregated_runs = digest_aggregator.get_aggregated_runs(
+                extracted_runs, resources_config, runs_index=runs_index
+            )
         summary = digest_aggregator.get_summary_entry(monitoring_group, aggregated_runs)
         digest_data.append(
             {
@@ -128,9 +210,11 @@ def distribute_digest_report(
     digest_start_time: datetime,
     digest_end_time: datetime,
     notification_queue_url: str,
+    payload_store: NotificationPayloadStore = None,
 ):
     logger.info("Distributing the digest report to the relevant recipients")
 
+    messages, message_group_ids = [], []
     for i, recipients_group in enumerate(recipients_groups):
         # get relevant digest data
         recipients_group_data = [
@@ -158,18 +242,26 @@ def distribute_digest_report(
                     "message_body": message_body,
                 },
             }
+            if payload_store is not None:
+                # oversized bodies are sent as S3 pointers (identical ones are stored once)
+                message = payload_store.offload_message_body(message)
+            messages.append(message)
+            message_group_ids.append(f"digest_group_{i}")
+
+    if not messages:
+        return
+
+    # send the messages to FIFO queue in batches (each recipient group has its own message group)
+    sender = SQSQueueSender(
+        queue_url=notification_queue_url,
+        message_group_id="digest",
+        sqs_client=sqs_client,
+    )
+    results = sender.send_messages(
+        messages=messages, message_group_ids=message_group_ids
+    )
 
-            # send the messages to FIFO queue
-            sender = SQSQueueSender(
-                queue_url=notification_queue_url,
-                message_group_id=f"digest_group_{i}",
-                sqs_client=sqs_client,
-            )
-            results = sender.send_messages(messages=[message])
-
-            logger.info(
-                f"Results of sending messages to SQS: {results} for the recipient group: {recipients_group['recipients']}"
-            )
+    logger.info(f"Results of sending {len(messages)} digest messages to SQS: {results}")
 
 
 def lambda_handler(event, context):
@@ -178,55 +270,98 @@ def lambda_handler(event, context):
 
     settings_s3_path = os.environ["SETTINGS_S3_PATH"]
     iam_role_name = os.environ["IAMROLE_MONITORED_ACC_EXTRACT_METRICS"]
+    resource_names_cache_s3_path = os.environ.get("RESOURCE_NAMES_CACHE_S3_PATH")
     notification_queue_url = os.environ["NOTIFICATION_QUEUE_URL"]
+    notification_payloads_s3_path = os.environ.get("NOTIFICATION_PAYLOADS_S3_PATH")
     metrics_storage_type = MetricsStorageTypes.AWS_TIMESTREAM
     metrics_db_name = os.environ["METRICS_DB_NAME"]
     report_period_hours = int(os.environ["DIGEST_REPORT_PERIOD_HOURS"])
+    settings_max_age_seconds = int(
+        os.environ.get(
+            "SETTINGS_MAX_AGE_SECONDS", SettingsCacheConfigs.SETTINGS_MAX_AGE_SECONDS
+        )
+    )
+    max_workers = int(
+        os.environ.get("DIGEST_MAX_WORKERS", DigestSettings.MAX_EXTRACTION_WORKERS)
+    )
     settings = Settings.from_s3_path(
-        base_path=settings_s3_path, iam_role_list_monitored_res=iam_role_name
+        base_path=settings_s3_path,
+        iam_role_list_monitored_res=iam_role_name,
+        resource_names_cache_path=resource_names_cache_s3_path,
+        max_age_seconds=settings_max_age_seconds,
     )
 
     digest_end_time = datetime.now(tz=timezone.utc)
     digest_start_time = digest_end_time - timedelta(hours=report_period_hours)
 
-    # prepare digest data
-    digest_data = []
+    # get and group recipients
+    recipients = settings.get_recipients_and_groups_by_notification_type(
+        NotificationType.DIGEST
+    )
+    recipients_groups = group_recipients(recipients, settings)
+
+    # only the resource types used by the monitoring groups with digest subscriptions are extracted
+    digest_monitoring_groups = {
+        monitoring_group
+        for recipient in recipients
+        for monitoring_group in recipient["monitoring_groups"]
+    }
+    monitoring_groups_by_type = {}
+    for resource_type in SettingConfigs.RESOURCE_TYPES:
+        monitoring_groups = [
+            monitoring_group
+            for monitoring_group in settings.get_monitoring_groups_by_resource_type(
+                resource_type=resource_type
+            )
+            if monitoring_group in digest_monitoring_groups
+        ]
+        if monitoring_groups:
+            monitoring_groups_by_type[resource_type] = monitoring_groups
+        else:
+            logger.info(f"No digest subscriptions for {resource_type}, skipping..")
 
     metrics_storage: BaseMetricsStorage = MetricsStorageProvider.get_metrics_storage(
         metrics_storage_type=metrics_storage_type,
         db_name=metrics_db_name,
     )
 
-    for resource_type in SettingConfigs.RESOURCE_TYPES:
-        # ceate an digest extractor for a specific resource type
-        digest_extractor = DigestDataExtractorProvider.get_digest_provider(
-            resource_type=resource_type,
-            metrics_storage=metrics_storage,
-        )
-        logger.info(f"Created digest extractor of type {type(digest_extractor)}")
-        query = digest_extractor.get_query(digest_start_time, digest_end_time)
-        extracted_runs = digest_extractor.extract_runs(query)
+    # extract runs of all the resource types concurrently
+    extracted_data = {}
+    if monitoring_groups_by_type:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(monitoring_groups_by_type)))
+        ) as executor:
+            futures = {
+                resource_type: executor.submit(
+                    extract_digest_data,
+                    resource_type=resource_type,
+                    monitoring_groups=monitoring_groups,
+                    settings=settings,
+                    metrics_storage=metrics_storage,
+                    digest_start_time=digest_start_time,
+                    digest_end_time=digest_end_time,
+                )
+                for resource_type, monitoring_groups in monitoring_groups_by_type.items()
+            }
+            extracted_data = {
+                resource_type: future.result()
+                for resource_type, future in futures.items()
+            }
 
-        # aggregate runs per monitoring_group and resource_type
-        monitoring_groups = settings.get_monitoring_groups_by_resource_type(
-            resource_type=resource_type
-        )
+    # aggregate runs per monitoring_group and resource_type
+    digest_data = []
+    for resource_type, (extracted_runs, aggregated) in extracted_data.items():
         append_digest_data(
             digest_data=digest_data,
-            monitoring_groups=monitoring_groups,
+            monitoring_groups=monitoring_groups_by_type[resource_type],
             resource_type=resource_type,
             settings=settings,
             extracted_runs=extracted_runs,
+            aggregated=aggregated,
         )
     # sort data by monitoring group name
     digest_data = sorted(digest_data, key=lambda x: next(iter(x.keys())))
 
-    # get and group recipients
-    recipients = settings.get_recipients_and_groups_by_notification_type(
-        NotificationType.DIGEST
-    )
-    recipients_groups = group_recipients(recipients, settings)
-
     # send the digest report to each recipients group
     distribute_digest_report(
         recipients_groups=recipients_groups,
@@ -234,4 +369,8 @@ def lambda_handler(event, context):
         digest_start_time=digest_start_time,
         digest_end_time=digest_end_time,
         notification_queue_url=notification_queue_url,
+        payload_store=NotificationPayloadStore(
+            payloads_s3_path=notification_payloads_s3_path,
+            s3_manager=S3Manager(s3_client),
+        ),
     )
@@ -1,16 +1,34 @@
 import os
 import boto3
 import logging
-from itertools import groupby
+import threading
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 from lib.aws import AWSNaming, Boto3ClientCreator
 from lib.aws.glue_manager import GlueManager
 from lib.settings import Settings
-from lib.core.constants import SettingConfigs
+from lib.core.constants import (
+    SettingConfigs,
+    ExtractMetricsConfigs,
+    SettingsCacheConfigs,
+)
 
-from lib.metrics_extractor import MetricsExtractorProvider, BaseMetricsExtractor
-from lib.metrics_storage.base_metrics_storage import BaseMetricsStorage
+from lib.metrics_extractor import (
+    MetricsExtractorProvider,
+    BaseMetricsExtractor,
+    MetricsExtractorException,
+    ExtractionPlanner,
+    WorkUnit,
+    CatalogCountsCache,
+)
+from lib.digest_service.metrics_rollup import MetricsRollup, MetricsRollupException
+from lib.digest_service.pending_rollups_store import PendingRollupsStore
+from lib.metrics_storage.base_metrics_storage import (
+    BaseMetricsStorage,
+    MetricsStorageWriteException,
+)
 from lib.metrics_storage.metrics_storage_provider import (
     MetricsStorageProvider,
     MetricsStorageTypes as storage_types,
@@ -24,6 +42,22 @@ logger.setLevel(logging.INFO)
 TIMESTREAM_WRITE_CLIENT = boto3.client("timestream-write")
 TIMESTREAM_QUERY_CLIENT = boto3.client("timestream-query")
 
+# per-account semaphores (shared by all worker pools within a warm Lambda container)
+ACCOUNT_SEMAPHORES: dict[str, threading.BoundedSemaphore] = {}
+ACCOUNT_SEMAPHORES_LOCK = threading.Lock()
+
+
+def get_account_semaphore(
+    account_id: str, max_workers_per_account: int
+) -> threading.BoundedSemaphore:
+    """Returns the semaphore limiting concurrent extractions against the given account."""
+    with ACCOUNT_SEMAPHORES_LOCK:
+        if account_id not in ACCOUNT_SEMAPHORES:
+            ACCOUNT_SEMAPHORES[account_id] = threading.BoundedSemaphore(
+                max_workers_per_account
+            )
+        return ACCOUNT_SEMAPHORES[account_id]
+
 
 def collect_glue_data_quality_result_ids(
     monitored_environment_name: str,
@@ -57,6 +91,7 @@ def get_since_time_for_individual_resource(
     resource_type: str,
     resource_name: str,
     metrics_storage: BaseMetricsStorage,
+    table_last_update_times: dict | None = None,
 ) -> datetime:
     # retrieve the last update time from the provided payload
     since_time = metrics_storage.get_resource_last_update_time_from_json(
@@ -68,14 +103,21 @@ def get_since_time_for_individual_resource(
         f"Last update time (from payload) for {resource_type}[{resource_name}] = {since_time}"
     )
 
-    # if last_update_time was not given or missing - query for specific resource directly from table
+    # if last_update_time was not given or missing - take it from the batch resolved from table
+    # (or query for specific resource directly from table if the batch wasn't resolved)
     if since_time is None:
-        logger.info(
-            f"No last_update_time for {resource_type}[{resource_name}] - querying directly from table"
-        )
-        since_time = metrics_storage.get_last_update_time_from_metrics_table(
-            resource_type=resource_type, resource_name=resource_name
-        )
+        if table_last_update_times is not None:
+            since_time = table_last_update_times.get(resource_name)
+            logger.info(
+                f"Last update time (from table) for {resource_type}[{resource_name}] = {since_time}"
+            )
+        else:
+            logger.info(
+                f"No last_update_time for {resource_type}[{resource_name}] - querying directly from table"
+            )
+            since_time = metrics_storage.get_last_update_time_from_metrics_table(
+                resource_type=resource_type, resource_name=resource_name
+            )
 
     # fetch the earliest time that Timestream can accept for writing
     earliest_time = metrics_storage.get_earliest_writeable_time_for_resource_type(
@@ -93,6 +135,19 @@ def get_since_time_for_individual_resource(
     return since_time
 
 
+def is_resource_not_found(error: BaseException) -> bool:
+    """Checks if the error (or the AWS error it has been raised from) is caused by a resource which doesn't exist."""
+    while error is not None:
+        if (
+            isinstance(error, ClientError)
+            and error.response.get("Error", {}).get("Code")
+            in ExtractMetricsConfigs.RESOURCE_NOT_FOUND_ERROR_CODES
+        ):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
 def process_individual_resource(
     monitored_environment_name: str,
     resource_type: str,
@@ -104,7 +159,17 @@ def process_individual_resource(
     last_update_times: dict,
     alerts_event_bus_name: str,
     result_ids: list,
+    table_last_update_times: dict | None = None,
+    pending_alerts: list | None = None,
+    catalog_counts_cache: CatalogCountsCache | None = None,
 ):
+    """
+    Extracts and writes the metrics of the resource and sends its alerts.
+
+    If pending_alerts is given, the alerts are not sent but appended to it - to be sent once the buffered
+    records have been written out (see send_pending_alerts).
+    If catalog_counts_cache is given, only the Glue tables updated since the previous run are counted.
+    """
     logger.info(
         f"Processing: {resource_type}: [{resource_name}] at env:{monitored_environment_name}"
     )
@@ -125,6 +190,7 @@ def process_individual_resource(
         resource_type=resource_type,
         resource_name=resource_name,
         metrics_storage=metrics_storage,
+        table_last_update_times=table_last_update_times,
     )
     logger.info(
         f"Extracting metrics since {since_time} for resource {resource_type}[{resource_name}]"
@@ -133,6 +199,8 @@ def process_individual_resource(
     # # 3. Set Result IDs for Glue Data Quality resources
     if resource_type == types.GLUE_DATA_QUALITY:
         metrics_extractor.set_result_ids(result_ids=result_ids)
+    if resource_type == types.GLUE_DATA_CATALOGS and catalog_counts_cache is not None:
+        metrics_extractor.set_catalog_counts_cache(catalog_counts_cache)
 
     # # 4. Extract metrics data in form of prepared list of timestream records
     records, common_attributes = metrics_extractor.prepare_metrics_data(
@@ -157,14 +225,27 @@ def process_individual_resource(
     # for resource types where alerts are processed inside Salmon (not by default EventBridge functionality)
     alerts_send = False
     if hasattr(metrics_extractor, "send_alerts"):
-        logger.info(f"Sending alerts to event bus {alerts_event_bus_name}")
         account_id, region = (
             boto3_client_creator.account_id,
             boto3_client_creator.region,
         )
-        metrics_extractor.send_alerts(alerts_event_bus_name, account_id, region)
-        logger.info(f"Alerts have been sent successfully")
-        alerts_send = True
+        if pending_alerts is not None:
+            pending_alerts.append(
+                {
+                    "monitored_environment_name": monitored_environment_name,
+                    "resource_type": resource_type,
+                    "resource_name": resource_name,
+                    "metrics_table_name": metrics_table_name,
+                    "metrics_extractor": metrics_extractor,
+                    "account_id": account_id,
+                    "region": region,
+                }
+            )
+        else:
+            logger.info(f"Sending alerts to event bus {alerts_event_bus_name}")
+            metrics_extractor.send_alerts(alerts_event_bus_name, account_id, region)
+            logger.info(f"Alerts have been sent successfully")
+            alerts_send = True
 
     return {
         "metrics_records_written": metrics_record_count,
@@ -182,7 +263,24 @@ def process_all_resources_by_env_and_type(
     metrics_storage: BaseMetricsStorage,
     last_update_times: dict,
     alerts_event_bus_name: str,
-):
+    max_workers: int = 1,
+    max_workers_per_account: int = ExtractMetricsConfigs.MAX_WORKERS_PER_ACCOUNT,
+    pending_alerts: list | None = None,
+    catalog_counts_cache: CatalogCountsCache | None = None,
+) -> list[str]:
+    """
+    Processes all resources of a specific type in a specific environment.
+
+    Resources are extracted in a thread pool of max_workers size (1 means sequential processing),
+    while the number of concurrent extractions against one account is capped by max_workers_per_account.
+    A failure of an individual resource doesn't interrupt processing of the others,
+    the resources which don't exist in the monitored account are skipped with a warning.
+    If pending_alerts is given, the alerts are collected into it instead of being sent (see process_individual_resource).
+    catalog_counts_cache is passed to the Glue Data Catalogs extractors (see process_individual_resource).
+
+    Returns:
+        list[str]: Names of the resources which failed to be processed.
+    """
     logger.info(
         f"Processing resource type: {resource_type}, env: {monitored_environment_name}"
     )
@@ -212,20 +310,158 @@ def process_all_resources_by_env_and_type(
             resource_type=resource_type,
         )
 
-    # 4. Process each resource of a specific type in a specific environment
-    for name in resource_names:
-        process_individual_resource(
-            monitored_environment_name=monitored_environment_name,
+    # 4. Resolve last update times for all resources missing in the payload at once
+    names_without_update_time = [
+        name
+        for name in resource_names
+        if metrics_storage.get_resource_last_update_time_from_json(
+            last_update_time_json=last_update_times,
             resource_type=resource_type,
             resource_name=name,
-            boto3_client_creator=boto3_client_creator,
-            aws_client_name=aws_client_name,
-            metrics_storage=metrics_storage,
-            metrics_table_name=metrics_table_name,
-            last_update_times=last_update_times,
-            alerts_event_bus_name=alerts_event_bus_name,
-            result_ids=result_ids,
         )
+        is None
+    ]
+    table_last_update_times = {}
+    if names_without_update_time:
+        logger.info(
+            f"No last_update_time in payload for {len(names_without_update_time)} {resource_type} resource(s) - querying from table"
+        )
+        table_last_update_times = (
+            metrics_storage.get_last_update_times_from_metrics_table(
+                resource_type=resource_type, resource_names=names_without_update_time
+            )
+        )
+
+    # 5. Process each resource of a specific type in a specific environment
+    account_semaphore = get_account_semaphore(account_id, max_workers_per_account)
+
+    def process_resource(resource_name: str):
+        with account_semaphore:
+            return process_individual_resource(
+                monitored_environment_name=monitored_environment_name,
+                resource_type=resource_type,
+                resource_name=resource_name,
+                boto3_client_creator=boto3_client_creator,
+                aws_client_name=aws_client_name,
+                metrics_storage=metrics_storage,
+                metrics_table_name=metrics_table_name,
+                last_update_times=last_update_times,
+                alerts_event_bus_name=alerts_event_bus_name,
+                result_ids=result_ids,
+                table_last_update_times=table_last_update_times,
+                pending_alerts=pending_alerts,
+                catalog_counts_cache=catalog_counts_cache,
+            )
+
+    failed_resources = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(process_resource, name): name for name in resource_names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                if is_resource_not_found(e):
+                    # e.g. a misspelled or not yet deployed resource (see Settings._replace_wildcards)
+                    logger.warning(
+                        f"Skipping {resource_type}[{name}] at env:{monitored_environment_name}: "
+                        f"it doesn't exist in the monitored account: {e}"
+                    )
+                    continue
+                logger.error(
+                    f"Error processing {resource_type}[{name}] at env:{monitored_environment_name}: {e}"
+                )
+                failed_resources.append(name)
+
+    return failed_resources
+
+
+def is_write_failed(
+    failed_writes: set[tuple[str, str | None]],
+    metrics_table_name: str,
+    resource_name: str,
+) -> bool:
+    """Checks if the resource's records failed to be written (records of an unknown resource fail the whole table)."""
+    return (metrics_table_name, resource_name) in failed_writes or (
+        metrics_table_name,
+        None,
+    ) in failed_writes
+
+
+def send_pending_alerts(
+    pending_alerts: list,
+    alerts_event_bus_name: str,
+    failed_writes: set[tuple[str, str | None]],
+) -> list[dict]:
+    """
+    Sends the alerts collected during the extraction, skipping the resources whose records failed to be written
+    (their runs are extracted and alerted again by the next run, as their last update time hasn't moved).
+    A failure of an individual resource doesn't interrupt sending the alerts of the others.
+
+    Returns:
+        list[dict]: The pending alerts which have not been sent.
+    """
+    not_sent = []
+    for pending_alert in pending_alerts:
+        resource = f"{pending_alert['resource_type']}[{pending_alert['resource_name']}]"
+        if is_write_failed(
+            failed_writes,
+            pending_alert["metrics_table_name"],
+            pending_alert["resource_name"],
+        ):
+            logger.warning(
+                f"Skipping alerts of {resource}: its metrics weren't written"
+            )
+            not_sent.append(pending_alert)
+            continue
+        try:
+            pending_alert["metrics_extractor"].send_alerts(
+                alerts_event_bus_name,
+                pending_alert["account_id"],
+                pending_alert["region"],
+            )
+        except Exception as e:
+            logger.error(f"Error sending alerts of {resource}: {e}")
+            not_sent.append(pending_alert)
+    return not_sent
+
+
+def refresh_rollups(
+    metrics_storage: BaseMetricsStorage,
+    settings: Settings,
+    resource_types: list[str],
+    pending_rollups_store: PendingRollupsStore = None,
+) -> int:
+    """
+    Refreshes the rollups of the resources whose runs have been written during this run
+    (and of the periods the previous runs failed to refresh, if pending_rollups_store is given).
+
+    Should be called once the buffered records are flushed (the rollups are computed from the metrics tables).
+    A failure of one resource type doesn't prevent refreshing the rollups of the others.
+
+    Returns:
+        int: Number of the written rollup records.
+
+    Raises:
+        MetricsRollupException: If the rollups of any of the resource types failed to refresh.
+    """
+    records_count = 0
+    errors = []
+    for resource_type in resource_types:
+        try:
+            metrics_rollup = MetricsRollup(resource_type, metrics_storage)
+            records_count += metrics_rollup.refresh_written_runs(
+                sla_thresholds=settings.get_sla_thresholds(resource_type),
+                pending_rollups_store=pending_rollups_store,
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing {resource_type} rollups: {e}")
+            errors.append(f"{resource_type}: {e}")
+    if errors:
+        raise MetricsRollupException("; ".join(errors))
+    return records_count
 
 
 def lambda_handler(event, context):
@@ -234,10 +470,27 @@ def lambda_handler(event, context):
     # get vars from either ENV or Event
     settings_s3_path = os.environ["SETTINGS_S3_PATH"]
     iam_role_name = os.environ["IAMROLE_MONITORED_ACC_EXTRACT_METRICS"]
+    resource_names_cache_s3_path = os.environ.get("RESOURCE_NAMES_CACHE_S3_PATH")
+    pending_rollups_s3_path = os.environ.get("PENDING_ROLLUPS_S3_PATH")
+    catalog_counts_cache_s3_path = os.environ.get("CATALOG_COUNTS_CACHE_S3_PATH")
+    settings_max_age_seconds = int(
+        os.environ.get(
+            "SETTINGS_MAX_AGE_SECONDS", SettingsCacheConfigs.SETTINGS_MAX_AGE_SECONDS
+        )
+    )
     metrics_db_name = os.environ["METRICS_DB_NAME"]
     alerts_event_bus_name = os.environ["ALERTS_EVENT_BUS_NAME"]
     monitoring_group_name = event.get("monitoring_group")
     last_update_times = event.get("last_update_times")
+    max_workers = int(
+        os.environ.get("EXTRACT_METRICS_MAX_WORKERS", ExtractMetricsConfigs.MAX_WORKERS)
+    )
+    max_workers_per_account = int(
+        os.environ.get(
+            "EXTRACT_METRICS_MAX_WORKERS_PER_ACCOUNT",
+            ExtractMetricsConfigs.MAX_WORKERS_PER_ACCOUNT,
+        )
+    )
 
     # create storage object
     metrics_storage: BaseMetricsStorage = MetricsStorageProvider.get_metrics_storage(
@@ -245,37 +498,107 @@ def lambda_handler(event, context):
         db_name=metrics_db_name,
         write_client=TIMESTREAM_WRITE_CLIENT,
         query_client=TIMESTREAM_QUERY_CLIENT,
+        buffer_writes=True,
     )
 
     # getting content of the monitoring group (in pydantic class form)
     settings = Settings.from_s3_path(
-        settings_s3_path, iam_role_list_monitored_res=iam_role_name
+        settings_s3_path,
+        iam_role_list_monitored_res=iam_role_name,
+        resource_names_cache_path=resource_names_cache_s3_path,
+        max_age_seconds=settings_max_age_seconds,
     )
-    content = settings.get_monitoring_group_content(monitoring_group_name)
-
-    for attr_name in content:
-        attr_value = content[attr_name]
-        # checking if it's our section like "glue_jobs", "lambda_functions" etc.
-        if isinstance(attr_value, list) and attr_name in SettingConfigs.RESOURCE_TYPES:
-            resource_type = attr_name
-            logger.info(f"Processing {resource_type}")
-
-            data = attr_value
-            # sorting so we can process resources optimally
-            data.sort(key=lambda x: x["monitored_environment_name"])
-
-            for monitored_environment_name, group in groupby(
-                data, key=lambda x: x["monitored_environment_name"]
-            ):
-                resource_names = [item["name"] for item in group]
-
-                process_all_resources_by_env_and_type(
-                    monitored_environment_name=monitored_environment_name,
-                    resource_type=resource_type,
-                    resource_names=resource_names,
-                    settings=settings,
-                    iam_role_name=iam_role_name,
-                    metrics_storage=metrics_storage,
-                    last_update_times=last_update_times,
-                    alerts_event_bus_name=alerts_event_bus_name,
-                )
+    if event.get("work_units") is not None:
+        # work units planned by the orchestrator (wildcards are already replaced with resource names)
+        work_units = [WorkUnit(**x) for x in event["work_units"]]
+    else:
+        content = settings.get_monitoring_group_content(monitoring_group_name)
+        work_units = ExtractionPlanner.get_work_units(content)
+
+    catalog_counts_cache = (
+        CatalogCountsCache(catalog_counts_cache_s3_path)
+        if catalog_counts_cache_s3_path
+        else None
+    )
+    failed_resources = {}
+    pending_alerts = []
+    for work_unit in work_units:
+        logger.info(
+            f"Processing {work_unit.resource_type} ({len(work_unit.resource_names)} resources)"
+        )
+        failed_names = process_all_resources_by_env_and_type(
+            monitored_environment_name=work_unit.monitored_environment_name,
+            resource_type=work_unit.resource_type,
+            resource_names=work_unit.resource_names,
+            settings=settings,
+            iam_role_name=iam_role_name,
+            metrics_storage=metrics_storage,
+            last_update_times=last_update_times,
+            alerts_event_bus_name=alerts_event_bus_name,
+            max_workers=max_workers,
+            max_workers_per_account=max_workers_per_account,
+            pending_alerts=pending_alerts,
+            catalog_counts_cache=catalog_counts_cache,
+        )
+        if failed_names:
+            failed_resources.setdefault(work_unit.resource_type, {}).setdefault(
+                work_unit.monitored_environment_name, []
+            ).extend(failed_names)
+
+    # writing out the records buffered across all the resources
+    failed_writes = set()
+    try:
+        metrics_storage.flush()
+    except MetricsStorageWriteException as e:
+        logger.error(f"Error writing metrics: {e}")
+        failed_writes = e.failed_resources
+    for work_unit in work_units:
+        metrics_table_name = metrics_storage.get_metrics_table_name_for_resource_type(
+            work_unit.resource_type
+        )
+        failed_names = [
+            name
+            for name in work_unit.resource_names
+            if is_write_failed(failed_writes, metrics_table_name, name)
+        ]
+        if failed_names:
+            failed_resources.setdefault(work_unit.resource_type, {}).setdefault(
+                work_unit.monitored_environment_name, []
+            ).extend(failed_names)
+
+    # the alerts are sent only once the runs they are based on have been written
+    not_sent_alerts = send_pending_alerts(
+        pending_alerts, alerts_event_bus_name, failed_writes
+    )
+    for pending_alert in not_sent_alerts:
+        names = failed_resources.setdefault(
+            pending_alert["resource_type"], {}
+        ).setdefault(pending_alert["monitored_environment_name"], [])
+        if pending_alert["resource_name"] not in names:
+            names.append(pending_alert["resource_name"])
+
+    # refreshing the rollups of the written runs (the digest and dashboards read them instead of the raw runs),
+    # the periods which fail to refresh are retried by the next run
+    rollup_error = None
+    try:
+        refresh_rollups(
+            metrics_storage=metrics_storage,
+            settings=settings,
+            resource_types=list(dict.fromkeys(x.resource_type for x in work_units)),
+            pending_rollups_store=(
+                PendingRollupsStore(pending_rollups_s3_path)
+                if pending_rollups_s3_path
+                else None
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error refreshing rollups: {e}")
+        rollup_error = e
+
+    # all the resources have been processed, surfacing the failures (if any)
+    if failed_resources:
+        raise MetricsExtractorException(
+            f"Metrics extraction failed for resources: {failed_resources}"
+        )
+    if rollup_error is not None:
+        raise MetricsExtractorException(f"Rollups refresh failed: {rollup_error}")
@@ -4,6 +4,9 @@ import logging
 
 import boto3
 from lib.settings import Settings
+from lib.core.constants import ExtractMetricsConfigs
+from lib.core.constants import SettingConfigResourceTypes as types
+from lib.metrics_extractor.extraction_planner import ExtractionPlanner
 from lib.metrics_storage.base_metrics_storage import BaseMetricsStorage
 from lib.metrics_storage.metrics_storage_provider import (
     MetricsStorageProvider,
@@ -20,12 +23,46 @@ TIMESTREAM_QUERY_CLIENT = boto3.client("timestream-query")
 def lambda_handler(event, context):
     # Load environment variables
     settings_s3_path = os.environ["SETTINGS_S3_PATH"]
+    iam_role_name = os.environ["IAMROLE_MONITORED_ACC_EXTRACT_METRICS"]
+    resource_names_cache_s3_path = os.environ.get("RESOURCE_NAMES_CACHE_S3_PATH")
     lambda_extract_metrics_name = os.environ["LAMBDA_EXTRACT_METRICS_NAME"]
     metrics_db_name = os.environ["METRICS_DB_NAME"]
+    max_concurrent_invocations = int(
+        os.environ.get(
+            "EXTRACT_METRICS_MAX_CONCURRENT_INVOCATIONS",
+            ExtractMetricsConfigs.MAX_CONCURRENT_INVOCATIONS,
+        )
+    )
+    max_resources_per_work_unit = int(
+        os.environ.get(
+            "EXTRACT_METRICS_MAX_RESOURCES_PER_WORK_UNIT",
+            ExtractMetricsConfigs.MAX_RESOURCES_PER_WORK_UNIT,
+        )
+    )
 
-    # Step 1: Retrieve settings and list monitoring groups
-    settings = Settings.from_s3_path(settings_s3_path)
-    monitoring_groups = settings.list_monitoring_groups()
+    # Step 1: Retrieve settings and plan extraction of unique resources across all monitoring groups
+    settings = Settings.from_s3_path(
+        settings_s3_path,
+        iam_role_list_monitored_res=iam_role_name,
+        resource_names_cache_path=resource_names_cache_s3_path,
+    )
+    monitoring_groups = settings.processed_monitoring_groups.get(
+        "monitoring_groups", []
+    )
+    # Lambda functions whose logs are pushed by the subscription filters are ingested in real time
+    subscribed_lambdas = {
+        (m_env_name, types.LAMBDA_FUNCTIONS, name)
+        for m_env_name, names in settings.lambda_logs_subscriptions.items()
+        for name in names
+    }
+    work_units = ExtractionPlanner.get_extraction_plan(
+        monitoring_groups,
+        max_resources_per_unit=max_resources_per_work_unit,
+        excluded_resources=subscribed_lambdas,
+    )
+    logger.info(
+        f"Planned {len(work_units)} work units for {len(monitoring_groups)} monitoring groups"
+    )
 
     # Step 2: Initialize Metrics Storage and retrieve last update times
     metrics_storage: BaseMetricsStorage = MetricsStorageProvider.get_metrics_storage(
@@ -39,21 +76,25 @@ def lambda_handler(event, context):
     )
     logger.info(f"Last Update Times: {last_update_times}")
 
-    # Step 3: Iterate through monitoring groups and invoke metrics extraction Lambda
-    for monitoring_group in monitoring_groups:
-        logger.info(f"Processing {monitoring_group}")
-
+    # Step 3: Distribute work units evenly (by estimated cost) and invoke metrics extraction Lambda per worker
+    workers = ExtractionPlanner.distribute_work_units(
+        work_units, max_workers=max_concurrent_invocations
+    )
+    for worker_units in workers:
         # Asynchronously invoke extract-metrics Lambda function
         lambda_client.invoke(
             FunctionName=lambda_extract_metrics_name,
             InvocationType="Event",
             Payload=json.dumps(
                 {
-                    "monitoring_group": monitoring_group,
-                    "last_update_times": last_update_times,
+                    "work_units": [x.model_dump() for x in worker_units],
+                    "last_update_times": ExtractionPlanner.filter_last_update_times(
+                        last_update_times, worker_units
+                    ),
                 }
             ),
         )
         logger.info(
-            f"Invoked lambda {lambda_extract_metrics_name} for monitoring group: {monitoring_group}"
+            f"Invoked lambda {lambda_extract_metrics_name} for {len(worker_units)} work units "
+            f"(estimated relative cost: {sum(x.estimated_cost for x in worker_units)})"
         )
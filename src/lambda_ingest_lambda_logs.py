@@ -0,0 +1,446 @@
+import os
+import boto3
+import logging
+from datetime import datetime, timedelta, timezone
+
+from lib.settings import Settings
+from lib.aws import Boto3ClientCreator
+from lib.core.constants import LambdaLogsSubscriptionConfigs, SettingsCacheConfigs
+from lib.core.constants import SettingConfigResourceTypes as types
+from lib.aws.lambda_manager import LambdaInvocation
+from lib.metrics_extractor import (
+    LambdaFunctionsMetricExtractor,
+    LambdaLogsIngestor,
+    PartialInvocationsStore,
+)
+from lib.digest_service.metrics_rollup import MetricsRollup
+from lib.digest_service.pending_rollups_store import PendingRollupsStore
+from lib.metrics_storage.base_metrics_storage import (
+    BaseMetricsStorage,
+    MetricsStorageWriteException,
+)
+from lib.metrics_storage.metrics_storage_provider import (
+    MetricsStorageProvider,
+    MetricsStorageTypes as storage_types,
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+TIMESTREAM_WRITE_CLIENT = boto3.client("timestream-write")
+TIMESTREAM_QUERY_CLIENT = boto3.client("timestream-query")
+
+# the in-progress invocations are kept in the warm Lambda container between the delivered batches
+LAMBDA_LOGS_INGESTOR = LambdaLogsIngestor()
+
+
+def refresh_lambda_rollups(
+    metrics_storage: BaseMetricsStorage,
+    settings: Settings,
+    pending_rollups_store: PendingRollupsStore = None,
+):
+    """Refreshes the rollups of the Lambda functions whose invocations have been written (and of the periods
+    which failed to refresh before, see MetricsRollup.refresh_written_runs). A failure is only logged:
+    the periods are kept in pending_rollups_store and refreshed by the next batch."""
+    resource_type = types.LAMBDA_FUNCTIONS
+    try:
+        MetricsRollup(resource_type, metrics_storage).refresh_written_runs(
+            sla_thresholds=settings.get_sla_thresholds(resource_type),
+            pending_rollups_store=pending_rollups_store,
+        )
+    except Exception as e:
+        logger.error(f"Error refreshing rollups: {e}")
+
+
+def get_subscribed_environment_name(
+    settings: Settings, account_id: str, function_name: str, region: str
+) -> str | None:
+    """Returns the monitored environment name of the function if its logs are subscribed in the settings."""
+    monitored_environment_name = settings.get_monitored_environment_name(
+        account_id, region
+    )
+    if function_name in settings.lambda_logs_subscriptions.get(
+        monitored_environment_name, []
+    ):
+        return monitored_environment_name
+    return None
+
+
+def is_write_failed(
+    failed_writes: set[tuple[str, str | None]],
+    metrics_table_name: str,
+    function_name: str,
+) -> bool:
+    """Checks if the function's records failed to be written (records of an unknown resource fail the whole table)."""
+    return (metrics_table_name, function_name) in failed_writes or (
+        metrics_table_name,
+        None,
+    ) in failed_writes
+
+
+def write_invocations(
+    completed_invocations: dict[tuple[str, str], list[LambdaInvocation]],
+    settings: Settings,
+    metrics_storage: BaseMetricsStorage,
+    region: str,
+) -> list[dict]:
+    """
+    Writes (buffers) the invocations of the subscribed functions.
+    A failure of an individual function doesn't interrupt writing the invocations of the others.
+
+    Returns:
+        list[dict]: The alerts of the written functions (to be sent once the records are flushed, see send_pending_alerts).
+    """
+    metrics_table_name = metrics_storage.get_metrics_table_name_for_resource_type(
+        types.LAMBDA_FUNCTIONS
+    )
+    pending_alerts = []
+    for (account_id, function_name), invocations in completed_invocations.items():
+        try:
+            monitored_environment_name = get_subscribed_environment_name(
+                settings, account_id, function_name, region
+            )
+            if monitored_environment_name is None:
+                logger.warning(
+                    f"Skipping {len(invocations)} invocations of {function_name} at {account_id}/{region}: "
+                    f"the function is not subscribed in the settings"
+                )
+                continue
+
+            metrics_extractor = LambdaFunctionsMetricExtractor(
+                boto3_client_creator=None,
+                aws_client_name="lambda",
+                resource_name=function_name,
+                monitored_environment_name=monitored_environment_name,
+            )
+            (
+                records,
+                common_attributes,
+            ) = metrics_extractor.prepare_metrics_data_from_invocations(invocations)
+            metrics_extractor.write_metrics(
+                metrics_table_name=metrics_table_name,
+                metrics_storage=metrics_storage,
+                records=records,
+                common_attributes=common_attributes,
+            )
+            pending_alerts.append(
+                {
+                    "metrics_table_name": metrics_table_name,
+                    "metrics_extractor": metrics_extractor,
+                    "account_id": account_id,
+                    "function_name": function_name,
+                }
+            )
+            logger.info(
+                f"Ingested {len(records)} invocations of {function_name} at env:{monitored_environment_name}"
+            )
+        except Exception as e:
+            logger.error(
+                f"Error ingesting invocations of {function_name} at {account_id}/{region}: {e}"
+            )
+    return pending_alerts
+
+
+def flush_metrics(metrics_storage: BaseMetricsStorage) -> set[tuple[str, str | None]]:
+    """
+    Writes out the buffered records.
+
+    Returns:
+        set: (table name, resource name) of the records which failed to be written.
+    """
+    try:
+        metrics_storage.flush()
+    except MetricsStorageWriteException as e:
+        logger.error(f"Error writing metrics: {e}")
+        return e.failed_resources
+    return set()
+
+
+def send_pending_alerts(
+    pending_alerts: list[dict],
+    alerts_event_bus_name: str,
+    failed_writes: set[tuple[str, str | None]],
+    region: str,
+):
+    """
+    Sends the alerts of the written functions, skipping the ones whose records failed to be written
+    (records of an unknown resource fail the whole table). A failure of an individual function
+    doesn't interrupt sending the alerts of the others.
+    """
+    for pending_alert in pending_alerts:
+        function_name = pending_alert["function_name"]
+        if is_write_failed(
+            failed_writes, pending_alert["metrics_table_name"], function_name
+        ):
+            logger.warning(
+                f"Skipping alerts of {function_name}: its invocations weren't written"
+            )
+            continue
+        try:
+            pending_alert["metrics_extractor"].send_alerts(
+                alerts_event_bus_name, pending_alert["account_id"], region
+            )
+        except Exception as e:
+            logger.error(f"Error sending alerts of {function_name}: {e}")
+
+
+def get_unwritten_invocations(
+    completed_invocations: dict[tuple[str, str], list[LambdaInvocation]],
+    pending_alerts: list[dict],
+    failed_writes: set[tuple[str, str | None]],
+) -> dict[tuple[str, str], list[LambdaInvocation]]:
+    """Returns the invocations of the written functions (see write_invocations) whose records failed to be written."""
+    unwritten_invocations = {}
+    for pending_alert in pending_alerts:
+        if is_write_failed(
+            failed_writes,
+            pending_alert["metrics_table_name"],
+            pending_alert["function_name"],
+        ):
+            key = (pending_alert["account_id"], pending_alert["function_name"])
+            unwritten_invocations[key] = completed_invocations[key]
+    return unwritten_invocations
+
+
+def store_partial_invocations(
+    partial_invocations: dict[tuple[str, str], list[LambdaInvocation]],
+    partial_invocations_store: PartialInvocationsStore | None,
+):
+    """
+    Stores the partial invocations (see LambdaLogsIngestor) or the unwritten ones (see get_unwritten_invocations)
+    to be extracted by the scheduled run.
+    A failure is only logged: retrying the whole batch would write and alert its other invocations again.
+    """
+    for (account_id, function_name), invocations in partial_invocations.items():
+        if partial_invocations_store is None:
+            logger.warning(
+                f"Skipping {len(invocations)} partial invocations of {function_name} at {account_id}: "
+                f"the partial invocations store is not configured"
+            )
+            continue
+        try:
+            partial_invocations_store.add(account_id, function_name, invocations)
+            logger.info(
+                f"Stored {len(invocations)} partial invocations of {function_name} at {account_id}"
+            )
+        except Exception as e:
+            logger.error(
+                f"Error storing partial invocations of {function_name} at {account_id}: {e}"
+            )
+
+
+def extract_partial_invocations(
+    partial_invocations_store: PartialInvocationsStore,
+    settings: Settings,
+    iam_role_name: str,
+    region: str,
+) -> tuple[
+    dict[tuple[str, str], list[LambdaInvocation]], dict[tuple[str, str], list[str]]
+]:
+    """
+    Extracts the stored partial invocations from the CloudWatch logs of the monitored accounts
+    (the same way as the scheduled metrics extraction does). A failure of an individual function is logged
+    and its partial invocations are extracted by the next run (unless they are too old already).
+
+    Returns:
+        tuple: (account ID, function name) to the extracted invocations and to the S3 paths
+            of the stored partial invocations to be removed once written.
+    """
+    now = datetime.now(tz=timezone.utc)
+    expired_time = now - timedelta(
+        seconds=LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_MAX_AGE_SECONDS
+    )
+    margin = timedelta(
+        seconds=LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_QUERY_MARGIN_SECONDS
+    )
+    stored_invocations = partial_invocations_store.get(
+        stored_before=now
+        - timedelta(
+            seconds=LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_MIN_AGE_SECONDS
+        )
+    )
+
+    extracted_invocations, extracted_s3_paths = {}, {}
+    for (account_id, function_name), (
+        partial_invocations,
+        s3_paths,
+    ) in stored_invocations.items():
+        key = (account_id, function_name)
+        monitored_environment_name = get_subscribed_environment_name(
+            settings, account_id, function_name, region
+        )
+        if monitored_environment_name is None:
+            logger.warning(
+                f"Dropping {len(partial_invocations)} partial invocations of {function_name} at {account_id}/{region}: "
+                f"the function is not subscribed in the settings"
+            )
+            extracted_s3_paths[key] = s3_paths
+            continue
+
+        try:
+            metrics_extractor = LambdaFunctionsMetricExtractor(
+                boto3_client_creator=Boto3ClientCreator(
+                    account_id, region, iam_role_name
+                ),
+                aws_client_name="lambda",
+                resource_name=function_name,
+                monitored_environment_name=monitored_environment_name,
+            )
+            invocations = metrics_extractor.extract_invocations(
+                since_time=min(x.StartedOn for x in partial_invocations) - margin,
+                until_time=max(x.CompletedOn for x in partial_invocations) + margin,
+            )
+        except Exception as e:
+            logger.error(
+                f"Error extracting partial invocations of {function_name} at env:{monitored_environment_name}: {e}"
+            )
+            expired_s3_paths = [
+                x
+                for x in s3_paths
+                if partial_invocations_store.get_stored_on(x) < expired_time
+            ]
+            if expired_s3_paths:
+                logger.warning(
+                    f"Dropping {len(expired_s3_paths)} expired partial invocation batches of {function_name}"
+                )
+                extracted_s3_paths[key] = expired_s3_paths
+            continue
+
+        requests = {(x.LogStream, x.RequestId) for x in partial_invocations}
+        extracted_invocations[key] = [
+            x for x in invocations if (x.LogStream, x.RequestId) in requests
+        ]
+        extracted_s3_paths[key] = s3_paths
+        logger.info(
+            f"Extracted {len(extracted_invocations[key])} of {len(requests)} partial invocations of {function_name} "
+            f"at env:{monitored_environment_name}"
+        )
+    return extracted_invocations, extracted_s3_paths
+
+
+def remove_partial_invocations(
+    partial_invocations_store: PartialInvocationsStore | None,
+    extracted_s3_paths: dict[tuple[str, str], list[str]],
+    failed_writes: set[tuple[str, str | None]],
+):
+    """
+    Removes the extracted partial invocations (see extract_partial_invocations), keeping the ones of the functions
+    whose records failed to be written (only the Lambda functions table is written), so they are extracted again.
+    """
+    if not extracted_s3_paths:
+        return
+    s3_paths = []
+    for (_, function_name), function_s3_paths in extracted_s3_paths.items():
+        if any(x in (function_name, None) for _, x in failed_writes):
+            logger.warning(
+                f"Keeping partial invocations of {function_name}: its invocations weren't written"
+            )
+            continue
+        s3_paths.extend(function_s3_paths)
+    try:
+        partial_invocations_store.remove(s3_paths)
+    except Exception as e:
+        # extracted and alerted again by the next run
+        logger.error(f"Error removing partial invocations: {e}")
+
+
+def lambda_handler(event, context):
+    settings_s3_path = os.environ["SETTINGS_S3_PATH"]
+    settings_max_age_seconds = int(
+        os.environ.get(
+            "SETTINGS_MAX_AGE_SECONDS", SettingsCacheConfigs.SETTINGS_MAX_AGE_SECONDS
+        )
+    )
+    metrics_db_name = os.environ["METRICS_DB_NAME"]
+    pending_rollups_s3_path = os.environ.get("PENDING_ROLLUPS_S3_PATH")
+    partial_invocations_s3_path = os.environ.get("PARTIAL_INVOCATIONS_S3_PATH")
+    alerts_event_bus_name = os.environ["ALERTS_EVENT_BUS_NAME"]
+    # Logs destination has to be in the same region as the subscribed log groups
+    region = os.environ["AWS_REGION"]
+
+    partial_invocations_store = (
+        PartialInvocationsStore(partial_invocations_s3_path)
+        if partial_invocations_s3_path
+        else None
+    )
+    settings = None
+    extracted_s3_paths = {}
+    is_scheduled_run = bool(
+        event.get(LambdaLogsSubscriptionConfigs.PARTIAL_INVOCATIONS_EVENT_KEY)
+    )
+    if is_scheduled_run:
+        # Step 1: Extract the partial invocations stored by the earlier batches (scheduled run)
+        if partial_invocations_store is None:
+            logger.warning("The partial invocations store is not configured")
+            return
+        settings = Settings.from_s3_path(
+            settings_s3_path, max_age_seconds=settings_max_age_seconds
+        )
+        completed_invocations, extracted_s3_paths = extract_partial_invocations(
+            partial_invocations_store,
+            settings,
+            iam_role_name=os.environ["IAMROLE_MONITORED_ACC_EXTRACT_METRICS"],
+            region=region,
+        )
+    else:
+        # Step 1: Decode the pushed log batches and complete the invocations
+        # (the partial ones are stored to be extracted by the scheduled run)
+        log_batches = LambdaLogsIngestor.get_log_batches(event)
+        completed_invocations = LAMBDA_LOGS_INGESTOR.process_log_batches(log_batches)
+        store_partial_invocations(
+            LAMBDA_LOGS_INGESTOR.pop_partial_invocations(), partial_invocations_store
+        )
+        logger.info(
+            f"Processed {len(log_batches)} log batches, completed invocations of {len(completed_invocations)} functions"
+        )
+
+    failed_writes = set()
+    if completed_invocations:
+        if settings is None:
+            settings = Settings.from_s3_path(
+                settings_s3_path, max_age_seconds=settings_max_age_seconds
+            )
+        metrics_storage: BaseMetricsStorage = (
+            MetricsStorageProvider.get_metrics_storage(
+                metrics_storage_type=storage_types.AWS_TIMESTREAM,
+                db_name=metrics_db_name,
+                write_client=TIMESTREAM_WRITE_CLIENT,
+                query_client=TIMESTREAM_QUERY_CLIENT,
+                buffer_writes=True,
+            )
+        )
+
+        # Step 2: Write the invocations (only for the subscribed functions) and send their alerts once written.
+        # The failures are not raised: retrying the whole batch would write and alert its other invocations again
+        pending_alerts = write_invocations(
+            completed_invocations, settings, metrics_storage, region
+        )
+        failed_writes = flush_metrics(metrics_storage)
+        send_pending_alerts(
+            pending_alerts, alerts_event_bus_name, failed_writes, region
+        )
+        if not is_scheduled_run:
+            # the unwritten invocations are extracted, written and alerted by the scheduled run
+            # (the extracted partial invocations are kept in the store in that case, see Step 4)
+            store_partial_invocations(
+                get_unwritten_invocations(
+                    completed_invocations, pending_alerts, failed_writes
+                ),
+                partial_invocations_store,
+            )
+
+        # Step 3: Refresh the rollups of the written invocations
+        refresh_lambda_rollups(
+            metrics_storage,
+            settings,
+            pending_rollups_store=(
+                PendingRollupsStore(pending_rollups_s3_path)
+                if pending_rollups_s3_path
+                else None
+            ),
+        )
+
+    # Step 4: Remove the extracted partial invocations
+    remove_partial_invocations(
+        partial_invocations_store, extracted_s3_paths, failed_writes
+    )
@@ -1,7 +1,9 @@
 from lib.aws.sns_manager import SnsTopicPublisher
+from lib.aws.s3_manager import S3Manager
 from lib.notification_service.formatter_provider import formatters
 from lib.notification_service.sender_provider import senders
 from lib.notification_service.messages import Message
+from lib.notification_service.payload_store import NotificationPayloadStore
 from lib.settings.settings_classes import DeliveryMethod
 
 import logging
@@ -12,6 +14,7 @@ import os
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 sns_client = boto3.client("sns")
+s3_client = boto3.client("s3")
 
 
 def lambda_handler(event, context):
@@ -41,7 +44,9 @@ def lambda_handler(event, context):
         delivery_method: DeliveryMethod = DeliveryMethod(**delivery_method_json)
 
         message_subject = message_info.get("message_subject")
-        message_body = message_info.get("message_body")
+        # the oversized message bodies are offloaded to S3 by the sender (claim check)
+        payload_store = NotificationPayloadStore(s3_manager=S3Manager(s3_client))
+        message_body = payload_store.load_message_body(message_info)
 
         if message_subject is None:
             raise KeyError("Message subject is not set.")
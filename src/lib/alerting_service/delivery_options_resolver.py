@@ -5,7 +5,10 @@ from ..settings import Settings
 class DeliveryOptionsResolver:
     @staticmethod
     def get_delivery_options(
-        settings: Settings, resource_type: str, resource_name: str
+        settings: Settings,
+        resource_type: str,
+        resource_name: str,
+        monitoring_groups: list[str] = None,
     ) -> list[dict]:
         """Returns delivery options section for the given resource name based on settings config.
 
@@ -13,15 +16,17 @@ class DeliveryOptionsResolver:
             settings (Settings): Settings component.
             resource_type (str): Resource type of the AWS resource.
             resource_name (str): Name of the AWS resource.
+            monitoring_groups (list[str]): Monitoring groups of the resource, if already known.
 
         Returns:
             list[dict]: List of delivery options including recipient and delivery method
         """
         delivery_options = []
         recipients = {}
-        monitoring_groups = settings.get_monitoring_groups(
-            resource_type=resource_type, resources=[resource_name]
-        )
+        if monitoring_groups is None:
+            monitoring_groups = settings.get_monitoring_groups(
+                resource_type=resource_type, resources=[resource_name]
+            )
         recipients_settings = settings.get_recipients(
             monitoring_groups, NotificationType.ALERT
         )
@@ -20,7 +20,7 @@ from .lambda_manager import (
     LambdaManagerException,
     LambdaLogProcessor,
 )
-from .s3_manager import S3Manager, S3ManagerReadException
+from .s3_manager import S3Manager, S3ManagerReadException, S3ManagerWriteException
 from .ses_manager import AwsSesManager, AwsSesRawEmailSenderException
 from .sns_manager import SnsTopicPublisher, SNSTopicPublisherException
 from .sqs_manager import SQSQueueSender, SQSQueueSenderException
@@ -29,6 +29,8 @@ from .emr_manager import EMRManager, EMRManagerException
 from .sts_manager import StsManager, StsManagerException
 from .timestream_manager import (
     TimestreamTableWriter,
+    TimestreamBufferedWriter,
+    TimestreamBufferedWriterException,
     TimestreamTableWriterException,
     TimeStreamQueryRunner,
 )
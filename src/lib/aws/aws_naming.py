@@ -95,6 +95,11 @@ class AWSNaming:
         prefix = "key"
         return AWSNaming.__resource_name_with_check(stack_obj, prefix, meaning)
 
+    @classmethod
+    def KinesisStream(cls, stack_obj: object, meaning: str) -> str:
+        prefix = "kinesis"
+        return AWSNaming.__resource_name_with_check(stack_obj, prefix, meaning)
+
     @classmethod
     def LambdaFunction(cls, stack_obj: object, meaning: str) -> str:
         prefix = "lambda"
@@ -138,6 +143,12 @@ class AWSNaming:
         meaning = f"{resource_type}-metrics"
         return AWSNaming.TimestreamTable(stack_obj, meaning)
 
+    @classmethod
+    def TimestreamRollupTable(cls, stack_obj: object, resource_type: str) -> str:
+        """Hourly rollup table of the resource type (next to its metrics table)."""
+        meaning = f"{resource_type}-rollup"
+        return AWSNaming.TimestreamTable(stack_obj, meaning)
+
     @classmethod
     def EC2(cls, stack_obj: object, meaning: str) -> str:
         prefix = "ec2"
@@ -160,6 +171,24 @@ class AWSNaming:
         outp = AWSNaming.__resource_name_with_check(stack_obj, prefix, meaning)
         return outp
 
+    @classmethod
+    def LogsDestination(cls, stack_obj: object, meaning: str) -> str:
+        prefix = "logs-destination"
+        outp = AWSNaming.__resource_name_with_check(stack_obj, prefix, meaning)
+        return outp
+
+    @classmethod
+    def LogsSubscriptionFilter(cls, stack_obj: object, meaning: str) -> str:
+        prefix = "subscription-filter"
+        outp = AWSNaming.__resource_name_with_check(stack_obj, prefix, meaning)
+        return outp
+
     @classmethod
     def Arn_IAMRole(cls, stack_obj: object, account_id: str, role_name: str) -> str:
         return f"arn:aws:iam::{account_id}:role/{role_name}"
+
+    @classmethod
+    def Arn_LogsDestination(
+        cls, stack_obj: object, region: str, account_id: str, destination_name: str
+    ) -> str:
+        return f"arn:aws:logs:{region}:{account_id}:destination:{destination_name}"
@@ -1,4 +1,6 @@
 import boto3
+import threading
+from datetime import datetime, timedelta, timezone
 
 from .aws_naming import AWSNaming
 from .sts_manager import StsManager
@@ -11,31 +13,101 @@ class Boto3ClientCreatorException(Exception):
 
 
 class Boto3ClientCreator:
-    """This class creates boto3 client."""
+    """This class creates boto3 client.
+
+    When iam_role_name is given, the client is created via the assumed role. Assumed-role sessions
+    are cached per (account_id, region, iam_role_name) until their credentials are about to expire,
+    and clients are cached per service name within the session. The caches are class-level,
+    so they are shared by all creators (and extractors) within a warm Lambda container.
+    """
+
+    # refresh assumed-role credentials this long before they actually expire
+    CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=5)
+
+    # boto3 default session is not thread-safe, so clients are created one at a time;
+    # the lock also guards the caches below
+    _lock = threading.Lock()
+    # (account_id, region, iam_role_name) -> lock held while the role is assumed and the clients are created,
+    # so the sessions of different accounts are created concurrently
+    _session_locks: dict[tuple, threading.Lock] = {}
+    # (account_id, region, iam_role_name) -> (boto3 session, credentials expiration)
+    _sessions: dict[tuple, tuple[boto3.session.Session, datetime]] = {}
+    # (account_id, region, iam_role_name, aws_client_name) -> boto3 client
+    _clients: dict[tuple, object] = {}
 
     def __init__(self, account_id: str, region: str, iam_role_name: str = None):
         self.account_id = account_id
         self.region = region
         self.iam_role_name = iam_role_name
 
-    def get_client(self, aws_client_name):
-        if self.iam_role_name:
+    @classmethod
+    def clear_cache(cls):
+        """Drops all cached sessions and clients."""
+        with cls._lock:
+            cls._sessions.clear()
+            cls._clients.clear()
+
+    @property
+    def _session_key(self) -> tuple:
+        return (self.account_id, self.region, self.iam_role_name)
+
+    def _is_session_valid(self, expiration: datetime) -> bool:
+        return datetime.now(tz=timezone.utc) < (
+            expiration - self.CREDENTIALS_REFRESH_MARGIN
+        )
+
+    def _get_session_lock(self) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(self._session_key, threading.Lock())
+
+    def _get_session(self) -> boto3.session.Session:
+        """Returns cached assumed-role session, (re)assuming the role if there is no valid one
+        (called under the session lock, the STS call itself is made outside the class-wide lock).
+        """
+        with self._lock:
+            cached = self._sessions.get(self._session_key)
+            if cached and self._is_session_valid(cached[1]):
+                return cached[0]
             sts_client = boto3.client("sts")
-            sts_manager = StsManager(sts_client)
-            extract_metrics_role_arn = AWSNaming.Arn_IAMRole(
-                None, self.account_id, self.iam_role_name
-            )
 
-            try:
-                client = sts_manager.get_client_via_assumed_role(
-                    aws_client_name=aws_client_name,
-                    via_assume_role_arn=extract_metrics_role_arn,
-                    region=self.region,
-                )
+        sts_manager = StsManager(sts_client)
+        extract_metrics_role_arn = AWSNaming.Arn_IAMRole(
+            None, self.account_id, self.iam_role_name
+        )
+        credentials = sts_manager.assume_role(extract_metrics_role_arn)
+        session = boto3.session.Session(
+            aws_access_key_id=credentials["AccessKeyId"],
+            aws_secret_access_key=credentials["SecretAccessKey"],
+            aws_session_token=credentials["SessionToken"],
+            region_name=self.region,
+        )
+
+        with self._lock:
+            self._sessions[self._session_key] = (session, credentials["Expiration"])
+            # clients created with the outdated credentials are not valid anymore
+            for client_key in [x for x in self._clients if x[:3] == self._session_key]:
+                del self._clients[client_key]
+
+        return session
+
+    def get_client(self, aws_client_name):
+        if not self.iam_role_name:
+            with self._lock:
+                return boto3.client(aws_client_name)
+
+        try:
+            with self._get_session_lock():
+                session = self._get_session()
+                client_key = self._session_key + (aws_client_name,)
+                with self._lock:
+                    client = self._clients.get(client_key)
+                if client is None:
+                    # the session is used by this session key only (guarded by the session lock)
+                    client = session.client(aws_client_name)
+                    with self._lock:
+                        self._clients[client_key] = client
                 return client
-            except Exception as ex:
-                raise Boto3ClientCreatorException(
-                    f"Error while creating boto3 client: {str(ex)}"
-                )
-        else:
-            return boto3.client(aws_client_name)
+        except Exception as ex:
+            raise Boto3ClientCreatorException(
+                f"Error while creating boto3 client: {str(ex)}"
+            )
@@ -1,5 +1,6 @@
 import boto3
 import time
+from typing import Iterator
 
 from ..core.constants import CloudWatchConfigs
 
@@ -73,10 +74,46 @@ class CloudWatchEventsPublisher:
             raise CloudWatchEventsPublisherException(error_message)
 
 
+class LogsQuerySlice:
+    """A time slice of the queried period, queried with one Logs Insights query."""
+
+    __slots__ = (
+        "start_time",
+        "end_time",
+        "query_id",
+        "started_at",
+        "poll_interval",
+        "next_poll_at",
+        "results",
+    )
+
+    def __init__(self, start_time: int, end_time: int):
+        self.start_time = start_time
+        self.end_time = end_time
+        self.query_id = None
+        self.started_at = None
+        self.poll_interval = CloudWatchConfigs.POLL_INITIAL_INTERVAL_SECONDS
+        self.next_poll_at = None
+        self.results = None
+
+    @property
+    def width(self) -> int:
+        return self.end_time - self.start_time + 1
+
+    def split(self, parts: int) -> list["LogsQuerySlice"]:
+        """Splits the slice into (up to) the given number of adjacent slices of the same width."""
+        parts = max(1, min(parts, self.width))
+        bounds = [self.start_time + self.width * i // parts for i in range(parts + 1)]
+        return [LogsQuerySlice(bounds[i], bounds[i + 1] - 1) for i in range(parts)]
+
+
 class CloudWatchManager:
     """This class Manages interactions with Amazon CloudWatch"""
 
     QUERY_COMPLETED_STATUS = "Complete"
+    QUERY_FAILED_STATUSES = ("Failed", "Cancelled", "Timeout", "Unknown")
+    # share of QUERY_MAX_RESULTS targeted by re-split slices (so that they don't hit the cap again)
+    SLICE_FILL_FACTOR = 0.8
 
     def __init__(self, cloudwatch_client=None):
         self.cloudwatch_client = (
@@ -89,50 +126,221 @@ class CloudWatchManager:
         query_string: str,
         start_time: int,
         end_time: int,
+        max_concurrent_queries: int = CloudWatchConfigs.MAX_CONCURRENT_QUERIES,
     ) -> list:
         """
-        Streams the results of a single query execution using CloudWatch Logs Insights.
+        Runs the query using CloudWatch Logs Insights (see iter_query_logs).
 
         Args:
             log_group_name (str): The log group on which to perform the query.
             query_string (str): The query string to use.
             start_time (int): The beginning of the time range to query (the range is inclusive). The epoch time in milliseconds as an int.
             end_time (int): The end of the time range to query (the range is inclusive). The epoch time in milliseconds as an int.
+            max_concurrent_queries (int): Max number of Logs Insights queries run at the same time.
 
         Returns:
             The results of the query execution or empty list if the log group does not exist.
         """
-        try:
-            start_query_response = self.cloudwatch_client.start_query(
-                logGroupName=log_group_name,
-                startTime=start_time,
-                endTime=end_time,
-                queryString=query_string,
+        return list(
+            self.iter_query_logs(
+                log_group_name=log_group_name,
+                query_string=query_string,
+                start_time=start_time,
+                end_time=end_time,
+                max_concurrent_queries=max_concurrent_queries,
             )
-            query_id = start_query_response["queryId"]
+        )
 
-            start_time = time.time()
-            while True:
-                if time.time() - start_time > CloudWatchConfigs.QUERY_TIMEOUT_SECONDS:
-                    error_msg = f"Query timeout: The query {query_string} for {log_group_name} is taking too long to execute."
-                    raise CloudWatchManagerException(error_msg)
+    def iter_query_logs(
+        self,
+        log_group_name: str,
+        query_string: str,
+        start_time: int,
+        end_time: int,
+        max_concurrent_queries: int = CloudWatchConfigs.MAX_CONCURRENT_QUERIES,
+    ) -> Iterator[list]:
+        """
+        Streams the results of the query using CloudWatch Logs Insights.
 
-                time.sleep(1)
-                response = self.cloudwatch_client.get_query_results(queryId=query_id)
+        The time range is split into slices queried concurrently (up to max_concurrent_queries queries at a time,
+        fewer if the account quota of concurrent queries is reached). A slice whose results hit the row cap
+        (CloudWatchConfigs.QUERY_MAX_RESULTS) is re-split according to the number of the matched records
+        (so that each part is expected to fit into the cap) and re-queried. The results are polled with
+        exponential backoff and yielded slice by slice in chronological order (so the sorting of the query
+        applies within a slice, e.g. log events of a log stream stay in order if sorted by @logStream, @timestamp).
 
-                if response["status"] == CloudWatchManager.QUERY_COMPLETED_STATUS:
-                    break
+        Args:
+            log_group_name (str): The log group on which to perform the query.
+            query_string (str): The query string to use.
+            start_time (int): The beginning of the time range to query (the range is inclusive). The epoch time in milliseconds as an int.
+            end_time (int): The end of the time range to query (the range is inclusive). The epoch time in milliseconds as an int.
+            max_concurrent_queries (int): Max number of Logs Insights queries run at the same time.
 
-                time.sleep(1)
+        Yields:
+            list: Result rows (lists of field/value dicts). Nothing if the log group does not exist.
+        """
+        max_concurrent_queries = max(1, max_concurrent_queries)
+        initial_width = max(
+            -(-(end_time - start_time + 1) // max_concurrent_queries),
+            CloudWatchConfigs.MIN_INITIAL_SLICE_SECONDS * 1000,
+        )
+        slices = LogsQuerySlice(start_time, end_time).split(
+            -(-(end_time - start_time + 1) // initial_width)
+        )
+        running: list[LogsQuerySlice] = []
+        throttled_since = None
 
-            results = response["results"]
-            return results
+        try:
+            while slices:
+                # yield the results of the earliest slices as soon as they are complete
+                while slices and slices[0].results is not None:
+                    yield from slices.pop(0).results
+                if not slices:
+                    break
+
+                # start the queries of the pending slices (the earliest first)
+                for query_slice in slices:
+                    if len(running) >= max_concurrent_queries:
+                        break
+                    if query_slice.query_id is not None:
+                        continue
+                    try:
+                        self._start_slice_query(
+                            query_slice, log_group_name, query_string
+                        )
+                        running.append(query_slice)
+                        throttled_since = None
+                    except self.cloudwatch_client.exceptions.LimitExceededException:
+                        # the account quota of concurrent queries is reached, waiting for a running query
+                        # (or backing off and retrying, if all the queries are run by others)
+                        throttled_since = throttled_since or time.monotonic()
+                        if (
+                            time.monotonic() - throttled_since
+                            > CloudWatchConfigs.QUERY_TIMEOUT_SECONDS
+                        ):
+                            raise CloudWatchManagerException(
+                                f"Query timeout: The concurrent queries quota is exhausted for {log_group_name}."
+                            )
+                        if not running:
+                            query_slice.poll_interval = min(
+                                query_slice.poll_interval * 2,
+                                CloudWatchConfigs.POLL_MAX_INTERVAL_SECONDS,
+                            )
+                            time.sleep(query_slice.poll_interval)
+                        break
+
+                if not running:
+                    continue
+
+                # poll the running queries which are due
+                next_poll_at = min(x.next_poll_at for x in running)
+                time.sleep(max(0.0, next_poll_at - time.monotonic()))
+                for query_slice in [
+                    x for x in running if x.next_poll_at <= time.monotonic()
+                ]:
+                    if self._poll_slice_query(
+                        query_slice, slices, log_group_name, query_string
+                    ):
+                        running.remove(query_slice)
 
         except self.cloudwatch_client.exceptions.ResourceNotFoundException:
             print(
                 f"Log group {log_group_name} does not exist in this account or region."
             )
-            return []
+        finally:
+            # the generator is closed early or failed - the running queries are not needed anymore
+            for query_slice in running:
+                if query_slice.results is None:
+                    self._stop_slice_query(query_slice)
+
+    def _start_slice_query(
+        self, query_slice: LogsQuerySlice, log_group_name: str, query_string: str
+    ):
+        response = self.cloudwatch_client.start_query(
+            logGroupName=log_group_name,
+            startTime=query_slice.start_time,
+            endTime=query_slice.end_time,
+            queryString=query_string,
+            limit=CloudWatchConfigs.QUERY_MAX_RESULTS,
+        )
+        query_slice.query_id = response["queryId"]
+        query_slice.started_at = time.monotonic()
+        query_slice.poll_interval = CloudWatchConfigs.POLL_INITIAL_INTERVAL_SECONDS
+        query_slice.next_poll_at = query_slice.started_at + query_slice.poll_interval
+
+    def _stop_slice_query(self, query_slice: LogsQuerySlice):
+        try:
+            self.cloudwatch_client.stop_query(queryId=query_slice.query_id)
+        except Exception:
+            # the query may have already completed
+            pass
+
+    def _poll_slice_query(
+        self,
+        query_slice: LogsQuerySlice,
+        slices: list[LogsQuerySlice],
+        log_group_name: str,
+        query_string: str,
+    ) -> bool:
+        """
+        Polls the results of the slice query. Once complete, either sets the results of the slice
+        or (if they hit the row cap) replaces the slice with the narrower ones.
+
+        Returns:
+            bool: True if the query is not running anymore.
+        """
+        response = self.cloudwatch_client.get_query_results(
+            queryId=query_slice.query_id
+        )
+        status = response["status"]
+
+        if status in CloudWatchManager.QUERY_FAILED_STATUSES:
+            raise CloudWatchManagerException(
+                f"Query {status}: The query {query_string} for {log_group_name} hasn't completed."
+            )
+
+        if status != CloudWatchManager.QUERY_COMPLETED_STATUS:
+            now = time.monotonic()
+            if now - query_slice.started_at > CloudWatchConfigs.QUERY_TIMEOUT_SECONDS:
+                error_msg = f"Query timeout: The query {query_string} for {log_group_name} is taking too long to execute."
+                raise CloudWatchManagerException(error_msg)
+            query_slice.poll_interval = min(
+                query_slice.poll_interval * 2,
+                CloudWatchConfigs.POLL_MAX_INTERVAL_SECONDS,
+            )
+            query_slice.next_poll_at = now + query_slice.poll_interval
+            return False
+
+        results = response["results"]
+        records_matched = response.get("statistics", {}).get("recordsMatched", 0)
+        is_truncated = len(results) >= CloudWatchConfigs.QUERY_MAX_RESULTS or (
+            records_matched > len(results)
+        )
+        if (
+            not is_truncated
+            or query_slice.width <= CloudWatchConfigs.MIN_SLICE_MILLISECONDS
+        ):
+            if is_truncated:
+                print(
+                    f"Query results for {log_group_name} are truncated to {len(results)} rows "
+                    f"within {query_slice.width} ms since {query_slice.start_time}."
+                )
+            query_slice.results = results
+            return True
+
+        # re-split the slice so that each part is expected to fit into the cap
+        max_rows = (
+            CloudWatchConfigs.QUERY_MAX_RESULTS * CloudWatchManager.SLICE_FILL_FACTOR
+        )
+        target_width = max(
+            int(query_slice.width * max_rows / max(records_matched, len(results))),
+            CloudWatchConfigs.MIN_SLICE_MILLISECONDS,
+        )
+        position = slices.index(query_slice)
+        slices[position : position + 1] = query_slice.split(
+            max(2, -(-query_slice.width // target_width))
+        )
+        return True
 
     def log_group_exists(self, log_group_name: str) -> bool:
         """
@@ -1,4 +1,9 @@
 import boto3
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -94,25 +99,37 @@ class EMRManager:
     STATES_FAILURE = ["FAILED", "CANCELLED"]
     # FYI: all states = 'SUBMITTED'|'PENDING'|'SCHEDULED'|'RUNNING'|'SUCCESS'|'FAILED'|'CANCELLING'|'CANCELLED'
 
+    MAX_GET_JOB_RUN_WORKERS = 5
+    # attempts to get job run details when the request is throttled
+    GET_JOB_RUN_MAX_ATTEMPTS = 5
+    BACKOFF_BASE_SECONDS = 0.5
+    BACKOFF_MAX_SECONDS = 10
+    THROTTLING_ERROR_CODES = ["ThrottlingException", "TooManyRequestsException"]
+
+    # application name -> ID indexes, shared by all managers using the same client (i.e. account and region)
+    _app_id_indexes = weakref.WeakKeyDictionary()
+    _app_id_indexes_lock = threading.Lock()
+
     def __init__(self, sf_client=None):
         self.sf_client = (
             boto3.client("emr-serverless") if sf_client is None else sf_client
         )
 
+    def _list_applications(self) -> list[dict]:
+        paginator = self.sf_client.get_paginator("list_applications")
+        applications = []
+
+        # Use paginator to iterate through all the pages
+        for page in paginator.paginate(maxResults=50):
+            applications.extend(page.get("applications", []))
+
+        return applications
+
     def get_all_names(self, **kwargs):
         """Get all EMR Serverless application names"""
 
         try:
-            paginator = self.sf_client.get_paginator("list_applications")
-            application_names = []
-
-            # Use paginator to iterate through all the pages
-            for page in paginator.paginate(maxResults=50):
-                application_names.extend(
-                    [res["name"] for res in page.get("applications", [])]
-                )
-
-            return application_names
+            return [res["name"] for res in self._list_applications()]
 
         except Exception as e:
             error_message = f"Error getting a list of EMR applications: {e}"
@@ -130,16 +147,29 @@ class EMRManager:
             raise EMRManagerException(error_message)
 
     def get_application_id_by_name(self, app_name: str) -> str:
-        """Get EMR Serverless application ID by its name"""
+        """
+        Get EMR Serverless application ID by its name.
 
-        try:
-            response = self.sf_client.list_applications()
-            applications = response.get("applications", [])
+        Applications are listed once per client (account and region) and the name -> ID index is reused
+        for all the applications. The index is rebuilt if the name is not found in it, the names missing
+        after the rebuild are remembered (as None) for the lifetime of the index.
+        """
 
-            for app in applications:
-                if app.get("name") == app_name:
-                    return app.get("id")
-            raise ValueError(f"Application with name {app_name} not found.")
+        try:
+            with self._app_id_indexes_lock:
+                app_id_index = self._app_id_indexes.get(self.sf_client)
+                if app_id_index is None or app_name not in app_id_index:
+                    app_id_index = {
+                        app.get("name"): app.get("id")
+                        for app in self._list_applications()
+                    }
+                    # e.g. a deleted application still referred to in the settings
+                    app_id_index.setdefault(app_name, None)
+                    self._app_id_indexes[self.sf_client] = app_id_index
+
+            if app_id_index[app_name] is None:
+                raise ValueError(f"Application with name {app_name} not found.")
+            return app_id_index[app_name]
         except Exception as e:
             error_message = f"Error retrieving application ID for {app_name}: {e}"
             raise EMRManagerException(error_message)
@@ -154,7 +184,49 @@ class EMRManager:
 
         except Exception as e:
             error_message = f"Error getting run details of EMR Job run ID {run_id}: {e}"
-            raise EMRManagerException(error_message)
+            raise EMRManagerException(error_message) from e
+
+    def _is_throttling_error(self, error: Exception) -> bool:
+        error_code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return error_code in self.THROTTLING_ERROR_CODES
+
+    def _get_job_run_with_backoff(self, app_id: str, run_id: str) -> EMRJobRunData:
+        for attempt in range(self.GET_JOB_RUN_MAX_ATTEMPTS):
+            try:
+                return self.get_job_run(app_id=app_id, run_id=run_id)
+            except EMRManagerException as e:
+                if (
+                    not self._is_throttling_error(e.__cause__)
+                    or attempt + 1 == self.GET_JOB_RUN_MAX_ATTEMPTS
+                ):
+                    raise
+                # exponential backoff with full jitter
+                time.sleep(
+                    random.uniform(
+                        0,
+                        min(
+                            self.BACKOFF_MAX_SECONDS,
+                            self.BACKOFF_BASE_SECONDS * 2**attempt,
+                        ),
+                    )
+                )
+
+    def get_job_runs(self, app_id: str, run_ids: list[str]) -> list[EMRJobRunData]:
+        """
+        Get detailed information about several job runs (get_job_run calls are sent concurrently,
+        throttled requests are retried with exponential backoff).
+        """
+        if not run_ids:
+            return []
+
+        max_workers = min(self.MAX_GET_JOB_RUN_WORKERS, len(run_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda run_id: self._get_job_run_with_backoff(app_id, run_id),
+                    run_ids,
+                )
+            )
 
     def list_job_runs(
         self, app_id: str, since_time: datetime, states: list[str] = []
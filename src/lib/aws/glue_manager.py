@@ -1,9 +1,10 @@
 import boto3
 import json
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
 from pydantic import BaseModel
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
 from lib.core.constants import SettingConfigResourceTypes
 from lib.aws.sts_manager import StsManager
@@ -313,12 +314,8 @@ class TableModel(BaseModel):
     UpdateTime: Optional[datetime]
     PartitionsCount: int = 0
     IndexesCount: int = 0
-
-    def set_partition_count(self, partitions: list[dict]):
-        self.PartitionsCount = len(partitions)
-
-    def set_indexes_count(self, indexes: list[dict]):
-        self.IndexesCount = len(indexes)
+    # when the partitions and indexes have been counted (see GlueManager.get_catalog_data)
+    CountedOn: Optional[datetime] = None
 
 
 class CatalogData(BaseModel):
@@ -393,6 +390,11 @@ class GlueManager:
     }
 
     GET_NAMES_PAGE_SIZE = 100  # Size of chunk used in get_all_*_names functions
+    GET_JOB_RUNS_PAGE_SIZE = 200  # Max page size of get_job_runs (AWS Limit)
+    GET_WORKFLOW_RUNS_PAGE_SIZE = 100
+    MAX_CATALOG_TABLE_WORKERS = (
+        10  # Max number of tables processed in parallel in get_catalog_data
+    )
 
     def __init__(self, glue_client=None):
         self.glue_client = boto3.client("glue") if glue_client is None else glue_client
@@ -547,14 +549,36 @@ class GlueManager:
         else:
             raise GlueManagerException(f"Unknown glue resource type {resource_type}")
 
-    def get_job_runs(self, job_name: str, since_time: datetime) -> list[JobRun]:
+    def _iter_runs_since(
+        self, operation_name: str, runs_key: str, since_time: datetime, **kwargs
+    ) -> Iterator[dict]:
+        """
+        Yields raw runs started after since_time, page by page.
+        Glue returns runs newest-first, so pagination stops at the first run which is not newer than since_time.
+        """
+        paginator = self.glue_client.get_paginator(operation_name)
+        for page in paginator.paginate(**kwargs):
+            for run in page.get(runs_key, []):
+                started_on = run.get("StartedOn")
+                if started_on is None:
+                    continue
+                if started_on <= since_time:
+                    return
+                yield run
+
+    def get_job_runs(self, job_name: str, since_time: datetime) -> Iterator[JobRun]:
+        """
+        Yields job runs started after since_time (lazily, newest-first).
+        """
         try:
-            response = self.glue_client.get_job_runs(JobName=job_name)
-
-            job_runs_data = JobRunsData(**response)
-            outp = [x for x in job_runs_data.JobRuns if x.StartedOn > since_time]
-
-            return outp
+            for run in self._iter_runs_since(
+                "get_job_runs",
+                "JobRuns",
+                since_time,
+                JobName=job_name,
+                PaginationConfig={"PageSize": self.GET_JOB_RUNS_PAGE_SIZE},
+            ):
+                yield JobRun(**run)
 
         except Exception as e:
             error_message = f"Error getting glue job runs : {e}"
@@ -562,14 +586,21 @@ class GlueManager:
 
     def get_workflow_runs(
         self, workflow_name: str, since_time: datetime
-    ) -> list[WorkflowRun]:
+    ) -> Iterator[WorkflowRun]:
+        """
+        Yields workflow runs started after since_time (lazily, newest-first).
+        Run graphs are not requested (error details are fetched separately, only for failed runs).
+        """
         try:
-            response = self.glue_client.get_workflow_runs(Name=workflow_name)
-
-            workflow_runs_data = WorkflowRunsData(**response)
-            outp = [x for x in workflow_runs_data.Runs if x.StartedOn > since_time]
-
-            return outp
+            for run in self._iter_runs_since(
+                "get_workflow_runs",
+                "Runs",
+                since_time,
+                Name=workflow_name,
+                IncludeGraph=False,
+                PaginationConfig={"PageSize": self.GET_WORKFLOW_RUNS_PAGE_SIZE},
+            ):
+                yield WorkflowRun(**run)
 
         except Exception as e:
             error_message = f"Error getting glue workflow runs : {e}"
@@ -672,25 +703,75 @@ class GlueManager:
         else:
             return []
 
-    def get_catalog_data(self, db_name: str) -> CatalogData:
+    def _count_items(self, operation_name: str, items_key: str, **kwargs) -> int:
+        """Counts items returned by all the pages of the paginated operation."""
+        paginator = self.glue_client.get_paginator(operation_name)
+        return sum(
+            len(page.get(items_key, [])) for page in paginator.paginate(**kwargs)
+        )
+
+    def _set_table_counts(self, db_name: str, table: TableModel):
+        # column schemas are not needed for counting, excluding them makes the response much smaller
+        table.PartitionsCount = self._count_items(
+            "get_partitions",
+            "Partitions",
+            DatabaseName=db_name,
+            TableName=table.Name,
+            ExcludeColumnSchema=True,
+        )
+        table.IndexesCount = self._count_items(
+            "get_partition_indexes",
+            "PartitionIndexDescriptorList",
+            DatabaseName=db_name,
+            TableName=table.Name,
+        )
+        table.CountedOn = datetime.now(tz=timezone.utc)
+
+    def get_catalog_data(
+        self, db_name: str, cached_tables: list[TableModel] | None = None
+    ) -> CatalogData:
         """
         Get data about the specific database in Glue Data Catalog: Total Number of Tables/Indexes/Partitions.
-        """
-        response = self.glue_client.get_tables(DatabaseName=db_name)
-        response["DatabaseName"] = db_name
-        catalog_data = CatalogData(**response)
+        Partitions and indexes are counted for several tables in parallel.
 
-        for table in catalog_data.TableList:
-            partitions_response = self.glue_client.get_partitions(
-                DatabaseName=db_name, TableName=table.Name
+        If cached_tables are given (counted by the earlier runs), their counts are reused for the tables
+        which haven't been updated since (same UpdateTime), only the rest of the tables are counted.
+        """
+        cached_tables = {table.Name: table for table in cached_tables or []}
+        try:
+            paginator = self.glue_client.get_paginator("get_tables")
+            catalog_data = CatalogData(
+                DatabaseName=db_name,
+                TableList=[
+                    table
+                    for page in paginator.paginate(DatabaseName=db_name)
+                    for table in page.get("TableList", [])
+                ],
             )
-            table.set_partition_count(partitions_response.get("Partitions"))
 
-            indexes_response = self.glue_client.get_partition_indexes(
-                DatabaseName=db_name, TableName=table.Name
-            )
-            table.set_indexes_count(
-                indexes_response.get("PartitionIndexDescriptorList")
-            )
+            tables_to_count = []
+            for table in catalog_data.TableList:
+                cached_table = cached_tables.get(table.Name)
+                if cached_table and cached_table.UpdateTime == table.UpdateTime:
+                    table.PartitionsCount = cached_table.PartitionsCount
+                    table.IndexesCount = cached_table.IndexesCount
+                    table.CountedOn = cached_table.CountedOn
+                else:
+                    tables_to_count.append(table)
+
+            if tables_to_count:
+                max_workers = min(self.MAX_CATALOG_TABLE_WORKERS, len(tables_to_count))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    # list() to surface the exceptions (if any)
+                    list(
+                        executor.map(
+                            lambda table: self._set_table_counts(db_name, table),
+                            tables_to_count,
+                        )
+                    )
 
-        return catalog_data
+            return catalog_data
+
+        except Exception as e:
+            error_message = f"Error getting glue data catalog data for {db_name}: {e}"
+            raise GlueManagerException(error_message)
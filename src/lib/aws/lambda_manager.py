@@ -1,20 +1,45 @@
 import re
 import boto3
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
+from functools import cached_property
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, NamedTuple, Optional
 
 from .cloudwatch_manager import CloudWatchManager
-from lib.core.datetime_utils import (
-    datetime_to_epoch_milliseconds,
-    str_utc_datetime_to_datetime,
-)
+from lib.core.datetime_utils import datetime_to_epoch_milliseconds
 
 
 ###########################################################
 
 
+# REPORT RequestId: <id>\tDuration: 2758.71 ms\tBilled Duration: 2759 ms\tMemory Size: 128 MB\tMax Memory Used: 80 MB\t...
+REPORT_PATTERN = re.compile(
+    r"\tDuration: (?P<duration>[0-9.]+) ms"
+    r"(?:.*?\tBilled Duration: (?P<billed_duration>\d+) ms)?"
+    r"(?:.*?\tMemory Size: (?P<memory_size>\d+) MB)?"
+    r"(?:.*?\tMax Memory Used: (?P<max_memory_used>\d+) MB)?"
+)
+# [ERROR]\t<timestamp>\t<request_id>\t<error_message>
+ERROR_PATTERN = re.compile(r"^\[ERROR\]\t[^\s]+\t([^\t]*)\t(.*)$", re.DOTALL)
+
+
+class LambdaReport(NamedTuple):
+    """Values of the REPORT log entry of a Lambda invocation."""
+
+    duration: float = 0.0
+    billed_duration: float = 0.0
+    memory_size: float = 0.0
+    max_memory_used: float = 0.0
+
+    @classmethod
+    def from_report(cls, report: Optional[str]) -> "LambdaReport":
+        match = REPORT_PATTERN.search(report) if report else None
+        if not match:
+            return cls()
+        return cls(*(float(x) if x else 0.0 for x in match.groups()))
+
+
 class LambdaInvocation(BaseModel):
     LambdaName: str
     LogStream: str
@@ -37,28 +62,26 @@ class LambdaInvocation(BaseModel):
     def IsFailure(self) -> bool:
         return self.Status in LambdaManager.LAMBDA_FAILURE_STATE
 
-    def _extract_value(self, pattern: str) -> float:
-        if self.Report:
-            match = re.search(pattern, self.Report)
-            if match:
-                return float(match.group(1))
-        return 0.0
+    @cached_property
+    def ReportValues(self) -> LambdaReport:
+        # the report is parsed once, on the first access to any of its values
+        return LambdaReport.from_report(self.Report)
 
     @property
     def Duration(self) -> float:
-        return self._extract_value(r"Duration: ([0-9.]+) ms")
+        return self.ReportValues.duration
 
     @property
     def BilledDuration(self) -> float:
-        return self._extract_value(r"Billed Duration: (\d+) ms")
+        return self.ReportValues.billed_duration
 
     @property
     def MemorySize(self) -> float:
-        return self._extract_value(r"Memory Size: (\d+) MB")
+        return self.ReportValues.memory_size
 
     @property
     def MaxMemoryUsed(self) -> float:
-        return self._extract_value(r"Max Memory Used: (\d+) MB")
+        return self.ReportValues.max_memory_used
 
     @property
     def ErrorString(self) -> str:
@@ -68,10 +91,9 @@ class LambdaInvocation(BaseModel):
         cleaned_errors = []
         for error in self.Errors:
             # extract the error message portion from a log entry formatted as '[ERROR] <timestamp> <request_id> <error_message>'
-            pattern = rf"^\[ERROR\]\t[^\s]+\t{self.RequestId}\t(.*)$"
-            match = re.search(pattern, error)
-            if match:
-                error = match.group(1).strip()
+            match = ERROR_PATTERN.match(error)
+            if match and match.group(1) == self.RequestId:
+                error = match.group(2).strip()
             cleaned_errors.append(error)
 
         error_string = "<br/>".join(cleaned_errors)
@@ -92,6 +114,8 @@ class LambdaManager:
     MESSAGE_PART_END = "END"
     MESSAGE_PART_REPORT = "REPORT RequestId:"
     MESSAGE_PART_ERROR = "[ERROR]"
+    MESSAGE_PREFIX_START = "START RequestId:"
+    MESSAGE_PREFIX_END = "END RequestId:"
     LAMBDA_SUCCESS_STATE = "SUCCEEDED"
     LAMBDA_FAILURE_STATE = "FAILED"
     LAMBDA_RUNNING_STATE = "RUNNING"
@@ -135,8 +159,9 @@ class LambdaManager:
         cloudwatch_manager: CloudWatchManager,
         function_name: str,
         since_time: datetime,
+        until_time: datetime = None,
     ) -> list[LambdaInvocation]:
-        """Get lambda invocations based on the CloudWatch logs
+        """Get lambda invocations based on the CloudWatch logs (up to until_time, if given)
 
         Example response from CloudWatch:
             [
@@ -171,9 +196,13 @@ class LambdaManager:
             query_start_time = int(
                 datetime_to_epoch_milliseconds(since_time + timedelta(milliseconds=1))
             )
-            query_end_time = int(datetime_to_epoch_milliseconds(datetime.now()))
+            query_end_time = int(
+                datetime_to_epoch_milliseconds(until_time or datetime.now())
+            )
 
-            lambda_logs = cloudwatch_manager.query_logs(
+            # the results are streamed slice by slice (see CloudWatchManager.iter_query_logs),
+            # invocations spanning several slices are completed by the entries of the later ones
+            lambda_logs = cloudwatch_manager.iter_query_logs(
                 log_group_name=self.get_log_group(function_name),
                 query_string=query_string,
                 start_time=query_start_time,
@@ -181,8 +210,7 @@ class LambdaManager:
             )
 
             log_processor = LambdaLogProcessor(function_name)
-            for log_entry_data in lambda_logs:
-                log_processor.process_log_entry(log_entry_data)
+            log_processor.process_log_entries(lambda_logs)
 
             lambda_invocations = log_processor.get_completed_invocations()
             return lambda_invocations
@@ -192,77 +220,172 @@ class LambdaManager:
             raise LambdaManagerException(error_message)
 
 
+class LambdaInvocationState:
+    """Compact state of an in-progress Lambda invocation (see LambdaLogProcessor)."""
+
+    __slots__ = ("request_id", "status", "started_on", "completed_on", "errors")
+
+    def __init__(self, request_id: Optional[str], started_on: Optional[datetime]):
+        self.request_id = request_id
+        self.status = LambdaManager.LAMBDA_RUNNING_STATE
+        self.started_on = started_on
+        self.completed_on = None
+        self.errors = None
+
+
 class LambdaLogProcessor:
-    def __init__(self, function_name):
+    """
+    Streaming state machine which turns the Lambda log entries (START -> [ERROR] -> END -> REPORT)
+    into the completed invocations. Log entries of each log stream are expected in chronological order.
+
+    Each entry is classified by its message prefix. Only START and END entries have their timestamps parsed,
+    in-progress invocations are kept as compact LambdaInvocationState objects and a LambdaInvocation is created
+    only once the invocation is completed (REPORT entry).
+
+    With complete_partial_invocations, the invocations whose START entry has not been seen (e.g. delivered
+    in an earlier batch of a subscription filter, processed by another container) are handled as well:
+    the start time is estimated from the REPORT entry time and the reported duration. Such an invocation
+    is completed only if its failure has been seen - otherwise its [ERROR] entries may have been delivered
+    elsewhere, so its status is unknown and it is kept as a partial invocation (see pop_partial_invocations).
+    """
+
+    def __init__(self, function_name, complete_partial_invocations: bool = False):
         self.function_name = function_name
+        self.complete_partial_invocations = complete_partial_invocations
         self.active_request_ids: Dict[str, str] = {}
-        self.in_progress_invocations: Dict[tuple, LambdaInvocation] = {}
+        self.in_progress_invocations: Dict[tuple, LambdaInvocationState] = {}
         self.completed_invocations: List[LambdaInvocation] = []
+        self.partial_invocations: List[LambdaInvocation] = []
+
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[datetime]:
+        """Parses the timestamp of a log entry: @timestamp value (like "2024-01-19 08:36:56.462", in UTC) or datetime."""
+        if not value or isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+    def _get_state(
+        self, log_stream: str, request_id: Optional[str]
+    ) -> Optional[LambdaInvocationState]:
+        """Returns the state of the in-progress invocation (created for the partial invocations if missing)."""
+        key = (log_stream, request_id)
+        state = self.in_progress_invocations.get(key)
+        if state is None and self.complete_partial_invocations and request_id:
+            state = self.in_progress_invocations[key] = LambdaInvocationState(
+                request_id, None
+            )
+        return state
 
-    def _extract_field(
-        self, log_entry: List[Dict[str, str]], field_name: str
-    ) -> Optional[str]:
-        """Extracts the value of a given field from a log entry."""
-        return next(
-            (item["value"] for item in log_entry if item["field"] == field_name), None
-        )
-
-    def process_log_entry(self, log_entry: List[Dict[str, str]]):
-        """Processes a single log entry and updates the Lambda execution results accordingly."""
-
-        log_timestamp = str_utc_datetime_to_datetime(
-            self._extract_field(log_entry, "@timestamp")
-        )
-        log_stream = self._extract_field(log_entry, "@logStream")
-        request_id = self._extract_field(log_entry, "@requestId")
-        message = self._extract_field(log_entry, "@message")
-
+    def process_log_event(
+        self,
+        log_stream: Optional[str],
+        message: Optional[str],
+        request_id: Optional[str] = None,
+        timestamp=None,
+    ):
+        """Processes a single log event (its timestamp is either @timestamp value or datetime)."""
         if not log_stream or not message:
             return
 
-        # handle some ERROR entries which not assigned with Request ID
-        if not request_id and LambdaManager.MESSAGE_PART_ERROR in message:
-            request_id = self.active_request_ids.get(log_stream)
-
-        key = (log_stream, request_id)
-        invocation_record = self.in_progress_invocations.get(key)
-
         # handle START entry
-        if LambdaManager.MESSAGE_PART_START in message:
-            invocation_record = LambdaInvocation(
-                LambdaName=self.function_name,
-                LogStream=log_stream,
-                RequestId=request_id,
-                Status=LambdaManager.LAMBDA_RUNNING_STATE,
-                StartedOn=log_timestamp,
-            )
+        if message.startswith(LambdaManager.MESSAGE_PREFIX_START):
             self.active_request_ids[log_stream] = request_id
-            self.in_progress_invocations[key] = invocation_record
-
-        # handle ERROR entry
-        elif LambdaManager.MESSAGE_PART_ERROR in message:
-            if invocation_record:
-                invocation_record.Status = LambdaManager.LAMBDA_FAILURE_STATE
-                invocation_record.Errors.append(message)
+            self.in_progress_invocations[
+                (log_stream, request_id)
+            ] = LambdaInvocationState(request_id, self._parse_timestamp(timestamp))
+            return
 
         # handle END entry
-        elif LambdaManager.MESSAGE_PART_END in message:
-            if invocation_record:
-                if invocation_record.Status != LambdaManager.LAMBDA_FAILURE_STATE:
-                    invocation_record.Status = LambdaManager.LAMBDA_SUCCESS_STATE
-                invocation_record.CompletedOn = log_timestamp
+        if message.startswith(LambdaManager.MESSAGE_PREFIX_END):
+            state = self._get_state(log_stream, request_id)
+            if state:
+                if state.status != LambdaManager.LAMBDA_FAILURE_STATE:
+                    state.status = LambdaManager.LAMBDA_SUCCESS_STATE
+                state.completed_on = self._parse_timestamp(timestamp)
+            return
 
         # handle REPORT entry
-        elif LambdaManager.MESSAGE_PART_REPORT in message:
-            if invocation_record:
-                invocation_record.Report = message
-
-                # mark the invocation as completed
-                self.completed_invocations.append(invocation_record)
-                # remove it from in_progress_invocations and active request_ids
-                del self.in_progress_invocations[key]
+        if message.startswith(LambdaManager.MESSAGE_PART_REPORT):
+            state = self.in_progress_invocations.pop((log_stream, request_id), None)
+            if state is None and self.complete_partial_invocations and request_id:
+                state = LambdaInvocationState(request_id, None)
+            if state:
+                invocation = LambdaInvocation(
+                    LambdaName=self.function_name,
+                    LogStream=log_stream,
+                    RequestId=state.request_id,
+                    Status=state.status,
+                    Report=message,
+                    Errors=state.errors or [],
+                    StartedOn=state.started_on,
+                    CompletedOn=state.completed_on,
+                )
                 self.active_request_ids.pop(log_stream, None)
+                if invocation.StartedOn is None:
+                    # the START entry hasn't been seen - the REPORT entry follows the END one right away
+                    reported_on = self._parse_timestamp(timestamp)
+                    if reported_on is None:
+                        return
+                    invocation.CompletedOn = invocation.CompletedOn or reported_on
+                    invocation.StartedOn = invocation.CompletedOn - timedelta(
+                        milliseconds=invocation.Duration
+                    )
+                    if not invocation.IsFailure:
+                        # its [ERROR] entries may have been seen by another processor
+                        self.partial_invocations.append(invocation)
+                        return
+                # mark the invocation as completed
+                self.completed_invocations.append(invocation)
+            return
+
+        # handle ERROR entry (some of them are not assigned with Request ID)
+        if LambdaManager.MESSAGE_PART_ERROR in message:
+            if not request_id:
+                request_id = self.active_request_ids.get(log_stream)
+            state = self._get_state(log_stream, request_id)
+            if state:
+                state.status = LambdaManager.LAMBDA_FAILURE_STATE
+                if state.errors is None:
+                    state.errors = []
+                state.errors.append(message)
+
+    def process_log_entry(self, log_entry: List[Dict[str, str]]):
+        """Processes a single log entry (a CloudWatch Logs Insights row) and updates the Lambda execution results accordingly."""
+        fields = {item["field"]: item["value"] for item in log_entry}
+        self.process_log_event(
+            log_stream=fields.get("@logStream"),
+            message=fields.get("@message"),
+            request_id=fields.get("@requestId"),
+            timestamp=fields.get("@timestamp"),
+        )
+
+    def process_log_entries(self, log_entries: Iterable[List[Dict[str, str]]]):
+        """Processes the log entries (e.g. streamed from CloudWatch Logs Insights) one by one."""
+        for log_entry in log_entries:
+            self.process_log_entry(log_entry)
 
     def get_completed_invocations(self) -> list[LambdaInvocation]:
         """Returns a list of completed Lambda invocations."""
         return self.completed_invocations
+
+    def pop_completed_invocations(self) -> list[LambdaInvocation]:
+        """Returns the completed Lambda invocations and clears them (the in-progress ones are kept)."""
+        completed_invocations = self.completed_invocations
+        self.completed_invocations = []
+        return completed_invocations
+
+    def pop_partial_invocations(self) -> list[LambdaInvocation]:
+        """Returns the partial invocations (reported, but with unknown status) and clears them."""
+        partial_invocations = self.partial_invocations
+        self.partial_invocations = []
+        return partial_invocations
+
+    def drop_stale_invocations(self, started_before: datetime):
+        """Drops the in-progress invocations started (or ended, if the start is unknown) before the given time,
+        e.g. whose REPORT entry has been lost."""
+        for key, state in list(self.in_progress_invocations.items()):
+            seen_on = state.started_on or state.completed_on
+            if seen_on is not None and seen_on < started_before:
+                del self.in_progress_invocations[key]
+                if self.active_request_ids.get(key[0]) == state.request_id:
+                    del self.active_request_ids[key[0]]
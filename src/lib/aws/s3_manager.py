@@ -1,3 +1,4 @@
+import gzip
 import boto3
 from botocore.exceptions import ClientError
 from urllib.parse import urlparse
@@ -9,19 +10,32 @@ class S3ManagerReadException(Exception):
     pass
 
 
+class S3ManagerWriteException(Exception):
+    """Exception raised for errors encountered while writing files using S3Manager."""
+
+    pass
+
+
 class S3Manager:
     """Manages interactions with Amazon S3.
 
-    This class encapsulates methods for reading files from an S3 bucket.
+    This class encapsulates methods for reading and writing files in an S3 bucket.
 
     Attributes:
         s3_client: Boto3 S3 client for AWS interactions.
 
     Methods:
-        read_settings_file: Reads file from the specified S3 bucket.
+        read_file: Reads file from the specified S3 bucket.
+        read_file_if_changed: Reads file unless its ETag matches the given one.
+        write_file: Writes file to the specified S3 bucket.
+        read_compressed_file: Reads gzip-compressed file from the specified S3 bucket.
+        write_compressed_file: Writes file gzip-compressed to the specified S3 bucket.
+        list_files: Lists files under the specified S3 prefix.
+        delete_files: Deletes the specified files.
 
     Raises:
         S3ManagerReadException: If there's an error reading settings file.
+        S3ManagerWriteException: If there's an error writing or deleting file.
 
     """
 
@@ -59,3 +73,182 @@ class S3Manager:
             else:
                 error_message = f"Error reading settings file from '{s3_path}': {e}"
                 raise S3ManagerReadException(error_message)
+
+    def read_file_if_changed(
+        self, s3_path: str, etag: str = None
+    ) -> tuple[str | None, str]:
+        """Read a file from the specified S3 bucket unless it has not changed since the given ETag.
+
+        Args:
+            s3_path (str): Full S3 path (e.g. s3://your_bucket_name/path/to/your/object/file.txt).
+            etag (str): ETag of the previously read version of the file.
+
+        Returns:
+            tuple[str | None, str]: The content of the file (None if it was not modified) and its ETag.
+
+        """
+        s3_path_parts = urlparse(s3_path, allow_fragments=False)
+        kwargs = {"IfNoneMatch": etag} if etag else {}
+        try:
+            response = self.s3_client.get_object(
+                Bucket=s3_path_parts.netloc,
+                Key=s3_path_parts.path.lstrip("/"),
+                **kwargs,
+            )
+            return response["Body"].read().decode("utf-8"), response["ETag"]
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            if error_code in ("304", "NotModified"):
+                return None, etag
+            elif error_code == "NoSuchKey":
+                raise FileNotFoundError(f"File not found: {s3_path}") from e
+            elif error_code == "AccessDenied":
+                raise FileNotFoundError(f"Access denied for file: {s3_path}") from e
+            else:
+                raise S3ManagerReadException(
+                    f"Error reading file from '{s3_path}': {e}"
+                ) from e
+
+    def write_file(self, s3_path: str, content: str) -> str:
+        """Write a file to the specified S3 bucket.
+
+        Args:
+            s3_path (str): Full S3 path (e.g. s3://your_bucket_name/path/to/your/object/file.txt).
+            content (str): The content of the file.
+
+        Returns:
+            str: ETag of the written file.
+
+        """
+        try:
+            s3_path_parts = urlparse(s3_path, allow_fragments=False)
+            response = self.s3_client.put_object(
+                Bucket=s3_path_parts.netloc,
+                Key=s3_path_parts.path.lstrip("/"),
+                Body=content.encode("utf-8"),
+            )
+            return response["ETag"]
+        except ClientError as e:
+            raise S3ManagerWriteException(
+                f"Error writing file to '{s3_path}': {e}"
+            ) from e
+
+    def read_compressed_file(self, s3_path: str) -> str:
+        """Read a gzip-compressed file from the specified S3 bucket
+        (the object is decompressed while it is streamed).
+
+        Args:
+            s3_path (str): Full S3 path (e.g. s3://your_bucket_name/path/to/your/object/file.json.gz).
+
+        Returns:
+            str: The decompressed content of the file.
+
+        """
+        s3_path_parts = urlparse(s3_path, allow_fragments=False)
+        try:
+            response = self.s3_client.get_object(
+                Bucket=s3_path_parts.netloc, Key=s3_path_parts.path.lstrip("/")
+            )
+            with gzip.GzipFile(fileobj=response["Body"]) as gzip_file:
+                return gzip_file.read().decode("utf-8")
+        except ClientError as e:
+            error_code = e.response["Error"]["Code"]
+            if error_code == "NoSuchKey":
+                raise FileNotFoundError(f"File not found: {s3_path}") from e
+            elif error_code == "AccessDenied":
+                raise FileNotFoundError(f"Access denied for file: {s3_path}") from e
+            else:
+                raise S3ManagerReadException(
+                    f"Error reading file from '{s3_path}': {e}"
+                ) from e
+        except (OSError, EOFError) as e:
+            raise S3ManagerReadException(
+                f"Error decompressing file from '{s3_path}': {e}"
+            ) from e
+
+    def write_compressed_file(self, s3_path: str, content: str) -> str:
+        """Write a file gzip-compressed to the specified S3 bucket.
+
+        Args:
+            s3_path (str): Full S3 path (e.g. s3://your_bucket_name/path/to/your/object/file.json.gz).
+            content (str): The content of the file (before compression).
+
+        Returns:
+            str: ETag of the written file.
+
+        """
+        try:
+            s3_path_parts = urlparse(s3_path, allow_fragments=False)
+            response = self.s3_client.put_object(
+                Bucket=s3_path_parts.netloc,
+                Key=s3_path_parts.path.lstrip("/"),
+                Body=gzip.compress(content.encode("utf-8")),
+            )
+            return response["ETag"]
+        except ClientError as e:
+            raise S3ManagerWriteException(
+                f"Error writing file to '{s3_path}': {e}"
+            ) from e
+
+    def list_files(self, s3_path: str) -> list[str]:
+        """List files under the specified S3 prefix.
+
+        Args:
+            s3_path (str): Full S3 path prefix (e.g. s3://your_bucket_name/path/to/your/objects/).
+
+        Returns:
+            list[str]: Full S3 paths of the files (in the key order).
+
+        """
+        s3_path_parts = urlparse(s3_path, allow_fragments=False)
+        bucket_name = s3_path_parts.netloc
+        try:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            return [
+                f"s3://{bucket_name}/{item['Key']}"
+                for page in paginator.paginate(
+                    Bucket=bucket_name, Prefix=s3_path_parts.path.lstrip("/")
+                )
+                for item in page.get("Contents", [])
+            ]
+        except ClientError as e:
+            raise S3ManagerReadException(
+                f"Error listing files under '{s3_path}': {e}"
+            ) from e
+
+    def delete_files(self, s3_paths: list[str]):
+        """Delete the specified files (of one or several buckets).
+
+        Args:
+            s3_paths (list[str]): Full S3 paths of the files.
+
+        """
+        keys_by_bucket = {}
+        for s3_path in s3_paths:
+            s3_path_parts = urlparse(s3_path, allow_fragments=False)
+            keys_by_bucket.setdefault(s3_path_parts.netloc, []).append(
+                s3_path_parts.path.lstrip("/")
+            )
+        for bucket_name, keys in keys_by_bucket.items():
+            # delete_objects accepts up to 1000 keys per call
+            for i in range(0, len(keys), 1000):
+                try:
+                    response = self.s3_client.delete_objects(
+                        Bucket=bucket_name,
+                        Delete={
+                            "Objects": [{"Key": key} for key in keys[i : i + 1000]],
+                            "Quiet": True,
+                        },
+                    )
+                except ClientError as e:
+                    raise S3ManagerWriteException(
+                        f"Error deleting files from '{bucket_name}': {e}"
+                    ) from e
+                if response.get("Errors"):
+                    raise S3ManagerWriteException(
+                        f"Error deleting files from '{bucket_name}': "
+                        + "; ".join(
+                            f"{x.get('Key')}: {x.get('Message')}"
+                            for x in response["Errors"]
+                        )
+                    )
@@ -1,5 +1,8 @@
 import boto3
 import json
+import time
+
+from lib.core.constants import SQSConfigs
 
 
 class SQSQueueSenderException(Exception):
@@ -22,7 +25,7 @@ class SQSQueueSender:
             a new client instance is created.
 
     Methods:
-        send_message(message): Sends a message to the SQS queue.
+        send_messages(messages): Sends messages to the SQS queue (in batches).
     """
 
     def __init__(self, queue_url: str, message_group_id: str, sqs_client=None):
@@ -40,28 +43,149 @@ class SQSQueueSender:
         self.message_group_id = message_group_id[:128]
         self.sqs_client = boto3.client("sqs") if sqs_client is None else sqs_client
 
-    def send_messages(self, messages: list[dict]):
+    @staticmethod
+    def _serialize(message: dict) -> str:
+        """Serializes the message compactly (the queue consumers don't need it to be human-readable)."""
+        return json.dumps(message, separators=(",", ":"))
+
+    @staticmethod
+    def _get_entry_size(entry: dict) -> int:
+        return len(entry["MessageBody"].encode("utf-8")) + len(
+            entry["MessageGroupId"].encode("utf-8")
+        )
+
+    @classmethod
+    def _get_batches(cls, entries: list[dict]) -> list[list[dict]]:
+        """Splits the entries into batches of up to MAX_BATCH_ENTRIES entries and MAX_BATCH_BYTES bytes
+        (the entries are expected to fit MAX_BATCH_BYTES each, see send_messages).
         """
-        Sends messages to the SQS queue.
+        batches = []
+        batch, batch_size = [], 0
+        for entry in entries:
+            entry_size = cls._get_entry_size(entry)
+            if batch and (
+                len(batch) == SQSConfigs.MAX_BATCH_ENTRIES
+                or batch_size + entry_size > SQSConfigs.MAX_BATCH_BYTES
+            ):
+                batches.append(batch)
+                batch, batch_size = [], 0
+            batch.append(entry)
+            batch_size += entry_size
+        if batch:
+            batches.append(batch)
+        return batches
 
-        Args:
-            message: A message dictionary array to be sent to the SQS queue.
+    def _send_batch(self, entries: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Sends the batch of entries, resending the entries failed not due to the sender's fault
+        (the ones rejected due to the sender's fault are not resent).
 
         Returns:
-            The responses from the SQS send_message API calls.
-
+            tuple: The successful and the failed entries of the send_message_batch responses.
         """
-        results = []
-        for message in messages:
+        successful, failures = [], []
+        pending = entries
+        for attempt in range(SQSConfigs.MAX_SEND_ATTEMPTS):
+            if attempt:
+                time.sleep(SQSConfigs.RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
             try:
-                result = self.sqs_client.send_message(
-                    QueueUrl=self.queue_url,
-                    MessageBody=json.dumps(message, indent=4),
-                    MessageGroupId=self.message_group_id,
+                response = self.sqs_client.send_message_batch(
+                    QueueUrl=self.queue_url, Entries=pending
                 )
-                results.append(result)
             except Exception as e:
                 error_message = f"Error sending messages to {self.queue_url}: {e}"
                 raise SQSQueueSenderException(error_message)
 
-        return results
+            successful.extend(response.get("Successful", []))
+            retryable = []
+            for failed in response.get("Failed", []):
+                if failed.get("SenderFault"):
+                    # rejected for good (e.g. invalid message), the rest of the entries is still resent
+                    failures.append(failed)
+                else:
+                    retryable.append(failed)
+            if not retryable:
+                return successful, failures
+            retryable_ids = {x["Id"] for x in retryable}
+            pending = [x for x in pending if x["Id"] in retryable_ids]
+
+        # the entries still failing after the last attempt
+        failures.extend(retryable)
+        return successful, failures
+
+    def send_messages(
+        self, messages: list[dict], message_group_ids: list[str] = None
+    ) -> list[dict]:
+        """
+        Sends messages to the SQS queue in batches (send_message_batch API calls).
+        The failed entries are resent (see SQSConfigs), the rest of the batches are sent regardless of the failures.
+
+        Args:
+            messages: A message dictionary array to be sent to the SQS queue.
+            message_group_ids: Message group IDs of the messages (if they differ from the sender's one).
+
+        Returns:
+            The successful entries of the send_message_batch responses (in the order of the messages).
+
+        Raises:
+            SQSQueueSenderException: If any of the messages has not been sent.
+        """
+        entries = [
+            {
+                "Id": str(i),
+                "MessageBody": self._serialize(message),
+                "MessageGroupId": (
+                    message_group_ids[i][:128]
+                    if message_group_ids
+                    else self.message_group_id
+                ),
+            }
+            for i, message in enumerate(messages)
+        ]
+
+        results, failures, sendable = [], [], []
+        for entry in entries:
+            if self._get_entry_size(entry) > SQSConfigs.MAX_BATCH_BYTES:
+                # SQS would reject the whole batch request (BatchRequestTooLong), so the entry is not sent
+                failures.append(
+                    {
+                        "Id": entry["Id"],
+                        "SenderFault": True,
+                        "Code": "MessageTooLong",
+                        "Message": f"The message exceeds {SQSConfigs.MAX_BATCH_BYTES} bytes",
+                    }
+                )
+            else:
+                sendable.append(entry)
+
+        for batch in self._get_batches(sendable):
+            try:
+                successful, failed = self._send_batch(batch)
+            except SQSQueueSenderException as e:
+                # the whole batch is failed, the rest of the batches are still sent
+                successful = []
+                failed = [
+                    {
+                        "Id": x["Id"],
+                        "SenderFault": False,
+                        "Code": "Error",
+                        "Message": str(e),
+                    }
+                    for x in batch
+                ]
+            results.extend(successful)
+            failures.extend(failed)
+
+        if failures:
+            error_message = (
+                f"Error sending {len(failures)} of {len(messages)} messages to {self.queue_url}: "
+                # the same error of the entries of a failed batch is reported once
+                + "; ".join(
+                    dict.fromkeys(
+                        f"{x.get('Code')}: {x.get('Message')}" for x in failures
+                    )
+                )
+            )
+            raise SQSQueueSenderException(error_message)
+
+        return sorted(results, key=lambda x: int(x["Id"]))
@@ -1,9 +1,12 @@
 import boto3
 import json
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Iterator, Optional
 
 
 ################################################################
@@ -62,6 +65,13 @@ class StepFunctionsManager:
     STATES_FAILURE = ["FAILED", "ABORTED", "TIMED_OUT"]
     # FYI: all states = 'RUNNING'|'SUCCEEDED'|'FAILED'|'TIMED_OUT'|'ABORTED'|'PENDING_REDRIVE'
 
+    LIST_EXECUTIONS_PAGE_SIZE = 1000  # Max page size of list_executions (AWS Limit)
+    MAX_DESCRIBE_EXECUTION_WORKERS = 5
+
+    # state machine name -> ARN indexes, shared by all managers using the same client (i.e. account and region)
+    _arn_indexes = weakref.WeakKeyDictionary()
+    _arn_indexes_lock = threading.Lock()
+
     @classmethod
     def is_final_state(cls, state: str) -> bool:
         return state in cls.STATES_SUCCESS or state in cls.STATES_FAILURE
@@ -71,18 +81,19 @@ class StepFunctionsManager:
             boto3.client("stepfunctions") if sf_client is None else sf_client
         )
 
-    def get_all_names(self, **kwargs):
-        try:
-            paginator = self.sf_client.get_paginator("list_state_machines")
-            state_machine_names = []
+    def _list_state_machines(self) -> list[dict]:
+        paginator = self.sf_client.get_paginator("list_state_machines")
+        state_machines = []
 
-            # Use paginator to iterate through all the pages
-            for page in paginator.paginate(maxResults=100):
-                state_machine_names.extend(
-                    [res["name"] for res in page.get("stateMachines", [])]
-                )
+        # Use paginator to iterate through all the pages
+        for page in paginator.paginate(maxResults=100):
+            state_machines.extend(page.get("stateMachines", []))
+
+        return state_machines
 
-            return state_machine_names
+    def get_all_names(self, **kwargs):
+        try:
+            return [res["name"] for res in self._list_state_machines()]
 
         except Exception as e:
             error_message = f"Error getting list of step functions: {e}"
@@ -92,44 +103,80 @@ class StepFunctionsManager:
         """
         Get the ARN of a specific AWS Step Function.
 
+        State machines are listed once per client (account and region) and the name -> ARN index
+        is reused for all the state machines. The index is rebuilt if the name is not found in it
+        (e.g. the state machine was created after the index was built). Names missing after the rebuild
+        are remembered (as None) for the lifetime of the index, so they don't trigger rebuilds again.
+
         :param step_function_name: Name of the Step Function state machine.
         :return: ARN of the Step Function state machine.
         """
-        sf_client = self.sf_client
-
         try:
-            response = sf_client.list_state_machines()
-            state_machines = response["stateMachines"]
-
-            for state_machine in state_machines:
-                if state_machine["name"] == step_function_name:
-                    return state_machine["stateMachineArn"]
-
-            return None
+            with self._arn_indexes_lock:
+                arn_index = self._arn_indexes.get(self.sf_client)
+                if arn_index is None or step_function_name not in arn_index:
+                    arn_index = {
+                        x["name"]: x["stateMachineArn"]
+                        for x in self._list_state_machines()
+                    }
+                    # e.g. a deleted state machine still referred to in the settings
+                    arn_index.setdefault(step_function_name, None)
+                    self._arn_indexes[self.sf_client] = arn_index
+
+            return arn_index.get(step_function_name)
         except Exception as e:
             error_message = f"Error getting step function ARN by name: {e}"
             raise StepFunctionsManagerException(error_message)
 
     def get_step_function_executions(
         self, step_function_name: str, since_time: datetime
-    ) -> list[ExecutionData]:
+    ) -> Iterator[ExecutionData]:
+        """
+        Yields executions started after since_time (lazily, newest-first).
+        list_executions returns executions newest-first, so pagination stops at the first execution
+        which is not newer than since_time.
+        """
         try:
             state_machine_arn = self.get_step_function_arn_by_name(step_function_name)
-            response = self.sf_client.list_executions(stateMachineArn=state_machine_arn)
-
-            step_function_executions_data = StepFunctionExecutionsData(**response)
-            outp = [
-                x
-                for x in step_function_executions_data.executions
-                if x.startDate > since_time
-            ]
+            if state_machine_arn is None:
+                raise StepFunctionsManagerException(
+                    f"State machine {step_function_name} is not found"
+                )
 
-            return outp
+            paginator = self.sf_client.get_paginator("list_executions")
+            for page in paginator.paginate(
+                stateMachineArn=state_machine_arn,
+                PaginationConfig={"PageSize": self.LIST_EXECUTIONS_PAGE_SIZE},
+            ):
+                for execution in page.get("executions", []):
+                    execution_data = ExecutionData(**execution)
+                    if execution_data.startDate <= since_time:
+                        return
+                    yield execution_data
 
         except Exception as e:
             error_message = f"Error getting step function executions: {e}"
             raise StepFunctionsManagerException(error_message)
 
+    def get_execution_errors(self, step_function_execution_arns: list[str]) -> dict:
+        """
+        Get error messages of several executions (describe_execution calls are sent concurrently).
+
+        :param step_function_execution_arns: ARNs of the executions.
+        :return: Execution ARN to error message.
+        """
+        if not step_function_execution_arns:
+            return {}
+
+        max_workers = min(
+            self.MAX_DESCRIBE_EXECUTION_WORKERS, len(step_function_execution_arns)
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            errors = executor.map(
+                self.get_execution_error, step_function_execution_arns
+            )
+            return dict(zip(step_function_execution_arns, errors))
+
     def get_execution_error(self, step_function_execution_arn: str) -> str:
         """ """
         response = self.sf_client.describe_execution(
@@ -1,11 +1,14 @@
 import boto3
+import random
+import threading
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import dateutil
 from functools import cached_property
 
-from pydantic import BaseModel
-from typing import List, Optional
+from typing import Iterator
 
 #################################################
 
@@ -16,51 +19,19 @@ class TimestreamTableWriterException(Exception):
     pass
 
 
-class TimestreamQueryException(Exception):
-    """Exception raised for errors encountered while interacting with TimeStream DB."""
-
-    pass
-
-
-#################################################
-# Query Response Pydantic classes
-
-
-class ScalarType(BaseModel):
-    ScalarValue: Optional[str]
-
-
-class Data(BaseModel):
-    Data: List[ScalarType]
-
-
-class ColumnType(BaseModel):
-    ScalarType: str
-
-
-class ColumnInfo(BaseModel):
-    Name: str
-    Type: ColumnType
-
+class TimestreamBufferedWriterException(TimestreamTableWriterException):
+    """Exception raised when some of the batches buffered by TimestreamBufferedWriter failed to be written."""
 
-class QueryStatus(BaseModel):
-    ProgressPercentage: float
-    CumulativeBytesScanned: int
-    CumulativeBytesMetered: int
+    def __init__(self, message: str, failed_sources: set):
+        super().__init__(message)
+        # sources (see TimestreamBufferedWriter.add_records) of the records of the failed batches
+        self.failed_sources = failed_sources
 
 
-class ResponseMetadata(BaseModel):
-    RequestId: str
-    HTTPStatusCode: int
-    RetryAttempts: int
-
+class TimestreamQueryException(Exception):
+    """Exception raised for errors encountered while interacting with TimeStream DB."""
 
-class QueryResponse(BaseModel):
-    QueryId: str
-    Rows: List[Data]
-    ColumnInfo: List[ColumnInfo]
-    QueryStatus: QueryStatus
-    ResponseMetadata: ResponseMetadata
+    pass
 
 
 #################################################
@@ -108,6 +79,12 @@ class TimestreamTableWriter:
     RECORDS_BATCH_SIZE = (
         100  # Maximum number of records inserted per one write (AWS Limit)
     )
+    # attempts to write a batch (throttled requests and re-sent rejected records)
+    MAX_WRITE_ATTEMPTS = 5
+    BACKOFF_BASE_SECONDS = 0.5
+    BACKOFF_MAX_SECONDS = 10
+    # rejection reasons for records with timestamps outside the memory store retention
+    OUTSIDE_MEMORY_STORE_REASON_MARKERS = ("memory store", "outside the time range")
 
     def __init__(self, db_name: str, table_name: str, timestream_write_client=None):
         """
@@ -126,6 +103,10 @@ class TimestreamTableWriter:
             if timestream_write_client is None
             else timestream_write_client
         )
+        # number of records dropped as older than the memory store
+        self.dropped_records_count = 0
+        # batches might be written from several threads (see TimestreamBufferedWriter)
+        self._lock = threading.Lock()
 
     @staticmethod
     def print_rejected_records_exceptions(err):
@@ -147,43 +128,113 @@ class TimestreamTableWriter:
             if "ExistingVersion" in rr:
                 print("Rejected record existing version: ", rr["ExistingVersion"])
 
+    def _get_backoff_seconds(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(
+            0, min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2**attempt)
+        )
+
+    def _is_outside_memory_store(self, reason: str) -> bool:
+        reason = reason.lower()
+        return any(x in reason for x in self.OUTSIDE_MEMORY_STORE_REASON_MARKERS)
+
+    def _split_rejected_records(self, records, rejected_records) -> tuple[list, list]:
+        """
+        Splits rejected records into the ones worth re-sending and non-retryable errors.
+
+        Version conflicts are resolved by bumping the record's Version (so the new record replaces the existing one),
+        records older than the memory store can't be written at all, so they are dropped (and counted).
+
+        Args:
+            records: The records of the batch which was sent.
+            rejected_records: RejectedRecords of the RejectedRecordsException response.
+
+        Returns:
+            tuple: (records to retry, list of non-retryable rejection reasons)
+        """
+        records_to_retry = []
+        errors = []
+        for rejected_record in rejected_records:
+            index = rejected_record["RecordIndex"]
+            reason = rejected_record.get("Reason", "")
+            if "ExistingVersion" in rejected_record:
+                records_to_retry.append(
+                    {
+                        **records[index],
+                        "Version": rejected_record["ExistingVersion"] + 1,
+                    }
+                )
+            elif self._is_outside_memory_store(reason):
+                with self._lock:
+                    self.dropped_records_count += 1
+                print(f"Record {index} is dropped: {reason}")
+            else:
+                errors.append(f"Record {index}: {reason}")
+        return records_to_retry, errors
+
     def _write_batch(self, records, common_attributes={}):
         """
         Writes a single batch (up to 100 records) to the Timestream table.
 
+        Records which are not written are handled individually (the rest of the batch is written by Timestream anyway):
+        version conflicts are re-sent with bumped Version, records older than the memory store are dropped,
+        the other rejections are reported once retryable records are written.
+        Throttled requests are retried with exponential backoff.
+
         Args:
             records: A list of records to be written to the Timestream table.
 
         Returns:
             The response from the Timestream write_records API call.
 
-        Todo:
-            Introduce records buffering to support batches of less than 100 records.
+        Note:
+            Use TimestreamBufferedWriter to combine records of several resources into full batches.
         """
-        try:
-            result = self.timestream_write_client.write_records(
-                DatabaseName=self.db_name,
-                TableName=self.table_name,
-                Records=records,
-                CommonAttributes=common_attributes,
-            )
-            print(
-                "WriteRecords Status: [%s]"
-                % result["ResponseMetadata"]["HTTPStatusCode"]
-            )
-            return result
-        except self.timestream_write_client.exceptions.RejectedRecordsException as err:
-            error_message = (
-                f"Records were rejected for {self.db_name}.{self.table_name}: {err}."
-            )
-            self.print_rejected_records_exceptions(err)
-            raise (TimestreamTableWriterException(error_message))
-        except Exception as err:
-            error_message = (
-                f"Error writing records into {self.db_name}.{self.table_name}: {err}."
+        errors = []
+        result = None
+        for attempt in range(self.MAX_WRITE_ATTEMPTS):
+            try:
+                result = self.timestream_write_client.write_records(
+                    DatabaseName=self.db_name,
+                    TableName=self.table_name,
+                    Records=records,
+                    CommonAttributes=common_attributes,
+                )
+                print(
+                    "WriteRecords Status: [%s]"
+                    % result["ResponseMetadata"]["HTTPStatusCode"]
+                )
+                records = []
+            except (
+                self.timestream_write_client.exceptions.RejectedRecordsException
+            ) as err:
+                self.print_rejected_records_exceptions(err)
+                result = err.response
+                records, rejection_errors = self._split_rejected_records(
+                    records, err.response["RejectedRecords"]
+                )
+                errors.extend(rejection_errors)
+            except self.timestream_write_client.exceptions.ThrottlingException as err:
+                print(f"WriteRecords is throttled (attempt {attempt + 1}): {err}")
+                if attempt + 1 < self.MAX_WRITE_ATTEMPTS:
+                    time.sleep(self._get_backoff_seconds(attempt))
+            except Exception as err:
+                error_message = f"Error writing records into {self.db_name}.{self.table_name}: {err}."
+                raise (TimestreamTableWriterException(error_message))
+
+            if not records:
+                break
+        else:
+            errors.append(
+                f"{len(records)} record(s) not written after {self.MAX_WRITE_ATTEMPTS} attempts"
             )
+
+        if errors:
+            error_message = f"Records were rejected for {self.db_name}.{self.table_name}: {'; '.join(errors)}."
             raise (TimestreamTableWriterException(error_message))
 
+        return result
+
     def write_records(self, records, common_attributes={}):
         """
         Orchestrates the process of writing records to the Timestream table in batches of 100.
@@ -267,7 +318,193 @@ class TimestreamTableWriter:
         )
 
 
+class TimestreamBufferedWriter:
+    """
+    This class buffers records written to the tables of a Timestream database and sends them in full batches.
+
+    Records of different resources (each with its own common attributes) are combined into batches of up
+    to RECORDS_BATCH_SIZE records per table. Common attributes (e.g. resource dimensions) are lifted into
+    each record, so that records of different resources can share the same batch.
+    A batch is sent as soon as it is full (several batches are in flight in parallel), the remaining records
+    are sent on flush (which is expected to be called at the end of the run).
+
+    Attributes:
+        db_name (str): The name of the Timestream database.
+        timestream_write_client: The Boto3 Timestream write client. If not provided,
+            a new client instance is created.
+        max_in_flight_batches (int): Max number of batches being written in parallel.
+
+    Methods:
+        add_records(table_name, records, common_attributes, source): Adds records to the table's buffer.
+        flush(): Writes all the buffered records and waits for all in-flight batches.
+    """
+
+    RECORDS_BATCH_SIZE = TimestreamTableWriter.RECORDS_BATCH_SIZE
+    MAX_IN_FLIGHT_BATCHES = 4
+
+    def __init__(
+        self,
+        db_name: str,
+        timestream_write_client=None,
+        max_in_flight_batches: int = MAX_IN_FLIGHT_BATCHES,
+    ):
+        """
+        Initializes a new TimestreamBufferedWriter instance.
+
+        Args:
+            db_name (str): The name of the Timestream database.
+            timestream_write_client: An optional Boto3 Timestream write client.
+                If none is provided, a new client instance will be created.
+            max_in_flight_batches (int): Max number of batches being written in parallel.
+        """
+        self.db_name = db_name
+        self.timestream_write_client = (
+            boto3.client("timestream-write")
+            if timestream_write_client is None
+            else timestream_write_client
+        )
+        self.max_in_flight_batches = max_in_flight_batches
+
+        # records might be added from several threads (resources are extracted concurrently)
+        self._lock = threading.Lock()
+        self._buffers: dict[str, list] = {}
+        # table name -> source of each buffered record (so the failed batches can be attributed)
+        self._buffer_sources: dict[str, list] = {}
+        self._table_writers: dict[str, TimestreamTableWriter] = {}
+        self._executor = None
+        self._futures = []
+
+    @staticmethod
+    def lift_common_attributes(records: list, common_attributes: dict) -> list:
+        """
+        Merges common attributes into each record (record's own attributes take precedence,
+        common dimensions are prepended to the record's dimensions).
+
+        Args:
+            records: A list of records.
+            common_attributes: Attributes applied to all the records.
+
+        Returns:
+            A list of self-contained records.
+        """
+        if not common_attributes:
+            return list(records)
+
+        common_dimensions = common_attributes.get("Dimensions", [])
+        other_attributes = {
+            key: value
+            for key, value in common_attributes.items()
+            if key != "Dimensions"
+        }
+        return [
+            {
+                **other_attributes,
+                **record,
+                "Dimensions": common_dimensions + record.get("Dimensions", []),
+            }
+            for record in records
+        ]
+
+    @property
+    def dropped_records_count(self) -> int:
+        return sum(x.dropped_records_count for x in self._table_writers.values())
+
+    def _get_table_writer(self, table_name: str) -> TimestreamTableWriter:
+        if table_name not in self._table_writers:
+            self._table_writers[table_name] = TimestreamTableWriter(
+                self.db_name, table_name, self.timestream_write_client
+            )
+        return self._table_writers[table_name]
+
+    def _submit_batch(self, table_name: str, batch: list, sources: list):
+        # should be called under the lock
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight_batches)
+        table_writer = self._get_table_writer(table_name)
+        future = self._executor.submit(table_writer._write_batch, batch)
+        self._futures.append((future, set(sources)))
+
+    def add_records(
+        self, table_name: str, records: list, common_attributes={}, source=None
+    ):
+        """
+        Adds records to the table's buffer. Full batches are sent right away (in background).
+
+        Args:
+            table_name: The name of the target Timestream table.
+            records: A list of records.
+            common_attributes: Attributes applied to all the records (e.g. dimensions).
+            source: Identifies the records if a batch containing them fails (see TimestreamBufferedWriterException).
+        """
+        records = self.lift_common_attributes(records, common_attributes)
+
+        with self._lock:
+            buffer = self._buffers.setdefault(table_name, [])
+            buffer_sources = self._buffer_sources.setdefault(table_name, [])
+            buffer.extend(records)
+            buffer_sources.extend([source] * len(records))
+            while len(buffer) >= self.RECORDS_BATCH_SIZE:
+                batch = buffer[: self.RECORDS_BATCH_SIZE]
+                batch_sources = buffer_sources[: self.RECORDS_BATCH_SIZE]
+                del buffer[: self.RECORDS_BATCH_SIZE]
+                del buffer_sources[: self.RECORDS_BATCH_SIZE]
+                self._submit_batch(table_name, batch, batch_sources)
+
+    def flush(self) -> list:
+        """
+        Sends the remaining (partial) batches and waits for all in-flight batches to be written.
+
+        Returns:
+            A list of responses from the Timestream write_records API call for each batch.
+
+        Raises:
+            TimestreamBufferedWriterException: If any of the batches failed to be written
+                (the exception names the sources of the failed records, the other batches are written anyway).
+        """
+        with self._lock:
+            for table_name, buffer in self._buffers.items():
+                if buffer:
+                    self._submit_batch(
+                        table_name, buffer, self._buffer_sources[table_name]
+                    )
+            self._buffers = {}
+            self._buffer_sources = {}
+            futures, self._futures = self._futures, []
+            executor, self._executor = self._executor, None
+
+        responses = []
+        errors = []
+        failed_sources = set()
+        for future, sources in futures:
+            try:
+                responses.append(future.result())
+            except Exception as err:
+                errors.append(str(err))
+                failed_sources.update(sources)
+        if executor is not None:
+            executor.shutdown()
+        if self.dropped_records_count:
+            print(
+                f"{self.dropped_records_count} record(s) older than the memory store were dropped"
+            )
+
+        if errors:
+            error_message = f"Error writing buffered records into {self.db_name}: {' '.join(errors)}"
+            raise TimestreamBufferedWriterException(error_message, failed_sources)
+
+        return responses
+
+
 class TimeStreamQueryRunner:
+    # conversions of Timestream scalar types (the values are returned as strings by the query API)
+    SCALAR_TYPE_CONVERTERS = {
+        "BIGINT": int,
+        "INTEGER": int,
+        "DOUBLE": float,
+        "BOOLEAN": lambda x: x.lower() == "true",
+        "TIMESTAMP": convert_timestream_datetime_str,
+    }
+
     def __init__(self, timestream_query_client):
         self.timestream_query_client = timestream_query_client
 
@@ -331,29 +568,79 @@ class TimeStreamQueryRunner:
         else:
             return convert_timestream_datetime_str(result_str)
 
-    def execute_query(self, query):
+    def iter_query_pages(self, query: str) -> Iterator[tuple[list, list]]:
         """
-        Executes a query and returns the result.
+        Executes a query and yields its result pages (following NextToken).
 
         Args:
             query (str): The query to be executed.
 
-        Returns:
-            str: The result of the query.
+        Yields:
+            tuple[list, list]: ColumnInfo and Rows of the page.
         """
-        try:
-            response = self.timestream_query_client.query(QueryString=query)
-            result = QueryResponse(**response)
+        kwargs = {"QueryString": query}
+        while True:
+            try:
+                response = self.timestream_query_client.query(**kwargs)
+            except Exception as e:
+                error_message = f"Error running query: {e}"
+                raise (TimestreamQueryException(error_message))
+
+            yield response["ColumnInfo"], response["Rows"]
+
+            next_token = response.get("NextToken")
+            if not next_token:
+                return
+            kwargs["NextToken"] = next_token
+
+    def _get_row_values(self, row: dict, converters: list = None) -> list:
+        """Returns scalar values of the row (None for nulls), converted if the converters are given."""
+        values = [x.get("ScalarValue") for x in row["Data"]]
+        if converters is None:
+            return values
+        return [
+            value if value is None or converter is None else converter(value)
+            for value, converter in zip(values, converters)
+        ]
+
+    def _get_converters(self, column_info: list) -> list:
+        return [
+            self.SCALAR_TYPE_CONVERTERS.get(x["Type"].get("ScalarType"))
+            for x in column_info
+        ]
+
+    def iter_query_rows(self, query: str, typed: bool = False) -> Iterator[dict]:
+        """
+        Executes a query and yields the result rows page by page (without holding the whole result in memory).
 
-            column_names = [x.Name for x in result.ColumnInfo]
+        Args:
+            query (str): The query to be executed.
+            typed (bool): If True, the values are converted according to the column scalar types
+                (BIGINT/INTEGER to int, DOUBLE to float, BOOLEAN to bool, TIMESTAMP to datetime),
+                otherwise they are returned as strings.
 
-            result_rows = []
-            for row in result.Rows:
-                values = [x.ScalarValue for x in row.Data]
-                data_row = dict(zip(column_names, values))
-                result_rows.append(data_row)
+        Yields:
+            dict: Column name to value.
+        """
+        for column_info, rows in self.iter_query_pages(query):
+            column_names = [x["Name"] for x in column_info]
+            converters = self._get_converters(column_info) if typed else None
+            for row in rows:
+                try:
+                    values = self._get_row_values(row, converters)
+                except Exception as e:
+                    error_message = f"Error converting query result: {e}"
+                    raise (TimestreamQueryException(error_message))
+                yield dict(zip(column_names, values))
 
-            return result_rows
-        except Exception as e:
-            error_message = f"Error running query: {e}"
-            raise (TimestreamQueryException(error_message))
+    def execute_query(self, query):
+        """
+        Executes a query and returns the result (all the pages).
+
+        Args:
+            query (str): The query to be executed.
+
+        Returns:
+            list[dict]: The result rows (column name to string value).
+        """
+        return list(self.iter_query_rows(query))
@@ -57,8 +57,63 @@ class SettingConfigs:
     }
 
 
+class SettingsCacheConfigs:
+    # how long the listed resource names (for wildcards replacement) are reused before being listed again
+    RESOURCE_NAMES_TTL_SECONDS = 600
+    # max number of (resource type, monitored environment) listings running in parallel
+    MAX_LISTING_WORKERS = 10
+    # how long settings cached in a warm Lambda container are reused before being revalidated in S3
+    SETTINGS_MAX_AGE_SECONDS = 60
+
+
 class CloudWatchConfigs:
+    # timeout of one Logs Insights query (i.e. of one time slice of the queried period)
     QUERY_TIMEOUT_SECONDS = 60
+    # max number of rows returned by one Logs Insights query (the service cap)
+    QUERY_MAX_RESULTS = 10000
+    # default max number of Logs Insights queries run concurrently by one query
+    # (the account quota of concurrent queries is shared by all the resources extracted in parallel)
+    MAX_CONCURRENT_QUERIES = 4
+    # the queried period is not split into slices shorter than that upfront
+    MIN_INITIAL_SLICE_SECONDS = 900
+    # slices hitting QUERY_MAX_RESULTS are re-split down to this width
+    MIN_SLICE_MILLISECONDS = 1000
+    # query results are polled with the interval growing exponentially from the initial to the max one
+    POLL_INITIAL_INTERVAL_SECONDS = 0.25
+    POLL_MAX_INTERVAL_SECONDS = 5
+
+
+class ExtractMetricsConfigs:
+    # default number of resources (of one env and type) extracted in parallel
+    MAX_WORKERS = 10
+    # default cap of concurrent extractions against one monitored account (to stay under AWS API throttling limits)
+    MAX_WORKERS_PER_ACCOUNT = 10
+    # default max number of extract-metrics Lambda invocations running at the same time (per orchestrator run)
+    MAX_CONCURRENT_INVOCATIONS = 20
+    # default max number of resources (of one env and type) in a work unit
+    MAX_RESOURCES_PER_WORK_UNIT = 50
+    # rough relative weights of extracting one resource of the type (not measured durations)
+    RESOURCE_EXTRACTION_COSTS = {
+        SettingConfigResourceTypes.GLUE_JOBS: 1.0,
+        SettingConfigResourceTypes.GLUE_WORKFLOWS: 2.0,
+        SettingConfigResourceTypes.GLUE_CRAWLERS: 1.0,
+        SettingConfigResourceTypes.GLUE_DATA_CATALOGS: 5.0,
+        SettingConfigResourceTypes.GLUE_DATA_QUALITY: 2.0,
+        # Logs Insights queries take a while to complete
+        SettingConfigResourceTypes.LAMBDA_FUNCTIONS: 10.0,
+        SettingConfigResourceTypes.STEP_FUNCTIONS: 2.0,
+        SettingConfigResourceTypes.EMR_SERVERLESS: 2.0,
+    }
+    DEFAULT_RESOURCE_EXTRACTION_COST = 1.0
+    # the Glue tables partitions and indexes are recounted once their counts are older than that,
+    # even if the tables haven't been updated (adding partitions doesn't change the UpdateTime of the table)
+    CATALOG_TABLE_COUNTS_MAX_AGE_SECONDS = 6 * 3600
+    # error codes of the resources which don't exist in the monitored account (skipped instead of failing the run)
+    RESOURCE_NOT_FOUND_ERROR_CODES = (
+        "EntityNotFoundException",
+        "ResourceNotFoundException",
+        "StateMachineDoesNotExist",
+    )
 
 
 class TimestreamRetention:
@@ -85,6 +140,65 @@ class DigestSettings:
     REPORT_PERIOD_HOURS = 24
     CRON_EXPRESSION = "cron(0 8 * * ? *)"
     MAX_ERROR_MESSAGE_LENGTH = 100
+    # max number of failed runs (with error messages) per resource returned by the aggregated digest queries
+    MAX_FAILED_RUNS_PER_RESOURCE = 10
+    # max number of resource types extracted concurrently by the digest lambda
+    MAX_EXTRACTION_WORKERS = 4
+
+
+class MetricsRollupConfigs:
+    # granularity of the rollups (hourly per-resource aggregates of the runs)
+    PERIOD_HOURS = 1
+    # max number of resources refreshed with one rollup query (to keep the query text reasonably small)
+    QUERY_CHUNK_SIZE = 500
+    # prefix (in the settings bucket) of the time ranges whose rollups failed to refresh, retried by the next run
+    PENDING_S3_PREFIX = "pending-rollups"
+
+
+class SQSConfigs:
+    # limits of one send_message_batch call: number of entries and total size of the messages
+    MAX_BATCH_ENTRIES = 10
+    MAX_BATCH_BYTES = 256 * 1024
+    # entries failed not due to the sender's fault (e.g. throttled) are resent up to the max number of attempts
+    MAX_SEND_ATTEMPTS = 3
+    # delay before resending the failed entries (doubled after each attempt)
+    RETRY_BASE_DELAY_SECONDS = 0.2
+
+
+class NotificationPayloadConfigs:
+    # messages larger than this are sent with their body offloaded to S3 (claim check),
+    # the margin below the SQS message limit is left for the message attributes and group IDs
+    MAX_INLINE_MESSAGE_BYTES = 200 * 1024
+    # prefix of the offloaded message bodies in the settings bucket
+    S3_PREFIX = "payloads"
+    # the offloaded bodies outlive the notification queue messages (retained for 4 days by default)
+    EXPIRATION_DAYS = 7
+    MESSAGE_BODY_S3_PATH_KEY = "message_body_s3_path"
+
+
+class LambdaLogsSubscriptionConfigs:
+    # only the log entries of the invocations lifecycle are forwarded by the subscription filter
+    FILTER_PATTERN = (
+        '?"START RequestId" ?"END RequestId" ?"REPORT RequestId" ?"[ERROR]"'
+    )
+    # in-progress invocations are kept between the delivered batches for up to the max Lambda timeout (+ margin)
+    MAX_INVOCATION_SECONDS = 960
+    # the delivered batches are accumulated by the event source mapping for up to this time
+    MAX_BATCHING_WINDOW_SECONDS = 30
+    # max number of Kinesis records (i.e. delivered batches) processed by one invocation
+    BATCH_SIZE = 500
+    # partial invocations (whose status is unknown, see LambdaLogsIngestor) are kept in the settings bucket
+    # and extracted from the CloudWatch logs by the scheduled run of the ingesting Lambda
+    PARTIAL_INVOCATIONS_S3_PREFIX = "partial-invocations"
+    PARTIAL_INVOCATIONS_SCHEDULE_MINUTES = 10
+    # the event of the scheduled run has this key set
+    PARTIAL_INVOCATIONS_EVENT_KEY = "extract_partial_invocations"
+    # the partial invocations are extracted once their log entries are surely queryable
+    PARTIAL_INVOCATIONS_MIN_AGE_SECONDS = 300
+    # the ones which still couldn't be extracted after this time are dropped
+    PARTIAL_INVOCATIONS_MAX_AGE_SECONDS = 24 * 3600
+    # margin of the queried period around the estimated invocation times
+    PARTIAL_INVOCATIONS_QUERY_MARGIN_SECONDS = 60
 
 
 class CDKDeployExclusions:
@@ -101,6 +215,7 @@ class CDKResourceNames:
     IAMROLE_EXTRACT_METRICS_LAMBDA = "extract-metrics-lambda"
     IAMROLE_MONITORED_ACC_PUT_EVENTS = "monitored-acc-put-events"
     IAMROLE_MONITORED_ACC_EXTRACT_METRICS = "monitored-acc-extract-metrics"
+    LOGS_DESTINATION_LAMBDA_LOGS = "lambda-logs"
 
 
 class GrafanaDefaultSettings:
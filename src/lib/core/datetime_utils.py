@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import time
 
 
@@ -74,3 +74,33 @@ def str_utc_datetime_to_datetime(datetime_str: str) -> datetime:
     result_datetime = datetime.strptime(datetime_str, "%Y-%m-%d %H:%M:%S.%f")
     result_datetime = result_datetime.replace(tzinfo=timezone.utc)
     return result_datetime
+
+
+def floor_datetime(datetime_value: datetime, period: timedelta) -> datetime:
+    """
+    Round a datetime down to the period boundary (e.g. to the start of the hour for 1 hour period).
+
+    Parameters:
+    datetime_value (datetime): The datetime to be rounded.
+    period (timedelta): The period (should divide a day evenly, e.g. 1 hour).
+
+    Returns:
+    datetime: The rounded datetime (with the same timezone).
+    """
+    day_start = datetime_value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day_start + ((datetime_value - day_start) // period) * period
+
+
+def ceil_datetime(datetime_value: datetime, period: timedelta) -> datetime:
+    """
+    Round a datetime up to the period boundary (e.g. to the start of the next hour for 1 hour period).
+
+    Parameters:
+    datetime_value (datetime): The datetime to be rounded.
+    period (timedelta): The period (should divide a day evenly, e.g. 1 hour).
+
+    Returns:
+    datetime: The rounded datetime (with the same timezone).
+    """
+    floored = floor_datetime(datetime_value, period)
+    return floored if floored == datetime_value else floored + period
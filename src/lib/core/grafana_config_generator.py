@@ -43,7 +43,10 @@ def generate_cloudwatch_dashboard_model(
 
 
 def generate_timestream_dashboard_model(
-    resource_type: str, timestream_database_name: str, timestream_table_name: str
+    resource_type: str,
+    timestream_database_name: str,
+    timestream_table_name: str,
+    timestream_rollup_table_name: str,
 ) -> dict:
     """
     Generates Dashboard json model for Timestream table.
@@ -51,6 +54,8 @@ def generate_timestream_dashboard_model(
     Args:
         timestream_database_name (str): Timestream database name.
         timestream_table_name (str): Timestream table name.
+        timestream_rollup_table_name (str): Timestream table with the hourly rollups of the runs
+            (referred by the run-based dashboards).
 
     Returns:
         dashboard_data (dict): Dashboard json model.
@@ -70,6 +75,7 @@ def generate_timestream_dashboard_model(
     replacements = {
         "<<DATABASE_NAME>>": f'"{timestream_database_name}"',
         "<<DATABASE_TABLE>>": f'"{timestream_table_name}"',
+        "<<ROLLUP_TABLE>>": f'"{timestream_rollup_table_name}"',
     }
     dashboard_data = ju.replace_values_in_json(json_data, replacements)
 
@@ -1,4 +1,6 @@
 import json
+import re
+from typing import Callable
 
 
 def parse_json(json_data: str) -> dict:
@@ -23,9 +25,51 @@ def parse_json(json_data: str) -> dict:
         )
 
 
+def _get_replacer(replacements: dict) -> Callable[[str], str] | None:
+    """Compiles the replacements into a function which replaces all the keys in a string in a single pass.
+
+    The keys are combined into one alternation regex (longer keys first, so overlapping keys
+    are replaced by the longest match). The function returns the very same string if nothing is replaced.
+    Returns None if there is nothing to replace.
+    """
+    keys = sorted((key for key in replacements if key), key=len, reverse=True)
+    if not keys:
+        return None
+    pattern = re.compile("|".join(re.escape(key) for key in keys))
+
+    def replace(value: str) -> str:
+        new_value, replaced_count = pattern.subn(
+            lambda match: replacements[match.group(0)], value
+        )
+        return new_value if replaced_count else value
+
+    return replace
+
+
+def _replace_recursive(obj, replace: Callable[[str], str]):
+    """Replaces values in the nested structure in place (only the changed values are assigned)."""
+    if isinstance(obj, str):
+        return replace(obj)
+
+    if isinstance(obj, dict):
+        items = obj.items()
+    elif isinstance(obj, list):
+        items = enumerate(obj)
+    else:
+        return obj
+
+    for key, value in list(items):
+        new_value = _replace_recursive(value, replace)
+        if new_value is not value:
+            obj[key] = new_value
+    return obj
+
+
 def replace_values_in_json(json_data: json, replacements: dict) -> dict:
     """
-    Replaces values in a JSON object based on a dictionary of replacements.
+    Replaces values in a JSON object (in place) based on a dictionary of replacements.
+    All the replacements are done in a single pass over each string
+    (replaced values are not scanned for other keys again).
 
     Args:
         json_data (dict): The JSON object.
@@ -35,17 +79,7 @@ def replace_values_in_json(json_data: json, replacements: dict) -> dict:
     Returns:
         dict: Updated JSON object.
     """
-
-    def replace_recursive(obj):
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                obj[key] = replace_recursive(value)
-        elif isinstance(obj, list):
-            for i, item in enumerate(obj):
-                obj[i] = replace_recursive(item)
-        elif isinstance(obj, str):
-            for key, value in replacements.items():
-                obj = obj.replace(key, value)
-        return obj
-
-    return replace_recursive(json_data)
+    replace = _get_replacer(replacements)
+    if replace is None:
+        return json_data
+    return _replace_recursive(json_data, replace)
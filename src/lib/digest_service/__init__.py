@@ -15,6 +15,7 @@ from .digest_data_aggregator import (
     AggregatedEntry,
     SummaryEntry,
     ResourceConfig,
+    ResourceRunsSummary,
 )
 from .glue_catalogs_digest_aggregator import (
     GlueCatalogsDigestAggregator,
@@ -24,3 +25,5 @@ from .glue_catalogs_digest_aggregator import (
 from .digest_message_builder import DigestMessageBuilder
 from .digest_data_extractor_provider import DigestDataExtractorProvider
 from .digest_data_aggregator_provider import DigestDataAggregatorProvider
+from .metrics_rollup import MetricsRollup, MetricsRollupException
+from .pending_rollups_store import PendingRollupsStore, PendingRollupsStoreException
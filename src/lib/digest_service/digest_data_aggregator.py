@@ -1,10 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional, Dict, List, DefaultDict
+from typing import Optional, Dict, List, DefaultDict, Tuple
 from collections import defaultdict
 
 from lib.core.constants import DigestSettings, SettingConfigs
 from lib.event_mapper import ExecutionInfoUrlMixin
 
+SLA_BREACHES_COLUMN_PREFIX = "sla_breaches_"
+
 
 class ResourceRun(BaseModel):
     resource_name: str
@@ -23,6 +25,34 @@ class ResourceRun(BaseModel):
     log_stream: Optional[str] = None
 
 
+class ResourceRunsSummary(BaseModel):
+    """Runs of a resource aggregated by the metrics storage (see BaseDigestDataExtractor.get_aggregated_queries)."""
+
+    resource_name: str
+    failed: int = 0
+    succeeded: int = 0
+    execution: int = 0
+    succeeded_with_retries: int = 0
+    sla_breaches: Dict[
+        int, int
+    ] = {}  # SLA threshold (sec) -> number of runs which breached it
+
+    @classmethod
+    def from_row(cls, row: dict) -> "ResourceRunsSummary":
+        """Creates the summary from a row of the summary query (sla_breaches_<seconds> columns are collected)."""
+        sla_breaches = {
+            int(key[len(SLA_BREACHES_COLUMN_PREFIX) :]): value or 0
+            for key, value in row.items()
+            if key.startswith(SLA_BREACHES_COLUMN_PREFIX)
+        }
+        values = {
+            key: value or 0
+            for key, value in row.items()
+            if not key.startswith(SLA_BREACHES_COLUMN_PREFIX)
+        }
+        return cls(**values, sla_breaches=sla_breaches)
+
+
 class ResourceConfig(BaseModel):
     name: str
     region_name: str
@@ -136,16 +166,39 @@ class DigestDataAggregator:
             AggregatedEntry
         )
 
-    def _get_runs_by_resource_name(
-        self, data: dict, resource_name: str
-    ) -> list[ResourceRun]:
-        """Gets runs related to specific resource name."""
-        return [
-            ResourceRun(**entry)
-            for entries in data.values()
-            for entry in entries
-            if entry["resource_name"] == resource_name
-        ]
+    # model of a single run returned by the digest extractor
+    run_model = ResourceRun
+
+    def get_runs_index(self, extracted_runs: dict) -> Dict[str, list]:
+        """Groups the extracted runs by resource name in one pass.
+
+        Each run is parsed only once, so the index can be built once per resource type
+        and shared by the aggregators of all the monitoring groups.
+        """
+        runs_index = defaultdict(list)
+        for entries in extracted_runs.values():
+            for entry in entries:
+                runs_index[entry["resource_name"]].append(self.run_model(**entry))
+        return dict(runs_index)
+
+    def get_summaries_index(
+        self, runs_summaries: dict
+    ) -> Dict[str, Tuple[Optional[ResourceRunsSummary], List[ResourceRun]]]:
+        """Groups the runs summarized by the metrics storage by resource name
+        (see BaseDigestDataExtractor.extract_runs_summaries).
+
+        Returns:
+            dict: Resource name -> (runs summary, sample of failed runs).
+        """
+        summaries_index = {
+            row["resource_name"]: (ResourceRunsSummary.from_row(row), [])
+            for row in runs_summaries.get("summaries", [])
+        }
+        for row in runs_summaries.get("failed_runs", []):
+            summaries_index.setdefault(row["resource_name"], (None, []))[1].append(
+                ResourceRun(**row)
+            )
+        return summaries_index
 
     def _check_sla_breach(
         self, agg_entry: AggregatedEntry, resource_run: ResourceRun
@@ -233,25 +286,82 @@ class DigestDataAggregator:
         self._check_succeeded_with_retry(agg_entry, resource_run)
 
     def get_aggregated_runs(
-        self, extracted_runs: dict, resources_config: List[dict]
+        self,
+        extracted_runs: dict,
+        resources_config: List[dict],
+        runs_index: Optional[Dict[str, list]] = None,
     ) -> Dict[str, AggregatedEntry]:
-        """Aggregates data for each resource specified in the configurations."""
+        """Aggregates data for each resource specified in the configurations.
+
+        If runs_index (see get_runs_index) is not passed, it is built from extracted_runs.
+        """
+        if runs_index is None:
+            runs_index = self.get_runs_index(extracted_runs)
 
         # convert list of dictionaries to list of ResourceConfig instances
         configs = [ResourceConfig(**item) for item in resources_config]
         for resource_config in configs:
-            runs = self._get_runs_by_resource_name(extracted_runs, resource_config.name)
             agg_entry = self.aggregated_runs[resource_config.name]
             agg_entry.MinRuns = resource_config.minimum_number_of_runs
             agg_entry.SLA = resource_config.sla_seconds
 
-            for run in runs:
+            for run in runs_index.get(resource_config.name, []):
                 self._process_single_run(agg_entry, run, resource_config)
 
             self._check_insufficient_runs(agg_entry)
 
         return dict(self.aggregated_runs)
 
+    def _process_runs_summary(
+        self, agg_entry: AggregatedEntry, runs_summary: ResourceRunsSummary
+    ) -> None:
+        """Aggregates runs of a specific resource summarized by the metrics storage."""
+        agg_entry.Errors += runs_summary.failed
+        agg_entry.Success += runs_summary.succeeded
+        agg_entry.Executions += runs_summary.execution
+
+        sla_breaches = runs_summary.sla_breaches.get(agg_entry.SLA, 0)
+        if agg_entry.SLA > 0 and sla_breaches > 0:
+            agg_entry.Warnings += sla_breaches
+            agg_entry.HasSLABreach = True
+
+        if runs_summary.succeeded_with_retries > 0:
+            agg_entry.Warnings += runs_summary.succeeded_with_retries
+            agg_entry.HasFailedAttempts = True
+
+    def get_aggregated_runs_from_summaries(
+        self,
+        runs_summaries: dict,
+        resources_config: List[dict],
+        summaries_index: Optional[dict] = None,
+    ) -> Dict[str, AggregatedEntry]:
+        """Aggregates data for each resource specified in the configurations
+        from the runs aggregated by the metrics storage (see BaseDigestDataExtractor.extract_runs_summaries).
+
+        Comments are generated only for the sample of failed runs returned per resource.
+        If summaries_index (see get_summaries_index) is not passed, it is built from runs_summaries.
+        """
+        if summaries_index is None:
+            summaries_index = self.get_summaries_index(runs_summaries)
+
+        configs = [ResourceConfig(**item) for item in resources_config]
+        for resource_config in configs:
+            agg_entry = self.aggregated_runs[resource_config.name]
+            agg_entry.MinRuns = resource_config.minimum_number_of_runs
+            agg_entry.SLA = resource_config.sla_seconds
+
+            runs_summary, failed_runs = summaries_index.get(
+                resource_config.name, (None, [])
+            )
+            if runs_summary is not None:
+                self._process_runs_summary(agg_entry, runs_summary)
+            for run in failed_runs:
+                self._append_error_comments(run, resource_config, agg_entry)
+
+            self._check_insufficient_runs(agg_entry)
+
+        return dict(self.aggregated_runs)
+
     def get_summary_entry(
         self, group_name: str, aggregated_runs: Dict[str, AggregatedEntry]
     ) -> SummaryEntry:
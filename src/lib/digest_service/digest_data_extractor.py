@@ -1,10 +1,13 @@
 import boto3
 import logging
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Iterator
 
 from lib.aws.timestream_manager import TimeStreamQueryRunner
 from lib.aws.glue_manager import GlueManager
+from lib.core.constants import DigestSettings, MetricsRollupConfigs
+from lib.core.datetime_utils import ceil_datetime, floor_datetime
 from lib.metrics_storage import BaseMetricsStorage
 
 logger = logging.getLogger()
@@ -20,6 +23,16 @@ class BaseDigestDataExtractor(ABC):
     Base Class which provides unified functionality for extracting runs used in the digest report.
     """
 
+    # whether the runs can be aggregated by the metrics storage (see get_aggregated_queries)
+    supports_aggregated_queries = True
+    # whether the runs returned by the query have the failed_attempts column
+    has_failed_attempts = False
+    # additional columns of the runs (e.g. consumed DPU-seconds) summed up in the rollups (see get_rollup_query)
+    rollup_sum_columns: tuple[str, ...] = ()
+    # how long after its first attempt a run can still have attempts (e.g. retries of Lambda invocations):
+    # such runs are selected by the time of their first attempt, so they fall into a single period
+    attempts_lookback = timedelta(0)
+
     def __init__(self, resource_type: str, metrics_storage: BaseMetricsStorage):
         self.metrics_storage = metrics_storage
         self.resource_type = resource_type
@@ -28,11 +41,358 @@ class BaseDigestDataExtractor(ABC):
         self.table_name = metrics_storage.get_metrics_table_name_for_resource_type(
             resource_type=resource_type
         )
+        self.rollup_table_name = (
+            metrics_storage.get_rollup_table_name_for_resource_type(
+                resource_type=resource_type
+            )
+        )
 
     @abstractmethod
     def get_query(self, start_time: datetime, end_time: datetime) -> str:
         pass
 
+    def _get_query_until(self, start_time: datetime, end_time: datetime) -> str:
+        """Returns the runs query for [start_time, end_time) (get_query includes both ends of the period)."""
+        return self.get_query(start_time, end_time - timedelta(microseconds=1))
+
+    @property
+    def _retried_condition(self) -> str:
+        failed_attempts = "failed_attempts" if self.has_failed_attempts else "0"
+        return f"succeeded > 0 AND {failed_attempts} > 0"
+
+    @staticmethod
+    def _get_unique_sla_thresholds(sla_thresholds: list[int]) -> list[int]:
+        return sorted({int(x) for x in sla_thresholds if x and x > 0})
+
+    def get_rollup_query(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        sla_thresholds: list[int],
+        resource_names: list[str] | None = None,
+    ) -> str:
+        """
+        Returns the query which aggregates the runs started in [start_time, end_time) per resource and
+        MetricsRollupConfigs.PERIOD_HOURS (the content of the rollup table, see MetricsRollup):
+        numbers of executions, failed and succeeded runs, runs succeeded after retries and runs which took longer
+        than each of the SLA thresholds (sla_breaches_<seconds> columns), total, max, p50 and p95 execution time
+        and the sums of rollup_sum_columns.
+
+        Args:
+            start_time (datetime): Start of the period (should be aligned with the rollup period).
+            end_time (datetime): End of the period (should be aligned with the rollup period).
+            sla_thresholds (list[int]): SLA thresholds (in seconds) configured for the resources.
+            resource_names (list[str], optional): Resources to aggregate (all if not given).
+        """
+        period = f"{MetricsRollupConfigs.PERIOD_HOURS}h"
+        names_filter = ""
+        if resource_names:
+            names_list = ", ".join(
+                "'" + name.replace("'", "''") + "'" for name in resource_names
+            )
+            names_filter = f"WHERE resource_name IN ({names_list})"
+        sum_columns = "".join(
+            f"""
+                     , SUM({column}) AS {column}"""
+            for column in self.rollup_sum_columns
+        )
+        sla_columns = "".join(
+            f"""
+                     , SUM(CASE WHEN execution_time_sec > {threshold} THEN 1 ELSE 0 END) AS sla_breaches_{threshold}"""
+            for threshold in self._get_unique_sla_thresholds(sla_thresholds)
+        )
+
+        return f"""WITH runs AS ({self._get_query_until(start_time, end_time)})
+                SELECT monitored_environment
+                     , resource_name
+                     , BIN(time, {period}) AS time
+                     , SUM(execution) AS execution
+                     , SUM(failed) AS failed
+                     , SUM(succeeded) AS succeeded
+                     , SUM(CASE WHEN {self._retried_condition} THEN 1 ELSE 0 END) AS succeeded_with_retries
+                     , SUM(execution_time_sec) AS execution_time_sec
+                     , MAX(execution_time_sec) AS max_execution_time_sec
+                     , APPROX_PERCENTILE(execution_time_sec, 0.5) AS p50_execution_time_sec
+                     , APPROX_PERCENTILE(execution_time_sec, 0.95) AS p95_execution_time_sec{sum_columns}{sla_columns}
+                  FROM runs
+                 {names_filter}
+                 GROUP BY monitored_environment, resource_name, BIN(time, {period})
+            """
+
+    def get_rollup_period(
+        self, start_time: datetime, end_time: datetime
+    ) -> tuple[datetime, datetime] | None:
+        """
+        Returns the part of the period (full rollup periods) which can be read from the rollup table
+        or None if the rollups don't cover it (e.g. they have been introduced later than the start of the period).
+        """
+        period = timedelta(hours=MetricsRollupConfigs.PERIOD_HOURS)
+        rollup_start = ceil_datetime(start_time, period)
+        rollup_end = floor_datetime(end_time, period)
+        if rollup_start >= rollup_end:
+            return None
+
+        try:
+            if self.metrics_storage.is_table_empty(self.rollup_table_name):
+                return None
+            rows = list(
+                self.metrics_storage.iter_query_rows(
+                    f'SELECT MIN(time) AS min_time FROM "{self.db_name}"."{self.rollup_table_name}"',
+                    typed=True,
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Rollups of {self.resource_type} can't be used: {e}")
+            return None
+
+        min_time = rows[0]["min_time"] if rows else None
+        if min_time is None or min_time > rollup_start:
+            logger.info(
+                f"Rollups of {self.resource_type} don't cover the period since {rollup_start}"
+            )
+            return None
+        return rollup_start, rollup_end
+
+    def get_rollup_sla_thresholds(self, rollup_start: datetime) -> list[int]:
+        """
+        Returns the SLA thresholds whose breaches can be read from the rollup table since rollup_start
+        (the thresholds configured later have no rollup records for the earlier periods).
+        """
+        try:
+            rows = self.metrics_storage.iter_query_rows(
+                f"""SELECT sla_seconds, MIN(time) AS min_time
+                      FROM "{self.db_name}"."{self.rollup_table_name}"
+                     WHERE sla_seconds <> '0'
+                     GROUP BY sla_seconds""",
+                typed=True,
+            )
+            return sorted(
+                int(row["sla_seconds"])
+                for row in rows
+                if row["min_time"] is not None and row["min_time"] <= rollup_start
+            )
+        except Exception as e:
+            logger.warning(
+                f"SLA breaches of {self.resource_type} can't be read from the rollups: {e}"
+            )
+            return []
+
+    def _get_summary_columns(
+        self,
+        sla_thresholds: list[int],
+        rollup: bool = False,
+        counted: bool = True,
+        breached_sla_thresholds: list[int] | None = None,
+    ) -> str:
+        """
+        Returns the columns of the summary query (aggregated from the runs or from the rollups).
+        The counts (if not counted) and the breaches of the SLA thresholds missing from breached_sla_thresholds
+        (if given) are zeros, so that the summaries of different sources can be summed up.
+        """
+        count_columns = ("execution", "failed", "succeeded", "succeeded_with_retries")
+        if rollup:
+            # counts are stored in the records without SLA threshold, SLA breaches - in the record per threshold
+            counts = {
+                column: f"SUM(CASE WHEN sla_seconds = '0' THEN {column} ELSE 0 END)"
+                for column in count_columns
+            }
+            breaches = {
+                threshold: f"SUM(CASE WHEN sla_seconds = '{threshold}' THEN sla_breaches ELSE 0 END)"
+                for threshold in sla_thresholds
+            }
+        else:
+            counts = {
+                "execution": "SUM(execution)",
+                "failed": "SUM(failed)",
+                "succeeded": "SUM(succeeded)",
+                "succeeded_with_retries": f"SUM(CASE WHEN {self._retried_condition} THEN 1 ELSE 0 END)",
+            }
+            breaches = {
+                threshold: f"SUM(CASE WHEN execution_time_sec > {threshold} THEN 1 ELSE 0 END)"
+                for threshold in sla_thresholds
+            }
+        columns = [
+            f"{counts[column] if counted else 0} AS {column}"
+            for column in count_columns
+        ]
+        if breached_sla_thresholds is None:
+            breached_sla_thresholds = sla_thresholds
+        columns += [
+            f"{breaches[threshold] if threshold in breached_sla_thresholds else 0} AS sla_breaches_{threshold}"
+            for threshold in sla_thresholds
+        ]
+        return "\n                     , ".join(["resource_name"] + columns)
+
+    def get_aggregated_queries(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        sla_thresholds: list[int],
+        rollup_period: tuple[datetime, datetime] | None = None,
+        rollup_sla_thresholds: list[int] | None = None,
+    ) -> tuple[str, str]:
+        """
+        Returns the queries of the aggregated mode, which wrap the runs query (see get_query),
+        so that the metrics storage returns O(resources) rows instead of all the runs:
+            - summary query: one row per resource with the total number of executions, failed and succeeded runs,
+              runs succeeded after retries and runs which took longer than each of the SLA thresholds
+              (sla_breaches_<seconds> columns)
+            - failed runs query: up to DigestSettings.MAX_FAILED_RUNS_PER_RESOURCE failed runs
+              (or runs succeeded after retries) per resource, with their error messages
+
+        If rollup_period is given (see get_rollup_period), the summary of this part of the period is read
+        from the rollup table, and only the runs of the rest of the period are read from the metrics table.
+        The breaches of the SLA thresholds missing from rollup_sla_thresholds (if given, see get_rollup_sla_thresholds)
+        are counted from the runs of the whole period.
+
+        Args:
+            start_time (datetime): Start of the digest period.
+            end_time (datetime): End of the digest period.
+            sla_thresholds (list[int]): SLA thresholds (in seconds) configured for the resources.
+            rollup_period (tuple[datetime, datetime], optional): Part of the period covered by the rollups.
+            rollup_sla_thresholds (list[int], optional): SLA thresholds covered by the rollups (all if not given).
+
+        Returns:
+            tuple[str, str]: Summary query and failed runs query.
+        """
+        sla_thresholds = self._get_unique_sla_thresholds(sla_thresholds)
+        runs_query = self.get_query(start_time, end_time)
+
+        if rollup_period is None:
+            summary_query = f"""WITH runs AS ({runs_query})
+                SELECT {self._get_summary_columns(sla_thresholds)}
+                  FROM runs
+                 GROUP BY resource_name
+            """
+        else:
+            rollup_start, rollup_end = rollup_period
+            # partial rollup periods at the edges of the period are read from the metrics table
+            edge_queries = []
+            if start_time < rollup_start:
+                edge_queries.append(self._get_query_until(start_time, rollup_start))
+            if rollup_end < end_time:
+                edge_queries.append(self.get_query(rollup_end, end_time))
+
+            if rollup_sla_thresholds is None:
+                rollup_sla_thresholds = sla_thresholds
+            missing_sla_thresholds = [
+                x for x in sla_thresholds if x not in rollup_sla_thresholds
+            ]
+
+            summaries = [
+                f"""SELECT {self._get_summary_columns(sla_thresholds, rollup=True, breached_sla_thresholds=rollup_sla_thresholds)}
+                  FROM "{self.db_name}"."{self.rollup_table_name}"
+                 WHERE time >= '{rollup_start}' AND time < '{rollup_end}'
+                 GROUP BY resource_name"""
+            ]
+            if missing_sla_thresholds:
+                summaries.append(
+                    f"""SELECT {self._get_summary_columns(sla_thresholds, counted=False, breached_sla_thresholds=missing_sla_thresholds)}
+                  FROM ({self._get_query_until(rollup_start, rollup_end)})
+                 GROUP BY resource_name"""
+                )
+            if edge_queries:
+                edge_runs = " UNION ALL ".join(
+                    f"SELECT * FROM ({query})" for query in edge_queries
+                )
+                summaries.append(
+                    f"""SELECT {self._get_summary_columns(sla_thresholds)}
+                  FROM ({edge_runs})
+                 GROUP BY resource_name"""
+                )
+            total_columns = "".join(
+                f"""
+                     , SUM({column}) AS {column}"""
+                for column in [
+                    "execution",
+                    "failed",
+                    "succeeded",
+                    "succeeded_with_retries",
+                ]
+                + [f"sla_breaches_{threshold}" for threshold in sla_thresholds]
+            )
+            summary_query = f"""WITH summaries AS ({" UNION ALL ".join(summaries)})
+                SELECT resource_name{total_columns}
+                  FROM summaries
+                 GROUP BY resource_name
+            """
+
+        failed_runs_query = f"""WITH runs AS ({runs_query}),
+                ranked_runs AS (
+                    SELECT runs.*
+                         , ROW_NUMBER() OVER (PARTITION BY resource_name ORDER BY failed DESC, job_run_id) AS rn
+                      FROM runs
+                     WHERE failed > 0 OR ({self._retried_condition})
+                )
+                SELECT *
+                  FROM ranked_runs
+                 WHERE rn <= {DigestSettings.MAX_FAILED_RUNS_PER_RESOURCE}
+            """
+        return summary_query, failed_runs_query
+
+    def extract_runs_summaries(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        sla_thresholds: list[int],
+        use_rollups: bool = True,
+    ) -> dict:
+        """
+        Extracts the runs aggregated per resource (see get_aggregated_queries).
+        If use_rollups is True, the rollups are used where they cover the period (see get_rollup_period).
+
+        Returns:
+            dict: {"summaries": [...], "failed_runs": [...]} or an empty dict if there is no data.
+        """
+        try:
+            if self.metrics_storage.is_table_empty(self.table_name):
+                logger.info(f"No data in table {self.table_name}, skipping..")
+                return {}
+
+            rollup_period = (
+                self.get_rollup_period(start_time, end_time) if use_rollups else None
+            )
+            rollup_sla_thresholds = (
+                self.get_rollup_sla_thresholds(rollup_period[0])
+                if rollup_period and sla_thresholds
+                else None
+            )
+            summary_query, failed_runs_query = self.get_aggregated_queries(
+                start_time,
+                end_time,
+                sla_thresholds,
+                rollup_period=rollup_period,
+                rollup_sla_thresholds=rollup_sla_thresholds,
+            )
+            return {
+                "summaries": list(
+                    self.metrics_storage.iter_query_rows(summary_query, typed=True)
+                ),
+                "failed_runs": list(
+                    self.metrics_storage.iter_query_rows(failed_runs_query)
+                ),
+            }
+        except Exception as e:
+            logger.error(e)
+            error_message = f"Error extracting digest data: {e}"
+            raise DigestException(error_message)
+
+    def iter_runs(self, query: str) -> Iterator[dict]:
+        """Yields the runs returned by the query one by one (without holding the whole result in memory)."""
+        # safety precautions for services where queries are not yet implemented
+        if not (query):
+            return
+
+        try:
+            if self.metrics_storage.is_table_empty(self.table_name):
+                logger.info(f"No data in table {self.table_name}, skipping..")
+                return
+            yield from self.metrics_storage.iter_query_rows(query)
+        except Exception as e:
+            logger.error(e)
+            error_message = f"Error extracting digest data: {e}"
+            raise DigestException(error_message)
+
     def extract_runs(self, query: str) -> dict:
         # safety precautions for services where queries are not yet implemented
         if not (query):
@@ -60,11 +420,14 @@ class GlueJobsDigestDataExtractor(BaseDigestDataExtractor):
     Class is responsible for preparing the query for extracting Glue Jobs runs.
     """
 
+    rollup_sum_columns = ("dpu_seconds",)
+
     def get_query(self, start_time: datetime, end_time: datetime) -> str:
         query = f"""SELECT '{self.resource_type}' as resource_type, monitored_environment, resource_name
                      , case when failed > 0 then job_run_id else '' end as job_run_id, execution
                      , failed, succeeded, execution_time_sec
                      , case when failed > 0 then error_message else '' end as error_message
+                     , dpu_seconds, time
                 FROM "{self.db_name}"."{self.table_name}"
                 WHERE time BETWEEN '{start_time}' AND '{end_time}'
             """
@@ -81,6 +444,7 @@ class GlueWorkflowsDigestDataExtractor(BaseDigestDataExtractor):
                      , case when failed > 0 then workflow_run_id else '' end as job_run_id, execution
                      , failed, succeeded, execution_time_sec
                      , case when failed > 0 then error_message else '' end as error_message 
+                     , time
                 FROM "{self.db_name}"."{self.table_name}" 
                 WHERE time BETWEEN '{start_time}' AND '{end_time}'
             """
@@ -92,11 +456,14 @@ class GlueCrawlersDigestDataExtractor(BaseDigestDataExtractor):
     Class is responsible for preparing the query for extracting Glue Crawlers runs.
     """
 
+    rollup_sum_columns = ("dpu_seconds",)
+
     def get_query(self, start_time: datetime, end_time: datetime) -> str:
         query = f"""SELECT '{self.resource_type}' as resource_type, monitored_environment, resource_name
                          , CASE WHEN failed > 0 THEN crawl_id ELSE '' END as job_run_id
                          , execution, failed, succeeded, duration_sec as execution_time_sec
                          , CASE WHEN failed > 0 THEN error_message ELSE '' END as error_message 
+                         , dpu_seconds, time
                       FROM "{self.db_name}"."{self.table_name}" 
                      WHERE time BETWEEN '{start_time}' AND '{end_time}' 
             """
@@ -108,6 +475,9 @@ class GlueDataCatalogsDigestDataExtractor(BaseDigestDataExtractor):
     Class is responsible for preparing the query for extracting Glue Data Catalogs counts.
     """
 
+    # the counts are already aggregated per resource
+    supports_aggregated_queries = False
+
     def get_query(self, start_time: datetime, end_time: datetime) -> str:
         query = f"""
                 WITH ranked_records AS(
@@ -168,6 +538,7 @@ class GlueDataQualityDigestDataExtractor(BaseDigestDataExtractor):
                      , execution, failed, succeeded, execution_time_sec
                      , case when failed > 0 then error_message else '' end as error_message
                      , context_type, glue_table_name, glue_db_name, glue_job_name  
+                     , time
                 FROM "{self.db_name}"."{self.table_name}" 
                 WHERE time BETWEEN '{start_time}' AND '{end_time}' 
             """
@@ -184,6 +555,7 @@ class StepFunctionsDigestDataExtractor(BaseDigestDataExtractor):
                      , case when failed > 0 then step_function_run_id else '' end as job_run_id
                      , execution, failed, succeeded, duration_sec as execution_time_sec
                      , case when failed > 0 then error_message else '' end as error_message  
+                     , time
                 FROM "{self.db_name}"."{self.table_name}"
                 WHERE time BETWEEN '{start_time}' AND '{end_time}' 
             """
@@ -195,14 +567,22 @@ class LambdaFunctionsDigestDataExtractor(BaseDigestDataExtractor):
     Class is responsible for preparing the query for extracting Lambda Functions invocations.
     """
 
+    has_failed_attempts = True
+    rollup_sum_columns = ("gb_seconds",)
+    # retries of the asynchronous invocations are made within minutes, the attempts delayed
+    # for longer (e.g. the throttled events) are counted as separate invocations
+    attempts_lookback = timedelta(hours=1)
+
     def get_query(self, start_time: datetime, end_time: datetime) -> str:
+        attempts_start_time = start_time - self.attempts_lookback
+        attempts_end_time = end_time + self.attempts_lookback
         query = f"""
                 -- Aggregate error messages by lambda_function_request_id
                 WITH ids AS(
                     SELECT lambda_function_request_id
                          , ARRAY_JOIN(ARRAY_AGG(error_message), ', ') AS error_message
                     FROM "{self.db_name}"."{self.table_name}"
-                    WHERE time BETWEEN '{start_time}' AND '{end_time}'
+                    WHERE time BETWEEN '{attempts_start_time}' AND '{attempts_end_time}'
                     GROUP BY lambda_function_request_id
                 ) 
                 SELECT  '{self.resource_type}' AS resource_type
@@ -216,15 +596,20 @@ class LambdaFunctionsDigestDataExtractor(BaseDigestDataExtractor):
                         , MAX(t.succeeded) AS succeeded
                         , ROUND(SUM(t.duration_ms)/1000, 2) AS execution_time_sec                                
                         , SUM(t.failed) AS failed_attempts
+                        , SUM(t.GB_seconds) AS gb_seconds
+                        , MIN(t.time) AS time
                 FROM "{self.db_name}"."{self.table_name}" t
                 JOIN ids 
                   ON t.lambda_function_request_id=ids.lambda_function_request_id
+                WHERE t.time BETWEEN '{attempts_start_time}' AND '{attempts_end_time}'
                 GROUP BY 
                           t.monitored_environment
                         , t.resource_name
                         , t.lambda_function_request_id
                         , t.log_stream
                         , ids.error_message                 
+                -- the invocation belongs to the period of its first attempt (counted once, with all its retries)
+                HAVING MIN(t.time) BETWEEN '{start_time}' AND '{end_time}'
                 """
         return query
 
@@ -239,6 +624,7 @@ class EMRServerlessDigestDataExtractor(BaseDigestDataExtractor):
                      , case when failed > 0 then job_run_id else '' end as job_run_id
                      , execution, failed, succeeded, execution_time_sec
                      , case when failed > 0 then error_message else '' end as error_message  
+                     , time
                 FROM "{self.db_name}"."{self.table_name}"
                 WHERE time BETWEEN '{start_time}' AND '{end_time}' 
             """
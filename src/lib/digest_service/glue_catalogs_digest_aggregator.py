@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, DefaultDict
+from typing import Dict, DefaultDict, Optional
 from collections import defaultdict
 
 from lib.core.constants import DigestSettings, SettingConfigs
@@ -109,30 +109,23 @@ class GlueCatalogsDigestAggregator(DigestDataAggregator):
             str, GlueCatalogAggregatedEntry
         ] = defaultdict(GlueCatalogAggregatedEntry)
 
-    def _get_runs_by_resource_name(
-        self, data: dict, resource_name: str
-    ) -> list[GlueCatalogRun]:
-        """Gets runs related to specific resource name."""
-        return [
-            GlueCatalogRun(**entry)
-            for entries in data.values()
-            for entry in entries
-            if entry["resource_name"] == resource_name
-        ]
+    run_model = GlueCatalogRun
 
     def get_aggregated_runs(
-        self, extracted_runs: dict, resources_config: list
+        self,
+        extracted_runs: dict,
+        resources_config: list,
+        runs_index: Optional[Dict[str, list]] = None,
     ) -> Dict[str, GlueCatalogAggregatedEntry]:
         """Aggregates data for each resource specified in the configurations."""
+        if runs_index is None:
+            runs_index = self.get_runs_index(extracted_runs)
 
         configs = [ResourceConfig(**item) for item in resources_config]
         for resource_config in configs:
-            resource_runs = self._get_runs_by_resource_name(
-                data=extracted_runs, resource_name=resource_config.name
-            )
             agg_entry = self.aggregated_runs[resource_config.name]
 
-            for run in resource_runs:
+            for run in runs_index.get(resource_config.name, []):
                 agg_entry.Tables += run.tables_count
                 agg_entry.Partitions += run.partitions_count
                 agg_entry.Indexes += run.indexes_count
@@ -0,0 +1,275 @@
+import logging
+from datetime import datetime, timedelta
+
+from lib.core.constants import MetricsRollupConfigs
+from lib.core.datetime_utils import (
+    ceil_datetime,
+    datetime_to_epoch_milliseconds,
+    epoch_milliseconds,
+    floor_datetime,
+)
+from lib.digest_service.digest_data_extractor_provider import (
+    DigestDataExtractorProvider,
+)
+from lib.digest_service.pending_rollups_store import (
+    PendingRollupsStore,
+    PendingRollupsStoreException,
+)
+from lib.metrics_storage import BaseMetricsStorage
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class MetricsRollupException(Exception):
+    """Exception raised for errors encountered while refreshing the rollups."""
+
+    pass
+
+
+class MetricsRollup:
+    """
+    Keeps the rollup table of a resource type up to date: aggregates of the runs per resource and
+    MetricsRollupConfigs.PERIOD_HOURS (see BaseDigestDataExtractor.get_rollup_query), which are read by
+    the digest and the dashboards instead of the raw runs.
+
+    Each rollup period of a resource is stored as:
+        - a record with sla_seconds = '0' dimension: numbers of executions, failed and succeeded runs,
+          runs succeeded after retries, execution time statistics and consumed resources (e.g. DPU-seconds)
+        - a record per SLA threshold with sla_seconds = '<threshold>' dimension: number of runs which breached it
+
+    The rollups are refreshed incrementally: only the periods with newly written runs are recomputed
+    (from the metrics table) and upserted. The Version of the records is the time the recomputation has started,
+    so a rollup computed from more complete data replaces the one computed earlier.
+    The periods which failed to refresh are kept in PendingRollupsStore and refreshed by the next run.
+    """
+
+    MEASURE_NAME = "rollup"
+    NO_SLA = "0"
+    COUNT_COLUMNS = ("execution", "failed", "succeeded", "succeeded_with_retries")
+    DURATION_COLUMNS = (
+        "execution_time_sec",
+        "max_execution_time_sec",
+        "p50_execution_time_sec",
+        "p95_execution_time_sec",
+    )
+
+    def __init__(self, resource_type: str, metrics_storage: BaseMetricsStorage):
+        self.resource_type = resource_type
+        self.metrics_storage = metrics_storage
+        self.digest_extractor = DigestDataExtractorProvider.get_digest_provider(
+            resource_type=resource_type, metrics_storage=metrics_storage
+        )
+        self.table_name = metrics_storage.get_rollup_table_name_for_resource_type(
+            resource_type=resource_type
+        )
+
+    @property
+    def is_supported(self) -> bool:
+        """Whether the runs of the resource type can be rolled up."""
+        return self.digest_extractor.supports_aggregated_queries
+
+    def _get_records(self, row: dict, sla_thresholds: list[int], version: int) -> list:
+        """Converts a row of the rollup query into the rollup records."""
+        common = {
+            "MeasureName": self.MEASURE_NAME,
+            "MeasureValueType": "MULTI",
+            "Time": datetime_to_epoch_milliseconds(row["time"]),
+            "Version": version,
+        }
+
+        def dimensions(sla_seconds: str) -> list:
+            return [
+                {
+                    "Name": "monitored_environment",
+                    "Value": row["monitored_environment"],
+                },
+                {"Name": "resource_name", "Value": row["resource_name"]},
+                {"Name": "sla_seconds", "Value": sla_seconds},
+            ]
+
+        measures = [
+            (column, row.get(column) or 0, "BIGINT") for column in self.COUNT_COLUMNS
+        ] + [("sla_breaches", 0, "BIGINT")]
+        measures += [
+            (column, row.get(column), "DOUBLE")
+            for column in self.DURATION_COLUMNS
+            + self.digest_extractor.rollup_sum_columns
+        ]
+        records = [
+            {
+                **common,
+                "Dimensions": dimensions(self.NO_SLA),
+                "MeasureValues": [
+                    {"Name": name, "Value": str(value), "Type": value_type}
+                    for name, value, value_type in measures
+                    if value is not None
+                ],
+            }
+        ]
+        for threshold in sla_thresholds:
+            breaches = row.get(f"sla_breaches_{threshold}") or 0
+            records.append(
+                {
+                    **common,
+                    "Dimensions": dimensions(str(threshold)),
+                    "MeasureValues": [
+                        {
+                            "Name": "sla_breaches",
+                            "Value": str(breaches),
+                            "Type": "BIGINT",
+                        }
+                    ],
+                }
+            )
+        return records
+
+    def refresh(
+        self,
+        written_time_ranges: dict,
+        sla_thresholds: list[int],
+        earliest_time: datetime | None = None,
+    ) -> int:
+        """
+        Recomputes the rollups of the periods with newly written runs and writes them into the rollup table.
+
+        Args:
+            written_time_ranges (dict): Resource name to (earliest, latest) time of the written runs
+                (see BaseMetricsStorage.get_written_time_ranges).
+            sla_thresholds (list[int]): SLA thresholds (in seconds) configured for the resources.
+            earliest_time (datetime, optional): The earliest time which can still be written into the table.
+
+        Returns:
+            int: Number of the written rollup records.
+        """
+        if not written_time_ranges or not self.is_supported:
+            return 0
+
+        period = timedelta(hours=MetricsRollupConfigs.PERIOD_HOURS)
+        # the written attempts may complete the runs started in the earlier periods
+        start_time = floor_datetime(
+            min(x[0] for x in written_time_ranges.values())
+            - self.digest_extractor.attempts_lookback,
+            period,
+        )
+        if earliest_time is not None and start_time < earliest_time:
+            start_time = ceil_datetime(earliest_time, period)
+        end_time = (
+            floor_datetime(max(x[1] for x in written_time_ranges.values()), period)
+            + period
+        )
+        if start_time >= end_time:
+            return 0
+
+        sla_thresholds = self.digest_extractor._get_unique_sla_thresholds(
+            sla_thresholds
+        )
+        resource_names = sorted(written_time_ranges)
+        version = epoch_milliseconds()
+        records_count = 0
+        try:
+            for i in range(
+                0, len(resource_names), MetricsRollupConfigs.QUERY_CHUNK_SIZE
+            ):
+                query = self.digest_extractor.get_rollup_query(
+                    start_time,
+                    end_time,
+                    sla_thresholds,
+                    resource_names=resource_names[
+                        i : i + MetricsRollupConfigs.QUERY_CHUNK_SIZE
+                    ],
+                )
+                records = [
+                    record
+                    for row in self.metrics_storage.iter_query_rows(query, typed=True)
+                    for record in self._get_records(row, sla_thresholds, version)
+                ]
+                if records:
+                    self.metrics_storage.write_records(self.table_name, records)
+                    records_count += len(records)
+        except Exception as e:
+            logger.error(e)
+            raise MetricsRollupException(
+                f"Error refreshing {self.resource_type} rollups: {e}"
+            )
+
+        logger.info(
+            f"Refreshed {records_count} {self.resource_type} rollup records "
+            f"for {len(resource_names)} resource(s) since {start_time}"
+        )
+        return records_count
+
+    def refresh_written_runs(
+        self,
+        sla_thresholds: list[int],
+        pending_rollups_store: PendingRollupsStore | None = None,
+    ) -> int:
+        """
+        Refreshes the rollups of the runs written by the metrics storage (see BaseMetricsStorage.get_written_time_ranges)
+        and of the periods which previous runs failed to refresh, then writes out the rollup records.
+
+        Should be called once the buffered runs are flushed (the rollups are computed from the metrics table).
+        If the refresh fails, the time ranges of the written runs are kept in pending_rollups_store
+        (if given), to be refreshed by the next run.
+
+        Args:
+            sla_thresholds (list[int]): SLA thresholds (in seconds) configured for the resources.
+            pending_rollups_store (PendingRollupsStore, optional): Store of the periods which still need a refresh.
+
+        Returns:
+            int: Number of the written rollup records.
+        """
+        written_time_ranges = self.metrics_storage.get_written_time_ranges(
+            self.metrics_storage.get_metrics_table_name_for_resource_type(
+                self.resource_type
+            )
+        )
+        if not self.is_supported:
+            return 0
+
+        time_ranges = dict(written_time_ranges)
+        pending_s3_paths = []
+        if pending_rollups_store is not None:
+            try:
+                pending_time_ranges, pending_s3_paths = pending_rollups_store.get(
+                    self.resource_type
+                )
+            except PendingRollupsStoreException as e:
+                # the pending periods are refreshed by one of the next runs
+                logger.warning(e)
+                pending_time_ranges = {}
+            for resource_name, (earliest, latest) in pending_time_ranges.items():
+                if resource_name in time_ranges:
+                    earliest = min(earliest, time_ranges[resource_name][0])
+                    latest = max(latest, time_ranges[resource_name][1])
+                time_ranges[resource_name] = (earliest, latest)
+
+        try:
+            records_count = self.refresh(
+                written_time_ranges=time_ranges,
+                sla_thresholds=sla_thresholds,
+                earliest_time=self.metrics_storage.get_earliest_writeable_time_for_resource_type(
+                    resource_type=self.resource_type
+                ),
+            )
+            if records_count:
+                self.metrics_storage.flush()
+        except Exception as e:
+            if pending_rollups_store is not None and written_time_ranges:
+                try:
+                    pending_rollups_store.add(self.resource_type, written_time_ranges)
+                except PendingRollupsStoreException as store_error:
+                    logger.error(store_error)
+            if isinstance(e, MetricsRollupException):
+                raise
+            raise MetricsRollupException(
+                f"Error writing {self.resource_type} rollups: {e}"
+            ) from e
+
+        if pending_s3_paths:
+            try:
+                pending_rollups_store.remove(pending_s3_paths)
+            except PendingRollupsStoreException as e:
+                # the periods are refreshed once again by the next run
+                logger.warning(e)
+        return records_count
@@ -0,0 +1,108 @@
+import json
+import uuid
+from datetime import datetime
+
+from lib.aws.s3_manager import (
+    S3Manager,
+    S3ManagerReadException,
+    S3ManagerWriteException,
+)
+from lib.core.datetime_utils import epoch_milliseconds
+
+
+class PendingRollupsStoreException(Exception):
+    """Exception raised for errors encountered while storing or reading the pending rollup refreshes."""
+
+    pass
+
+
+class PendingRollupsStore:
+    """
+    Keeps the time ranges of the written runs whose rollups failed to refresh (see MetricsRollup.refresh_written_runs),
+    so that the next run refreshes them along with its own ones.
+
+    Each failed refresh is stored as a separate S3 object (<pending_rollups_s3_path>/<resource_type>/<id>.json
+    with resource name to [earliest, latest] run time), so concurrent runs never overwrite each other's entries.
+    The objects are deleted once their periods have been refreshed. Refreshing a period twice is harmless
+    (the rollups are recomputed and upserted).
+
+    Attributes:
+        pending_rollups_s3_path (str): S3 path the pending refreshes are stored under.
+        s3_manager (S3Manager): S3 manager to write, list and delete the objects.
+    """
+
+    def __init__(self, pending_rollups_s3_path: str, s3_manager: S3Manager = None):
+        self.pending_rollups_s3_path = pending_rollups_s3_path.rstrip("/") + "/"
+        self.s3_manager = S3Manager() if s3_manager is None else s3_manager
+
+    def _get_prefix(self, resource_type: str) -> str:
+        return f"{self.pending_rollups_s3_path}{resource_type}/"
+
+    def add(self, resource_type: str, time_ranges: dict):
+        """
+        Stores the time ranges whose rollups still need a refresh.
+
+        Args:
+            resource_type (str): Resource type of the runs.
+            time_ranges (dict): Resource name to (earliest, latest) time of the runs (datetime).
+        """
+        s3_path = f"{self._get_prefix(resource_type)}{epoch_milliseconds()}-{uuid.uuid4().hex}.json"
+        content = {
+            resource_name: [earliest.isoformat(), latest.isoformat()]
+            for resource_name, (earliest, latest) in time_ranges.items()
+        }
+        try:
+            self.s3_manager.write_file(s3_path, json.dumps(content))
+        except S3ManagerWriteException as e:
+            raise PendingRollupsStoreException(
+                f"Error storing pending {resource_type} rollups: {e}"
+            ) from e
+
+    def get(self, resource_type: str) -> tuple[dict, list[str]]:
+        """
+        Returns the time ranges whose rollups still need a refresh.
+
+        Args:
+            resource_type (str): Resource type of the runs.
+
+        Returns:
+            tuple[dict, list[str]]: Resource name to (earliest, latest) time of the runs (merged across
+                the stored refreshes) and S3 paths of the stored refreshes (to be removed once refreshed).
+        """
+        time_ranges, s3_paths = {}, []
+        try:
+            for s3_path in self.s3_manager.list_files(self._get_prefix(resource_type)):
+                try:
+                    content = json.loads(self.s3_manager.read_file(s3_path))
+                except FileNotFoundError:
+                    # already refreshed and removed by a concurrent run
+                    continue
+                s3_paths.append(s3_path)
+                for resource_name, (earliest, latest) in content.items():
+                    earliest = datetime.fromisoformat(earliest)
+                    latest = datetime.fromisoformat(latest)
+                    if resource_name in time_ranges:
+                        earliest = min(earliest, time_ranges[resource_name][0])
+                        latest = max(latest, time_ranges[resource_name][1])
+                    time_ranges[resource_name] = (earliest, latest)
+        except (S3ManagerReadException, ValueError) as e:
+            raise PendingRollupsStoreException(
+                f"Error reading pending {resource_type} rollups: {e}"
+            ) from e
+        return time_ranges, s3_paths
+
+    def remove(self, s3_paths: list[str]):
+        """
+        Removes the stored refreshes (once their periods have been refreshed).
+
+        Args:
+            s3_paths (list[str]): S3 paths of the stored refreshes (see get).
+        """
+        if not s3_paths:
+            return
+        try:
+            self.s3_manager.delete_files(s3_paths)
+        except S3ManagerWriteException as e:
+            raise PendingRollupsStoreException(
+                f"Error removing pending rollups: {e}"
+            ) from e
@@ -3,8 +3,19 @@ from .glue_jobs_metrics_extractor import GlueJobsMetricExtractor
 from .glue_workflows_metrics_extractor import GlueWorkflowsMetricExtractor
 from .glue_crawlers_metrics_extractor import GlueCrawlersMetricExtractor
 from .glue_catalogs_metrics_extractor import GlueCatalogsMetricExtractor
+from .catalog_counts_cache import CatalogCountsCache, CatalogCountsCacheException
 from .glue_data_quality_metrics_extractor import GlueDataQualityMetricExtractor
 from .lambda_functions_metrics_extractor import LambdaFunctionsMetricExtractor
 from .step_functions_metrics_extractor import StepFunctionsMetricExtractor
 from .emr_serverless_metrics_extractor import EMRServerlessMetricExtractor
 from .metrics_extractor_provider import MetricsExtractorProvider
+from .extraction_planner import ExtractionPlanner, WorkUnit
+from .lambda_logs_ingestor import (
+    LambdaLogsIngestor,
+    LambdaLogsIngestorException,
+    LambdaLogsBatch,
+)
+from .partial_invocations_store import (
+    PartialInvocationsStore,
+    PartialInvocationsStoreException,
+)
@@ -0,0 +1,96 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from lib.aws.glue_manager import CatalogData, TableModel
+from lib.aws.s3_manager import (
+    S3Manager,
+    S3ManagerReadException,
+    S3ManagerWriteException,
+)
+from lib.core.constants import ExtractMetricsConfigs
+
+
+class CatalogCountsCacheException(Exception):
+    """Exception raised for errors encountered while reading or writing the cached Glue tables counts."""
+
+    pass
+
+
+class CatalogCountsCache:
+    """
+    Keeps the partitions and indexes counts of the Glue Data Catalog tables between the extraction runs,
+    so that only the tables updated since (by their UpdateTime) are counted again (see GlueManager.get_catalog_data).
+
+    The tables of each database are stored as a separate S3 object
+    (<catalog_counts_s3_path>/<account_id>/<region>/<database name>.json), so the databases extracted
+    in parallel never overwrite each other's entries. Adding partitions doesn't change the UpdateTime
+    of the table, so the counts older than max_age_seconds are not returned (the tables are counted again).
+
+    Attributes:
+        catalog_counts_s3_path (str): S3 path the counts are stored under.
+        max_age_seconds (int): How long the counts of a table are reused.
+        s3_manager (S3Manager): S3 manager to read and write the objects.
+    """
+
+    def __init__(
+        self,
+        catalog_counts_s3_path: str,
+        max_age_seconds: int = ExtractMetricsConfigs.CATALOG_TABLE_COUNTS_MAX_AGE_SECONDS,
+        s3_manager: S3Manager = None,
+    ):
+        self.catalog_counts_s3_path = catalog_counts_s3_path.rstrip("/") + "/"
+        self.max_age_seconds = max_age_seconds
+        self.s3_manager = S3Manager() if s3_manager is None else s3_manager
+
+    def _get_s3_path(self, account_id: str, region: str, db_name: str) -> str:
+        return f"{self.catalog_counts_s3_path}{account_id}/{region}/{db_name}.json"
+
+    def get(self, account_id: str, region: str, db_name: str) -> list[TableModel]:
+        """
+        Returns the tables of the database whose counts can still be reused (counted within max_age_seconds).
+
+        Args:
+            account_id (str): Account ID of the Data Catalog.
+            region (str): Region of the Data Catalog.
+            db_name (str): Name of the database.
+        """
+        try:
+            content = self.s3_manager.read_file(
+                self._get_s3_path(account_id, region, db_name)
+            )
+        except FileNotFoundError:
+            return []
+        except S3ManagerReadException as e:
+            raise CatalogCountsCacheException(
+                f"Error reading cached counts of {db_name}: {e}"
+            ) from e
+
+        counted_after = datetime.now(tz=timezone.utc) - timedelta(
+            seconds=self.max_age_seconds
+        )
+        tables = [TableModel(**x) for x in json.loads(content)]
+        return [
+            table
+            for table in tables
+            if table.CountedOn is not None and table.CountedOn > counted_after
+        ]
+
+    def put(self, account_id: str, region: str, catalog_data: CatalogData):
+        """
+        Stores the counted tables of the database (replacing the ones stored before).
+
+        Args:
+            account_id (str): Account ID of the Data Catalog.
+            region (str): Region of the Data Catalog.
+            catalog_data (CatalogData): The database with the counted tables.
+        """
+        content = [table.model_dump(mode="json") for table in catalog_data.TableList]
+        try:
+            self.s3_manager.write_file(
+                self._get_s3_path(account_id, region, catalog_data.DatabaseName),
+                json.dumps(content),
+            )
+        except S3ManagerWriteException as e:
+            raise CatalogCountsCacheException(
+                f"Error storing counts of {catalog_data.DatabaseName}: {e}"
+            ) from e
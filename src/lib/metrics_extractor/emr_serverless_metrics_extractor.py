@@ -23,9 +23,7 @@ class EMRServerlessMetricExtractor(BaseMetricsExtractor):
             return []
 
         # extract detailed information about each finished run
-        job_runs = [
-            emr_man.get_job_run(app_id=app_id, run_id=run_id) for run_id in runs_ids
-        ]
+        job_runs = emr_man.get_job_runs(app_id=app_id, run_ids=runs_ids)
         return job_runs
 
     def _data_to_timestream_records(self, job_runs: list[EMRJobRunData]) -> list:
@@ -0,0 +1,163 @@
+import heapq
+from itertools import groupby
+
+from pydantic import BaseModel
+
+from lib.core.constants import SettingConfigs, ExtractMetricsConfigs
+
+
+class WorkUnit(BaseModel):
+    """A chunk of resources of one type in one monitored environment, extracted by one Lambda invocation."""
+
+    monitored_environment_name: str
+    resource_type: str
+    resource_names: list[str]
+
+    @property
+    def estimated_cost(self) -> float:
+        """Estimated extraction cost (unitless, relative to the other work units)."""
+        cost_per_resource = ExtractMetricsConfigs.RESOURCE_EXTRACTION_COSTS.get(
+            self.resource_type, ExtractMetricsConfigs.DEFAULT_RESOURCE_EXTRACTION_COST
+        )
+        return len(self.resource_names) * cost_per_resource
+
+
+class ExtractionPlanner:
+    """
+    Splits monitoring groups into work units and distributes them evenly across extract-metrics invocations.
+    """
+
+    @staticmethod
+    def get_work_units(
+        monitoring_group_content: dict, max_resources_per_unit: int = None
+    ) -> list[WorkUnit]:
+        """
+        Splits the monitoring group content (with replaced wildcards) into work units:
+        by monitored environment, resource type and chunks of up to max_resources_per_unit resources.
+
+        Args:
+            monitoring_group_content (dict): Monitoring group content.
+            max_resources_per_unit (int): Max number of resources in a work unit (None means no chunking).
+
+        Returns:
+            list[WorkUnit]: Work units (in the order of resource types in the group, then by environment).
+        """
+        work_units = []
+        for attr_name, attr_value in monitoring_group_content.items():
+            # checking if it's our section like "glue_jobs", "lambda_functions" etc.
+            if not (
+                isinstance(attr_value, list)
+                and attr_name in SettingConfigs.RESOURCE_TYPES
+            ):
+                continue
+
+            # sorting so we can process resources optimally
+            data = sorted(attr_value, key=lambda x: x["monitored_environment_name"])
+            for monitored_environment_name, group in groupby(
+                data, key=lambda x: x["monitored_environment_name"]
+            ):
+                resource_names = [item["name"] for item in group]
+                chunk_size = max_resources_per_unit or len(resource_names)
+                for i in range(0, len(resource_names), chunk_size):
+                    work_units.append(
+                        WorkUnit(
+                            monitored_environment_name=monitored_environment_name,
+                            resource_type=attr_name,
+                            resource_names=resource_names[i : i + chunk_size],
+                        )
+                    )
+
+        return work_units
+
+    @staticmethod
+    def get_extraction_plan(
+        monitoring_groups: list[dict],
+        max_resources_per_unit: int = None,
+        excluded_resources: set[tuple[str, str, str]] = None,
+    ) -> list[WorkUnit]:
+        """
+        Builds work units for all the monitoring groups (with replaced wildcards),
+        so that each (monitored environment, resource type, resource name) is extracted exactly once,
+        even if the resource belongs to several groups.
+
+        Args:
+            monitoring_groups (list[dict]): Monitoring groups content.
+            max_resources_per_unit (int): Max number of resources in a work unit (None means no chunking).
+            excluded_resources (set): (monitored environment, resource type, resource name) of the resources
+                which are not extracted (e.g. Lambda functions whose logs are pushed by the subscription filters).
+
+        Returns:
+            list[WorkUnit]: Work units.
+        """
+        unique_resources = {}
+        seen = set(excluded_resources or ())
+        for monitoring_group in monitoring_groups:
+            for resource_type in SettingConfigs.RESOURCE_TYPES:
+                for resource in monitoring_group.get(resource_type, []):
+                    key = (
+                        resource["monitored_environment_name"],
+                        resource_type,
+                        resource["name"],
+                    )
+                    if key not in seen:
+                        seen.add(key)
+                        unique_resources.setdefault(resource_type, []).append(resource)
+
+        return ExtractionPlanner.get_work_units(
+            unique_resources, max_resources_per_unit=max_resources_per_unit
+        )
+
+    @staticmethod
+    def distribute_work_units(
+        work_units: list[WorkUnit], max_workers: int
+    ) -> list[list[WorkUnit]]:
+        """
+        Distributes work units across up to max_workers workers, so that the workers' estimated costs are even
+        (the most expensive units are assigned first, each to the least loaded worker).
+
+        Args:
+            work_units (list[WorkUnit]): Work units.
+            max_workers (int): Max number of workers (i.e. concurrent extract-metrics invocations).
+
+        Returns:
+            list[list[WorkUnit]]: Work units of each worker.
+        """
+        workers_count = min(max_workers, len(work_units))
+        workers = [[] for _ in range(workers_count)]
+        # heap of (estimated cost, worker index)
+        workers_load = [(0.0, i) for i in range(workers_count)]
+
+        for work_unit in sorted(
+            work_units, key=lambda x: x.estimated_cost, reverse=True
+        ):
+            load, worker_index = heapq.heappop(workers_load)
+            workers[worker_index].append(work_unit)
+            heapq.heappush(
+                workers_load, (load + work_unit.estimated_cost, worker_index)
+            )
+
+        return workers
+
+    @staticmethod
+    def filter_last_update_times(
+        last_update_times: dict, work_units: list[WorkUnit]
+    ) -> dict:
+        """
+        Keeps only the last update times of the resources in the work units
+        (to keep the invocation payload small).
+        """
+        resource_names = {
+            (work_unit.resource_type, resource_name)
+            for work_unit in work_units
+            for resource_name in work_unit.resource_names
+        }
+        filtered = {}
+        for resource_type, items in (last_update_times or {}).items():
+            items = [
+                item
+                for item in items
+                if (resource_type, item.get("resource_name")) in resource_names
+            ]
+            if items:
+                filtered[resource_type] = items
+        return filtered
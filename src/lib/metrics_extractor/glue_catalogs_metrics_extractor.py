@@ -1,6 +1,10 @@
 from datetime import datetime, timezone
 
 from lib.metrics_extractor.base_metrics_extractor import BaseMetricsExtractor
+from lib.metrics_extractor.catalog_counts_cache import (
+    CatalogCountsCache,
+    CatalogCountsCacheException,
+)
 from lib.aws.glue_manager import GlueManager, CatalogData
 from lib.core import datetime_utils
 
@@ -10,9 +14,36 @@ class GlueCatalogsMetricExtractor(BaseMetricsExtractor):
     Class is responsible for extracting glue catalogs metrics
     """
 
+    catalog_counts_cache: CatalogCountsCache | None = None
+
+    def set_catalog_counts_cache(self, catalog_counts_cache: CatalogCountsCache):
+        self.catalog_counts_cache = catalog_counts_cache
+
     def _extract_metrics_data(self) -> CatalogData:
         glue_man = GlueManager(super().get_aws_service_client())
-        return glue_man.get_catalog_data(db_name=self.resource_name)
+        if self.catalog_counts_cache is None:
+            return glue_man.get_catalog_data(db_name=self.resource_name)
+
+        # the cache is best-effort: the tables are just counted again if it can't be read or written
+        account_id, region = (
+            self.boto3_client_creator.account_id,
+            self.boto3_client_creator.region,
+        )
+        try:
+            cached_tables = self.catalog_counts_cache.get(
+                account_id, region, self.resource_name
+            )
+        except CatalogCountsCacheException as e:
+            print(f"GlueCatalogs extractor: {e}")
+            cached_tables = []
+        catalog_data = glue_man.get_catalog_data(
+            db_name=self.resource_name, cached_tables=cached_tables
+        )
+        try:
+            self.catalog_counts_cache.put(account_id, region, catalog_data)
+        except CatalogCountsCacheException as e:
+            print(f"GlueCatalogs extractor: {e}")
+        return catalog_data
 
     def _data_to_timestream_records(self, catalog_data: CatalogData) -> list:
         common_dimensions = [
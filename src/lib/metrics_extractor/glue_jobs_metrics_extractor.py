@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Iterable
 from lib.aws.glue_manager import GlueManager, JobRun
 
 from lib.metrics_extractor.base_metrics_extractor import BaseMetricsExtractor
@@ -10,14 +11,14 @@ class GlueJobsMetricExtractor(BaseMetricsExtractor):
     Class is responsible for extracting glue job metrics
     """
 
-    def _extract_metrics_data(self, since_time: datetime) -> list[JobRun]:
+    def _extract_metrics_data(self, since_time: datetime) -> Iterable[JobRun]:
         glue_man = GlueManager(super().get_aws_service_client())
         job_runs = glue_man.get_job_runs(
             job_name=self.resource_name, since_time=since_time
         )
         return job_runs
 
-    def _data_to_timestream_records(self, job_runs: list[JobRun]) -> list:
+    def _data_to_timestream_records(self, job_runs: Iterable[JobRun]) -> list:
         common_dimensions = [
             {"Name": "monitored_environment", "Value": self.monitored_environment_name},
             {"Name": self.RESOURCE_NAME_COLUMN_NAME, "Value": self.resource_name},
@@ -1,6 +1,7 @@
 import json
 import boto3
 from datetime import datetime
+from typing import Iterable
 from lib.metrics_extractor.base_metrics_extractor import BaseMetricsExtractor
 from lib.core.constants import EventResult
 
@@ -14,14 +15,14 @@ class GlueWorkflowsMetricExtractor(BaseMetricsExtractor):
     Class is responsible for extracting glue job metrics
     """
 
-    def _extract_metrics_data(self, since_time: datetime) -> list[WorkflowRun]:
+    def _extract_metrics_data(self, since_time: datetime) -> Iterable[WorkflowRun]:
         glue_man = GlueManager(super().get_aws_service_client())
         workflow_runs = glue_man.get_workflow_runs(
             workflow_name=self.resource_name, since_time=since_time
         )
         return workflow_runs
 
-    def _data_to_timestream_records(self, workflow_runs: list[WorkflowRun]) -> list:
+    def _data_to_timestream_records(self, workflow_runs: Iterable[WorkflowRun]) -> list:
         common_dimensions = [
             {"Name": "monitored_environment", "Value": self.monitored_environment_name},
             {"Name": self.RESOURCE_NAME_COLUMN_NAME, "Value": self.resource_name},
@@ -30,6 +31,7 @@ class GlueWorkflowsMetricExtractor(BaseMetricsExtractor):
         common_attributes = {"Dimensions": common_dimensions}
 
         records = []
+        glue_man = None
         for workflow_run in workflow_runs:
             if GlueManager.is_workflow_final_state(
                 workflow_run.Status
@@ -42,7 +44,8 @@ class GlueWorkflowsMetricExtractor(BaseMetricsExtractor):
                 # If ErrorMessage is not returned for the failed Glue workflow run,
                 # generate an error message based on all failed components that belong to the workflow
                 if workflow_run.IsFailure and workflow_run_error_message is None:
-                    glue_man = GlueManager(super().get_aws_service_client())
+                    if glue_man is None:
+                        glue_man = GlueManager(super().get_aws_service_client())
                     workflow_run_error_message = (
                         glue_man.generate_workflow_run_error_message(
                             workflow_name=workflow_run.Name,
@@ -105,7 +108,8 @@ class GlueWorkflowsMetricExtractor(BaseMetricsExtractor):
         return records, common_attributes
 
     def prepare_metrics_data(self, since_time: datetime) -> (list, dict):
-        self.workflow_runs = self._extract_metrics_data(since_time=since_time)
+        # runs are kept as a list, since they are also used for sending alerts
+        self.workflow_runs = list(self._extract_metrics_data(since_time=since_time))
         records, common_attributes = self._data_to_timestream_records(
             self.workflow_runs
         )
@@ -14,11 +14,13 @@ class LambdaFunctionsMetricExtractor(BaseMetricsExtractor):
     Class is responsible for extracting lambda function metrics
     """
 
-    def _extract_metrics_data(self, since_time: datetime) -> list[LambdaInvocation]:
+    def _extract_metrics_data(
+        self, since_time: datetime, until_time: datetime = None
+    ) -> list[LambdaInvocation]:
         cloudwatch_man = CloudWatchManager(super().get_aws_service_client("logs"))
         lambda_man = LambdaManager(super().get_aws_service_client())
         lambda_invocations = lambda_man.get_lambda_invocations(
-            cloudwatch_man, self.resource_name, since_time
+            cloudwatch_man, self.resource_name, since_time, until_time
         )
         return lambda_invocations
 
@@ -92,6 +94,25 @@ class LambdaFunctionsMetricExtractor(BaseMetricsExtractor):
         )
         return records, common_attributes
 
+    def prepare_metrics_data_from_invocations(
+        self, lambda_invocations: list[LambdaInvocation]
+    ) -> tuple[list, dict]:
+        """
+        Converts the invocations pushed by the CloudWatch Logs subscription filter to Timestream records
+        (they are sent as alerts by send_alerts as well as the extracted ones).
+        """
+        self.lambda_invocations = lambda_invocations
+        return self._data_to_timestream_records(self.lambda_invocations)
+
+    def extract_invocations(
+        self, since_time: datetime, until_time: datetime
+    ) -> list[LambdaInvocation]:
+        """
+        Extracts the invocations of the period from the CloudWatch logs
+        (e.g. the partial ones pushed by the subscription filter, see LambdaLogsIngestor).
+        """
+        return self._extract_metrics_data(since_time=since_time, until_time=until_time)
+
     ###########################################################################################
     def generate_event(
         self,
@@ -0,0 +1,169 @@
+import re
+import gzip
+import json
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from pydantic import BaseModel
+
+from lib.aws.lambda_manager import (
+    ERROR_PATTERN,
+    LambdaInvocation,
+    LambdaLogProcessor,
+    LambdaManager,
+)
+from lib.core.constants import LambdaLogsSubscriptionConfigs
+
+# START RequestId: <id> Version: $LATEST / END RequestId: <id> / REPORT RequestId: <id>\tDuration: ...
+REQUEST_ID_PATTERN = re.compile(r"RequestId: ([^\s]+)")
+# log streams of the custom log groups (LoggingConfig) start with the function name:
+# YYYY/MM/DD/<function name>[<version>]<instance ID>
+CUSTOM_LOG_STREAM_PATTERN = re.compile(r"^\d{4}/\d{2}/\d{2}/([^\[/]+)\[")
+
+
+class LambdaLogsIngestorException(Exception):
+    """Exception raised for errors encountered while ingesting the Lambda logs pushed by the subscription filters."""
+
+    pass
+
+
+class LambdaLogsBatch(BaseModel):
+    """Log events of one log stream delivered by a CloudWatch Logs subscription filter."""
+
+    account_id: str
+    log_group: str
+    log_stream: str
+    log_events: list[dict]
+
+    @property
+    def function_name(self) -> str:
+        """Function name from the log stream (custom log groups can be shared by the functions) or the log group."""
+        match = CUSTOM_LOG_STREAM_PATTERN.match(self.log_stream)
+        if match:
+            return match.group(1)
+        return self.log_group.removeprefix(LambdaLogsIngestor.LOG_GROUP_PREFIX)
+
+
+class LambdaLogsIngestor:
+    """
+    Turns the Lambda log events pushed by the CloudWatch Logs subscription filters into the completed invocations.
+
+    The log events are delivered as gzip-compressed, base64-encoded batches either directly (awslogs event)
+    or through the Kinesis stream behind the cross-account Logs destination (Kinesis event).
+    Each (account, function) has its own LambdaLogProcessor which is kept between the handled events,
+    so the invocations whose entries are spread across several batches are completed once their REPORT
+    entry arrives. The state is not shared between the containers though: an invocation whose START entry
+    has been processed by another container is completed only if its failure has been seen (the start time
+    is estimated from the REPORT entry). The status of the rest of such partial invocations is unknown,
+    so they are returned by pop_partial_invocations to be extracted from the CloudWatch logs later on.
+    """
+
+    LOG_GROUP_PREFIX = "/aws/lambda/"
+    DATA_MESSAGE_TYPE = "DATA_MESSAGE"
+
+    def __init__(self):
+        self.log_processors: dict[tuple[str, str], LambdaLogProcessor] = {}
+
+    @staticmethod
+    def decode_log_data(data: str | bytes) -> dict:
+        """Decodes the gzip-compressed, base64-encoded payload of the subscription filter."""
+        try:
+            return json.loads(gzip.decompress(base64.b64decode(data)))
+        except Exception as e:
+            raise LambdaLogsIngestorException(f"Error decoding log data: {e}")
+
+    @classmethod
+    def get_log_batches(cls, event: dict) -> list[LambdaLogsBatch]:
+        """
+        Extracts the log batches from the awslogs or Kinesis event
+        (the control messages sent to check the destination are skipped).
+        """
+        if "awslogs" in event:
+            payloads = [event["awslogs"]["data"]]
+        else:
+            payloads = [
+                record["kinesis"]["data"] for record in event.get("Records", [])
+            ]
+
+        log_batches = []
+        for payload in payloads:
+            log_data = cls.decode_log_data(payload)
+            if log_data.get("messageType") != cls.DATA_MESSAGE_TYPE:
+                continue
+            log_batches.append(
+                LambdaLogsBatch(
+                    account_id=log_data["owner"],
+                    log_group=log_data["logGroup"],
+                    log_stream=log_data["logStream"],
+                    log_events=log_data.get("logEvents", []),
+                )
+            )
+        return log_batches
+
+    @staticmethod
+    def get_request_id(message: str) -> Optional[str]:
+        """Extracts the Request ID from the message (the pushed log events have no @requestId field)."""
+        if message.startswith(LambdaManager.MESSAGE_PART_ERROR):
+            match = ERROR_PATTERN.match(message)
+            return (match.group(1) or None) if match else None
+        match = REQUEST_ID_PATTERN.search(message)
+        return match.group(1) if match else None
+
+    def process_log_batches(
+        self, log_batches: list[LambdaLogsBatch]
+    ) -> dict[tuple[str, str], list[LambdaInvocation]]:
+        """
+        Processes the log batches and returns the invocations completed by them.
+
+        Returns:
+            dict: (account ID, function name) to the completed invocations.
+        """
+        processors = {}
+        for log_batch in log_batches:
+            key = (log_batch.account_id, log_batch.function_name)
+            log_processor = self.log_processors.get(key)
+            if log_processor is None:
+                log_processor = self.log_processors[key] = LambdaLogProcessor(
+                    log_batch.function_name, complete_partial_invocations=True
+                )
+            processors[key] = log_processor
+
+            for log_event in log_batch.log_events:
+                message = log_event.get("message")
+                if not message:
+                    continue
+                log_processor.process_log_event(
+                    log_stream=log_batch.log_stream,
+                    message=message,
+                    request_id=self.get_request_id(message),
+                    timestamp=datetime.fromtimestamp(
+                        log_event["timestamp"] / 1000, tz=timezone.utc
+                    ),
+                )
+
+        # the invocations which haven't been completed in time won't be completed anymore
+        stale_time = datetime.now(tz=timezone.utc) - timedelta(
+            seconds=LambdaLogsSubscriptionConfigs.MAX_INVOCATION_SECONDS
+        )
+        completed_invocations = {}
+        for key, log_processor in processors.items():
+            log_processor.drop_stale_invocations(started_before=stale_time)
+            invocations = log_processor.pop_completed_invocations()
+            if invocations:
+                completed_invocations[key] = invocations
+        return completed_invocations
+
+    def pop_partial_invocations(self) -> dict[tuple[str, str], list[LambdaInvocation]]:
+        """
+        Returns the partial invocations (reported, but with unknown status, see LambdaLogProcessor) and clears them.
+
+        Returns:
+            dict: (account ID, function name) to the partial invocations.
+        """
+        partial_invocations = {}
+        for key, log_processor in self.log_processors.items():
+            invocations = log_processor.pop_partial_invocations()
+            if invocations:
+                partial_invocations[key] = invocations
+        return partial_invocations
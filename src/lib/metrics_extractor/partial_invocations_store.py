@@ -0,0 +1,138 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+from lib.aws.lambda_manager import LambdaInvocation
+from lib.aws.s3_manager import (
+    S3Manager,
+    S3ManagerReadException,
+    S3ManagerWriteException,
+)
+from lib.core.datetime_utils import epoch_milliseconds
+
+
+class PartialInvocationsStoreException(Exception):
+    """Exception raised for errors encountered while storing or reading the partial Lambda invocations."""
+
+    pass
+
+
+class PartialInvocationsStore:
+    """
+    Keeps the partial Lambda invocations pushed by the subscription filters (reported, but with unknown status,
+    see LambdaLogsIngestor), so that the scheduled run extracts them from the CloudWatch logs.
+
+    The partial invocations of each processed batch are stored as a separate S3 object
+    (<partial_invocations_s3_path>/<account_id>/<function_name>/<stored time>-<id>.json), so concurrent
+    containers never overwrite each other's entries. The objects are deleted once their invocations are extracted.
+
+    Attributes:
+        partial_invocations_s3_path (str): S3 path the partial invocations are stored under.
+        s3_manager (S3Manager): S3 manager to write, list and delete the objects.
+    """
+
+    def __init__(self, partial_invocations_s3_path: str, s3_manager: S3Manager = None):
+        self.partial_invocations_s3_path = partial_invocations_s3_path.rstrip("/") + "/"
+        self.s3_manager = S3Manager() if s3_manager is None else s3_manager
+
+    @staticmethod
+    def get_stored_on(s3_path: str) -> datetime:
+        """Returns the time the object of the partial invocations has been stored at (see add)."""
+        stored_on = s3_path.rsplit("/", 1)[-1].split("-", 1)[0]
+        return datetime.fromtimestamp(int(stored_on) / 1000, tz=timezone.utc)
+
+    def add(
+        self,
+        account_id: str,
+        function_name: str,
+        invocations: list[LambdaInvocation],
+    ):
+        """
+        Stores the partial invocations of the function.
+
+        Args:
+            account_id (str): Account ID of the function.
+            function_name (str): Name of the function.
+            invocations (list[LambdaInvocation]): The partial invocations (with the estimated start and end times).
+        """
+        s3_path = (
+            f"{self.partial_invocations_s3_path}{account_id}/{function_name}/"
+            f"{epoch_milliseconds()}-{uuid.uuid4().hex}.json"
+        )
+        content = [
+            {
+                "request_id": x.RequestId,
+                "log_stream": x.LogStream,
+                "started_on": x.StartedOn.isoformat(),
+                "completed_on": x.CompletedOn.isoformat(),
+            }
+            for x in invocations
+        ]
+        try:
+            self.s3_manager.write_file(s3_path, json.dumps(content))
+        except S3ManagerWriteException as e:
+            raise PartialInvocationsStoreException(
+                f"Error storing partial invocations of {function_name}: {e}"
+            ) from e
+
+    def get(
+        self, stored_before: datetime
+    ) -> dict[tuple[str, str], tuple[list[LambdaInvocation], list[str]]]:
+        """
+        Returns the partial invocations stored before the given time.
+
+        Args:
+            stored_before (datetime): The objects stored later on are skipped.
+
+        Returns:
+            dict: (account ID, function name) to the partial invocations and S3 paths of their objects
+                (to be removed once extracted).
+        """
+        partial_invocations = {}
+        try:
+            for s3_path in self.s3_manager.list_files(self.partial_invocations_s3_path):
+                if self.get_stored_on(s3_path) >= stored_before:
+                    continue
+                try:
+                    content = json.loads(self.s3_manager.read_file(s3_path))
+                except FileNotFoundError:
+                    # already extracted and removed by a concurrent run
+                    continue
+                account_id, function_name = s3_path.removeprefix(
+                    self.partial_invocations_s3_path
+                ).split("/")[:2]
+                invocations, s3_paths = partial_invocations.setdefault(
+                    (account_id, function_name), ([], [])
+                )
+                s3_paths.append(s3_path)
+                invocations.extend(
+                    LambdaInvocation(
+                        LambdaName=function_name,
+                        LogStream=x["log_stream"],
+                        RequestId=x["request_id"],
+                        StartedOn=datetime.fromisoformat(x["started_on"]),
+                        CompletedOn=datetime.fromisoformat(x["completed_on"]),
+                    )
+                    for x in content
+                )
+        except (S3ManagerReadException, ValueError, KeyError) as e:
+            raise PartialInvocationsStoreException(
+                f"Error reading partial invocations: {e}"
+            ) from e
+        return partial_invocations
+
+    def remove(self, s3_paths: list[str]):
+        """
+        Removes the stored partial invocations (once extracted).
+
+        Args:
+            s3_paths (list[str]): S3 paths of the objects (see get).
+        """
+        if not s3_paths:
+            return
+        try:
+            self.s3_manager.delete_files(s3_paths)
+        except S3ManagerWriteException as e:
+            raise PartialInvocationsStoreException(
+                f"Error removing partial invocations: {e}"
+            ) from e
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Iterable
 
 from lib.aws.step_functions_manager import StepFunctionsManager, ExecutionData
 from lib.metrics_extractor.base_metrics_extractor import BaseMetricsExtractor
@@ -12,7 +13,7 @@ class StepFunctionsMetricExtractor(BaseMetricsExtractor):
 
     def _extract_metrics_data(
         self, since_time: datetime, step_functions_manager: StepFunctionsManager
-    ) -> list[ExecutionData]:
+    ) -> Iterable[ExecutionData]:
         step_function_executions = step_functions_manager.get_step_function_executions(
             step_function_name=self.resource_name, since_time=since_time
         )
@@ -20,7 +21,7 @@ class StepFunctionsMetricExtractor(BaseMetricsExtractor):
 
     def _data_to_timestream_records(
         self,
-        step_function_executions: list[ExecutionData],
+        step_function_executions: Iterable[ExecutionData],
         step_functions_manager: StepFunctionsManager,
     ) -> list:
         common_dimensions = [
@@ -30,54 +31,57 @@ class StepFunctionsMetricExtractor(BaseMetricsExtractor):
 
         common_attributes = {"Dimensions": common_dimensions}
 
+        # exclude writing metrics for executions in progress
+        step_function_executions = [
+            x
+            for x in step_function_executions
+            if StepFunctionsManager.is_final_state(x.status)
+        ]
+        # error details of failed executions are fetched concurrently
+        execution_errors = step_functions_manager.get_execution_errors(
+            [x.executionArn for x in step_function_executions if x.IsFailure]
+        )
+
         records = []
         for step_function_execution in step_function_executions:
-            if StepFunctionsManager.is_final_state(
-                step_function_execution.status
-            ):  # exclude writing metrics for executions in progress
-                if step_function_execution.IsFailure:
-                    error_message = step_functions_manager.get_execution_error(
-                        step_function_execution.executionArn
-                    )
-                else:
-                    error_message = None
+            error_message = execution_errors.get(step_function_execution.executionArn)
 
-                dimensions = [
-                    {
-                        "Name": "step_function_run_id",
-                        "Value": step_function_execution.name,
-                    }
-                ]
+            dimensions = [
+                {
+                    "Name": "step_function_run_id",
+                    "Value": step_function_execution.name,
+                }
+            ]
 
-                metric_values = [
-                    ("execution", 1, "BIGINT"),
-                    ("succeeded", int(step_function_execution.IsSuccess), "BIGINT"),
-                    ("failed", int(step_function_execution.IsFailure), "BIGINT"),
-                    ("duration_sec", step_function_execution.Duration, "DOUBLE"),
-                    ("error_message", error_message, "VARCHAR"),
-                ]
-                measure_values = [
-                    {
-                        "Name": metric_name,
-                        "Value": str(metric_value),
-                        "Type": metric_type,
-                    }
-                    for metric_name, metric_value, metric_type in metric_values
-                ]
+            metric_values = [
+                ("execution", 1, "BIGINT"),
+                ("succeeded", int(step_function_execution.IsSuccess), "BIGINT"),
+                ("failed", int(step_function_execution.IsFailure), "BIGINT"),
+                ("duration_sec", step_function_execution.Duration, "DOUBLE"),
+                ("error_message", error_message, "VARCHAR"),
+            ]
+            measure_values = [
+                {
+                    "Name": metric_name,
+                    "Value": str(metric_value),
+                    "Type": metric_type,
+                }
+                for metric_name, metric_value, metric_type in metric_values
+            ]
 
-                record_time = datetime_utils.datetime_to_epoch_milliseconds(
-                    step_function_execution.startDate
-                )
+            record_time = datetime_utils.datetime_to_epoch_milliseconds(
+                step_function_execution.startDate
+            )
 
-                records.append(
-                    {
-                        "Dimensions": dimensions,
-                        "MeasureName": self.EXECUTION_MEASURE_NAME,
-                        "MeasureValueType": "MULTI",
-                        "MeasureValues": measure_values,
-                        "Time": record_time,
-                    }
-                )
+            records.append(
+                {
+                    "Dimensions": dimensions,
+                    "MeasureName": self.EXECUTION_MEASURE_NAME,
+                    "MeasureValueType": "MULTI",
+                    "MeasureValues": measure_values,
+                    "Time": record_time,
+                }
+            )
 
         return records, common_attributes
 
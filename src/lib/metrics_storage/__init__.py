@@ -1,2 +1,6 @@
-from .base_metrics_storage import BaseMetricsStorage, MetricsStorageException
+from .base_metrics_storage import (
+    BaseMetricsStorage,
+    MetricsStorageException,
+    MetricsStorageWriteException,
+)
 from .metrics_storage_provider import MetricsStorageProvider, MetricsStorageTypes
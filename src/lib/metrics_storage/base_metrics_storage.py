@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 from lib.aws.aws_naming import AWSNaming
 
@@ -9,6 +10,15 @@ class MetricsStorageException(Exception):
     pass
 
 
+class MetricsStorageWriteException(MetricsStorageException):
+    """Exception raised when some of the buffered records failed to be written out."""
+
+    def __init__(self, message: str, failed_resources: set[tuple[str, str | None]]):
+        super().__init__(message)
+        # (table name, resource name) of the failed records (resource name is None if it is not known)
+        self.failed_resources = failed_resources
+
+
 class BaseMetricsStorage:
     RESOURCE_NAME_COLUMN_NAME = "resource_name"
 
@@ -37,6 +47,9 @@ class BaseMetricsStorage:
     def get_metrics_table_name_for_resource_type(self, resource_type: str):
         return AWSNaming.TimestreamMetricsTable(None, resource_type)
 
+    def get_rollup_table_name_for_resource_type(self, resource_type: str):
+        return AWSNaming.TimestreamRollupTable(None, resource_type)
+
     ####################################################################################################
     # Read operations
 
@@ -48,6 +61,33 @@ class BaseMetricsStorage:
     def execute_query(self, query) -> list:
         pass
 
+    @abstractmethod
+    def iter_query_rows(self, query, typed: bool = False) -> Iterator[dict]:
+        """
+        Executes a query and yields the result rows one by one (without holding the whole result in memory).
+
+        Args:
+            query: the query to be executed
+            typed: if True, the values are converted to Python types according to the column types
+        """
+        pass
+
+    @abstractmethod
+    def get_last_update_times_from_metrics_table(
+        self, resource_type: str, resource_names: list[str]
+    ) -> dict:
+        """
+        Retrieve max(time) for a set of resources of the same type (with one grouped query).
+
+        Args:
+            resource_type (str): Resource type.
+            resource_names (list[str]): Resource names.
+
+        Returns:
+            dict: Resource name to last update time (datetime). Resources without metrics are omitted.
+        """
+        pass
+
     ####################################################################################################
     # Write operations
 
@@ -62,3 +102,27 @@ class BaseMetricsStorage:
             common_attributes: a list of attributes applied to all records (e.g. dimensions)
         """
         pass
+
+    @abstractmethod
+    def get_written_time_ranges(self, table_name) -> dict:
+        """
+        Returns the time ranges of the records written into the table by this storage object (i.e. during the run).
+
+        Args:
+            table_name: target table name
+
+        Returns:
+            dict: Resource name to (earliest, latest) record time (datetime).
+        """
+        pass
+
+    @abstractmethod
+    def flush(self) -> list:
+        """
+        Writes out the records buffered by write_records (if the storage buffers writes).
+        Expected to be called at the end of the run.
+
+        Raises:
+            MetricsStorageWriteException: If some of the records failed to be written.
+        """
+        pass
@@ -1,7 +1,15 @@
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
 from functools import cached_property
-
-from lib.aws.timestream_manager import TimestreamTableWriter, TimeStreamQueryRunner
+from typing import Iterator
+
+from lib.aws.timestream_manager import (
+    TimestreamBufferedWriter,
+    TimestreamBufferedWriterException,
+    TimestreamTableWriter,
+    TimeStreamQueryRunner,
+    convert_timestream_datetime_str,
+)
 from lib.settings.settings import SettingConfigs
 from lib.core.datetime_utils import str_utc_datetime_to_datetime
 
@@ -9,6 +17,7 @@ import boto3
 from lib.metrics_storage.base_metrics_storage import (
     BaseMetricsStorage,
     MetricsStorageException,
+    MetricsStorageWriteException,
 )
 
 
@@ -18,7 +27,16 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
     with Timestream metrics storage. Clients and writer are lazily initialized to optimize for partial use cases.
     """
 
-    def __init__(self, db_name: str, write_client=None, query_client=None):
+    # max number of resources looked up in one "last update time" query (to keep the query text reasonably small)
+    LAST_UPDATE_TIMES_QUERY_CHUNK_SIZE = 500
+
+    def __init__(
+        self,
+        db_name: str,
+        write_client=None,
+        query_client=None,
+        buffer_writes: bool = False,
+    ):
         """
         Initialize the TimestreamMetricsStorage.
 
@@ -26,12 +44,24 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
             db_name (str): Name of the Timestream database.
             write_client: Optional boto3 Timestream write client. Lazily initialized if not provided.
             query_client: Optional boto3 Timestream query client. Lazily initialized if not provided.
+            buffer_writes (bool): If True, records of different write_records calls are combined into full
+                batches, which are written in background. flush() must be called at the end of the run.
         """
         super().__init__(db_name=db_name)
         self._write_client = write_client
         self._query_client = query_client
+        self.buffer_writes = buffer_writes
         self._writer = None
+        self._buffered_writer = None
         self._query_runner = None
+        # table emptiness is checked once per storage object (i.e. per run)
+        self._is_table_empty_cache: dict[str, bool] = {}
+        # last update times JSON indexed by (resource_type, resource_name)
+        self._last_update_times_index_source = None
+        self._last_update_times_index: dict[tuple, str] = {}
+        # table name -> resource name -> (earliest, latest) written record time (epoch ms)
+        self._written_time_ranges: dict[str, dict[str, tuple[int, int]]] = {}
+        self._written_time_ranges_lock = threading.Lock()
 
     def writer(self, table_name):
         if self._write_client is None:
@@ -45,6 +75,16 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
         )
         return self._writer
 
+    @property
+    def buffered_writer(self) -> TimestreamBufferedWriter:
+        if self._buffered_writer is None:
+            if self._write_client is None:
+                self._write_client = boto3.client("timestream-write")
+            self._buffered_writer = TimestreamBufferedWriter(
+                self.db_name, self._write_client
+            )
+        return self._buffered_writer
+
     @cached_property
     def query_runner(self) -> TimeStreamQueryRunner:
         if self._query_runner is None:
@@ -55,7 +95,71 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
 
     # Proxy methods for TimestreamTableWriter
     def write_records(self, table_name, records, common_attributes={}) -> list:
-        return self.writer(table_name).write_records(records, common_attributes)
+        if self.buffer_writes:
+            # the records are attributed to the resource in case their batch fails
+            self.buffered_writer.add_records(
+                table_name,
+                records,
+                common_attributes,
+                source=(table_name, self._get_resource_name(common_attributes)),
+            )
+            result = []
+        else:
+            result = self.writer(table_name).write_records(records, common_attributes)
+        if records:
+            self._is_table_empty_cache[table_name] = False
+            self._track_written_time_ranges(table_name, records, common_attributes)
+        return result
+
+    def _track_written_time_ranges(
+        self, table_name, records, common_attributes: dict
+    ) -> None:
+        """Tracks the time range of the written records per resource (see get_written_time_ranges)."""
+        common_resource_name = self._get_resource_name(common_attributes)
+        ranges = {}
+        for record in records:
+            resource_name = self._get_resource_name(record) or common_resource_name
+            record_time = record.get("Time", common_attributes.get("Time"))
+            if resource_name is None or record_time is None:
+                continue
+            record_time = int(record_time)
+            earliest, latest = ranges.get(resource_name, (record_time, record_time))
+            ranges[resource_name] = (
+                min(earliest, record_time),
+                max(latest, record_time),
+            )
+
+        with self._written_time_ranges_lock:
+            table_ranges = self._written_time_ranges.setdefault(table_name, {})
+            for resource_name, (earliest, latest) in ranges.items():
+                if resource_name in table_ranges:
+                    earliest = min(earliest, table_ranges[resource_name][0])
+                    latest = max(latest, table_ranges[resource_name][1])
+                table_ranges[resource_name] = (earliest, latest)
+
+    def _get_resource_name(self, record: dict) -> str | None:
+        for dimension in record.get("Dimensions", []):
+            if dimension["Name"] == self.RESOURCE_NAME_COLUMN_NAME:
+                return dimension["Value"]
+        return None
+
+    def get_written_time_ranges(self, table_name) -> dict:
+        with self._written_time_ranges_lock:
+            table_ranges = dict(self._written_time_ranges.get(table_name, {}))
+        return {
+            resource_name: tuple(
+                datetime.fromtimestamp(x / 1000, tz=timezone.utc) for x in time_range
+            )
+            for resource_name, time_range in table_ranges.items()
+        }
+
+    def flush(self) -> list:
+        if self._buffered_writer is None:
+            return []
+        try:
+            return self._buffered_writer.flush()
+        except TimestreamBufferedWriterException as e:
+            raise MetricsStorageWriteException(str(e), e.failed_sources) from e
 
     def _get_memory_store_retention_hours(self, table_name):
         return self.writer(table_name).get_MemoryStoreRetentionPeriodInHours()
@@ -71,7 +175,11 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
 
     # Proxy methods for TimeStreamQueryRunner
     def is_table_empty(self, table_name) -> bool:
-        return self.query_runner.is_table_empty(self.db_name, table_name)
+        if table_name not in self._is_table_empty_cache:
+            self._is_table_empty_cache[table_name] = self.query_runner.is_table_empty(
+                self.db_name, table_name
+            )
+        return self._is_table_empty_cache[table_name]
 
     def execute_scalar_query(self, query):
         return self.query_runner.execute_scalar_query(query)
@@ -82,6 +190,9 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
     def execute_query(self, query):
         return self.query_runner.execute_query(query)
 
+    def iter_query_rows(self, query, typed: bool = False) -> Iterator[dict]:
+        return self.query_runner.iter_query_rows(query, typed=typed)
+
     # Added methods from metrics_extractor_utils.py
     def retrieve_last_update_time_for_all_resources(self, logger):
         """
@@ -151,14 +262,25 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
         if not last_update_time_json:
             return None
 
-        resource_section = last_update_time_json.get(resource_type)
-        if not resource_section:
+        last_update_time = self._get_last_update_times_index(last_update_time_json).get(
+            (resource_type, resource_name)
+        )
+        if last_update_time is None:
             return None
-
-        for resource_info in resource_section:
-            if resource_info["resource_name"] == resource_name:
-                return str_utc_datetime_to_datetime(resource_info["last_update_time"])
-        return None
+        return str_utc_datetime_to_datetime(last_update_time)
+
+    def _get_last_update_times_index(self, last_update_time_json: dict) -> dict:
+        """Indexes last update times JSON by (resource_type, resource_name), once per JSON object."""
+        if self._last_update_times_index_source is not last_update_time_json:
+            self._last_update_times_index = {
+                (resource_type, resource_info["resource_name"]): resource_info[
+                    "last_update_time"
+                ]
+                for resource_type, resource_section in last_update_time_json.items()
+                for resource_info in resource_section or []
+            }
+            self._last_update_times_index_source = last_update_time_json
+        return self._last_update_times_index
 
     def get_last_update_time_from_metrics_table(
         self, resource_type, resource_name
@@ -175,6 +297,45 @@ class TimestreamMetricsStorage(BaseMetricsStorage):
         last_date = self.execute_scalar_query_date_field(query=query)
         return last_date
 
+    def get_last_update_times_from_metrics_table(
+        self, resource_type: str, resource_names: list[str]
+    ) -> dict:
+        """
+        Retrieve max(time) for a set of resources of the same type (with one grouped query per chunk of resources).
+
+        Args:
+            resource_type (str): Resource type.
+            resource_names (list[str]): Resource names.
+
+        Returns:
+            dict: Resource name to last update time (datetime). Resources without metrics are omitted.
+        """
+        metrics_table_name = self.get_metrics_table_name_for_resource_type(
+            resource_type
+        )
+
+        if not resource_names or self.is_table_empty(metrics_table_name):
+            return {}
+
+        last_update_times = {}
+        unique_names = list(dict.fromkeys(resource_names))
+        for i in range(0, len(unique_names), self.LAST_UPDATE_TIMES_QUERY_CHUNK_SIZE):
+            chunk = unique_names[i : i + self.LAST_UPDATE_TIMES_QUERY_CHUNK_SIZE]
+            names_list = ", ".join(
+                "'" + name.replace("'", "''") + "'" for name in chunk
+            )
+            query = f"""SELECT {self.RESOURCE_NAME_COLUMN_NAME}, max(time) as last_update_time
+                          FROM "{self.db_name}"."{metrics_table_name}"
+                         WHERE {self.RESOURCE_NAME_COLUMN_NAME} IN ({names_list})
+                         GROUP BY {self.RESOURCE_NAME_COLUMN_NAME}"""
+            for row in self.execute_query(query):
+                if row["last_update_time"] is not None:
+                    last_update_times[
+                        row[self.RESOURCE_NAME_COLUMN_NAME]
+                    ] = convert_timestream_datetime_str(row["last_update_time"])
+
+        return last_update_times
+
     def get_earliest_last_update_time_for_resource_set(
         self, last_update_times, resource_names, resource_type
     ) -> datetime:
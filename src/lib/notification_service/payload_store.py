@@ -0,0 +1,95 @@
+import json
+import hashlib
+from typing import Optional
+
+from lib.aws.s3_manager import (
+    S3Manager,
+    S3ManagerReadException,
+    S3ManagerWriteException,
+)
+from lib.core.constants import NotificationPayloadConfigs
+
+
+class NotificationPayloadStoreException(Exception):
+    """Exception raised for errors encountered while offloading or loading the notification message bodies."""
+
+    pass
+
+
+class NotificationPayloadStore:
+    """
+    Claim check for the notification messages exceeding the SQS message size limit.
+
+    The body of an oversized message is written gzip-compressed to S3 and the message carries
+    only the S3 path of it (message_body_s3_path instead of message_body). The objects are
+    content-addressed, so identical bodies (e.g. the same digest for several recipient groups)
+    are stored once.
+
+    Attributes:
+        payloads_s3_path (str): S3 path the bodies are offloaded to (if None, the messages are not offloaded).
+        s3_manager (S3Manager): S3 manager to write and read the bodies.
+    """
+
+    def __init__(
+        self, payloads_s3_path: Optional[str] = None, s3_manager: S3Manager = None
+    ):
+        self.payloads_s3_path = (
+            payloads_s3_path.rstrip("/") + "/" if payloads_s3_path else None
+        )
+        self.s3_manager = S3Manager() if s3_manager is None else s3_manager
+        self._stored_paths: set[str] = set()
+
+    @staticmethod
+    def _serialize(content) -> str:
+        return json.dumps(content, separators=(",", ":"))
+
+    def offload_message_body(self, message: dict) -> dict:
+        """
+        Offloads the body of the message to S3 if the message exceeds MAX_INLINE_MESSAGE_BYTES.
+
+        Args:
+            message (dict): Notification message ({"delivery_options": ..., "message": {..., "message_body": ...}}).
+
+        Returns:
+            dict: The message as is or its copy with the body replaced by the S3 path.
+        """
+        if self.payloads_s3_path is None:
+            return message
+        message_size = len(self._serialize(message).encode("utf-8"))
+        if message_size <= NotificationPayloadConfigs.MAX_INLINE_MESSAGE_BYTES:
+            return message
+
+        message_info = dict(message["message"])
+        body = self._serialize(message_info.pop("message_body"))
+        body_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        s3_path = f"{self.payloads_s3_path}{body_hash}.json.gz"
+
+        if s3_path not in self._stored_paths:
+            try:
+                self.s3_manager.write_compressed_file(s3_path, body)
+            except S3ManagerWriteException as e:
+                raise NotificationPayloadStoreException(
+                    f"Error offloading message body of {message_size} bytes: {e}"
+                ) from e
+            self._stored_paths.add(s3_path)
+
+        message_info[NotificationPayloadConfigs.MESSAGE_BODY_S3_PATH_KEY] = s3_path
+        return {**message, "message": message_info}
+
+    def load_message_body(self, message_info: dict):
+        """
+        Returns the body of the message, reading it from S3 if it has been offloaded.
+
+        Args:
+            message_info (dict): The "message" part of the notification message.
+        """
+        s3_path = message_info.get(NotificationPayloadConfigs.MESSAGE_BODY_S3_PATH_KEY)
+        if s3_path is None:
+            return message_info.get("message_body")
+
+        try:
+            return json.loads(self.s3_manager.read_compressed_file(s3_path))
+        except (S3ManagerReadException, FileNotFoundError, ValueError) as e:
+            raise NotificationPayloadStoreException(
+                f"Error loading message body from {s3_path}: {e}"
+            ) from e
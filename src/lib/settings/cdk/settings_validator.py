@@ -37,6 +37,7 @@ def validate(settings: Settings):
         validate_existing_monitored_environment_names_mgs,
         validate_existing_monitoring_group_names_rs,
         validate_existing_delivery_methods_rs,
+        validate_lambda_logs_subscription_regions_gs,
     ]
     errors = []
 
@@ -131,6 +132,23 @@ def validate_existing_delivery_methods_rs(settings: Settings) -> List[tuple]:
     )
 
 
+def validate_lambda_logs_subscription_regions_gs(settings: Settings) -> List[tuple]:
+    """Validates if the monitored environments with lambda_logs_subscription are in the tooling environment region
+    (the Logs destination in the tooling account has to be in the same region as the subscribed log groups).
+    """
+    general = settings.get_raw_settings(SettingFileNames.GENERAL)
+    tooling_region = general.get("tooling_environment", {}).get("region")
+    return [
+        (
+            f"Monitored environment {m_env['name']} with lambda_logs_subscription "
+            f"is not in the tooling environment region ({tooling_region}).",
+            m_env.get("region") == tooling_region,
+        )
+        for m_env in general.get("monitored_environments", [])
+        if m_env.get("lambda_logs_subscription")
+    ]
+
+
 # Helpers
 def validate_unique_names(names: List[str], error_message: str) -> List[tuple]:
     """Validates that names are unique."""
@@ -0,0 +1,111 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+from copy import deepcopy
+from datetime import datetime, timezone
+
+from lib.aws import S3Manager
+from lib.core.constants import SettingsCacheConfigs
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+class ResourceNamesCache:
+    """TTL cache of the resource names listed in the monitored environments for the wildcards replacement.
+
+    The cache is persisted as a JSON object in S3, so it is reused by all the Lambda invocations
+    (cold starts included). The last read version of the object is kept in memory along with its ETag,
+    so warm invocations download the object again only if it was changed by another invocation.
+    The object has the following format:
+        {"glue_jobs": {
+            "monitored_env_name_1": {"names": ["job1", ..., "jobN"], "listed_at": 1700000000.0},
+            ...
+            },
+        "glue_workflows": {...},
+        ...
+        }
+
+    The cache is best-effort: if the object can't be read or written, the names are just listed again.
+    """
+
+    _lock = threading.Lock()
+    # s3 path -> (ETag, content of the object)
+    _objects: dict[str, tuple[str, dict]] = {}
+
+    def __init__(
+        self,
+        s3_path: str,
+        ttl_seconds: int = SettingsCacheConfigs.RESOURCE_NAMES_TTL_SECONDS,
+        s3_manager: S3Manager = None,
+    ):
+        self.s3_path = s3_path
+        self.ttl_seconds = ttl_seconds
+        self.s3_manager = S3Manager() if s3_manager is None else s3_manager
+
+    @classmethod
+    def clear_cache(cls):
+        """Drops the in-memory copies of the cache objects."""
+        with cls._lock:
+            cls._objects.clear()
+
+    def _load(self) -> dict:
+        """Returns the latest content of the cache object (re-downloaded only if its ETag has changed)."""
+        with self._lock:
+            etag, content = self._objects.get(self.s3_path, (None, {}))
+            try:
+                raw_content, etag = self.s3_manager.read_file_if_changed(
+                    self.s3_path, etag
+                )
+            except FileNotFoundError:
+                return {}
+            except Exception as e:
+                logger.warning(f"Could not read resource names cache: {e}")
+                return content
+
+            if raw_content is not None:
+                content = json.loads(raw_content)
+                self._objects[self.s3_path] = (etag, content)
+            return content
+
+    def get(self, resource_pairs: set[tuple[str, str]]) -> dict:
+        """Get the cached (and not expired) resource names.
+
+        Args:
+            resource_pairs (set[tuple[str, str]]): (resource type, monitored environment name) pairs.
+
+        Returns:
+            dict: Resource names in the following format (pairs without valid cache entries are omitted)
+                {"glue_jobs": {"monitored_env_name_1": ["job1", ...,  "jobN"], ...}, ...}
+        """
+        content = self._load()
+        now = datetime.now(tz=timezone.utc).timestamp()
+        resource_names = defaultdict(dict)
+        for resource_type, monitored_env_name in resource_pairs:
+            entry = content.get(resource_type, {}).get(monitored_env_name)
+            if entry and now - entry["listed_at"] < self.ttl_seconds:
+                resource_names[resource_type][monitored_env_name] = entry["names"]
+        return resource_names
+
+    def put(self, resource_names: dict):
+        """Store the listed resource names (merged into the latest version of the cache object).
+
+        Args:
+            resource_names (dict): Resource names in the format returned by get.
+        """
+        content = deepcopy(self._load())
+        listed_at = datetime.now(tz=timezone.utc).timestamp()
+        for resource_type, names_by_env in resource_names.items():
+            for monitored_env_name, names in names_by_env.items():
+                content.setdefault(resource_type, {})[monitored_env_name] = {
+                    "names": names,
+                    "listed_at": listed_at,
+                }
+
+        with self._lock:
+            try:
+                etag = self.s3_manager.write_file(self.s3_path, json.dumps(content))
+                self._objects[self.s3_path] = (etag, content)
+            except Exception as e:
+                logger.warning(f"Could not write resource names cache: {e}")
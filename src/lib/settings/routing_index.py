@@ -0,0 +1,136 @@
+import re
+from collections import defaultdict
+from fnmatch import translate
+from typing import Iterable
+
+from lib.core.constants import NotificationType, SettingConfigs
+
+# characters which make a resource name in the settings a (fnmatch) pattern
+WILDCARD_CHARS = "*?["
+
+
+class ResourceGroupsIndex:
+    """Maps resource names of one resource type to the monitoring groups they belong to.
+
+    Exact names are kept in a hash map. Wildcard patterns are compiled into one combined regex
+    (to quickly skip the resources which match none of them) and are bucketed by their literal prefix
+    (the part before the first wildcard), so only the patterns with a prefix of the resource name
+    are checked one by one.
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, str]]):
+        """
+        Args:
+            entries (Iterable[tuple[str, str]]): (resource name or pattern, monitoring group name) pairs.
+        """
+        self._exact_names = defaultdict(set)
+        groups_by_pattern = defaultdict(set)
+        for name, group_name in entries:
+            if not name:
+                continue
+            if any(char in name for char in WILDCARD_CHARS):
+                groups_by_pattern[name].add(group_name)
+            else:
+                self._exact_names[name].add(group_name)
+
+        # literal prefix -> [(compiled pattern, monitoring groups)]
+        self._patterns_by_prefix = defaultdict(list)
+        for pattern, group_names in groups_by_pattern.items():
+            prefix = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+            self._patterns_by_prefix[prefix].append(
+                (re.compile(translate(pattern)), group_names)
+            )
+        self._combined_pattern = (
+            re.compile("|".join(f"(?:{translate(x)})" for x in groups_by_pattern))
+            if groups_by_pattern
+            else None
+        )
+
+    def get_groups(self, resource_name: str) -> set[str]:
+        """Get names of the monitoring groups which the resource belongs to."""
+        group_names = set(self._exact_names.get(resource_name, ()))
+        if self._combined_pattern and self._combined_pattern.match(resource_name):
+            for i in range(len(resource_name) + 1):
+                for pattern, pattern_groups in self._patterns_by_prefix.get(
+                    resource_name[:i], ()
+                ):
+                    if pattern.match(resource_name):
+                        group_names.update(pattern_groups)
+        return group_names
+
+
+class RoutingIndex:
+    """Precompiled index for routing resource events to monitoring groups and their recipients.
+
+    Built once per settings, so that resolving the monitoring groups and recipients of an event
+    does not depend on the number of configured resources, groups and subscriptions.
+    """
+
+    def __init__(self, monitoring_groups: list[dict], recipients: list[dict]):
+        """
+        Args:
+            monitoring_groups (list[dict]): Monitoring groups (resource names may contain wildcards).
+            recipients (list[dict]): Recipients with their subscriptions.
+        """
+        self._resource_groups = {
+            resource_type: ResourceGroupsIndex(
+                (res.get("name"), group["group_name"])
+                for group in monitoring_groups
+                for res in group.get(resource_type, [])
+            )
+            for resource_type in SettingConfigs.RESOURCE_TYPES
+        }
+
+        self._recipients = [
+            {
+                "recipient": recipient.get("recipient"),
+                "delivery_method": recipient.get("delivery_method"),
+            }
+            for recipient in recipients
+        ]
+        # notification type -> monitoring group -> positions of the subscribed recipients
+        self._subscriptions = {
+            NotificationType.ALERT: defaultdict(set),
+            NotificationType.DIGEST: defaultdict(set),
+        }
+        for position, recipient in enumerate(recipients):
+            for subscription in recipient.get("subscriptions", []):
+                group_name = subscription.get("monitoring_group")
+                if subscription.get("alerts"):
+                    self._subscriptions[NotificationType.ALERT][group_name].add(
+                        position
+                    )
+                if subscription.get("digest"):
+                    self._subscriptions[NotificationType.DIGEST][group_name].add(
+                        position
+                    )
+
+    def get_monitoring_groups(
+        self, resource_type: str, resource_names: list[str]
+    ) -> set[str]:
+        """Get names of the monitoring groups which any of the resources belongs to."""
+        resource_groups = self._resource_groups.get(resource_type)
+        if resource_groups is None:
+            return set()
+        return {
+            group_name
+            for resource_name in resource_names
+            for group_name in resource_groups.get_groups(resource_name)
+        }
+
+    def get_recipients(
+        self, monitoring_groups: list[str], notification_type: NotificationType
+    ) -> list[dict]:
+        """Get unique recipients (with delivery methods) subscribed to the monitoring groups,
+        in the order they are defined in the settings."""
+        subscriptions = self._subscriptions.get(notification_type, {})
+        positions = set()
+        for group_name in monitoring_groups:
+            positions.update(subscriptions.get(group_name, ()))
+
+        matched_recipients = []
+        for position in sorted(positions):
+            recipient_info = self._recipients[position]
+            if recipient_info not in matched_recipients:
+                matched_recipients.append(dict(recipient_info))
+        return matched_recipients
@@ -1,16 +1,18 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy import deepcopy
 from collections import defaultdict
 from functools import cached_property
 from fnmatch import fnmatch
 
 from lib.aws import (
-    AWSNaming,
+    Boto3ClientCreator,
     GlueManager,
     LambdaManager,
     S3Manager,
     StepFunctionsManager,
-    StsManager,
     EMRManager,
 )
 import lib.core.file_manager as fm
@@ -18,11 +20,14 @@ import lib.core.json_utils as ju
 from lib.core.constants import (
     SettingConfigResourceTypes,
     SettingConfigs,
+    SettingsCacheConfigs,
     SettingFileNames,
     NotificationType,
     GrafanaDefaultSettings,
     DigestSettings,
 )
+from lib.settings.resource_names_cache import ResourceNamesCache
+from lib.settings.routing_index import RoutingIndex
 
 # Used for settings only
 RESOURCE_TYPES_LINKED_AWS_MANAGERS = {
@@ -55,11 +60,14 @@ class Settings:
         _processed_settings (dict): Processed configuration settings with added defaults, replaced wildcards, etc.
         _replacements (dict): Replacement values for placeholders in settings.
         _iam_role_list_monitored_res (str): IAM role to get the list of glue jobs, workflows, etc. for the wildcards replacement.
+        _resource_names_cache (ResourceNamesCache): Optional cache of the resource names listed for the wildcards replacement.
 
     Methods:
         _nested_replace_placeholder: Recursive function to replace placeholder with its value inside any nested structure.
         _get_default_metrics_extractor_role_arn: Get the default IAM role ARN for metrics extraction.
-        _get_all_resource_names: Get all resource names for all the monitored account IDs.
+        _get_wildcard_resource_pairs: Get (resource type, monitored environment) pairs with wildcards.
+        _get_all_resource_names: Get resource names for the (resource type, monitored environment) pairs.
+        _list_resource_names: List resource names of the resource type in the monitored environment.
         _replace_wildcards: Replace wildcards with real resource names.
         _read_settings: Read settings from file.
         ---
@@ -68,6 +76,8 @@ class Settings:
         monitoring_groups: the processed monitoring groups settings (without replaced wildcards).
         processed_monitoring_groups: the processed monitoring groups settings (with replaced wildcards)
         recipients: Retrieves the processed recipients settings.
+        routing_index: Precompiled index of monitoring groups and recipients for events routing.
+        lambda_logs_subscriptions: Lambda functions whose logs are pushed by the subscription filters.
         ---
         get_monitored_account_ids: Get monitored account IDs.
         get_monitored_account_region_pairs: Get monitored account IDs and Regions.
@@ -87,10 +97,23 @@ class Settings:
         get_delivery_method: Get delivery method by name.
         ---
         from_file_path: Create an instance of Settings from local file paths.
-        from_s3_path: Create an instance of Settings from S3 bucket paths.
+        from_s3_path: Create an instance of Settings from S3 bucket paths (optionally cached in the warm container).
+        clear_cache: Drop the cached instances of Settings.
 
     """
 
+    SETTINGS_FILE_NAMES = [
+        SettingFileNames.GENERAL,
+        SettingFileNames.MONITORING_GROUPS,
+        SettingFileNames.RECIPIENTS,
+        SettingFileNames.REPLACEMENTS,
+    ]
+
+    # Settings cached in the (warm) Lambda container by from_s3_path:
+    # (base_path, iam_role_list_monitored_res, resource_names_cache_path) -> cache entry
+    _cache_lock = threading.Lock()
+    _cache: dict[tuple, dict] = {}
+
     def __init__(
         self,
         general_settings: str,
@@ -98,6 +121,7 @@ class Settings:
         recipients_settings: str,
         replacements_settings: str,
         iam_role_list_monitored_res: str,
+        resource_names_cache: ResourceNamesCache = None,
     ):
         general = ju.parse_json(general_settings)
         monitoring = ju.parse_json(monitoring_settings)
@@ -117,6 +141,7 @@ class Settings:
             ju.parse_json(replacements_settings) if replacements_settings else {}
         )
         self._iam_role_list_monitored_res = iam_role_list_monitored_res
+        self._resource_names_cache = resource_names_cache
 
     @cached_property
     def processed_settings(self):
@@ -186,23 +211,80 @@ class Settings:
     def recipients(self):
         return self.processed_settings[SettingFileNames.RECIPIENTS]
 
+    @cached_property
+    def routing_index(self) -> RoutingIndex:
+        """monitoring groups (without wildcards replacement) and recipients indexed for events routing"""
+        return RoutingIndex(
+            self.monitoring_groups.get("monitoring_groups", []),
+            self.recipients.get("recipients", []),
+        )
+
+    @cached_property
+    def lambda_logs_subscriptions(self) -> dict[str, list[str]]:
+        """Lambda function names (by monitored environment name) whose logs are pushed to the tooling
+        environment by the CloudWatch Logs subscription filters, instead of being queried by the metrics extraction.
+
+        Only the monitored environments with "lambda_logs_subscription" enabled are included and only the functions
+        listed by their exact names (the log groups matching wildcards are not subscribed).
+        """
+        subscribed_env_names = {
+            m_env["name"]
+            for m_env in self.general.get("monitored_environments", [])
+            if m_env.get("lambda_logs_subscription")
+        }
+        subscriptions = defaultdict(set)
+        for m_grp in self.monitoring_groups.get("monitoring_groups", []):
+            for res in m_grp.get(SettingConfigResourceTypes.LAMBDA_FUNCTIONS, []):
+                m_env_name = res["monitored_environment_name"]
+                if m_env_name in subscribed_env_names and "*" not in res["name"]:
+                    subscriptions[m_env_name].add(res["name"])
+        return {
+            m_env_name: sorted(names) for m_env_name, names in subscriptions.items()
+        }
+
+    @cached_property
+    def _delivery_methods(self) -> dict:
+        return {
+            method.get("name"): method
+            for method in reversed(self.general.get("delivery_methods", []))
+        }
+
     # Processing methods
     def _get_default_metrics_extractor_role_arn(self, account_id: str) -> str:
         return f"arn:aws:iam::{account_id}:role/role-salmon-cross-account-extract-metrics-dev"
 
     def _process_monitoring_groups(self):
-        # Get resource names dict
-        resource_names = self._get_all_resource_names()
+        # Resolve the subscribed Lambda functions while the wildcards are still in place
+        self.lambda_logs_subscriptions
+
+        # Get resource names (listed only where there are wildcards to replace)
+        resource_names = self._get_all_resource_names(
+            self._get_wildcard_resource_pairs()
+        )
 
         # Replace wildcards for all the resource types (glue, lambda, etc.)
         for m_grp in self._processed_settings[SettingFileNames.MONITORING_GROUPS].get(
             "monitoring_groups", []
         ):
             for m_res in SettingConfigs.RESOURCE_TYPES:
-                self._replace_wildcards(m_grp, m_res, resource_names[m_res])
+                self._replace_wildcards(m_grp, m_res, resource_names.get(m_res, {}))
+
+    def _get_wildcard_resource_pairs(self) -> set[tuple[str, str]]:
+        """Get (resource type, monitored environment name) pairs which have wildcards in resource names."""
+        return {
+            (m_res, res["monitored_environment_name"])
+            for m_grp in self.monitoring_groups.get("monitoring_groups", [])
+            for m_res in SettingConfigs.RESOURCE_TYPES
+            for res in m_grp.get(m_res, [])
+            if "*" in res["name"]
+        }
 
-    def _get_all_resource_names(self) -> dict:
-        """Get all resource names for all the monitored account ids.
+    def _get_all_resource_names(
+        self, resource_pairs: set[tuple[str, str]] = None
+    ) -> dict:
+        """Get resource names for the (resource type, monitored environment name) pairs
+        (for all the resource types in all the monitored environments if not specified).
+        The names are taken from the cache if possible, the rest are listed in parallel.
         Returns dict in the following format
             {"glue_jobs": {
                 "monitored_env_name_1": ["job1", ...,  "jobN"],
@@ -212,51 +294,84 @@ class Settings:
             "glue_workflows": {...},
             ...
             }"""
-        # Get all monitored accounts
-        monitored_accounts = self.general.get("monitored_environments", [])
+        monitored_environments = {
+            m_env["name"]: m_env
+            for m_env in self.general.get("monitored_environments", [])
+        }
+        if resource_pairs is None:
+            resource_pairs = {
+                (res_type, m_env_name)
+                for res_type in SettingConfigs.RESOURCE_TYPES
+                for m_env_name in monitored_environments
+            }
 
-        # Initialize an empty dictionary for each resource type
         resource_names = defaultdict(dict)
+        if not resource_pairs:
+            return resource_names
 
-        # Get all names for the resource type for all the monitored accounts
-        for res_type in SettingConfigs.RESOURCE_TYPES:
-            for account in monitored_accounts:
-                account_name = account["name"]
-                account_id = account["account_id"]
-                region = account["region"]
-                aws_client_name = SettingConfigs.RESOURCE_TYPES_LINKED_AWS_SERVICES[
-                    res_type
-                ]
+        if not self._iam_role_list_monitored_res:
+            raise SettingsException(
+                "Error getting resource names for settings wildcards replacement: "
+                "IAM Role for metrics extraction not provided"
+            )
+        for _, m_env_name in resource_pairs:
+            if m_env_name not in monitored_environments:
+                raise SettingsException(
+                    f"Error getting resource names for settings wildcards replacement: "
+                    f"monitored environment '{m_env_name}' not found"
+                )
+
+        if self._resource_names_cache:
+            resource_names.update(self._resource_names_cache.get(resource_pairs))
+        pairs_to_list = [
+            (res_type, m_env_name)
+            for res_type, m_env_name in resource_pairs
+            if m_env_name not in resource_names[res_type]
+        ]
+        if not pairs_to_list:
+            return resource_names
+
+        listed_names = defaultdict(dict)
+        with ThreadPoolExecutor(
+            max_workers=min(
+                SettingsCacheConfigs.MAX_LISTING_WORKERS, len(pairs_to_list)
+            )
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._list_resource_names,
+                    res_type,
+                    monitored_environments[m_env_name],
+                ): (res_type, m_env_name)
+                for res_type, m_env_name in pairs_to_list
+            }
+            for future in as_completed(futures):
+                res_type, m_env_name = futures[future]
                 try:
-                    if not self._iam_role_list_monitored_res:
-                        raise SettingsException(
-                            "IAM Role for metrics extraction not provided"
-                        )
-
-                    extract_metrics_role_arn = AWSNaming.Arn_IAMRole(
-                        None,
-                        account_id,
-                        self._iam_role_list_monitored_res,
-                    )
+                    listed_names[res_type][m_env_name] = future.result()
                 except Exception as e:
                     raise SettingsException(
-                        f"Error getting resource names for settings wildcards replacement: {e}"
-                    )
+                        f"Error getting {res_type} names in {m_env_name} "
+                        f"for settings wildcards replacement: {e}"
+                    ) from e
 
-                sts_manager = StsManager()
-                client = sts_manager.get_client_via_assumed_role(
-                    aws_client_name=aws_client_name,
-                    via_assume_role_arn=extract_metrics_role_arn,
-                    region=region,
-                )
-
-                manager = RESOURCE_TYPES_LINKED_AWS_MANAGERS[res_type](client)
-                resource_names[res_type][account_name] = manager.get_all_names(
-                    resource_type=res_type
-                )
+        if self._resource_names_cache:
+            self._resource_names_cache.put(listed_names)
+        for res_type, names_by_env in listed_names.items():
+            resource_names[res_type].update(names_by_env)
 
         return resource_names
 
+    def _list_resource_names(self, resource_type: str, monitored_env: dict) -> list:
+        """List resource names of the resource type in the monitored environment (via the assumed role)."""
+        client = Boto3ClientCreator(
+            monitored_env["account_id"],
+            monitored_env["region"],
+            self._iam_role_list_monitored_res,
+        ).get_client(SettingConfigs.RESOURCE_TYPES_LINKED_AWS_SERVICES[resource_type])
+        manager = RESOURCE_TYPES_LINKED_AWS_MANAGERS[resource_type](client)
+        return manager.get_all_names(resource_type=resource_type)
+
     def _replace_wildcards(
         self, monitoring_group: dict, settings_key: str, replacements: dict
     ):
@@ -265,14 +380,18 @@ class Settings:
         for res in monitoring_group.get(settings_key, []):
             res_name = res["name"]
             res_monitored_env_name = res["monitored_environment_name"]
+            names = replacements.get(res_monitored_env_name)
             if "*" in res_name:
                 # Add new resources with full names
-                for name in replacements[res_monitored_env_name]:
+                for name in names or []:
                     if fnmatch(name, res_name):
                         new_entry = deepcopy(res)
                         new_entry["name"] = name
                         upd_mon_group.append(new_entry)
-            elif res_name in replacements[res_monitored_env_name]:
+            # Resource names are listed only for resource types and environments with wildcards.
+            # Otherwise, the resource name is taken as it is specified in the configuration
+            # (the extraction skips the resources which don't exist in the monitored account).
+            elif names is None or res_name in names:
                 new_entry = deepcopy(res)
                 upd_mon_group.append(new_entry)
             # Data Quality Rulesets within Glue Jobs are not returned using list_data_quality_rulesets.
@@ -387,20 +506,7 @@ class Settings:
         self, resource_type: str, resources: list[str]
     ) -> list[str]:
         """Get monitoring groups by resources list."""
-        matched_groups = set()  # Prevent duplicates
-
-        for group in self.monitoring_groups.get("monitoring_groups", []):
-            resource_groups = []
-            resource_groups += group.get(resource_type, [])
-
-            for resource in resources:
-                matched_groups.update(
-                    group["group_name"]
-                    for res in resource_groups
-                    if res["name"] and fnmatch(resource, res.get("name"))
-                )
-
-        return list(matched_groups)
+        return list(self.routing_index.get_monitoring_groups(resource_type, resources))
 
     def get_monitoring_groups_by_resource_type(self, resource_type: str) -> list[str]:
         """Get monitoring groups related to particular resource type."""
@@ -411,32 +517,22 @@ class Settings:
         }
         return list(matched_groups)
 
+    def get_sla_thresholds(self, resource_type: str) -> list[int]:
+        """Get unique SLA thresholds (in seconds) configured for the resources of particular type."""
+        return sorted(
+            {
+                res["sla_seconds"]
+                for group in self.monitoring_groups.get("monitoring_groups", [])
+                for res in group.get(resource_type, [])
+                if res.get("sla_seconds", 0) > 0
+            }
+        )
+
     def get_recipients(
         self, monitoring_groups: list[str], notification_type: NotificationType
     ) -> list[dict]:
         """Get recipients by monitoring groups."""
-        matched_recipients = []
-
-        for recipient in self.recipients.get("recipients", []):
-            subscriptions = recipient.get("subscriptions", [])
-            for subscription in subscriptions:
-                for monitoring_group in monitoring_groups:
-                    if subscription.get("monitoring_group") == monitoring_group:
-                        if (
-                            notification_type == NotificationType.ALERT
-                            and subscription.get("alerts")
-                        ) or (
-                            notification_type == NotificationType.DIGEST
-                            and subscription.get("digest")
-                        ):
-                            recipient_info = {
-                                "recipient": recipient.get("recipient"),
-                                "delivery_method": recipient.get("delivery_method"),
-                            }
-                            if recipient_info not in matched_recipients:
-                                matched_recipients.append(recipient_info)
-
-        return matched_recipients
+        return self.routing_index.get_recipients(monitoring_groups, notification_type)
 
     def get_recipients_and_groups_by_notification_type(
         self, notification_type: NotificationType
@@ -473,10 +569,7 @@ class Settings:
         Returns:
             dict: Delivery method info
         """
-        for method in self.general.get("delivery_methods", []):
-            if method.get("name") == delivery_method_name:
-                return method
-        return {}
+        return self._delivery_methods.get(delivery_method_name, {})
 
     @staticmethod
     def _read_settings(base_path: str, read_file_func, *file_names):
@@ -516,25 +609,118 @@ class Settings:
         )
 
     @classmethod
-    def from_s3_path(cls, base_path: str, iam_role_list_monitored_res: str = None):
+    def from_s3_path(
+        cls,
+        base_path: str,
+        iam_role_list_monitored_res: str = None,
+        resource_names_cache_path: str = None,
+        max_age_seconds: int = None,
+    ):
+        """Create an instance of Settings from S3 bucket paths.
+
+        If max_age_seconds is given, the instance is cached at the class level, so it survives
+        across invocations of a warm Lambda container (along with its processed settings and
+        replaced wildcards). The cached instance is reused without any S3 requests for max_age_seconds,
+        then the settings files are revalidated by conditional GETs (If-None-Match with their ETags)
+        and the instance is re-created only if any of them has changed.
+        Wildcards are replaced again once the resource names TTL has expired.
+        """
         s3 = S3Manager()
-        (
-            general_settings,
-            monitoring_settings,
-            recipients_settings,
-            replacements_settings,
-        ) = cls._read_settings(
-            base_path,
-            s3.read_file,
-            SettingFileNames.GENERAL,
-            SettingFileNames.MONITORING_GROUPS,
-            SettingFileNames.RECIPIENTS,
-            SettingFileNames.REPLACEMENTS,
+        if max_age_seconds is not None:
+            return cls._get_cached_from_s3_path(
+                s3,
+                base_path,
+                iam_role_list_monitored_res,
+                resource_names_cache_path,
+                max_age_seconds,
+            )
+
+        settings_files = cls._read_settings(
+            base_path, s3.read_file, *cls.SETTINGS_FILE_NAMES
+        )
+        return cls._create_from_s3_files(
+            s3, settings_files, iam_role_list_monitored_res, resource_names_cache_path
         )
+
+    @classmethod
+    def _create_from_s3_files(
+        cls,
+        s3: S3Manager,
+        settings_files: list[str],
+        iam_role_list_monitored_res: str,
+        resource_names_cache_path: str,
+    ):
         return cls(
-            general_settings,
-            monitoring_settings,
-            recipients_settings,
-            replacements_settings,
+            *settings_files,
             iam_role_list_monitored_res,
+            resource_names_cache=(
+                ResourceNamesCache(resource_names_cache_path, s3_manager=s3)
+                if resource_names_cache_path
+                else None
+            ),
         )
+
+    @classmethod
+    def _get_cached_from_s3_path(
+        cls,
+        s3: S3Manager,
+        base_path: str,
+        iam_role_list_monitored_res: str,
+        resource_names_cache_path: str,
+        max_age_seconds: int,
+    ):
+        cache_key = (base_path, iam_role_list_monitored_res, resource_names_cache_path)
+        with cls._cache_lock:
+            cached = cls._cache.get(cache_key)
+            now = time.monotonic()
+            if cached and now - cached["validated_at"] < max_age_seconds:
+                return cached["settings"]
+
+            contents = dict(cached["contents"]) if cached else {}
+            etags = dict(cached["etags"]) if cached else {}
+            is_changed = cached is None
+            for file_name in cls.SETTINGS_FILE_NAMES:
+                try:
+                    content, etags[file_name] = s3.read_file_if_changed(
+                        os.path.join(base_path, file_name), etags.get(file_name)
+                    )
+                except FileNotFoundError as e:
+                    if file_name != SettingFileNames.REPLACEMENTS:
+                        raise e
+                    is_changed = is_changed or contents.get(file_name) is not None
+                    contents[file_name], etags[file_name] = None, None
+                    continue
+                if content is not None:
+                    contents[file_name] = content
+                    is_changed = True
+
+            is_expired = (
+                cached is not None
+                and now - cached["created_at"]
+                >= SettingsCacheConfigs.RESOURCE_NAMES_TTL_SECONDS
+            )
+            if is_changed or is_expired:
+                settings = cls._create_from_s3_files(
+                    s3,
+                    [contents[file_name] for file_name in cls.SETTINGS_FILE_NAMES],
+                    iam_role_list_monitored_res,
+                    resource_names_cache_path,
+                )
+                created_at = now
+            else:
+                settings, created_at = cached["settings"], cached["created_at"]
+
+            cls._cache[cache_key] = {
+                "settings": settings,
+                "contents": contents,
+                "etags": etags,
+                "created_at": created_at,
+                "validated_at": now,
+            }
+            return settings
+
+    @classmethod
+    def clear_cache(cls):
+        """Drop the cached instances of Settings."""
+        with cls._cache_lock:
+            cls._cache.clear()
@@ -0,0 +1,138 @@
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from lib.aws.boto3_client_creator import (
+    Boto3ClientCreator,
+    Boto3ClientCreatorException,
+)
+
+ACCOUNT_ID = "123456789012"
+REGION = "us-east-1"
+ROLE_NAME = "test-role"
+STS_MANAGER_CLASS_NAME = "lib.aws.boto3_client_creator.StsManager"
+SESSION_CLASS_NAME = "lib.aws.boto3_client_creator.boto3.session.Session"
+
+
+def get_credentials(expires_in: timedelta) -> dict:
+    return {
+        "AccessKeyId": "key",
+        "SecretAccessKey": "secret",
+        "SessionToken": "token",
+        "Expiration": datetime.now(tz=timezone.utc) + expires_in,
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    Boto3ClientCreator.clear_cache()
+    yield
+    Boto3ClientCreator.clear_cache()
+
+
+@pytest.fixture
+def mock_sts_manager():
+    mock_sts_manager = MagicMock()
+    mock_sts_manager.assume_role.return_value = get_credentials(timedelta(hours=1))
+    with patch(STS_MANAGER_CLASS_NAME, return_value=mock_sts_manager), patch(
+        "lib.aws.boto3_client_creator.boto3.client"
+    ):
+        yield mock_sts_manager
+
+
+@pytest.fixture
+def mock_session():
+    with patch(SESSION_CLASS_NAME) as mock_session_class:
+        mock_session_class.return_value.client.side_effect = lambda name: MagicMock(
+            service_name=name
+        )
+        yield mock_session_class
+
+
+def test_session_and_clients_are_cached(mock_sts_manager, mock_session):
+    client_creator = Boto3ClientCreator(ACCOUNT_ID, REGION, ROLE_NAME)
+    another_client_creator = Boto3ClientCreator(ACCOUNT_ID, REGION, ROLE_NAME)
+
+    glue_client = client_creator.get_client("glue")
+    assert another_client_creator.get_client("glue") is glue_client
+    assert client_creator.get_client("logs") is not glue_client
+
+    mock_sts_manager.assume_role.assert_called_once_with(
+        f"arn:aws:iam::{ACCOUNT_ID}:role/{ROLE_NAME}"
+    )
+    mock_session.assert_called_once_with(
+        aws_access_key_id="key",
+        aws_secret_access_key="secret",
+        aws_session_token="token",
+        region_name=REGION,
+    )
+    assert mock_session.return_value.client.call_count == 2
+
+
+def test_separate_sessions_per_account_region(mock_sts_manager, mock_session):
+    Boto3ClientCreator(ACCOUNT_ID, REGION, ROLE_NAME).get_client("glue")
+    Boto3ClientCreator(ACCOUNT_ID, "eu-west-1", ROLE_NAME).get_client("glue")
+    Boto3ClientCreator("210987654321", REGION, ROLE_NAME).get_client("glue")
+
+    assert mock_sts_manager.assume_role.call_count == 3
+
+
+def test_roles_of_different_accounts_are_assumed_concurrently(
+    mock_sts_manager, mock_session
+):
+    # each assume_role call waits for the other one to start (it would time out if they were serialized)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def assume_role(role_arn):
+        barrier.wait()
+        return get_credentials(timedelta(hours=1))
+
+    mock_sts_manager.assume_role.side_effect = assume_role
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(
+                Boto3ClientCreator(account_id, REGION, ROLE_NAME).get_client, "glue"
+            )
+            for account_id in [ACCOUNT_ID, "210987654321"]
+        ]
+        clients = [x.result() for x in futures]
+
+    assert clients[0] is not clients[1]
+    assert mock_sts_manager.assume_role.call_count == 2
+
+
+def test_expiring_credentials_are_refreshed(mock_sts_manager, mock_session):
+    # credentials which are about to expire are not reused
+    mock_sts_manager.assume_role.return_value = get_credentials(timedelta(minutes=1))
+    client_creator = Boto3ClientCreator(ACCOUNT_ID, REGION, ROLE_NAME)
+
+    first_client = client_creator.get_client("glue")
+    second_client = client_creator.get_client("glue")
+
+    assert mock_sts_manager.assume_role.call_count == 2
+    assert first_client is not second_client
+
+
+def test_assume_role_error(mock_sts_manager, mock_session):
+    mock_sts_manager.assume_role.side_effect = Exception("Access denied")
+    client_creator = Boto3ClientCreator(ACCOUNT_ID, REGION, ROLE_NAME)
+
+    with pytest.raises(Boto3ClientCreatorException, match="Access denied"):
+        client_creator.get_client("glue")
+
+
+def test_no_role_client_is_not_cached():
+    client_creator = Boto3ClientCreator(ACCOUNT_ID, REGION)
+
+    with patch(
+        "lib.aws.boto3_client_creator.boto3.client",
+        side_effect=[MagicMock(), MagicMock()],
+    ) as mock_client:
+        first_client = client_creator.get_client("glue")
+        second_client = client_creator.get_client("glue")
+
+    assert first_client is not second_client
+    assert mock_client.call_count == 2
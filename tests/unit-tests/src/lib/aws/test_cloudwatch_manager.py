@@ -0,0 +1,221 @@
+import boto3
+import pytest
+from unittest.mock import patch
+
+from lib.aws.cloudwatch_manager import (
+    CloudWatchManager,
+    CloudWatchManagerException,
+    LogsQuerySlice,
+)
+from lib.core.constants import CloudWatchConfigs
+
+LOG_GROUP_NAME = "/aws/lambda/test-lambda"
+QUERY_STRING = "fields @timestamp, @message"
+HOUR_MS = 3600 * 1000
+
+
+def get_row(timestamp: int) -> list:
+    return [{"field": "@timestamp", "value": str(timestamp)}]
+
+
+class FakeLogsInsights:
+    """Runs the queries over the given log event timestamps (each query completes after `polls` polls)."""
+
+    def __init__(self, client, timestamps: list[int], polls: int = 1):
+        self.client = client
+        self.timestamps = timestamps
+        self.polls = polls
+        self.queries = {}
+        self.started = []
+        self.stopped = []
+        self.max_running = 0
+
+    @property
+    def running(self) -> int:
+        return sum(1 for x in self.queries.values() if x["polls"] < self.polls)
+
+    def start_query(self, logGroupName, startTime, endTime, queryString, limit):
+        query_id = f"query-{len(self.started)}"
+        self.queries[query_id] = {"range": (startTime, endTime), "polls": 0}
+        self.started.append((startTime, endTime))
+        self.max_running = max(self.max_running, self.running)
+        return {"queryId": query_id}
+
+    def get_query_results(self, queryId):
+        query = self.queries[queryId]
+        query["polls"] += 1
+        if query["polls"] < self.polls:
+            return {"status": "Running", "results": []}
+        start_time, end_time = query["range"]
+        matched = [x for x in self.timestamps if start_time <= x <= end_time]
+        return {
+            "status": "Complete",
+            "results": [
+                get_row(x) for x in matched[: CloudWatchConfigs.QUERY_MAX_RESULTS]
+            ],
+            "statistics": {"recordsMatched": float(len(matched))},
+        }
+
+    def stop_query(self, queryId):
+        self.stopped.append(queryId)
+        return {"success": True}
+
+
+@pytest.fixture
+def logs_client():
+    return boto3.client("logs", region_name="us-east-1")
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    # a fake clock, advanced by sleep
+    clock = [0.0]
+
+    def sleep(seconds):
+        clock[0] += seconds
+
+    with patch(
+        "lib.aws.cloudwatch_manager.time.monotonic", side_effect=lambda: clock[0]
+    ), patch("lib.aws.cloudwatch_manager.time.sleep", side_effect=sleep) as mock_sleep:
+        yield mock_sleep
+
+
+def patch_client(logs_client, fake: FakeLogsInsights):
+    return (
+        patch.object(logs_client, "start_query", side_effect=fake.start_query),
+        patch.object(
+            logs_client, "get_query_results", side_effect=fake.get_query_results
+        ),
+        patch.object(logs_client, "stop_query", side_effect=fake.stop_query),
+    )
+
+
+def run_query(logs_client, fake, start_time, end_time, **kwargs) -> list:
+    patches = patch_client(logs_client, fake)
+    with patches[0], patches[1], patches[2]:
+        return CloudWatchManager(logs_client).query_logs(
+            log_group_name=LOG_GROUP_NAME,
+            query_string=QUERY_STRING,
+            start_time=start_time,
+            end_time=end_time,
+            **kwargs,
+        )
+
+
+def test_query_slice_split():
+    slices = LogsQuerySlice(0, 9).split(3)
+
+    assert [(x.start_time, x.end_time) for x in slices] == [(0, 2), (3, 5), (6, 9)]
+    # a slice is not split into parts narrower than 1 ms
+    assert len(LogsQuerySlice(0, 1).split(5)) == 2
+
+
+def test_query_logs_short_period_single_query(logs_client):
+    fake = FakeLogsInsights(logs_client, [10, 20])
+
+    result = run_query(logs_client, fake, 0, 60 * 1000)
+
+    assert result == [get_row(10), get_row(20)]
+    assert fake.started == [(0, 60 * 1000)]
+
+
+def test_query_logs_concurrent_slices(logs_client):
+    timestamps = [i * HOUR_MS + 1 for i in range(24)]
+    fake = FakeLogsInsights(logs_client, timestamps, polls=3)
+
+    result = run_query(logs_client, fake, 0, 24 * HOUR_MS - 1, max_concurrent_queries=4)
+
+    # the slices are queried concurrently and merged in chronological order
+    assert result == [get_row(x) for x in timestamps]
+    assert len(fake.started) == 4
+    assert fake.max_running == 4
+
+
+def test_query_logs_resplits_capped_slice(logs_client):
+    timestamps = list(range(0, 1000, 100))
+    fake = FakeLogsInsights(logs_client, timestamps)
+
+    with patch.object(CloudWatchConfigs, "QUERY_MAX_RESULTS", 4), patch.object(
+        CloudWatchConfigs, "MIN_SLICE_MILLISECONDS", 1
+    ):
+        result = run_query(logs_client, fake, 0, 999)
+
+    # nothing is lost or duplicated
+    assert result == [get_row(x) for x in timestamps]
+    # the capped slice (10 matched records) is re-split to fit 80% of the cap
+    assert fake.started[0] == (0, 999)
+    assert len(fake.started) == 1 + 4
+
+
+def test_query_logs_min_slice_is_truncated(logs_client):
+    fake = FakeLogsInsights(logs_client, [1, 2, 3])
+
+    with patch.object(CloudWatchConfigs, "QUERY_MAX_RESULTS", 2):
+        result = run_query(logs_client, fake, 0, 999)
+
+    # the slice can't be narrower than MIN_SLICE_MILLISECONDS - the results are truncated
+    assert result == [get_row(1), get_row(2)]
+    assert len(fake.started) == 1
+
+
+def test_query_logs_polls_with_backoff(logs_client, no_sleep):
+    fake = FakeLogsInsights(logs_client, [1], polls=4)
+
+    run_query(logs_client, fake, 0, 1000)
+
+    # the interval doubles after each poll of the running query
+    assert [x.args[0] for x in no_sleep.call_args_list] == [0.25, 0.5, 1.0, 2.0]
+
+
+def test_query_logs_concurrent_queries_quota(logs_client):
+    fake = FakeLogsInsights(logs_client, [i * HOUR_MS for i in range(4)], polls=2)
+    limit_error = logs_client.exceptions.LimitExceededException(
+        {"Error": {"Code": "LimitExceededException", "Message": "Quota"}},
+        "StartQuery",
+    )
+    start_query = fake.start_query
+    responses = iter([None, limit_error, limit_error])
+
+    def throttled_start_query(**kwargs):
+        response = next(responses, None)
+        if response is not None:
+            raise response
+        return start_query(**kwargs)
+
+    fake.start_query = throttled_start_query
+    result = run_query(logs_client, fake, 0, 4 * HOUR_MS - 1)
+
+    # the throttled queries are started later
+    assert result == [get_row(i * HOUR_MS) for i in range(4)]
+    assert len(fake.started) == 4
+
+
+def test_query_logs_failed_query_stops_running_ones(logs_client):
+    fake = FakeLogsInsights(logs_client, [], polls=5)
+    get_query_results = fake.get_query_results
+
+    def failing_get_query_results(queryId):
+        if queryId == "query-1":
+            return {"status": "Failed", "results": []}
+        return get_query_results(queryId)
+
+    fake.get_query_results = failing_get_query_results
+
+    with pytest.raises(CloudWatchManagerException, match="Failed"):
+        run_query(logs_client, fake, 0, 4 * HOUR_MS - 1)
+
+    assert "query-0" in fake.stopped
+
+
+def test_query_logs_log_group_not_found(logs_client):
+    fake = FakeLogsInsights(logs_client, [])
+
+    def start_query(**kwargs):
+        raise logs_client.exceptions.ResourceNotFoundException(
+            {"Error": {"Code": "ResourceNotFoundException", "Message": "Not found"}},
+            "StartQuery",
+        )
+
+    fake.start_query = start_query
+
+    assert run_query(logs_client, fake, 0, 1000) == []
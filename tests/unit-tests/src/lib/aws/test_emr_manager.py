@@ -1,8 +1,14 @@
 import pytest
 
 from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
 
-from lib.aws.emr_manager import EMRManager, EMRJobRunData, ResourceUtilization
+from lib.aws.emr_manager import (
+    EMRManager,
+    EMRManagerException,
+    EMRJobRunData,
+    ResourceUtilization,
+)
 
 cur_time = datetime.now().astimezone(timezone.utc) - timedelta(minutes=10)
 
@@ -97,3 +103,69 @@ def test_properties(
     assert (
         is_error_message_empty == error_message_empty
     ), f"For jobrun {job_run_data.jobRunId}, error_message should be {'empty' if error_message_empty else 'not empty'}. Actual error_message: {job_run_data.ErrorMessage}"
+
+
+class ThrottlingError(Exception):
+    response = {"Error": {"Code": "ThrottlingException"}}
+
+
+def get_job_run_response(run_id: str) -> dict:
+    return {
+        "jobRun": {
+            "applicationId": "app1",
+            "jobRunId": run_id,
+            "createdAt": cur_time,
+            "updatedAt": cur_time,
+            "state": "SUCCESS",
+        }
+    }
+
+
+def test_application_id_index_is_built_once_per_client():
+    emr_client = MagicMock()
+    emr_client.get_paginator.return_value.paginate.return_value = [
+        {"applications": [{"name": "app-name1", "id": "app1"}]},
+        {"applications": [{"name": "app-name2", "id": "app2"}]},
+    ]
+
+    assert EMRManager(emr_client).get_application_id_by_name("app-name2") == "app2"
+    assert EMRManager(emr_client).get_application_id_by_name("app-name1") == "app1"
+    emr_client.get_paginator.assert_called_once_with("list_applications")
+
+    # unknown name - index is rebuilt once, then the missing name is remembered
+    for _ in range(2):
+        with pytest.raises(EMRManagerException, match="not found"):
+            EMRManager(emr_client).get_application_id_by_name("app-name3")
+    assert emr_client.get_paginator.return_value.paginate.call_count == 2
+
+
+@patch("lib.aws.emr_manager.time.sleep")
+def test_get_job_runs_retries_throttled_requests(mock_sleep):
+    throttled_run_ids = {"run1"}
+
+    def get_job_run(applicationId, jobRunId):
+        # the first request for run1 is throttled
+        if jobRunId in throttled_run_ids:
+            throttled_run_ids.remove(jobRunId)
+            raise ThrottlingError()
+        return get_job_run_response(jobRunId)
+
+    emr_client = MagicMock()
+    emr_client.get_job_run.side_effect = get_job_run
+
+    job_runs = EMRManager(emr_client).get_job_runs(
+        app_id="app1", run_ids=["run1", "run2", "run3"]
+    )
+
+    assert [x.jobRunId for x in job_runs] == ["run1", "run2", "run3"]
+    assert emr_client.get_job_run.call_count == 4
+    mock_sleep.assert_called_once()
+
+
+def test_get_job_runs_raises_other_errors():
+    emr_client = MagicMock()
+    emr_client.get_job_run.side_effect = Exception("Access denied")
+
+    with pytest.raises(EMRManagerException, match="Access denied"):
+        EMRManager(emr_client).get_job_runs(app_id="app1", run_ids=["run1"])
+    assert emr_client.get_job_run.call_count == 1
@@ -1,7 +1,8 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
 
-from lib.aws.glue_manager import GlueManager, GlueManagerException
+from lib.aws.glue_manager import GlueManager, GlueManagerException, TableModel
 
 
 GLUE_WF_NAME = "TestWorkflow"
@@ -127,3 +128,187 @@ def test_generate_workflow_run_error_message_exception(mock_boto_client):
     ):
         glue_manager = GlueManager()
         glue_manager.generate_workflow_run_error_message(GLUE_WF_NAME, GLUE_WF_RUN_ID)
+
+
+def get_job_run(run_id: str, started_on: datetime) -> dict:
+    return {
+        "Id": run_id,
+        "Attempt": 0,
+        "JobName": "TestJob",
+        "StartedOn": started_on,
+        "LastModifiedOn": started_on,
+        "CompletedOn": started_on,
+        "JobRunState": "SUCCEEDED",
+        "AllocatedCapacity": 2,
+        "ExecutionTime": 10,
+        "Timeout": 60,
+        "MaxCapacity": 2.0,
+        "LogGroupName": "/aws-glue/jobs",
+        "GlueVersion": "4.0",
+    }
+
+
+def test_get_job_runs_stops_at_since_time():
+    now = datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc)
+    pages = [
+        {
+            "JobRuns": [
+                get_job_run("jr_3", now),
+                get_job_run("jr_2", now - timedelta(hours=1)),
+            ]
+        },
+        {"JobRuns": [get_job_run("jr_1", now - timedelta(hours=3))]},
+        {"JobRuns": [get_job_run("jr_0", now - timedelta(hours=4))]},
+    ]
+    pages_read = []
+
+    def paginate(**kwargs):
+        for page in pages:
+            pages_read.append(page)
+            yield page
+
+    mock_glue_client = MagicMock()
+    mock_glue_client.get_paginator.return_value.paginate.side_effect = paginate
+
+    glue_manager = GlueManager(mock_glue_client)
+    job_runs = glue_manager.get_job_runs(
+        job_name="TestJob", since_time=now - timedelta(hours=2)
+    )
+
+    # runs are not requested until they are consumed
+    mock_glue_client.get_paginator.assert_not_called()
+    assert [x.Id for x in job_runs] == ["jr_3", "jr_2"]
+    mock_glue_client.get_paginator.assert_called_once_with("get_job_runs")
+    # the page with an older run stops the pagination
+    assert len(pages_read) == 2
+
+
+def test_get_workflow_runs_without_graph():
+    now = datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc)
+    workflow_run = {
+        "Name": GLUE_WF_NAME,
+        "WorkflowRunId": GLUE_WF_RUN_ID,
+        "WorkflowRunProperties": {},
+        "StartedOn": now,
+        "Status": "COMPLETED",
+    }
+    mock_glue_client = MagicMock()
+    mock_glue_client.get_paginator.return_value.paginate.return_value = [
+        {"Runs": [workflow_run, {**workflow_run, "StartedOn": now - timedelta(days=1)}]}
+    ]
+
+    glue_manager = GlueManager(mock_glue_client)
+    workflow_runs = list(
+        glue_manager.get_workflow_runs(
+            workflow_name=GLUE_WF_NAME, since_time=now - timedelta(hours=1)
+        )
+    )
+
+    assert len(workflow_runs) == 1
+    paginate_kwargs = (
+        mock_glue_client.get_paginator.return_value.paginate.call_args.kwargs
+    )
+    assert paginate_kwargs["Name"] == GLUE_WF_NAME
+    assert paginate_kwargs["IncludeGraph"] is False
+
+
+def test_get_job_runs_exception():
+    mock_glue_client = MagicMock()
+    mock_glue_client.get_paginator.return_value.paginate.side_effect = Exception(
+        "Access denied"
+    )
+
+    glue_manager = GlueManager(mock_glue_client)
+    with pytest.raises(GlueManagerException, match="Access denied"):
+        list(glue_manager.get_job_runs(job_name="TestJob", since_time=datetime.now()))
+
+
+def get_catalog_glue_client(tables: list[dict], partitions_pages: list[dict]):
+    paginators = {
+        "get_tables": MagicMock(),
+        "get_partitions": MagicMock(),
+        "get_partition_indexes": MagicMock(),
+    }
+    paginators["get_tables"].paginate.return_value = [
+        {"TableList": [table]} for table in tables
+    ]
+    paginators["get_partitions"].paginate.side_effect = lambda **kwargs: iter(
+        partitions_pages
+    )
+    paginators["get_partition_indexes"].paginate.side_effect = lambda **kwargs: iter(
+        [{"PartitionIndexDescriptorList": [{"IndexName": "idx1"}]}]
+    )
+    glue_client = MagicMock()
+    glue_client.get_paginator.side_effect = lambda name: paginators[name]
+    return glue_client, paginators
+
+
+def get_table(name: str, update_time: datetime) -> dict:
+    return {
+        "Name": name,
+        "CatalogId": "123456789012",
+        "CreateTime": update_time,
+        "UpdateTime": update_time,
+    }
+
+
+def test_get_catalog_data_counts_all_pages():
+    now = datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc)
+    glue_client, paginators = get_catalog_glue_client(
+        tables=[get_table("table1", now), get_table("table2", now)],
+        partitions_pages=[
+            {"Partitions": [{"Values": ["1"]}, {"Values": ["2"]}]},
+            {"Partitions": [{"Values": ["3"]}]},
+        ],
+    )
+
+    catalog_data = GlueManager(glue_client).get_catalog_data(db_name="db1")
+
+    assert catalog_data.TotalTableCount == 2
+    assert catalog_data.TotalPartitionsCount == 6
+    assert catalog_data.TotalIndexesCount == 2
+    for partitions_call in paginators["get_partitions"].paginate.call_args_list:
+        assert partitions_call.kwargs["ExcludeColumnSchema"] is True
+
+
+def test_get_catalog_data_reuses_cached_counts():
+    now = datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc)
+    glue_client, paginators = get_catalog_glue_client(
+        tables=[get_table("table1", now), get_table("table2", now)],
+        partitions_pages=[{"Partitions": [{"Values": ["1"]}]}],
+    )
+    counted_on = now + timedelta(minutes=5)
+    cached_tables = [
+        # not updated since counted
+        TableModel(
+            **get_table("table1", now), PartitionsCount=10, CountedOn=counted_on
+        ),
+        # updated since counted
+        TableModel(
+            **get_table("table2", now - timedelta(days=1)),
+            PartitionsCount=20,
+            CountedOn=counted_on,
+        ),
+    ]
+
+    catalog_data = GlueManager(glue_client).get_catalog_data(
+        db_name="db1", cached_tables=cached_tables
+    )
+
+    assert [x.PartitionsCount for x in catalog_data.TableList] == [10, 1]
+    assert catalog_data.TableList[0].CountedOn == counted_on
+    assert catalog_data.TableList[1].CountedOn > counted_on
+    paginators["get_partitions"].paginate.assert_called_once()
+    assert (
+        paginators["get_partitions"].paginate.call_args.kwargs["TableName"] == "table2"
+    )
+
+
+def test_get_catalog_data_exception():
+    glue_client = MagicMock()
+    glue_client.get_paginator.return_value.paginate.side_effect = Exception(
+        "Database not found"
+    )
+
+    with pytest.raises(GlueManagerException, match="Database not found"):
+        GlueManager(glue_client).get_catalog_data(db_name="db1")
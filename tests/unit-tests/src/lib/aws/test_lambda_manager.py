@@ -1,9 +1,11 @@
 from unittest.mock import patch
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from lib.aws.lambda_manager import (
     LambdaManager,
     LambdaInvocation,
+    LambdaLogProcessor,
+    LambdaReport,
 )
 
 SINCE_TIME = datetime(2024, 1, 1, 0, 0, 0)
@@ -49,7 +51,7 @@ def test_get_lambda_success_invocations(mock_boto3, mock_cw_man):
             {"field": "@requestId", "value": REQUEST_ID_ONE},
         ],
     ]
-    mock_cw_man.query_logs.return_value = lambda_logs
+    mock_cw_man.iter_query_logs.return_value = iter(lambda_logs)
 
     lambda_man = LambdaManager()
     lambda_invocations = lambda_man.get_lambda_invocations(
@@ -125,7 +127,7 @@ def test_get_lambda_failed_invocations(mock_boto3, mock_cw_man):
             {"field": "@requestId", "value": REQUEST_ID_TWO},
         ],
     ]
-    mock_cw_man.query_logs.return_value = lambda_logs
+    mock_cw_man.iter_query_logs.return_value = iter(lambda_logs)
 
     lambda_man = LambdaManager()
     lambda_invocations = lambda_man.get_lambda_invocations(
@@ -208,7 +210,7 @@ def test_get_two_lambda_invocations_with_same_request_id(mock_boto3, mock_cw_man
             {"field": "@requestId", "value": REQUEST_ID_ONE},
         ],
     ]
-    mock_cw_man.query_logs.return_value = lambda_logs
+    mock_cw_man.iter_query_logs.return_value = iter(lambda_logs)
 
     lambda_man = LambdaManager()
     lambda_invocations = lambda_man.get_lambda_invocations(
@@ -240,3 +242,146 @@ def test_get_two_lambda_invocations_with_same_request_id(mock_boto3, mock_cw_man
 
     assert len(expected_results) == 2
     assert lambda_invocations == expected_results
+
+
+def get_log_entry(timestamp: str, message: str, request_id=REQUEST_ID_ONE) -> list:
+    return [
+        {"field": "@timestamp", "value": timestamp},
+        {"field": "@logStream", "value": LOG_STREAM_ONE},
+        {"field": "@message", "value": message},
+        {"field": "@requestId", "value": request_id},
+    ]
+
+
+# only the platform START/END/REPORT entries change the state of an invocation
+def test_log_processor_ignores_messages_containing_markers():
+    report = f"REPORT RequestId: {REQUEST_ID_ONE}\tDuration: 10.5 ms\tBilled Duration: 11 ms\tMemory Size: 256 MB\tMax Memory Used: 64 MB\t\n"
+    log_processor = LambdaLogProcessor(LAMBDA_NAME)
+
+    log_processor.process_log_entries(
+        [
+            # no START for this one - it started before the queried period
+            get_log_entry("2024-10-01 09:00:00.000", report, request_id="other"),
+            get_log_entry(
+                "2024-10-01 09:41:25.893", f"START RequestId: {REQUEST_ID_ONE}\n"
+            ),
+            get_log_entry("2024-10-01 09:41:26.000", "[INFO] SENDING the batch\n"),
+            get_log_entry("2024-10-01 09:41:27.000", "[INFO] RESTART the loop\n"),
+            get_log_entry(
+                "2024-10-01 09:41:28.660", f"END RequestId: {REQUEST_ID_ONE}\n"
+            ),
+            get_log_entry("2024-10-01 09:41:28.661", report),
+        ]
+    )
+    invocations = log_processor.get_completed_invocations()
+
+    assert len(invocations) == 1
+    assert invocations[0].Status == LambdaManager.LAMBDA_SUCCESS_STATE
+    assert invocations[0].StartedOn == datetime(
+        2024, 10, 1, 9, 41, 25, 893000, tzinfo=timezone.utc
+    )
+    assert invocations[0].CompletedOn == datetime(
+        2024, 10, 1, 9, 41, 28, 660000, tzinfo=timezone.utc
+    )
+    assert log_processor.in_progress_invocations == {}
+
+
+def test_log_processor_partial_invocations():
+    report = f"REPORT RequestId: {REQUEST_ID_ONE}\tDuration: 1500.0 ms\tBilled Duration: 1500 ms\tMemory Size: 256 MB\tMax Memory Used: 64 MB\t\n"
+    error = f"[ERROR]\t2024-10-01T09:41:28.000Z\t{REQUEST_ID_ONE}\tSomething failed\n"
+    log_processor = LambdaLogProcessor(LAMBDA_NAME, complete_partial_invocations=True)
+
+    # the START entry has been delivered in another batch
+    log_processor.process_log_event(LOG_STREAM_ONE, error, REQUEST_ID_ONE)
+    log_processor.process_log_event(
+        LOG_STREAM_ONE,
+        f"END RequestId: {REQUEST_ID_ONE}\n",
+        REQUEST_ID_ONE,
+        datetime(2024, 10, 1, 9, 41, 28, 500000, tzinfo=timezone.utc),
+    )
+    log_processor.process_log_event(
+        LOG_STREAM_ONE,
+        report,
+        REQUEST_ID_ONE,
+        datetime(2024, 10, 1, 9, 41, 28, 501000, tzinfo=timezone.utc),
+    )
+    # only the REPORT entry has been delivered
+    log_processor.process_log_event(
+        LOG_STREAM_TWO,
+        report.replace(REQUEST_ID_ONE, REQUEST_ID_TWO),
+        REQUEST_ID_TWO,
+        datetime(2024, 10, 1, 10, 0, 1, 500000, tzinfo=timezone.utc),
+    )
+    invocations = log_processor.pop_completed_invocations()
+    partial_invocations = log_processor.pop_partial_invocations()
+
+    # the failed one is completed, the status of the other one is unknown
+    # (its [ERROR] entries may have been delivered in another batch)
+    assert [(x.RequestId, x.Status) for x in invocations] == [
+        (REQUEST_ID_ONE, LambdaManager.LAMBDA_FAILURE_STATE),
+    ]
+    assert [(x.RequestId, x.LogStream) for x in partial_invocations] == [
+        (REQUEST_ID_TWO, LOG_STREAM_TWO),
+    ]
+    # the start time is estimated by the reported duration
+    assert invocations[0].StartedOn == datetime(
+        2024, 10, 1, 9, 41, 27, tzinfo=timezone.utc
+    )
+    assert invocations[0].ErrorString == "Something failed"
+    assert partial_invocations[0].StartedOn == datetime(
+        2024, 10, 1, 10, 0, tzinfo=timezone.utc
+    )
+    assert partial_invocations[0].CompletedOn == datetime(
+        2024, 10, 1, 10, 0, 1, 500000, tzinfo=timezone.utc
+    )
+    assert log_processor.get_completed_invocations() == []
+    assert log_processor.pop_partial_invocations() == []
+    assert log_processor.in_progress_invocations == {}
+
+
+def test_log_processor_drops_stale_invocations():
+    started_on = datetime(2024, 10, 1, 9, 0, tzinfo=timezone.utc)
+    log_processor = LambdaLogProcessor(LAMBDA_NAME)
+    log_processor.process_log_event(
+        LOG_STREAM_ONE,
+        f"START RequestId: {REQUEST_ID_ONE}\n",
+        REQUEST_ID_ONE,
+        started_on,
+    )
+    log_processor.process_log_event(
+        LOG_STREAM_TWO,
+        f"START RequestId: {REQUEST_ID_TWO}\n",
+        REQUEST_ID_TWO,
+        started_on + timedelta(minutes=20),
+    )
+
+    log_processor.drop_stale_invocations(
+        started_before=started_on + timedelta(minutes=10)
+    )
+
+    assert list(log_processor.in_progress_invocations) == [
+        (LOG_STREAM_TWO, REQUEST_ID_TWO)
+    ]
+    assert log_processor.active_request_ids == {LOG_STREAM_TWO: REQUEST_ID_TWO}
+
+
+def test_lambda_report_parsed_once():
+    invocation = LambdaInvocation(
+        LambdaName=LAMBDA_NAME,
+        LogStream=LOG_STREAM_ONE,
+        RequestId=REQUEST_ID_ONE,
+        Report=f"REPORT RequestId: {REQUEST_ID_ONE}\tDuration: 10.5 ms\tBilled Duration: 11 ms\tMemory Size: 256 MB\tMax Memory Used: 64 MB\tInit Duration: 100.1 ms\t\n",
+    )
+
+    with patch(
+        "lib.aws.lambda_manager.LambdaReport.from_report",
+        wraps=LambdaReport.from_report,
+    ) as mock_from_report:
+        assert invocation.Duration == 10.5
+        assert invocation.BilledDuration == 11
+        assert invocation.MemorySize == 256
+        assert invocation.MaxMemoryUsed == 64
+
+    mock_from_report.assert_called_once()
+    assert LambdaReport.from_report(None) == LambdaReport(0.0, 0.0, 0.0, 0.0)
+    assert LambdaReport.from_report("REPORT details") == LambdaReport()
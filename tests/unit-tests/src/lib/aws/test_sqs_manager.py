@@ -0,0 +1,245 @@
+import os
+import json
+import boto3
+import pytest
+from unittest.mock import MagicMock, patch
+from moto import mock_aws
+
+from lib.aws.sqs_manager import SQSQueueSender, SQSQueueSenderException
+
+REGION_NAME = "us-east-1"
+QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/123456789012/queue-test.fifo"
+
+
+@pytest.fixture(autouse=True)
+def mock_sleep():
+    with patch("lib.aws.sqs_manager.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.fixture
+def aws_sqs_client():
+    """Mocked AWS Credentials for moto."""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+
+    with mock_aws():
+        yield boto3.client("sqs", region_name=REGION_NAME)
+
+
+def get_successful_response(entries: list) -> dict:
+    return {
+        "Successful": [{"Id": x["Id"], "MessageId": f"msg-{x['Id']}"} for x in entries]
+    }
+
+
+def test_send_messages_batches_by_count():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = lambda QueueUrl, Entries: (
+        get_successful_response(Entries)
+    )
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    results = sender.send_messages([{"index": i} for i in range(23)])
+
+    batches = [
+        x.kwargs["Entries"] for x in sqs_client.send_message_batch.call_args_list
+    ]
+    assert [len(x) for x in batches] == [10, 10, 3]
+    assert [x["MessageId"] for x in results] == [f"msg-{i}" for i in range(23)]
+    # compact serialization
+    assert batches[0][0]["MessageBody"] == '{"index":0}'
+    assert batches[0][0]["MessageGroupId"] == "group"
+
+
+@patch("lib.core.constants.SQSConfigs.MAX_BATCH_BYTES", 100)
+def test_send_messages_batches_by_size():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = lambda QueueUrl, Entries: (
+        get_successful_response(Entries)
+    )
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    # each entry is 45 bytes (40 bytes body + 5 bytes group id)
+    sender.send_messages([{"body": "x" * 29} for _ in range(5)])
+
+    batches = [
+        x.kwargs["Entries"] for x in sqs_client.send_message_batch.call_args_list
+    ]
+    assert [len(x) for x in batches] == [2, 2, 1]
+
+
+def test_send_messages_with_message_group_ids():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = lambda QueueUrl, Entries: (
+        get_successful_response(Entries)
+    )
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    sender.send_messages([{"a": 1}, {"b": 2}], message_group_ids=["g1", "g2" * 100])
+
+    entries = sqs_client.send_message_batch.call_args.kwargs["Entries"]
+    assert [x["MessageGroupId"] for x in entries] == ["g1", ("g2" * 100)[:128]]
+
+
+def test_send_messages_retries_failed_entries_only(mock_sleep):
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = [
+        {
+            "Successful": [{"Id": "0", "MessageId": "msg-0"}],
+            "Failed": [
+                {"Id": "1", "SenderFault": False, "Code": "InternalError"},
+            ],
+        },
+        {"Successful": [{"Id": "1", "MessageId": "msg-1"}]},
+    ]
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    results = sender.send_messages([{"a": 1}, {"b": 2}])
+
+    assert sqs_client.send_message_batch.call_count == 2
+    resent = sqs_client.send_message_batch.call_args.kwargs["Entries"]
+    assert [x["Id"] for x in resent] == ["1"]
+    assert [x["MessageId"] for x in results] == ["msg-0", "msg-1"]
+    mock_sleep.assert_called_once()
+
+
+def test_send_messages_sender_fault_not_retried():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.return_value = {
+        "Successful": [{"Id": "0", "MessageId": "msg-0"}],
+        "Failed": [
+            {
+                "Id": "1",
+                "SenderFault": True,
+                "Code": "InvalidMessageContents",
+                "Message": "Invalid characters",
+            }
+        ],
+    }
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    with pytest.raises(
+        SQSQueueSenderException,
+        match="Error sending 1 of 2 messages.*InvalidMessageContents",
+    ):
+        sender.send_messages([{"a": 1}, {"b": 2}])
+
+    sqs_client.send_message_batch.assert_called_once()
+
+
+def test_send_messages_sender_fault_does_not_stop_retries(mock_sleep):
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = [
+        {
+            "Successful": [{"Id": "0", "MessageId": "msg-0"}],
+            "Failed": [
+                {
+                    "Id": "1",
+                    "SenderFault": True,
+                    "Code": "InvalidMessageContents",
+                    "Message": "Invalid characters",
+                },
+                {"Id": "2", "SenderFault": False, "Code": "InternalError"},
+            ],
+        },
+        {"Successful": [{"Id": "2", "MessageId": "msg-2"}]},
+    ]
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    # only the entry rejected due to the sender's fault is reported
+    with pytest.raises(
+        SQSQueueSenderException,
+        match="Error sending 1 of 3 messages.*InvalidMessageContents",
+    ):
+        sender.send_messages([{"a": 1}, {"b": 2}, {"c": 3}])
+
+    assert sqs_client.send_message_batch.call_count == 2
+    resent = sqs_client.send_message_batch.call_args.kwargs["Entries"]
+    assert [x["Id"] for x in resent] == ["2"]
+    mock_sleep.assert_called_once()
+
+
+def test_send_messages_retries_exhausted():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.return_value = {
+        "Failed": [{"Id": "0", "SenderFault": False, "Code": "InternalError"}],
+    }
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    with pytest.raises(SQSQueueSenderException, match="InternalError"):
+        sender.send_messages([{"a": 1}])
+
+    assert sqs_client.send_message_batch.call_count == 3
+
+
+def test_send_messages_api_error():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = Exception("Access denied")
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    with pytest.raises(SQSQueueSenderException, match="Access denied"):
+        sender.send_messages([{"a": 1}])
+
+
+def test_send_messages_api_error_does_not_stop_other_batches():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = [
+        Exception("Access denied"),
+        get_successful_response([{"Id": str(i)} for i in range(10, 12)]),
+    ]
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    with pytest.raises(
+        SQSQueueSenderException, match="Error sending 10 of 12 messages.*Access denied"
+    ):
+        sender.send_messages([{"index": i} for i in range(12)])
+
+    assert sqs_client.send_message_batch.call_count == 2
+
+
+@patch("lib.core.constants.SQSConfigs.MAX_BATCH_BYTES", 100)
+def test_send_messages_oversized_message_not_sent():
+    sqs_client = MagicMock()
+    sqs_client.send_message_batch.side_effect = lambda QueueUrl, Entries: (
+        get_successful_response(Entries)
+    )
+    sender = SQSQueueSender(QUEUE_URL, "group", sqs_client=sqs_client)
+
+    # SQS would reject the whole batch with the oversized entry
+    with pytest.raises(
+        SQSQueueSenderException, match="Error sending 1 of 3 messages.*MessageTooLong"
+    ):
+        sender.send_messages([{"a": 1}, {"body": "x" * 100}, {"b": 2}])
+
+    entries = sqs_client.send_message_batch.call_args.kwargs["Entries"]
+    assert [x["Id"] for x in entries] == ["0", "2"]
+    sqs_client.send_message_batch.assert_called_once()
+
+
+def test_send_messages_fifo_queue(aws_sqs_client):
+    queue_url = aws_sqs_client.create_queue(
+        QueueName="queue-test.fifo",
+        Attributes={"FifoQueue": "true", "ContentBasedDeduplication": "true"},
+    )["QueueUrl"]
+    sender = SQSQueueSender(queue_url, "group", sqs_client=aws_sqs_client)
+    messages = [{"index": i} for i in range(12)]
+
+    results = sender.send_messages(messages)
+
+    assert len(results) == 12
+    received = []
+    while True:
+        response = aws_sqs_client.receive_message(
+            QueueUrl=queue_url, MaxNumberOfMessages=10
+        )
+        if not response.get("Messages"):
+            break
+        for message in response["Messages"]:
+            received.append(json.loads(message["Body"]))
+            aws_sqs_client.delete_message(
+                QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"]
+            )
+    assert received == messages
@@ -0,0 +1,126 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from lib.aws.step_functions_manager import (
+    StepFunctionsManager,
+    StepFunctionsManagerException,
+)
+
+NOW = datetime(2024, 10, 1, 12, 0, tzinfo=timezone.utc)
+STATE_MACHINE_ARN = "arn:aws:states:us-east-1:123456789012:stateMachine:sm1"
+
+
+def get_execution(name: str, start_date: datetime, status: str = "SUCCEEDED"):
+    return {
+        "executionArn": f"{STATE_MACHINE_ARN}:{name}",
+        "stateMachineArn": STATE_MACHINE_ARN,
+        "name": name,
+        "status": status,
+        "startDate": start_date,
+        "stopDate": start_date + timedelta(minutes=1),
+    }
+
+
+def get_sf_client(list_state_machines_pages: list, list_executions_pages: list = []):
+    sf_client = MagicMock()
+    paginators = {
+        "list_state_machines": MagicMock(),
+        "list_executions": MagicMock(),
+    }
+    paginators["list_state_machines"].paginate.return_value = list_state_machines_pages
+    paginators["list_executions"].paginate.return_value = list_executions_pages
+    sf_client.get_paginator.side_effect = lambda name: paginators[name]
+    return sf_client, paginators
+
+
+def test_arn_index_is_built_once_per_client():
+    sf_client, paginators = get_sf_client(
+        [
+            {"stateMachines": [{"name": "sm1", "stateMachineArn": STATE_MACHINE_ARN}]},
+            {"stateMachines": [{"name": "sm2", "stateMachineArn": "arn:sm2"}]},
+        ]
+    )
+
+    # state machine from the second page is found
+    assert StepFunctionsManager(sf_client).get_step_function_arn_by_name("sm2") == (
+        "arn:sm2"
+    )
+    assert StepFunctionsManager(sf_client).get_step_function_arn_by_name("sm1") == (
+        STATE_MACHINE_ARN
+    )
+    assert paginators["list_state_machines"].paginate.call_count == 1
+
+    # unknown name - index is rebuilt (the state machine might be created recently)
+    assert StepFunctionsManager(sf_client).get_step_function_arn_by_name("sm3") is None
+    assert paginators["list_state_machines"].paginate.call_count == 2
+
+    # the missing name is remembered - no rebuild on the next lookups
+    assert StepFunctionsManager(sf_client).get_step_function_arn_by_name("sm3") is None
+    assert StepFunctionsManager(sf_client).get_step_function_arn_by_name("sm1") == (
+        STATE_MACHINE_ARN
+    )
+    assert paginators["list_state_machines"].paginate.call_count == 2
+
+
+def test_get_executions_stops_at_since_time():
+    pages = [
+        {
+            "executions": [
+                get_execution("e3", NOW, status="RUNNING"),
+                get_execution("e2", NOW - timedelta(hours=1)),
+            ]
+        },
+        {"executions": [get_execution("e1", NOW - timedelta(hours=3))]},
+        {"executions": [get_execution("e0", NOW - timedelta(hours=4))]},
+    ]
+    pages_read = []
+
+    def read_pages():
+        for page in pages:
+            pages_read.append(page)
+            yield page
+
+    sf_client, paginators = get_sf_client(
+        [{"stateMachines": [{"name": "sm1", "stateMachineArn": STATE_MACHINE_ARN}]}],
+    )
+    paginators["list_executions"].paginate.return_value = read_pages()
+
+    executions = StepFunctionsManager(sf_client).get_step_function_executions(
+        step_function_name="sm1", since_time=NOW - timedelta(hours=2)
+    )
+
+    assert [x.name for x in executions] == ["e3", "e2"]
+    assert len(pages_read) == 2
+    assert (
+        paginators["list_executions"].paginate.call_args.kwargs["stateMachineArn"]
+        == STATE_MACHINE_ARN
+    )
+
+
+def test_get_executions_unknown_state_machine():
+    sf_client, _ = get_sf_client([{"stateMachines": []}])
+
+    with pytest.raises(StepFunctionsManagerException, match="not found"):
+        list(
+            StepFunctionsManager(sf_client).get_step_function_executions(
+                step_function_name="sm1", since_time=NOW
+            )
+        )
+
+
+def test_get_execution_errors():
+    sf_client, _ = get_sf_client([])
+    sf_client.describe_execution.side_effect = lambda executionArn: {
+        **get_execution(executionArn.split(":")[-1], NOW, status="FAILED"),
+        "input": "{}",
+        "error": "States.TaskFailed",
+        "cause": f"Failure of {executionArn.split(':')[-1]}",
+    }
+    arns = [f"{STATE_MACHINE_ARN}:e{i}" for i in range(10)]
+
+    errors = StepFunctionsManager(sf_client).get_execution_errors(arns)
+
+    assert sf_client.describe_execution.call_count == 10
+    assert errors[f"{STATE_MACHINE_ARN}:e7"] == "States.TaskFailed Failure of e7"
+    assert StepFunctionsManager(sf_client).get_execution_errors([]) == {}
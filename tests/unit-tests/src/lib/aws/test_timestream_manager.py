@@ -0,0 +1,327 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from datetime import datetime, timezone
+
+from lib.aws.timestream_manager import (
+    TimeStreamQueryRunner,
+    TimestreamBufferedWriter,
+    TimestreamBufferedWriterException,
+    TimestreamQueryException,
+    TimestreamTableWriter,
+    TimestreamTableWriterException,
+)
+
+DB_NAME = "test-db"
+SUCCESS_RESPONSE = {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+class RejectedRecordsException(Exception):
+    def __init__(self, rejected_records: list):
+        super().__init__("Some records were rejected")
+        self.response = {**SUCCESS_RESPONSE, "RejectedRecords": rejected_records}
+
+
+class ThrottlingException(Exception):
+    pass
+
+
+TABLE_NAME = "glue_jobs_metrics"
+
+
+def get_records(count: int, resource_name: str = "job1") -> list:
+    return [
+        {
+            "Dimensions": [{"Name": "job_run_id", "Value": f"{resource_name}-{i}"}],
+            "MeasureName": "Metrics",
+            "Time": str(i),
+        }
+        for i in range(count)
+    ]
+
+
+def get_common_attributes(resource_name: str) -> dict:
+    return {
+        "Dimensions": [
+            {"Name": "monitored_environment", "Value": "env1"},
+            {"Name": "resource_name", "Value": resource_name},
+        ]
+    }
+
+
+@pytest.fixture
+def mock_write_client():
+    mock_write_client = MagicMock()
+    mock_write_client.exceptions.RejectedRecordsException = RejectedRecordsException
+    mock_write_client.exceptions.ThrottlingException = ThrottlingException
+    mock_write_client.write_records.return_value = SUCCESS_RESPONSE
+    return mock_write_client
+
+
+def test_lift_common_attributes():
+    records = [{"Dimensions": [{"Name": "job_run_id", "Value": "1"}], "Time": "1"}]
+    common_attributes = {**get_common_attributes("job1"), "TimeUnit": "MILLISECONDS"}
+
+    lifted = TimestreamBufferedWriter.lift_common_attributes(records, common_attributes)
+
+    assert lifted == [
+        {
+            "TimeUnit": "MILLISECONDS",
+            "Time": "1",
+            "Dimensions": [
+                {"Name": "monitored_environment", "Value": "env1"},
+                {"Name": "resource_name", "Value": "job1"},
+                {"Name": "job_run_id", "Value": "1"},
+            ],
+        }
+    ]
+    # the original record is not modified
+    assert records[0]["Dimensions"] == [{"Name": "job_run_id", "Value": "1"}]
+
+
+def test_records_of_several_resources_share_batch(mock_write_client):
+    writer = TimestreamBufferedWriter(DB_NAME, mock_write_client)
+
+    for resource_name in ["job1", "job2", "job3"]:
+        writer.add_records(
+            TABLE_NAME,
+            get_records(2, resource_name),
+            get_common_attributes(resource_name),
+        )
+    mock_write_client.write_records.assert_not_called()
+
+    responses = writer.flush()
+
+    assert len(responses) == 1
+    mock_write_client.write_records.assert_called_once()
+    call_kwargs = mock_write_client.write_records.call_args.kwargs
+    assert call_kwargs["DatabaseName"] == DB_NAME
+    assert call_kwargs["TableName"] == TABLE_NAME
+    assert call_kwargs["CommonAttributes"] == {}
+    assert len(call_kwargs["Records"]) == 6
+    assert {"Name": "resource_name", "Value": "job3"} in call_kwargs["Records"][-1][
+        "Dimensions"
+    ]
+
+
+def test_full_batches_are_sent_before_flush(mock_write_client):
+    writer = TimestreamBufferedWriter(DB_NAME, mock_write_client)
+
+    writer.add_records(TABLE_NAME, get_records(150, "job1"))
+    writer.add_records(TABLE_NAME, get_records(60, "job2"))
+    writer.add_records("glue_workflows_metrics", get_records(5, "workflow1"))
+
+    responses = writer.flush()
+
+    # 2 full batches + partial batches for each table
+    assert len(responses) == 4
+    batch_sizes = sorted(
+        (x.kwargs["TableName"], len(x.kwargs["Records"]))
+        for x in mock_write_client.write_records.call_args_list
+    )
+    assert batch_sizes == [
+        ("glue_jobs_metrics", 10),
+        ("glue_jobs_metrics", 100),
+        ("glue_jobs_metrics", 100),
+        ("glue_workflows_metrics", 5),
+    ]
+
+    # buffers are empty after flush
+    assert writer.flush() == []
+    assert mock_write_client.write_records.call_count == 4
+
+
+def test_flush_raises_when_batch_fails(mock_write_client):
+    mock_write_client.write_records.side_effect = [
+        {"ResponseMetadata": {"HTTPStatusCode": 200}},
+        Exception("Throttled"),
+    ]
+    writer = TimestreamBufferedWriter(DB_NAME, mock_write_client)
+    writer.add_records(TABLE_NAME, get_records(120))
+
+    with pytest.raises(TimestreamTableWriterException, match="Throttled"):
+        writer.flush()
+
+    # all the batches were attempted
+    assert mock_write_client.write_records.call_count == 2
+
+
+def test_flush_names_sources_of_failed_batches(mock_write_client):
+    def write_records(**kwargs):
+        # the last (partial) batch contains the records of job2 only
+        if len(kwargs["Records"]) < TimestreamBufferedWriter.RECORDS_BATCH_SIZE:
+            raise Exception("Throttled")
+        return SUCCESS_RESPONSE
+
+    mock_write_client.write_records.side_effect = write_records
+    writer = TimestreamBufferedWriter(DB_NAME, mock_write_client)
+    writer.add_records(TABLE_NAME, get_records(150, "job1"), source="job1")
+    writer.add_records(TABLE_NAME, get_records(60, "job2"), source="job2")
+
+    with pytest.raises(TimestreamBufferedWriterException) as exc_info:
+        writer.flush()
+
+    # the records of job1 were written (the 2nd full batch is shared by job1 and job2)
+    assert exc_info.value.failed_sources == {"job2"}
+
+
+def test_only_rejected_records_are_resent(mock_write_client):
+    mock_write_client.write_records.side_effect = [
+        RejectedRecordsException(
+            [
+                {"RecordIndex": 1, "Reason": "Version conflict", "ExistingVersion": 3},
+                {
+                    "RecordIndex": 2,
+                    "Reason": "The record timestamp is outside the time range of the memory store.",
+                },
+            ]
+        ),
+        SUCCESS_RESPONSE,
+    ]
+    writer = TimestreamTableWriter(DB_NAME, TABLE_NAME, mock_write_client)
+    records = get_records(3)
+
+    writer.write_records(records)
+
+    assert mock_write_client.write_records.call_count == 2
+    resent_records = mock_write_client.write_records.call_args.kwargs["Records"]
+    assert resent_records == [{**records[1], "Version": 4}]
+    assert writer.dropped_records_count == 1
+
+
+def test_non_retryable_rejection_raises(mock_write_client):
+    mock_write_client.write_records.side_effect = [
+        RejectedRecordsException(
+            [
+                {"RecordIndex": 0, "Reason": "Dimension value is too long."},
+                {"RecordIndex": 1, "Reason": "Version conflict", "ExistingVersion": 1},
+            ]
+        ),
+        SUCCESS_RESPONSE,
+    ]
+    writer = TimestreamTableWriter(DB_NAME, TABLE_NAME, mock_write_client)
+
+    with pytest.raises(TimestreamTableWriterException, match="too long"):
+        writer.write_records(get_records(2))
+
+    # the retryable record is written anyway
+    assert mock_write_client.write_records.call_count == 2
+
+
+@patch("lib.aws.timestream_manager.time.sleep")
+def test_throttled_write_is_retried_with_backoff(mock_sleep, mock_write_client):
+    mock_write_client.write_records.side_effect = [
+        ThrottlingException("Rate exceeded"),
+        ThrottlingException("Rate exceeded"),
+        SUCCESS_RESPONSE,
+    ]
+    writer = TimestreamTableWriter(DB_NAME, TABLE_NAME, mock_write_client)
+
+    assert writer.write_records(get_records(2)) == [SUCCESS_RESPONSE]
+
+    assert mock_write_client.write_records.call_count == 3
+    assert mock_sleep.call_count == 2
+    assert all(
+        0 <= x.args[0] <= TimestreamTableWriter.BACKOFF_MAX_SECONDS
+        for x in mock_sleep.call_args_list
+    )
+
+
+@patch("lib.aws.timestream_manager.time.sleep")
+def test_throttled_write_fails_after_max_attempts(mock_sleep, mock_write_client):
+    mock_write_client.write_records.side_effect = ThrottlingException("Rate exceeded")
+    writer = TimestreamTableWriter(DB_NAME, TABLE_NAME, mock_write_client)
+
+    with pytest.raises(TimestreamTableWriterException, match="not written"):
+        writer.write_records(get_records(2))
+
+    assert (
+        mock_write_client.write_records.call_count
+        == TimestreamTableWriter.MAX_WRITE_ATTEMPTS
+    )
+
+
+QUERY_COLUMN_INFO = [
+    {"Name": "resource_name", "Type": {"ScalarType": "VARCHAR"}},
+    {"Name": "execution", "Type": {"ScalarType": "BIGINT"}},
+    {"Name": "execution_time_sec", "Type": {"ScalarType": "DOUBLE"}},
+    {"Name": "time", "Type": {"ScalarType": "TIMESTAMP"}},
+]
+
+
+def get_query_page(rows: list, next_token: str = None) -> dict:
+    page = {
+        "ColumnInfo": QUERY_COLUMN_INFO,
+        "Rows": [
+            {
+                "Data": [
+                    {"NullValue": True} if x is None else {"ScalarValue": x}
+                    for x in row
+                ]
+            }
+            for row in rows
+        ],
+    }
+    if next_token:
+        page["NextToken"] = next_token
+    return page
+
+
+@pytest.fixture
+def query_client():
+    query_client = MagicMock()
+    query_client.query.side_effect = [
+        get_query_page(
+            [("job1", "1", "10.5", "2024-09-20 16:39:05.000000000")], next_token="t1"
+        ),
+        # pages may be empty while the query is still running
+        get_query_page([], next_token="t2"),
+        get_query_page([("job2", "2", None, "2024-09-20 16:40:00.000000000")]),
+    ]
+    return query_client
+
+
+def test_execute_query_reads_all_pages(query_client):
+    result = TimeStreamQueryRunner(query_client).execute_query("SELECT 1")
+
+    assert result == [
+        {
+            "resource_name": "job1",
+            "execution": "1",
+            "execution_time_sec": "10.5",
+            "time": "2024-09-20 16:39:05.000000000",
+        },
+        {
+            "resource_name": "job2",
+            "execution": "2",
+            "execution_time_sec": None,
+            "time": "2024-09-20 16:40:00.000000000",
+        },
+    ]
+    assert [x.kwargs for x in query_client.query.call_args_list] == [
+        {"QueryString": "SELECT 1"},
+        {"QueryString": "SELECT 1", "NextToken": "t1"},
+        {"QueryString": "SELECT 1", "NextToken": "t2"},
+    ]
+
+
+def test_iter_query_rows_typed_is_lazy(query_client):
+    rows = TimeStreamQueryRunner(query_client).iter_query_rows("SELECT 1", typed=True)
+
+    assert next(rows) == {
+        "resource_name": "job1",
+        "execution": 1,
+        "execution_time_sec": 10.5,
+        "time": datetime(2024, 9, 20, 16, 39, 5, tzinfo=timezone.utc),
+    }
+    # the next pages are not requested until the rows are consumed
+    assert query_client.query.call_count == 1
+    assert [x["execution"] for x in rows] == [2]
+
+
+def test_execute_query_error():
+    query_client = MagicMock()
+    query_client.query.side_effect = Exception("Access denied")
+
+    with pytest.raises(TimestreamQueryException, match="Access denied"):
+        TimeStreamQueryRunner(query_client).execute_query("SELECT 1")
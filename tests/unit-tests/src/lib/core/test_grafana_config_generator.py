@@ -0,0 +1,34 @@
+import json
+import os
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+from lib.core.constants import SettingConfigs
+from lib.core.grafana_config_generator import generate_timestream_dashboard_model
+
+GRAFANA_DASHBOARD_TEMPLATE_FOLDER = os.path.join(
+    Path(__file__).resolve().parents[5],
+    "cdk",
+    "tooling_environment",
+    "stacks",
+    "grafana",
+)
+
+
+@pytest.mark.parametrize("resource_type", SettingConfigs.RESOURCE_TYPES)
+def test_generate_timestream_dashboard_model(resource_type):
+    with patch(
+        "lib.core.grafana_config_generator.GRAFANA_DASHBOARD_TEMPLATE_FOLDER",
+        GRAFANA_DASHBOARD_TEMPLATE_FOLDER,
+    ):
+        dashboard_data = generate_timestream_dashboard_model(
+            resource_type=resource_type,
+            timestream_database_name="timestream-db",
+            timestream_table_name=f"tstable-{resource_type}-metrics",
+            timestream_rollup_table_name=f"tstable-{resource_type}-rollups",
+        )
+
+    # all the placeholders are replaced
+    dashboard_json = json.dumps(dashboard_data)
+    assert "<<" not in dashboard_json
@@ -0,0 +1,59 @@
+from lib.core.json_utils import replace_values_in_json
+
+REPLACEMENTS = {
+    "<<env>>": "dev",
+    "<<env_name>>": "development",
+    "<<account_id>>": "1234567890",
+}
+
+
+def get_json_data() -> dict:
+    return {
+        "tooling_environment": {
+            "name": "Tooling [<<env>>]",
+            "account_id": "<<account_id>>",
+            "region": "us-east-1",
+        },
+        "monitored_environments": [
+            {"name": "monitored [<<env_name>>] <<env>>", "account_id": "111"},
+            {"name": "static", "account_id": "222", "port": 8080},
+        ],
+        "flag": True,
+    }
+
+
+def test_replace_values_in_json():
+    json_data = get_json_data()
+
+    result = replace_values_in_json(json_data, REPLACEMENTS)
+
+    # replaced in place
+    assert result is json_data
+    assert result["tooling_environment"] == {
+        "name": "Tooling [dev]",
+        "account_id": "1234567890",
+        "region": "us-east-1",
+    }
+    # the longest key wins when keys overlap
+    assert result["monitored_environments"][0]["name"] == "monitored [development] dev"
+    assert result["monitored_environments"][1] == {
+        "name": "static",
+        "account_id": "222",
+        "port": 8080,
+    }
+    assert result["flag"] is True
+
+
+def test_replace_values_in_json_single_pass():
+    # replaced values are not scanned for other keys again
+    result = replace_values_in_json(
+        {"value": "<<a>> <<b>>"}, {"<<a>>": "<<b>>", "<<b>>": "b"}
+    )
+
+    assert result == {"value": "<<b>> b"}
+
+
+def test_replace_values_in_json_no_replacements():
+    json_data = get_json_data()
+
+    assert replace_values_in_json(json_data, {}) == get_json_data()
@@ -558,3 +558,167 @@ def test_get_summary_entry_with_warnings(scenario, resource_type, aggregated_run
     assert returned_summary_entry.TotalSuccess == 3
     assert returned_summary_entry.TotalFailures == 0
     assert returned_summary_entry.TotalWarnings == 2
+
+
+RESOURCES_CONFIG = [
+    {
+        "name": "lambda-test",
+        "sla_seconds": 10,
+        "minimum_number_of_runs": 0,
+        "region_name": "test_region",
+        "account_id": "test_account_id",
+    },
+    {
+        "name": "lambda-test-2",
+        "sla_seconds": 0,
+        "minimum_number_of_runs": 5,
+        "region_name": "test_region",
+        "account_id": "test_account_id",
+    },
+]
+EXTRACTED_LAMBDA_RUNS = {
+    types.LAMBDA_FUNCTIONS: [
+        {
+            "resource_name": "lambda-test",
+            "execution": "1",
+            "failed": "0",
+            "succeeded": "1",
+            "execution_time_sec": "12",
+            "failed_attempts": "1",
+            "job_run_id": "1111",
+            "log_stream": "log-stream-1111",
+            "error_message": "Timeout",
+        },
+        {
+            "resource_name": "lambda-test",
+            "execution": "1",
+            "failed": "1",
+            "succeeded": "0",
+            "execution_time_sec": "5",
+            "failed_attempts": "0",
+            "job_run_id": "2222",
+            "log_stream": "log-stream-2222",
+            "error_message": "Failed",
+        },
+        {
+            "resource_name": "lambda-test",
+            "execution": "1",
+            "failed": "0",
+            "succeeded": "1",
+            "execution_time_sec": "3",
+            "failed_attempts": "0",
+        },
+    ]
+}
+# the same runs aggregated by the metrics storage
+RUNS_SUMMARIES = {
+    "summaries": [
+        {
+            "resource_name": "lambda-test",
+            "execution": 3,
+            "failed": 1,
+            "succeeded": 2,
+            "succeeded_with_retries": 1,
+            "sla_breaches_10": 1,
+        }
+    ],
+    "failed_runs": [
+        {**run, "rn": str(i + 1)}
+        for i, run in enumerate(EXTRACTED_LAMBDA_RUNS[types.LAMBDA_FUNCTIONS][:2])
+    ],
+}
+
+
+def test_get_aggregated_runs_from_summaries():
+    digest_aggregator = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.LAMBDA_FUNCTIONS
+    )
+    result = digest_aggregator.get_aggregated_runs_from_summaries(
+        RUNS_SUMMARIES, RESOURCES_CONFIG
+    )
+
+    entry = result["lambda-test"]
+    assert (entry.Executions, entry.Success, entry.Errors, entry.Warnings) == (
+        3,
+        2,
+        1,
+        2,
+    )
+    assert entry.Status == DigestSettings.STATUS_ERROR
+    assert entry.HasSLABreach and entry.HasFailedAttempts
+    assert "ERROR: Failed" in entry.CommentsStr
+    assert "ERROR: Timeout" in entry.CommentsStr
+    # resources without runs
+    assert result["lambda-test-2"].Executions == 0
+    assert result["lambda-test-2"].InsufficientRuns
+
+
+def test_get_aggregated_runs_from_summaries_matches_get_aggregated_runs():
+    aggregated_runs = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.LAMBDA_FUNCTIONS
+    ).get_aggregated_runs(EXTRACTED_LAMBDA_RUNS, RESOURCES_CONFIG)
+    aggregated_summaries = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.LAMBDA_FUNCTIONS
+    ).get_aggregated_runs_from_summaries(RUNS_SUMMARIES, RESOURCES_CONFIG)
+
+    assert aggregated_summaries.keys() == aggregated_runs.keys()
+    for name, entry in aggregated_runs.items():
+        assert aggregated_summaries[name].Status == entry.Status
+        assert aggregated_summaries[name].CommentsStr == entry.CommentsStr
+        assert aggregated_summaries[name].model_dump() == entry.model_dump()
+
+
+def test_get_aggregated_runs_from_empty_summaries():
+    digest_aggregator = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.GLUE_JOBS
+    )
+    result = digest_aggregator.get_aggregated_runs_from_summaries({}, RESOURCES_CONFIG)
+
+    assert result["lambda-test"].Status == DigestSettings.STATUS_OK
+    assert result["lambda-test-2"].Status == DigestSettings.STATUS_ERROR
+
+
+def test_get_runs_index():
+    digest_aggregator = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.LAMBDA_FUNCTIONS
+    )
+    runs_index = digest_aggregator.get_runs_index(EXTRACTED_LAMBDA_RUNS)
+
+    assert list(runs_index) == ["lambda-test"]
+    assert [run.job_run_id for run in runs_index["lambda-test"]] == [
+        "1111",
+        "2222",
+        None,
+    ]
+    assert runs_index["lambda-test"][0].failed_attempts == 1
+
+
+def test_get_aggregated_runs_with_shared_runs_index():
+    runs_index = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.LAMBDA_FUNCTIONS
+    ).get_runs_index(EXTRACTED_LAMBDA_RUNS)
+
+    # the aggregators of different monitoring groups reuse the same index
+    for resources_config in (RESOURCES_CONFIG, RESOURCES_CONFIG[:1]):
+        expected = DigestDataAggregatorProvider.get_aggregator_provider(
+            types.LAMBDA_FUNCTIONS
+        ).get_aggregated_runs(EXTRACTED_LAMBDA_RUNS, resources_config)
+        result = DigestDataAggregatorProvider.get_aggregator_provider(
+            types.LAMBDA_FUNCTIONS
+        ).get_aggregated_runs({}, resources_config, runs_index=runs_index)
+
+        assert {name: entry.model_dump() for name, entry in result.items()} == {
+            name: entry.model_dump() for name, entry in expected.items()
+        }
+
+
+def test_get_summaries_index():
+    digest_aggregator = DigestDataAggregatorProvider.get_aggregator_provider(
+        types.LAMBDA_FUNCTIONS
+    )
+    summaries_index = digest_aggregator.get_summaries_index(RUNS_SUMMARIES)
+
+    runs_summary, failed_runs = summaries_index["lambda-test"]
+    assert runs_summary.execution == 3
+    assert runs_summary.sla_breaches == {10: 1}
+    assert [run.job_run_id for run in failed_runs] == ["1111", "2222"]
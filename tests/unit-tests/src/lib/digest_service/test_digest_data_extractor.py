@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
 from unittest.mock import MagicMock, patch
 import pytest
-from lib.core.constants import SettingConfigResourceTypes as types
+from lib.core.constants import SettingConfigResourceTypes as types, DigestSettings
 from lib.digest_service import (
     DigestDataExtractorProvider,
     DigestException,
@@ -174,3 +174,264 @@ def test_digest_extract_runs_exception(scenario, resource_type):
 
     mocked_metrics_storage.is_table_empty.assert_called_once_with(metrics_table_name)
     mocked_metrics_storage.execute_query.assert_not_called()
+
+
+def test_digest_iter_runs(mocked_metrics_storage):
+    rows = [{"resource_name": "job1"}, {"resource_name": "job2"}]
+    mocked_metrics_storage.is_table_empty.return_value = False
+    mocked_metrics_storage.iter_query_rows.return_value = iter(rows)
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    assert list(returned_extractor.iter_runs("test_query")) == rows
+    mocked_metrics_storage.iter_query_rows.assert_called_once_with("test_query")
+    mocked_metrics_storage.execute_query.assert_not_called()
+
+
+def test_digest_iter_runs_no_data(mocked_metrics_storage):
+    mocked_metrics_storage.is_table_empty.return_value = True
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    assert list(returned_extractor.iter_runs("test_query")) == []
+    mocked_metrics_storage.iter_query_rows.assert_not_called()
+
+
+def test_digest_get_aggregated_queries(mocked_metrics_storage):
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.LAMBDA_FUNCTIONS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    summary_query, failed_runs_query = returned_extractor.get_aggregated_queries(
+        START_TIME, END_TIME, [30, 0, 10, 30]
+    )
+
+    runs_query = returned_extractor.get_query(START_TIME, END_TIME)
+    assert runs_query in summary_query
+    assert "GROUP BY resource_name" in summary_query
+    # one column per unique positive SLA threshold
+    assert re.findall(r"AS (sla_breaches_\d+)", summary_query) == [
+        "sla_breaches_10",
+        "sla_breaches_30",
+    ]
+    assert "failed_attempts > 0" in summary_query
+    assert runs_query in failed_runs_query
+    assert "ROW_NUMBER() OVER (PARTITION BY resource_name" in failed_runs_query
+    assert f"rn <= {DigestSettings.MAX_FAILED_RUNS_PER_RESOURCE}" in failed_runs_query
+
+
+def test_digest_extract_runs_summaries(mocked_metrics_storage):
+    summaries = [{"resource_name": "job1", "execution": 2}]
+    failed_runs = [{"resource_name": "job1", "failed": "1"}]
+    mocked_metrics_storage.is_table_empty.return_value = False
+    mocked_metrics_storage.iter_query_rows.side_effect = [
+        iter(summaries),
+        iter(failed_runs),
+    ]
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+    result = returned_extractor.extract_runs_summaries(
+        START_TIME, END_TIME, [10], use_rollups=False
+    )
+
+    assert result == {"summaries": summaries, "failed_runs": failed_runs}
+    assert mocked_metrics_storage.iter_query_rows.call_count == 2
+    mocked_metrics_storage.execute_query.assert_not_called()
+
+
+def test_digest_extract_runs_summaries_from_rollups(mocked_metrics_storage):
+    summaries = [{"resource_name": "job1", "execution": 2}]
+    mocked_metrics_storage.get_rollup_table_name_for_resource_type.return_value = (
+        "glue_jobs-rollup"
+    )
+    mocked_metrics_storage.is_table_empty.return_value = False
+    mocked_metrics_storage.iter_query_rows.side_effect = [
+        iter([{"min_time": datetime(1999, 12, 1)}]),
+        iter([{"sla_seconds": "10", "min_time": datetime(1999, 12, 1)}]),
+        iter(summaries),
+        iter([]),
+    ]
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+    result = returned_extractor.extract_runs_summaries(
+        START_TIME, datetime(2000, 1, 2, 0, 30), [10]
+    )
+
+    assert result == {"summaries": summaries, "failed_runs": []}
+    summary_query = mocked_metrics_storage.iter_query_rows.call_args_list[2].args[0]
+    # full hours are read from the rollups, the rest - from the runs
+    assert '"glue_jobs-rollup"' in summary_query
+    assert "UNION ALL" in summary_query
+    assert "sla_seconds = '10'" in summary_query
+    assert "2000-01-02 00:00:00" in summary_query
+
+
+def test_digest_get_rollup_sla_thresholds(mocked_metrics_storage):
+    mocked_metrics_storage.iter_query_rows.return_value = iter(
+        [
+            {"sla_seconds": "60", "min_time": datetime(1999, 12, 1)},
+            {"sla_seconds": "10", "min_time": datetime(1999, 12, 1)},
+            # configured after the start of the period
+            {"sla_seconds": "30", "min_time": datetime(2000, 1, 1, 5)},
+        ]
+    )
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    assert returned_extractor.get_rollup_sla_thresholds(START_TIME) == [10, 60]
+
+
+def test_digest_aggregated_queries_missing_sla_thresholds(mocked_metrics_storage):
+    mocked_metrics_storage.get_rollup_table_name_for_resource_type.return_value = (
+        "glue_jobs-rollup"
+    )
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+    rollup_start, rollup_end = datetime(2000, 1, 1, 1), datetime(2000, 1, 1, 5)
+
+    summary_query, _ = returned_extractor.get_aggregated_queries(
+        datetime(2000, 1, 1, 0, 30),
+        rollup_end,
+        [10, 30],
+        rollup_period=(rollup_start, rollup_end),
+        rollup_sla_thresholds=[10],
+    )
+
+    # the breaches of the threshold missing from the rollups are counted from the runs of the rollup period
+    assert "sla_seconds = '10'" in summary_query
+    assert "sla_seconds = '30'" not in summary_query
+    assert "0 AS sla_breaches_30" in summary_query
+    assert "0 AS execution" in summary_query
+    assert "execution_time_sec > 30" in summary_query
+    assert (
+        f"'{rollup_start}' AND '{rollup_end - timedelta(microseconds=1)}'"
+        in summary_query
+    )
+
+
+@pytest.mark.parametrize(
+    "start_time, end_time, min_time, expected",
+    [
+        # rollups cover the full hours of the period
+        (
+            datetime(2000, 1, 1, 0, 10),
+            datetime(2000, 1, 1, 5, 30),
+            datetime(1999, 12, 1),
+            (datetime(2000, 1, 1, 1), datetime(2000, 1, 1, 5)),
+        ),
+        # rollups have been introduced after the start of the period
+        (START_TIME, END_TIME, datetime(2000, 1, 1, 3), None),
+        # the rollup table is empty
+        (START_TIME, END_TIME, None, None),
+        # no full hour in the period
+        (datetime(2000, 1, 1, 0, 10), datetime(2000, 1, 1, 0, 50), None, None),
+    ],
+)
+def test_digest_get_rollup_period(
+    start_time, end_time, min_time, expected, mocked_metrics_storage
+):
+    mocked_metrics_storage.is_table_empty.return_value = min_time is None
+    mocked_metrics_storage.iter_query_rows.return_value = iter([{"min_time": min_time}])
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    assert returned_extractor.get_rollup_period(start_time, end_time) == expected
+
+
+def test_digest_get_rollup_period_query_error(mocked_metrics_storage):
+    mocked_metrics_storage.is_table_empty.side_effect = Exception("Table not found")
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    # the digest falls back to the runs
+    assert returned_extractor.get_rollup_period(START_TIME, END_TIME) is None
+
+
+@pytest.mark.parametrize(
+    "resource_type, sum_column",
+    [
+        (types.GLUE_JOBS, "dpu_seconds"),
+        (types.LAMBDA_FUNCTIONS, "gb_seconds"),
+        (types.STEP_FUNCTIONS, None),
+    ],
+)
+def test_digest_get_rollup_query(resource_type, sum_column, mocked_metrics_storage):
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=resource_type,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    query = returned_extractor.get_rollup_query(
+        START_TIME, END_TIME, [60, 10, 60], resource_names=["job1", "job'2"]
+    )
+
+    assert "resource_name IN ('job1', 'job''2')" in query
+    assert "BIN(time, 1h) AS time" in query
+    assert "APPROX_PERCENTILE(execution_time_sec, 0.95)" in query
+    assert query.count("AS sla_breaches_60") == 1
+    assert "AS sla_breaches_10" in query
+    if sum_column:
+        assert f"SUM({sum_column}) AS {sum_column}" in query
+
+
+def test_digest_lambda_query_by_first_attempt(mocked_metrics_storage):
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.LAMBDA_FUNCTIONS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    query = returned_extractor.get_query(START_TIME, END_TIME)
+
+    # all the attempts of the invocations are read, but only the ones first attempted in the period are returned
+    lookback = returned_extractor.attempts_lookback
+    attempts_filter = (
+        f"time BETWEEN '{START_TIME - lookback}' AND '{END_TIME + lookback}'"
+    )
+    assert query.count(attempts_filter) == 2
+    assert f"HAVING MIN(t.time) BETWEEN '{START_TIME}' AND '{END_TIME}'" in query
+
+
+def test_digest_extract_runs_summaries_exception(mocked_metrics_storage):
+    mocked_metrics_storage.is_table_empty.return_value = False
+    mocked_metrics_storage.iter_query_rows.side_effect = Exception("Query failed")
+
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_JOBS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    with pytest.raises(DigestException):
+        returned_extractor.extract_runs_summaries(START_TIME, END_TIME, [])
+
+
+def test_digest_glue_catalogs_not_aggregated(mocked_metrics_storage):
+    returned_extractor = DigestDataExtractorProvider.get_digest_provider(
+        resource_type=types.GLUE_DATA_CATALOGS,
+        metrics_storage=mocked_metrics_storage,
+    )
+
+    assert not returned_extractor.supports_aggregated_queries
@@ -0,0 +1,213 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lib.core.constants import SettingConfigResourceTypes as types
+from lib.digest_service import MetricsRollup, MetricsRollupException
+
+ROLLUP_ROW = {
+    "monitored_environment": "env1",
+    "resource_name": "job1",
+    "time": datetime(2024, 1, 1, 10, tzinfo=timezone.utc),
+    "execution": 3,
+    "failed": 1,
+    "succeeded": 2,
+    "succeeded_with_retries": None,
+    "execution_time_sec": 90.0,
+    "max_execution_time_sec": 50.0,
+    "p50_execution_time_sec": 30.0,
+    "p95_execution_time_sec": 50.0,
+    "dpu_seconds": None,
+    "sla_breaches_40": 1,
+}
+
+
+@pytest.fixture
+def mocked_metrics_storage():
+    metrics_storage = MagicMock()
+    metrics_storage.get_rollup_table_name_for_resource_type.return_value = (
+        "glue_jobs-rollup"
+    )
+    return metrics_storage
+
+
+def test_rollup_records(mocked_metrics_storage):
+    metrics_rollup = MetricsRollup(types.GLUE_JOBS, mocked_metrics_storage)
+
+    records = metrics_rollup._get_records(ROLLUP_ROW, [40], version=123)
+
+    assert len(records) == 2
+    base_record, sla_record = records
+    assert base_record["Time"] == "1704103200000"
+    assert base_record["Version"] == 123
+    assert base_record["Dimensions"] == [
+        {"Name": "monitored_environment", "Value": "env1"},
+        {"Name": "resource_name", "Value": "job1"},
+        {"Name": "sla_seconds", "Value": "0"},
+    ]
+    measures = {x["Name"]: x["Value"] for x in base_record["MeasureValues"]}
+    # missing counts are zeros, missing statistics are skipped
+    assert measures == {
+        "execution": "3",
+        "failed": "1",
+        "succeeded": "2",
+        "succeeded_with_retries": "0",
+        "sla_breaches": "0",
+        "execution_time_sec": "90.0",
+        "max_execution_time_sec": "50.0",
+        "p50_execution_time_sec": "30.0",
+        "p95_execution_time_sec": "50.0",
+    }
+    assert sla_record["Dimensions"][2] == {"Name": "sla_seconds", "Value": "40"}
+    assert sla_record["MeasureValues"] == [
+        {"Name": "sla_breaches", "Value": "1", "Type": "BIGINT"}
+    ]
+
+
+def test_refresh(mocked_metrics_storage):
+    mocked_metrics_storage.iter_query_rows.return_value = iter([ROLLUP_ROW])
+    metrics_rollup = MetricsRollup(types.GLUE_JOBS, mocked_metrics_storage)
+    written_time_ranges = {
+        "job1": (datetime(2024, 1, 1, 10, 20), datetime(2024, 1, 1, 10, 40)),
+        "job2": (datetime(2024, 1, 1, 9, 50), datetime(2024, 1, 1, 11, 5)),
+    }
+
+    with patch.object(
+        metrics_rollup.digest_extractor,
+        "get_rollup_query",
+        wraps=metrics_rollup.digest_extractor.get_rollup_query,
+    ) as mock_get_query:
+        result = metrics_rollup.refresh(
+            written_time_ranges, [40, 40, 0], earliest_time=datetime(2024, 1, 1, 8)
+        )
+
+    # the full hours with the written runs are recomputed
+    assert result == 2
+    mock_get_query.assert_called_once_with(
+        datetime(2024, 1, 1, 9),
+        datetime(2024, 1, 1, 12),
+        [40],
+        resource_names=["job1", "job2"],
+    )
+    mocked_metrics_storage.write_records.assert_called_once()
+    assert mocked_metrics_storage.write_records.call_args.args[0] == "glue_jobs-rollup"
+
+
+def test_refresh_clipped_to_earliest_time(mocked_metrics_storage):
+    mocked_metrics_storage.iter_query_rows.return_value = iter([])
+    metrics_rollup = MetricsRollup(types.GLUE_JOBS, mocked_metrics_storage)
+
+    with patch.object(
+        metrics_rollup.digest_extractor, "get_rollup_query", return_value="query"
+    ) as mock_get_query:
+        result = metrics_rollup.refresh(
+            {"job1": (datetime(2024, 1, 1, 1), datetime(2024, 1, 1, 10, 30))},
+            [],
+            earliest_time=datetime(2024, 1, 1, 8, 15),
+        )
+
+    # the hour partially older than the earliest writeable time is skipped
+    assert result == 0
+    assert mock_get_query.call_args.args[:2] == (
+        datetime(2024, 1, 1, 9),
+        datetime(2024, 1, 1, 11),
+    )
+    mocked_metrics_storage.write_records.assert_not_called()
+
+
+def test_refresh_lambda_first_attempt_periods(mocked_metrics_storage):
+    mocked_metrics_storage.iter_query_rows.return_value = iter([])
+    metrics_rollup = MetricsRollup(types.LAMBDA_FUNCTIONS, mocked_metrics_storage)
+
+    with patch.object(
+        metrics_rollup.digest_extractor, "get_rollup_query", return_value="query"
+    ) as mock_get_query:
+        metrics_rollup.refresh(
+            {"lambda1": (datetime(2024, 1, 1, 10, 5), datetime(2024, 1, 1, 10, 30))},
+            [],
+        )
+
+    # the retries written at 10:05 may belong to the invocations first attempted in the previous hour
+    assert mock_get_query.call_args.args[:2] == (
+        datetime(2024, 1, 1, 9),
+        datetime(2024, 1, 1, 11),
+    )
+
+
+def test_refresh_not_supported(mocked_metrics_storage):
+    metrics_rollup = MetricsRollup(types.GLUE_DATA_CATALOGS, mocked_metrics_storage)
+
+    assert (
+        metrics_rollup.refresh(
+            {"db1": (datetime(2024, 1, 1, 1), datetime(2024, 1, 1, 2))}, []
+        )
+        == 0
+    )
+    mocked_metrics_storage.iter_query_rows.assert_not_called()
+
+
+def test_refresh_exception(mocked_metrics_storage):
+    mocked_metrics_storage.iter_query_rows.side_effect = Exception("Query failed")
+    metrics_rollup = MetricsRollup(types.GLUE_JOBS, mocked_metrics_storage)
+
+    with pytest.raises(MetricsRollupException, match="Query failed"):
+        metrics_rollup.refresh(
+            {"job1": (datetime(2024, 1, 1, 1), datetime(2024, 1, 1, 2))}, []
+        )
+
+
+def test_refresh_written_runs_with_pending(mocked_metrics_storage):
+    mocked_metrics_storage.get_written_time_ranges.return_value = {
+        "job1": (datetime(2024, 1, 1, 10, 20), datetime(2024, 1, 1, 10, 40)),
+    }
+    mocked_metrics_storage.get_earliest_writeable_time_for_resource_type.return_value = (
+        None
+    )
+    pending_rollups_store = MagicMock()
+    pending_rollups_store.get.return_value = (
+        {
+            "job1": (datetime(2024, 1, 1, 7, 10), datetime(2024, 1, 1, 7, 10)),
+            "job2": (datetime(2024, 1, 1, 8, 0), datetime(2024, 1, 1, 8, 30)),
+        },
+        ["s3://bucket/pending-rollups/glue_jobs/1.json"],
+    )
+    metrics_rollup = MetricsRollup(types.GLUE_JOBS, mocked_metrics_storage)
+
+    with patch.object(metrics_rollup, "refresh", return_value=2) as mock_refresh:
+        result = metrics_rollup.refresh_written_runs([40], pending_rollups_store)
+
+    # the pending periods are refreshed along with the written runs, then removed from the store
+    assert result == 2
+    assert mock_refresh.call_args.kwargs["written_time_ranges"] == {
+        "job1": (datetime(2024, 1, 1, 7, 10), datetime(2024, 1, 1, 10, 40)),
+        "job2": (datetime(2024, 1, 1, 8, 0), datetime(2024, 1, 1, 8, 30)),
+    }
+    mocked_metrics_storage.flush.assert_called_once()
+    pending_rollups_store.remove.assert_called_once_with(
+        ["s3://bucket/pending-rollups/glue_jobs/1.json"]
+    )
+    pending_rollups_store.add.assert_not_called()
+
+
+def test_refresh_written_runs_failure_is_stored(mocked_metrics_storage):
+    written_time_ranges = {
+        "job1": (datetime(2024, 1, 1, 10, 20), datetime(2024, 1, 1, 10, 40)),
+    }
+    mocked_metrics_storage.get_written_time_ranges.return_value = written_time_ranges
+    mocked_metrics_storage.flush.side_effect = Exception("Throttled")
+    pending_rollups_store = MagicMock()
+    pending_rollups_store.get.return_value = ({}, [])
+    metrics_rollup = MetricsRollup(types.GLUE_JOBS, mocked_metrics_storage)
+
+    with patch.object(metrics_rollup, "refresh", return_value=2):
+        with pytest.raises(
+            MetricsRollupException, match="Error writing glue_jobs rollups: Throttled"
+        ):
+            metrics_rollup.refresh_written_runs([40], pending_rollups_store)
+
+    # the written runs are refreshed by the next run
+    pending_rollups_store.add.assert_called_once_with(
+        types.GLUE_JOBS, written_time_ranges
+    )
+    pending_rollups_store.remove.assert_not_called()
@@ -0,0 +1,89 @@
+import os
+import boto3
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from moto import mock_aws
+
+from lib.aws.s3_manager import S3Manager, S3ManagerReadException
+from lib.digest_service import PendingRollupsStore, PendingRollupsStoreException
+
+BUCKET_NAME = "test-bucket"
+PENDING_ROLLUPS_S3_PATH = f"s3://{BUCKET_NAME}/pending-rollups/"
+REGION_NAME = "us-east-1"
+
+
+@pytest.fixture
+def s3_manager():
+    """Mocked AWS Credentials for moto."""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name=REGION_NAME)
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        yield S3Manager(s3_client)
+
+
+def get_time(hour: int, minute: int = 0) -> datetime:
+    return datetime(2024, 1, 1, hour, minute, tzinfo=timezone.utc)
+
+
+def test_add_get_and_remove(s3_manager):
+    pending_rollups_store = PendingRollupsStore(PENDING_ROLLUPS_S3_PATH, s3_manager)
+
+    pending_rollups_store.add(
+        "glue_jobs", {"job1": (get_time(10, 20), get_time(10, 40))}
+    )
+    pending_rollups_store.add(
+        "glue_jobs",
+        {
+            "job1": (get_time(7), get_time(8)),
+            "job2": (get_time(9), get_time(9, 30)),
+        },
+    )
+    pending_rollups_store.add(
+        "lambda_functions", {"lambda1": (get_time(1), get_time(2))}
+    )
+
+    time_ranges, s3_paths = pending_rollups_store.get("glue_jobs")
+
+    # the ranges of the stored refreshes are merged per resource
+    assert time_ranges == {
+        "job1": (get_time(7), get_time(10, 40)),
+        "job2": (get_time(9), get_time(9, 30)),
+    }
+    assert len(s3_paths) == 2
+    assert all(x.startswith(f"{PENDING_ROLLUPS_S3_PATH}glue_jobs/") for x in s3_paths)
+
+    pending_rollups_store.remove(s3_paths)
+
+    assert pending_rollups_store.get("glue_jobs") == ({}, [])
+    assert list(pending_rollups_store.get("lambda_functions")[0]) == ["lambda1"]
+
+
+def test_get_skips_removed_refreshes():
+    s3_manager = MagicMock()
+    s3_manager.list_files.return_value = ["s3://bucket/1.json", "s3://bucket/2.json"]
+    s3_manager.read_file.side_effect = [
+        FileNotFoundError("File not found"),
+        '{"job1": ["2024-01-01T07:00:00+00:00", "2024-01-01T08:00:00+00:00"]}',
+    ]
+    pending_rollups_store = PendingRollupsStore(PENDING_ROLLUPS_S3_PATH, s3_manager)
+
+    time_ranges, s3_paths = pending_rollups_store.get("glue_jobs")
+
+    # the refresh removed by a concurrent run is skipped
+    assert time_ranges == {"job1": (get_time(7), get_time(8))}
+    assert s3_paths == ["s3://bucket/2.json"]
+
+
+def test_get_exception():
+    s3_manager = MagicMock()
+    s3_manager.list_files.side_effect = S3ManagerReadException("Access denied")
+    pending_rollups_store = PendingRollupsStore(PENDING_ROLLUPS_S3_PATH, s3_manager)
+
+    with pytest.raises(PendingRollupsStoreException, match="Access denied"):
+        pending_rollups_store.get("glue_jobs")
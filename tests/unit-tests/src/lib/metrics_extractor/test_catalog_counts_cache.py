@@ -0,0 +1,73 @@
+import os
+import boto3
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from moto import mock_aws
+
+from lib.aws.glue_manager import CatalogData, TableModel
+from lib.aws.s3_manager import S3Manager, S3ManagerReadException
+from lib.metrics_extractor import CatalogCountsCache, CatalogCountsCacheException
+
+BUCKET_NAME = "test-bucket"
+CATALOG_COUNTS_S3_PATH = f"s3://{BUCKET_NAME}/cache/catalog_counts/"
+REGION_NAME = "us-east-1"
+ACCOUNT_ID = "123456789012"
+DB_NAME = "db1"
+
+
+@pytest.fixture
+def s3_manager():
+    """Mocked AWS Credentials for moto."""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name=REGION_NAME)
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        yield S3Manager(s3_client)
+
+
+def get_table(name: str, counted_on: datetime) -> TableModel:
+    return TableModel(
+        Name=name,
+        CatalogId=ACCOUNT_ID,
+        CreateTime=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        UpdateTime=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        PartitionsCount=10,
+        IndexesCount=1,
+        CountedOn=counted_on,
+    )
+
+
+def test_put_and_get(s3_manager):
+    catalog_counts_cache = CatalogCountsCache(
+        CATALOG_COUNTS_S3_PATH, max_age_seconds=3600, s3_manager=s3_manager
+    )
+    now = datetime.now(tz=timezone.utc)
+    fresh_table = get_table("table1", now)
+    catalog_counts_cache.put(
+        ACCOUNT_ID,
+        REGION_NAME,
+        CatalogData(
+            DatabaseName=DB_NAME,
+            TableList=[fresh_table, get_table("table2", now - timedelta(hours=2))],
+        ),
+    )
+
+    # the counts older than max age are counted again
+    assert catalog_counts_cache.get(ACCOUNT_ID, REGION_NAME, DB_NAME) == [fresh_table]
+    assert catalog_counts_cache.get(ACCOUNT_ID, REGION_NAME, "other-db") == []
+
+
+def test_get_error():
+    s3_manager = MagicMock()
+    s3_manager.read_file.side_effect = S3ManagerReadException("Throttled")
+    catalog_counts_cache = CatalogCountsCache(
+        CATALOG_COUNTS_S3_PATH, s3_manager=s3_manager
+    )
+
+    with pytest.raises(CatalogCountsCacheException, match="Throttled"):
+        catalog_counts_cache.get(ACCOUNT_ID, REGION_NAME, DB_NAME)
@@ -69,9 +69,9 @@ JOB_RUN_ERROR = EMRJobRunData(
 @pytest.fixture(scope="function", autouse=True)
 def mock_emr_client():
     mock_emr_client = MagicMock()
-    mock_emr_client.list_applications.return_value = {
-        "applications": [{"name": EMR_APP_NAME, "id": EMR_APP_ID}]
-    }
+    mock_emr_client.get_paginator.return_value.paginate.return_value = [
+        {"applications": [{"name": EMR_APP_NAME, "id": EMR_APP_ID}]}
+    ]
     with patch("boto3.client", return_value=mock_emr_client) as mock_emr:
         yield mock_emr
 
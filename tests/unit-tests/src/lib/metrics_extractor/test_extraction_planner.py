@@ -0,0 +1,144 @@
+from lib.core.constants import SettingConfigResourceTypes as types
+from lib.metrics_extractor.extraction_planner import ExtractionPlanner, WorkUnit
+
+MONITORING_GROUP_CONTENT = {
+    "group_name": "test_group",
+    "glue_jobs": [
+        {"name": "job1", "monitored_environment_name": "env2"},
+        {"name": "job2", "monitored_environment_name": "env1"},
+        {"name": "job3", "monitored_environment_name": "env1"},
+        {"name": "job4", "monitored_environment_name": "env1"},
+    ],
+    "lambda_functions": [
+        {"name": "lambda1", "monitored_environment_name": "env1"},
+    ],
+}
+
+
+def test_get_work_units():
+    work_units = ExtractionPlanner.get_work_units(MONITORING_GROUP_CONTENT)
+
+    assert [
+        (x.resource_type, x.monitored_environment_name, x.resource_names)
+        for x in work_units
+    ] == [
+        (types.GLUE_JOBS, "env1", ["job2", "job3", "job4"]),
+        (types.GLUE_JOBS, "env2", ["job1"]),
+        (types.LAMBDA_FUNCTIONS, "env1", ["lambda1"]),
+    ]
+
+
+def test_get_work_units_chunks():
+    work_units = ExtractionPlanner.get_work_units(
+        MONITORING_GROUP_CONTENT, max_resources_per_unit=2
+    )
+
+    assert [x.resource_names for x in work_units] == [
+        ["job2", "job3"],
+        ["job4"],
+        ["job1"],
+        ["lambda1"],
+    ]
+
+
+def test_distribute_work_units_evenly():
+    work_units = [
+        WorkUnit(
+            monitored_environment_name="env1",
+            resource_type=types.GLUE_JOBS,
+            resource_names=[f"job{i}" for i in range(size)],
+        )
+        for size in [8, 7, 6, 5, 4]
+    ]
+
+    workers = ExtractionPlanner.distribute_work_units(work_units, max_workers=2)
+
+    assert len(workers) == 2
+    assert sorted(sum(x.estimated_cost for x in worker) for worker in workers) == [
+        13.0,
+        17.0,
+    ]
+    assert sum(len(worker) for worker in workers) == len(work_units)
+
+
+def test_distribute_work_units_more_workers_than_units():
+    work_units = ExtractionPlanner.get_work_units(MONITORING_GROUP_CONTENT)
+
+    workers = ExtractionPlanner.distribute_work_units(work_units, max_workers=10)
+
+    assert len(workers) == 3
+    # Logs Insights based extraction is the most expensive one
+    assert workers[0][0].resource_type == types.LAMBDA_FUNCTIONS
+    assert ExtractionPlanner.distribute_work_units([], max_workers=10) == []
+
+
+def test_filter_last_update_times():
+    last_update_times = {
+        types.GLUE_JOBS: [
+            {"resource_name": "job1", "last_update_time": "2024-04-16 12:05:11"},
+            {"resource_name": "job2", "last_update_time": "2024-04-16 12:05:11"},
+        ],
+        types.STEP_FUNCTIONS: [
+            {"resource_name": "sf1", "last_update_time": "2024-04-16 12:05:11"},
+        ],
+    }
+    work_units = [
+        WorkUnit(
+            monitored_environment_name="env1",
+            resource_type=types.GLUE_JOBS,
+            resource_names=["job2", "job3"],
+        )
+    ]
+
+    assert ExtractionPlanner.filter_last_update_times(
+        last_update_times, work_units
+    ) == {types.GLUE_JOBS: [last_update_times[types.GLUE_JOBS][1]]}
+
+
+def test_get_extraction_plan_deduplicates_resources():
+    monitoring_groups = [
+        MONITORING_GROUP_CONTENT,
+        {
+            "group_name": "test_group2",
+            "glue_jobs": [
+                # the same resources in another group
+                {"name": "job2", "monitored_environment_name": "env1"},
+                {"name": "job3", "monitored_environment_name": "env1"},
+                # the same name, but another environment
+                {"name": "job2", "monitored_environment_name": "env2"},
+            ],
+            "step_functions": [
+                {"name": "sf1", "monitored_environment_name": "env1"},
+            ],
+        },
+    ]
+
+    work_units = ExtractionPlanner.get_extraction_plan(monitoring_groups)
+
+    assert [
+        (x.resource_type, x.monitored_environment_name, x.resource_names)
+        for x in work_units
+    ] == [
+        (types.GLUE_JOBS, "env1", ["job2", "job3", "job4"]),
+        (types.GLUE_JOBS, "env2", ["job1", "job2"]),
+        (types.LAMBDA_FUNCTIONS, "env1", ["lambda1"]),
+        (types.STEP_FUNCTIONS, "env1", ["sf1"]),
+    ]
+
+
+def test_get_extraction_plan_excluded_resources():
+    work_units = ExtractionPlanner.get_extraction_plan(
+        [MONITORING_GROUP_CONTENT],
+        excluded_resources={
+            ("env1", types.LAMBDA_FUNCTIONS, "lambda1"),
+            ("env2", types.GLUE_JOBS, "job2"),  # not in the group
+        },
+    )
+
+    assert [
+        (x.resource_type, x.monitored_environment_name, x.resource_names)
+        for x in work_units
+    ] == [
+        (types.GLUE_JOBS, "env1", ["job2", "job3", "job4"]),
+        (types.GLUE_JOBS, "env2", ["job1"]),
+    ]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from lib.metrics_extractor import GlueCatalogsMetricExtractor
 from lib.aws.glue_manager import CatalogData, TableModel
 
@@ -81,3 +81,32 @@ def test_data_catalog_metrics_extractor(boto3_client_creator):
         assert CATALOG_DATA.TotalTableCount == 3
         assert CATALOG_DATA.TotalPartitionsCount == 13
         assert CATALOG_DATA.TotalIndexesCount == 6
+
+
+def test_data_catalog_metrics_extractor_cached_counts(boto3_client_creator):
+    catalog_counts_cache = MagicMock()
+    catalog_counts_cache.get.return_value = CATALOG_DATA.TableList[:1]
+    with patch(
+        "lib.metrics_extractor.glue_catalogs_metrics_extractor.GlueManager.get_catalog_data"
+    ) as mocked_get_catalog:
+        mocked_get_catalog.return_value = CATALOG_DATA
+
+        extractor = GlueCatalogsMetricExtractor(
+            boto3_client_creator=boto3_client_creator,
+            aws_client_name="glue",
+            resource_name=DATA_CATALOG_DB,
+            monitored_environment_name="env1",
+        )
+        extractor.set_catalog_counts_cache(catalog_counts_cache)
+        extractor.prepare_metrics_data(since_time=datetime(2020, 1, 1, 0, 0, 0))
+
+    catalog_counts_cache.get.assert_called_once_with(
+        boto3_client_creator.account_id, boto3_client_creator.region, DATA_CATALOG_DB
+    )
+    assert (
+        mocked_get_catalog.call_args.kwargs["cached_tables"]
+        == CATALOG_DATA.TableList[:1]
+    )
+    catalog_counts_cache.put.assert_called_once_with(
+        boto3_client_creator.account_id, boto3_client_creator.region, CATALOG_DATA
+    )
@@ -199,3 +199,22 @@ def test_send_alerts(boto3_client_creator):
             assert (
                 ret_val["events_sent"] == 2
             )  # Both succeeded and failed events are sent. Running - skipped
+
+
+def test_extract_invocations_of_period(boto3_client_creator):
+    with patch(GET_EXECUTIONS_METHOD_NAME) as mocked_get_executions:
+        mocked_get_executions.return_value = [EXEC_SUCCESS1]
+        extractor = LambdaFunctionsMetricExtractor(
+            boto3_client_creator=boto3_client_creator,
+            aws_client_name="lambda",
+            resource_name=LAMBDA_NAME,
+            monitored_environment_name="env1",
+        )
+        since_time = datetime(2024, 1, 1, 0, 0, 0)
+        until_time = datetime(2024, 1, 1, 0, 5, 0)
+
+        invocations = extractor.extract_invocations(since_time, until_time)
+
+        assert invocations == [EXEC_SUCCESS1]
+        args = mocked_get_executions.call_args.args
+        assert args[1:] == (LAMBDA_NAME, since_time, until_time)
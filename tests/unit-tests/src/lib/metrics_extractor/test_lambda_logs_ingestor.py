@@ -0,0 +1,208 @@
+import base64
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from lib.aws.lambda_manager import LambdaManager
+from lib.metrics_extractor import (
+    LambdaLogsBatch,
+    LambdaLogsIngestor,
+    LambdaLogsIngestorException,
+)
+
+ACCOUNT_ID = "123456789012"
+FUNCTION_NAME = "test-lambda"
+LOG_STREAM = "2024/10/01/[$LATEST]abc"
+REQUEST_ID = "5e844c16-4356-4c04-a266-c92d590415c3"
+START_TIME = datetime.now(tz=timezone.utc).replace(microsecond=0)
+
+
+def get_log_event(seconds: float, message: str) -> dict:
+    timestamp = START_TIME + timedelta(seconds=seconds)
+    return {
+        "id": "1",
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "message": message,
+    }
+
+
+def encode_log_data(log_events: list, message_type: str = "DATA_MESSAGE") -> str:
+    log_data = {
+        "messageType": message_type,
+        "owner": ACCOUNT_ID,
+        "logGroup": f"/aws/lambda/{FUNCTION_NAME}",
+        "logStream": LOG_STREAM,
+        "subscriptionFilters": ["subscription-filter-salmon-lambda-logs-dev"],
+        "logEvents": log_events,
+    }
+    return base64.b64encode(gzip.compress(json.dumps(log_data).encode())).decode()
+
+
+def get_log_batch(log_events: list) -> LambdaLogsBatch:
+    return LambdaLogsBatch(
+        account_id=ACCOUNT_ID,
+        log_group=f"/aws/lambda/{FUNCTION_NAME}",
+        log_stream=LOG_STREAM,
+        log_events=log_events,
+    )
+
+
+START = f"START RequestId: {REQUEST_ID} Version: $LATEST\n"
+ERROR = f"[ERROR]\t2024-10-01T09:41:26.000Z\t{REQUEST_ID}\tSomething failed\n"
+END = f"END RequestId: {REQUEST_ID}\n"
+REPORT = f"REPORT RequestId: {REQUEST_ID}\tDuration: 2000.0 ms\tBilled Duration: 2000 ms\tMemory Size: 128 MB\tMax Memory Used: 80 MB\t\n"
+
+
+@pytest.mark.parametrize(
+    "log_group, log_stream",
+    [
+        (f"/aws/lambda/{FUNCTION_NAME}", LOG_STREAM),
+        # custom log group (LoggingConfig), possibly shared by several functions
+        ("/custom/lambda-logs", f"2024/10/01/{FUNCTION_NAME}[$LATEST]abc"),
+        ("/aws/lambda/shared", f"2024/10/01/{FUNCTION_NAME}[1]abc"),
+    ],
+)
+def test_log_batch_function_name(log_group, log_stream):
+    log_batch = LambdaLogsBatch(
+        account_id=ACCOUNT_ID, log_group=log_group, log_stream=log_stream, log_events=[]
+    )
+
+    assert log_batch.function_name == FUNCTION_NAME
+
+
+def test_get_log_batches_kinesis_event():
+    event = {
+        "Records": [
+            {"kinesis": {"data": encode_log_data([get_log_event(0, START)])}},
+            # sent by CloudWatch Logs to check the destination is reachable
+            {"kinesis": {"data": encode_log_data([], "CONTROL_MESSAGE")}},
+        ]
+    }
+
+    log_batches = LambdaLogsIngestor.get_log_batches(event)
+
+    assert len(log_batches) == 1
+    assert log_batches[0].account_id == ACCOUNT_ID
+    assert log_batches[0].function_name == FUNCTION_NAME
+    assert log_batches[0].log_stream == LOG_STREAM
+    assert log_batches[0].log_events[0]["message"] == START
+
+
+def test_get_log_batches_awslogs_event():
+    event = {"awslogs": {"data": encode_log_data([get_log_event(0, START)])}}
+
+    log_batches = LambdaLogsIngestor.get_log_batches(event)
+
+    assert [x.function_name for x in log_batches] == [FUNCTION_NAME]
+
+
+def test_decode_log_data_invalid():
+    with pytest.raises(LambdaLogsIngestorException, match="Error decoding log data"):
+        LambdaLogsIngestor.decode_log_data("not-gzip")
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        (START, REQUEST_ID),
+        (END, REQUEST_ID),
+        (REPORT, REQUEST_ID),
+        (ERROR, REQUEST_ID),
+        ("[ERROR] Runtime.ImportModuleError: Unable to import module\n", None),
+    ],
+)
+def test_get_request_id(message, expected):
+    assert LambdaLogsIngestor.get_request_id(message) == expected
+
+
+def test_process_log_batches_across_batches():
+    ingestor = LambdaLogsIngestor()
+
+    first = ingestor.process_log_batches(
+        [get_log_batch([get_log_event(0, START), get_log_event(1, ERROR)])]
+    )
+    second = ingestor.process_log_batches(
+        [get_log_batch([get_log_event(2, END), get_log_event(2.001, REPORT)])]
+    )
+
+    # the invocation is completed once its REPORT entry arrives
+    assert first == {}
+    invocations = second[(ACCOUNT_ID, FUNCTION_NAME)]
+    assert len(invocations) == 1
+    assert invocations[0].RequestId == REQUEST_ID
+    assert invocations[0].Status == LambdaManager.LAMBDA_FAILURE_STATE
+    assert invocations[0].StartedOn == START_TIME
+    assert invocations[0].Duration == 2000.0
+    assert invocations[0].ErrorString == "Something failed"
+
+
+def test_process_log_batches_drops_stale_invocations():
+    ingestor = LambdaLogsIngestor()
+    stale_start = {
+        "id": "1",
+        "timestamp": int((START_TIME - timedelta(hours=1)).timestamp() * 1000),
+        "message": START.replace(REQUEST_ID, "stale"),
+    }
+
+    ingestor.process_log_batches([get_log_batch([stale_start])])
+
+    log_processor = ingestor.log_processors[(ACCOUNT_ID, FUNCTION_NAME)]
+    assert log_processor.in_progress_invocations == {}
+
+
+def test_process_log_batches_across_ingestors():
+    # the batches of the log stream are processed by different containers
+    first_ingestor, second_ingestor = LambdaLogsIngestor(), LambdaLogsIngestor()
+
+    first = first_ingestor.process_log_batches(
+        [
+            get_log_batch(
+                [
+                    get_log_event(0, START),
+                    get_log_event(1, ERROR),
+                    get_log_event(2, END),
+                ]
+            )
+        ]
+    )
+    second = second_ingestor.process_log_batches(
+        [get_log_batch([get_log_event(2.001, REPORT)])]
+    )
+
+    # the failure hasn't been seen by the second one - the invocation is not reported as succeeded
+    assert first == {}
+    assert second == {}
+    assert first_ingestor.pop_partial_invocations() == {}
+    partial_invocations = second_ingestor.pop_partial_invocations()
+    invocations = partial_invocations[(ACCOUNT_ID, FUNCTION_NAME)]
+    assert [(x.RequestId, x.LogStream) for x in invocations] == [
+        (REQUEST_ID, LOG_STREAM)
+    ]
+    assert invocations[0].StartedOn == START_TIME + timedelta(milliseconds=1)
+    assert not invocations[0].IsSuccess
+    assert second_ingestor.pop_partial_invocations() == {}
+
+
+def test_process_log_batches_across_ingestors_failure_seen():
+    first_ingestor, second_ingestor = LambdaLogsIngestor(), LambdaLogsIngestor()
+
+    first_ingestor.process_log_batches([get_log_batch([get_log_event(0, START)])])
+    completed = second_ingestor.process_log_batches(
+        [
+            get_log_batch(
+                [
+                    get_log_event(1, ERROR),
+                    get_log_event(2, END),
+                    get_log_event(2.001, REPORT),
+                ]
+            )
+        ]
+    )
+
+    # the failed invocation is completed without its START entry
+    invocations = completed[(ACCOUNT_ID, FUNCTION_NAME)]
+    assert [x.Status for x in invocations] == [LambdaManager.LAMBDA_FAILURE_STATE]
+    assert invocations[0].StartedOn == START_TIME
+    assert second_ingestor.pop_partial_invocations() == {}
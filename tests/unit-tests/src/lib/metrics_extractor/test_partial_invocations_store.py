@@ -0,0 +1,133 @@
+import os
+import boto3
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from moto import mock_aws
+
+from lib.aws.lambda_manager import LambdaInvocation
+from lib.aws.s3_manager import S3Manager, S3ManagerReadException
+from lib.metrics_extractor import (
+    PartialInvocationsStore,
+    PartialInvocationsStoreException,
+)
+
+BUCKET_NAME = "test-bucket"
+PARTIAL_INVOCATIONS_S3_PATH = f"s3://{BUCKET_NAME}/partial-invocations/"
+REGION_NAME = "us-east-1"
+ACCOUNT_ID = "123456789012"
+STARTED_ON = datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def s3_manager():
+    """Mocked AWS Credentials for moto."""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name=REGION_NAME)
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        yield S3Manager(s3_client)
+
+
+def get_invocation(function_name: str, request_id: str) -> LambdaInvocation:
+    return LambdaInvocation(
+        LambdaName=function_name,
+        LogStream="2024/01/01/[$LATEST]abc",
+        RequestId=request_id,
+        Status="RUNNING",
+        Report=f"REPORT RequestId: {request_id}\tDuration: 2000.0 ms\t",
+        StartedOn=STARTED_ON,
+        CompletedOn=STARTED_ON + timedelta(seconds=2),
+    )
+
+
+def test_add_get_and_remove(s3_manager):
+    partial_invocations_store = PartialInvocationsStore(
+        PARTIAL_INVOCATIONS_S3_PATH, s3_manager
+    )
+    partial_invocations_store.add(
+        ACCOUNT_ID, "lambda1", [get_invocation("lambda1", "request1")]
+    )
+    partial_invocations_store.add(
+        ACCOUNT_ID,
+        "lambda1",
+        [get_invocation("lambda1", "request2"), get_invocation("lambda1", "request3")],
+    )
+    partial_invocations_store.add(
+        ACCOUNT_ID, "lambda2", [get_invocation("lambda2", "request4")]
+    )
+
+    partial_invocations = partial_invocations_store.get(
+        stored_before=datetime.now(tz=timezone.utc) + timedelta(seconds=1)
+    )
+
+    assert sorted(partial_invocations) == [
+        (ACCOUNT_ID, "lambda1"),
+        (ACCOUNT_ID, "lambda2"),
+    ]
+    invocations, s3_paths = partial_invocations[(ACCOUNT_ID, "lambda1")]
+    assert sorted(x.RequestId for x in invocations) == [
+        "request1",
+        "request2",
+        "request3",
+    ]
+    # only the values required to extract the invocations are kept
+    assert invocations[0] == LambdaInvocation(
+        LambdaName="lambda1",
+        LogStream="2024/01/01/[$LATEST]abc",
+        RequestId=invocations[0].RequestId,
+        StartedOn=STARTED_ON,
+        CompletedOn=STARTED_ON + timedelta(seconds=2),
+    )
+    assert len(s3_paths) == 2
+    assert all(
+        x.startswith(f"{PARTIAL_INVOCATIONS_S3_PATH}{ACCOUNT_ID}/lambda1/")
+        for x in s3_paths
+    )
+
+    partial_invocations_store.remove(s3_paths)
+
+    partial_invocations = partial_invocations_store.get(
+        stored_before=datetime.now(tz=timezone.utc) + timedelta(seconds=1)
+    )
+    assert list(partial_invocations) == [(ACCOUNT_ID, "lambda2")]
+
+
+def test_get_skips_recently_stored(s3_manager):
+    partial_invocations_store = PartialInvocationsStore(
+        PARTIAL_INVOCATIONS_S3_PATH, s3_manager
+    )
+    partial_invocations_store.add(
+        ACCOUNT_ID, "lambda1", [get_invocation("lambda1", "request1")]
+    )
+
+    # the log entries of the recent invocations may not be queryable yet
+    assert (
+        partial_invocations_store.get(
+            stored_before=datetime.now(tz=timezone.utc) - timedelta(minutes=5)
+        )
+        == {}
+    )
+
+
+def test_get_stored_on():
+    stored_on = PartialInvocationsStore.get_stored_on(
+        f"{PARTIAL_INVOCATIONS_S3_PATH}{ACCOUNT_ID}/lambda1/1704103200000-abc.json"
+    )
+
+    assert stored_on == STARTED_ON
+
+
+def test_get_exception():
+    s3_manager = MagicMock()
+    s3_manager.list_files.side_effect = S3ManagerReadException("Access denied")
+    partial_invocations_store = PartialInvocationsStore(
+        PARTIAL_INVOCATIONS_S3_PATH, s3_manager
+    )
+
+    with pytest.raises(PartialInvocationsStoreException, match="Access denied"):
+        partial_invocations_store.get(stored_before=datetime.now(tz=timezone.utc))
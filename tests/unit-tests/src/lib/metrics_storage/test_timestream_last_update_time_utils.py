@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 import pytest
 
@@ -313,3 +313,147 @@ def test_get_last_update_time_non_empty(metrics_storage):
             "glue_jobs", "glue-job-1"
         )
         assert last_update_time == db_mocked_result
+
+
+###############################################################################
+# tests for get_last_update_times_from_metrics_table
+
+
+def test_get_last_update_times_empty_table(metrics_storage):
+    with patch.object(
+        TimestreamMetricsStorage, "is_table_empty", return_value=True
+    ), patch.object(TimestreamMetricsStorage, "execute_query") as mock_execute_query:
+        result = metrics_storage.get_last_update_times_from_metrics_table(
+            "glue_jobs", ["glue-job-1", "glue-job-2"]
+        )
+
+    assert result == {}
+    mock_execute_query.assert_not_called()
+
+
+def test_get_last_update_times_grouped_query(metrics_storage):
+    db_mocked_result = [
+        {
+            "resource_name": "glue-job-1",
+            "last_update_time": "2024-01-09 11:00:40.911000000",
+        },
+        {
+            "resource_name": "glue-job's-2",
+            "last_update_time": "2024-01-10 12:00:00.143000000",
+        },
+    ]
+    with patch.object(
+        TimestreamMetricsStorage, "is_table_empty", return_value=False
+    ), patch.object(
+        TimestreamMetricsStorage, "execute_query", return_value=db_mocked_result
+    ) as mock_execute_query:
+        result = metrics_storage.get_last_update_times_from_metrics_table(
+            "glue_jobs", ["glue-job-1", "glue-job's-2", "glue-job-3"]
+        )
+
+    assert result == {
+        "glue-job-1": str_utc_datetime_to_datetime("2024-01-09 11:00:40.911000000"),
+        "glue-job's-2": str_utc_datetime_to_datetime("2024-01-10 12:00:00.143000000"),
+    }
+    # one query for all resources, quotes in names are escaped
+    mock_execute_query.assert_called_once()
+    query = mock_execute_query.call_args.args[0]
+    assert "IN ('glue-job-1', 'glue-job''s-2', 'glue-job-3')" in query
+    assert "GROUP BY resource_name" in query
+
+
+def test_get_last_update_times_chunked(metrics_storage):
+    resource_names = [f"glue-job-{i}" for i in range(5)]
+    with patch.object(
+        TimestreamMetricsStorage, "is_table_empty", return_value=False
+    ), patch.object(
+        TimestreamMetricsStorage, "LAST_UPDATE_TIMES_QUERY_CHUNK_SIZE", 2
+    ), patch.object(
+        TimestreamMetricsStorage, "execute_query", return_value=[]
+    ) as mock_execute_query:
+        metrics_storage.get_last_update_times_from_metrics_table(
+            "glue_jobs", resource_names
+        )
+
+    assert mock_execute_query.call_count == 3
+
+
+###############################################################################
+# tests for is_table_empty memoization
+
+
+def test_is_table_empty_memoized(metrics_storage):
+    mock_query_runner = MagicMock()
+    mock_query_runner.is_table_empty.return_value = True
+    metrics_storage._query_runner = mock_query_runner
+
+    assert metrics_storage.is_table_empty("table1") is True
+    assert metrics_storage.is_table_empty("table1") is True
+    mock_query_runner.is_table_empty.assert_called_once_with("sample_db_name", "table1")
+
+    # table is not empty anymore after records have been written into it
+    with patch.object(TimestreamMetricsStorage, "writer"):
+        metrics_storage.write_records("table1", [{"record": 1}])
+    assert metrics_storage.is_table_empty("table1") is False
+    mock_query_runner.is_table_empty.assert_called_once()
+
+
+def test_buffered_write_records():
+    mock_write_client = MagicMock()
+    mock_write_client.write_records.return_value = {
+        "ResponseMetadata": {"HTTPStatusCode": 200}
+    }
+    metrics_storage = TimestreamMetricsStorage(
+        db_name="test-db", write_client=mock_write_client, buffer_writes=True
+    )
+
+    for resource_name in ["job1", "job2"]:
+        metrics_storage.write_records(
+            table_name="glue_jobs_metrics",
+            records=[{"Dimensions": [], "MeasureName": "Metrics", "Time": "1"}],
+            common_attributes={
+                "Dimensions": [{"Name": "resource_name", "Value": resource_name}]
+            },
+        )
+    mock_write_client.write_records.assert_not_called()
+
+    metrics_storage.flush()
+
+    mock_write_client.write_records.assert_called_once()
+    assert len(mock_write_client.write_records.call_args.kwargs["Records"]) == 2
+
+
+def test_get_written_time_ranges():
+    metrics_storage = TimestreamMetricsStorage(
+        db_name="test-db", write_client=MagicMock(), buffer_writes=True
+    )
+
+    for times in [["1704103200000", "1704099600000"], ["1704110400000"]]:
+        metrics_storage.write_records(
+            table_name="glue_jobs_metrics",
+            records=[{"Dimensions": [], "Time": x} for x in times],
+            common_attributes={
+                "Dimensions": [{"Name": "resource_name", "Value": "job1"}]
+            },
+        )
+    metrics_storage.write_records(
+        table_name="glue_jobs_metrics",
+        records=[
+            {
+                "Dimensions": [{"Name": "resource_name", "Value": "job2"}],
+                "Time": "1704099600000",
+            }
+        ],
+    )
+
+    assert metrics_storage.get_written_time_ranges("glue_jobs_metrics") == {
+        "job1": (
+            datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+            datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+        ),
+        "job2": (
+            datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+            datetime(2024, 1, 1, 9, tzinfo=timezone.utc),
+        ),
+    }
+    assert metrics_storage.get_written_time_ranges("other_table") == {}
@@ -0,0 +1,120 @@
+import os
+import json
+import boto3
+import pytest
+from unittest.mock import MagicMock, patch
+from moto import mock_aws
+
+from lib.aws.s3_manager import S3Manager, S3ManagerWriteException
+from lib.notification_service.payload_store import (
+    NotificationPayloadStore,
+    NotificationPayloadStoreException,
+)
+
+BUCKET_NAME = "test-bucket"
+PAYLOADS_S3_PATH = f"s3://{BUCKET_NAME}/payloads/"
+REGION_NAME = "us-east-1"
+
+
+def get_message(message_body, recipients=("recipient1",)) -> dict:
+    return {
+        "delivery_options": {"recipients": list(recipients), "delivery_method": {}},
+        "message": {"message_subject": "Digest Report", "message_body": message_body},
+    }
+
+
+@pytest.fixture
+def s3_manager():
+    """Mocked AWS Credentials for moto."""
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SECURITY_TOKEN"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name=REGION_NAME)
+        s3_client.create_bucket(Bucket=BUCKET_NAME)
+        yield S3Manager(s3_client)
+
+
+def test_small_message_is_not_offloaded():
+    s3_manager = MagicMock()
+    payload_store = NotificationPayloadStore(PAYLOADS_S3_PATH, s3_manager)
+    message = get_message([{"text": "Digest"}])
+
+    assert payload_store.offload_message_body(message) is message
+    s3_manager.write_compressed_file.assert_not_called()
+
+
+def test_offloading_disabled_without_payloads_path():
+    s3_manager = MagicMock()
+    payload_store = NotificationPayloadStore(s3_manager=s3_manager)
+    message = get_message([{"text": "x" * 300 * 1024}])
+
+    assert payload_store.offload_message_body(message) is message
+
+
+@patch("lib.core.constants.NotificationPayloadConfigs.MAX_INLINE_MESSAGE_BYTES", 100)
+def test_offload_and_load_message_body(s3_manager):
+    payload_store = NotificationPayloadStore(PAYLOADS_S3_PATH, s3_manager)
+    message_body = [{"table": {"rows": [{"values": ["job", "x" * 1000]}]}}]
+    message = get_message(message_body)
+
+    offloaded = payload_store.offload_message_body(message)
+
+    s3_path = offloaded["message"]["message_body_s3_path"]
+    assert s3_path.startswith(PAYLOADS_S3_PATH) and s3_path.endswith(".json.gz")
+    assert "message_body" not in offloaded["message"]
+    assert offloaded["message"]["message_subject"] == "Digest Report"
+    assert offloaded["delivery_options"] == message["delivery_options"]
+    # the original message is not modified
+    assert message["message"]["message_body"] == message_body
+    # the body is compressed
+    stored = s3_manager.s3_client.get_object(
+        Bucket=BUCKET_NAME, Key=s3_path.removeprefix(f"s3://{BUCKET_NAME}/")
+    )
+    assert stored["ContentLength"] < len(json.dumps(message_body))
+
+    assert payload_store.load_message_body(offloaded["message"]) == message_body
+
+
+@patch("lib.core.constants.NotificationPayloadConfigs.MAX_INLINE_MESSAGE_BYTES", 10)
+def test_identical_bodies_are_stored_once():
+    s3_manager = MagicMock()
+    payload_store = NotificationPayloadStore(PAYLOADS_S3_PATH, s3_manager)
+
+    first = payload_store.offload_message_body(get_message(["body"], ["r1"]))
+    second = payload_store.offload_message_body(get_message(["body"], ["r2"]))
+    other = payload_store.offload_message_body(get_message(["other body"], ["r3"]))
+
+    assert s3_manager.write_compressed_file.call_count == 2
+    assert (
+        first["message"]["message_body_s3_path"]
+        == second["message"]["message_body_s3_path"]
+        != other["message"]["message_body_s3_path"]
+    )
+
+
+@patch("lib.core.constants.NotificationPayloadConfigs.MAX_INLINE_MESSAGE_BYTES", 10)
+def test_offload_error():
+    s3_manager = MagicMock()
+    s3_manager.write_compressed_file.side_effect = S3ManagerWriteException("Denied")
+    payload_store = NotificationPayloadStore(PAYLOADS_S3_PATH, s3_manager)
+
+    with pytest.raises(NotificationPayloadStoreException, match="Denied"):
+        payload_store.offload_message_body(get_message(["body"]))
+
+
+def test_load_inline_message_body():
+    payload_store = NotificationPayloadStore(s3_manager=MagicMock())
+
+    assert payload_store.load_message_body({"message_body": ["body"]}) == ["body"]
+
+
+def test_load_missing_message_body(s3_manager):
+    payload_store = NotificationPayloadStore(s3_manager=s3_manager)
+
+    with pytest.raises(NotificationPayloadStoreException, match="File not found"):
+        payload_store.load_message_body(
+            {"message_body_s3_path": f"{PAYLOADS_S3_PATH}missing.json.gz"}
+        )
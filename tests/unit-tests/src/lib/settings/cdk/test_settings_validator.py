@@ -4,6 +4,7 @@ import json
 from lib.settings.cdk.settings_validator import (
     validate,
     validate_cdk_env_variables,
+    validate_lambda_logs_subscription_regions_gs,
     SettingsValidatorException,
 )
 
@@ -70,3 +71,24 @@ def test_validate_cdk_env_variables_invalid():
             cdk_env_variables=cdk_env_variables,
             config_values=config_values,
         )
+
+
+def test_validate_lambda_logs_subscription_regions(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    with open(os.path.join(config_path, "general.json")) as f:
+        general = json.loads(f.read())
+    # the tooling environment is in us-east-1
+    general["monitored_environments"][0]["lambda_logs_subscription"] = True
+    general["monitored_environments"][1]["lambda_logs_subscription"] = False
+    settings = Settings(json.dumps(general), "{}", "{}", None, None)
+
+    result = validate_lambda_logs_subscription_regions_gs(settings)
+
+    assert len(result) == 1
+    assert "monitored1 [<<env>>]" in result[0][0]
+    assert result[0][1] is False
+
+    general["monitored_environments"][0]["region"] = "us-east-1"
+    settings = Settings(json.dumps(general), "{}", "{}", None, None)
+
+    assert validate_lambda_logs_subscription_regions_gs(settings)[0][1] is True
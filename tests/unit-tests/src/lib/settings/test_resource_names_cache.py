@@ -0,0 +1,113 @@
+import json
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+from unittest.mock import patch
+
+from lib.aws import S3Manager
+from lib.settings.resource_names_cache import ResourceNamesCache
+
+MOCKED_S3_BUCKET_NAME = "mocked-cache-bucket"
+CACHE_S3_PATH = f"s3://{MOCKED_S3_BUCKET_NAME}/cache/resource_names.json"
+ENV_NAME = "monitored1 [dev]"
+
+
+@pytest.fixture
+def s3_client():
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["AWS_SESSION_TOKEN"] = "testing"
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=MOCKED_S3_BUCKET_NAME)
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    ResourceNamesCache.clear_cache()
+    yield
+    ResourceNamesCache.clear_cache()
+
+
+def get_cache(s3_client, ttl_seconds: int = 600) -> ResourceNamesCache:
+    return ResourceNamesCache(
+        CACHE_S3_PATH, ttl_seconds=ttl_seconds, s3_manager=S3Manager(s3_client)
+    )
+
+
+def test_get_missing_cache_object(s3_client):
+    assert get_cache(s3_client).get({("glue_jobs", ENV_NAME)}) == {}
+
+
+def test_put_and_get(s3_client):
+    cache = get_cache(s3_client)
+    cache.put({"glue_jobs": {ENV_NAME: ["job1", "job2"]}})
+
+    # another invocation (e.g. cold start) reads the names from S3
+    ResourceNamesCache.clear_cache()
+    result = get_cache(s3_client).get(
+        {("glue_jobs", ENV_NAME), ("step_functions", ENV_NAME)}
+    )
+
+    assert result == {"glue_jobs": {ENV_NAME: ["job1", "job2"]}}
+
+
+def test_put_merges_entries(s3_client):
+    get_cache(s3_client).put({"glue_jobs": {ENV_NAME: ["job1"]}})
+    get_cache(s3_client).put({"step_functions": {ENV_NAME: ["sf1"]}})
+
+    content = json.loads(
+        s3_client.get_object(
+            Bucket=MOCKED_S3_BUCKET_NAME, Key="cache/resource_names.json"
+        )["Body"].read()
+    )
+    assert content["glue_jobs"][ENV_NAME]["names"] == ["job1"]
+    assert content["step_functions"][ENV_NAME]["names"] == ["sf1"]
+
+
+def test_expired_entries_are_skipped(s3_client):
+    cache = get_cache(s3_client, ttl_seconds=0)
+    cache.put({"glue_jobs": {ENV_NAME: ["job1"]}})
+
+    assert cache.get({("glue_jobs", ENV_NAME)}) == {}
+
+
+def test_unchanged_object_is_not_downloaded_again(s3_client):
+    cache = get_cache(s3_client)
+    cache.put({"glue_jobs": {ENV_NAME: ["job1"]}})
+    etag = ResourceNamesCache._objects[CACHE_S3_PATH][0]
+
+    with patch.object(
+        cache.s3_manager,
+        "read_file_if_changed",
+        wraps=cache.s3_manager.read_file_if_changed,
+    ) as mock_read:
+        result = cache.get({("glue_jobs", ENV_NAME)})
+
+    assert result == {"glue_jobs": {ENV_NAME: ["job1"]}}
+    # the ETag of the written object is sent, so S3 responds with 304 Not Modified
+    mock_read.assert_called_once_with(CACHE_S3_PATH, etag)
+    assert cache.s3_manager.read_file_if_changed(CACHE_S3_PATH, etag) == (None, etag)
+
+
+def test_read_error_does_not_fail(s3_client):
+    cache = get_cache(s3_client)
+
+    with patch.object(
+        cache.s3_manager, "read_file_if_changed", side_effect=Exception("Access denied")
+    ):
+        assert cache.get({("glue_jobs", ENV_NAME)}) == {}
+
+
+def test_write_error_does_not_fail(s3_client):
+    cache = get_cache(s3_client)
+
+    with patch.object(
+        cache.s3_manager, "write_file", side_effect=Exception("Access denied")
+    ):
+        cache.put({"glue_jobs": {ENV_NAME: ["job1"]}})
+
+    assert cache.get({("glue_jobs", ENV_NAME)}) == {}
@@ -0,0 +1,118 @@
+from fnmatch import fnmatch
+
+import pytest
+
+from lib.core.constants import NotificationType
+from lib.settings.routing_index import ResourceGroupsIndex, RoutingIndex
+
+MONITORING_GROUPS = [
+    {
+        "group_name": "group1",
+        "glue_jobs": [
+            {"name": "glue-job-1", "monitored_environment_name": "env1"},
+            {"name": "etl-*", "monitored_environment_name": "env1"},
+        ],
+    },
+    {
+        "group_name": "group2",
+        "glue_jobs": [
+            {"name": "*-daily", "monitored_environment_name": "env1"},
+            {"name": "etl-*", "monitored_environment_name": "env1"},
+        ],
+        "lambda_functions": [
+            {"name": "lambda-?", "monitored_environment_name": "env1"}
+        ],
+    },
+    {
+        "group_name": "group3",
+        "glue_jobs": [{"name": "glue-job-1", "monitored_environment_name": "env1"}],
+    },
+]
+
+RECIPIENTS = [
+    {
+        "recipient": "first@company.com",
+        "delivery_method": "aws_ses",
+        "subscriptions": [
+            {"monitoring_group": "group2", "alerts": True, "digest": False},
+        ],
+    },
+    {
+        "recipient": "second@company.com",
+        "delivery_method": "aws_ses",
+        "subscriptions": [
+            {"monitoring_group": "group1", "alerts": True, "digest": True},
+            {"monitoring_group": "group2", "alerts": True, "digest": True},
+        ],
+    },
+    {
+        "recipient": "first@company.com",
+        "delivery_method": "aws_ses",
+        "subscriptions": [
+            {"monitoring_group": "group3", "alerts": True, "digest": True},
+        ],
+    },
+]
+
+
+@pytest.fixture
+def routing_index():
+    return RoutingIndex(MONITORING_GROUPS, RECIPIENTS)
+
+
+@pytest.mark.parametrize(
+    "resource_type, resource_names, expected_groups",
+    [
+        ("glue_jobs", ["glue-job-1"], {"group1", "group3"}),
+        ("glue_jobs", ["etl-orders"], {"group1", "group2"}),
+        ("glue_jobs", ["etl-orders-daily"], {"group1", "group2"}),
+        ("glue_jobs", ["sales-daily"], {"group2"}),
+        ("glue_jobs", ["glue-job-2"], set()),
+        ("glue_jobs", ["glue-job-2", "sales-daily"], {"group2"}),
+        ("lambda_functions", ["lambda-1"], {"group2"}),
+        ("lambda_functions", ["lambda-10"], set()),
+        ("step_functions", ["glue-job-1"], set()),
+        ("unknown_type", ["glue-job-1"], set()),
+    ],
+)
+def test_get_monitoring_groups(
+    routing_index, resource_type, resource_names, expected_groups
+):
+    assert (
+        routing_index.get_monitoring_groups(resource_type, resource_names)
+        == expected_groups
+    )
+
+
+# the index should give the same results as matching each entry with fnmatch
+def test_resource_groups_index_matches_fnmatch():
+    patterns = ["job-*", "*-etl", "job-?-etl", "job-[ab]*", "*", "exact-job", ""]
+    entries = [(pattern, f"group-{i}") for i, pattern in enumerate(patterns)]
+    index = ResourceGroupsIndex(entries)
+
+    for resource_name in ["job-1-etl", "job-a", "exact-job", "job-", "etl", "x"]:
+        expected = {
+            group_name
+            for pattern, group_name in entries
+            if pattern and fnmatch(resource_name, pattern)
+        }
+        assert index.get_groups(resource_name) == expected, resource_name
+
+
+def test_get_recipients(routing_index):
+    recipients = routing_index.get_recipients(
+        ["group1", "group2", "group3"], NotificationType.ALERT
+    )
+
+    # recipients are unique and in the order of the settings
+    assert recipients == [
+        {"recipient": "first@company.com", "delivery_method": "aws_ses"},
+        {"recipient": "second@company.com", "delivery_method": "aws_ses"},
+    ]
+
+
+def test_get_recipients_by_notification_type(routing_index):
+    assert routing_index.get_recipients(["group2"], NotificationType.DIGEST) == [
+        {"recipient": "second@company.com", "delivery_method": "aws_ses"},
+    ]
+    assert routing_index.get_recipients(["unknown"], NotificationType.ALERT) == []
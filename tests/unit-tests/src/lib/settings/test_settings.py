@@ -6,7 +6,7 @@ from moto import mock_aws
 
 from lib.settings import Settings, SettingsException
 from lib.core.constants import DigestSettings
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from lib.core.constants import SettingConfigResourceTypes, NotificationType
 import pytest
@@ -78,6 +78,49 @@ def test_from_s3_path(s3_setup):
     ), f"Tooling account properties doesn't match"
 
 
+@pytest.fixture
+def clear_settings_cache():
+    Settings.clear_cache()
+    yield
+    Settings.clear_cache()
+
+
+# settings cached in the warm container should be reused until max age
+def test_from_s3_path_cached(s3_setup, clear_settings_cache):
+    config_path = f"s3://{MOCKED_S3_BUCKET_NAME}/"
+    settings = Settings.from_s3_path(config_path, max_age_seconds=60)
+
+    with patch("lib.aws.S3Manager.read_file_if_changed") as mock_read:
+        assert Settings.from_s3_path(config_path, max_age_seconds=60) is settings
+    mock_read.assert_not_called()
+
+    # not cached without max age
+    assert Settings.from_s3_path(config_path) is not settings
+
+
+# cached settings should be revalidated by ETags after max age and re-created only if changed
+def test_from_s3_path_cached_revalidation(s3_setup, clear_settings_cache):
+    config_path = f"s3://{MOCKED_S3_BUCKET_NAME}/"
+    settings = Settings.from_s3_path(config_path, max_age_seconds=0)
+    assert settings.list_monitoring_groups() == ["group1"]
+
+    assert Settings.from_s3_path(config_path, max_age_seconds=0) is settings
+
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket=MOCKED_S3_BUCKET_NAME,
+        Key="monitoring_groups.json",
+        Body=json.dumps({"monitoring_groups": [{"group_name": "new_group"}]}),
+    )
+    updated_settings = Settings.from_s3_path(config_path, max_age_seconds=0)
+
+    assert updated_settings is not settings
+    assert updated_settings.list_monitoring_groups() == ["new_group"]
+    assert updated_settings.get_tooling_account_props() == (
+        TOOLING_ACCOUNT_ID,
+        TOOLING_REGION,
+    )
+
+
 # testing reading config without_replacements_file (shouldn't throw an error)
 def test_read_from_path_without_replacements_file(config_path_settings_tests):
     config_path = os.path.join(
@@ -613,7 +656,7 @@ def test_get_all_resource_names(config_path_settings_tests):
 
     with patch("lib.aws.GlueManager.get_all_names", return_value=glue_job_names), patch(
         "lib.aws.StepFunctionsManager.get_all_names", return_value=step_function_names
-    ), patch("lib.aws.StsManager.get_client_via_assumed_role"):
+    ), patch("lib.settings.settings.Boto3ClientCreator"):
         result = settings._get_all_resource_names()
 
         assert SettingConfigResourceTypes.GLUE_JOBS in result
@@ -639,6 +682,159 @@ def test_get_all_resource_names_no_iam_role(config_path_settings_tests):
         settings._get_all_resource_names()
 
 
+def get_settings_with_monitoring_groups(
+    config_path: str, monitoring_groups: list[dict], resource_names_cache=None
+) -> Settings:
+    """Settings from config_path with the given monitoring groups."""
+
+    def read(file_name):
+        with open(os.path.join(config_path, file_name)) as f:
+            return f.read()
+
+    return Settings(
+        read("general.json"),
+        json.dumps({"monitoring_groups": monitoring_groups}),
+        read("recipients.json"),
+        read("replacements.json"),
+        "sample",
+        resource_names_cache=resource_names_cache,
+    )
+
+
+# only (resource type, monitored environment) pairs with wildcards should be listed
+def test_processed_monitoring_groups_lists_only_wildcards(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    settings = get_settings_with_monitoring_groups(
+        config_path,
+        [
+            {
+                "group_name": "group1",
+                "glue_jobs": [
+                    {
+                        "name": "glue-job-*",
+                        "monitored_environment_name": "monitored1 [dev]",
+                    },
+                    {
+                        "name": "exact-job",
+                        "monitored_environment_name": "monitored1 [dev]",
+                    },
+                    {
+                        "name": "other-job",
+                        "monitored_environment_name": "monitored2 [dev]",
+                    },
+                ],
+                "lambda_functions": [
+                    {
+                        "name": "lambda-1",
+                        "monitored_environment_name": "monitored1 [dev]",
+                    }
+                ],
+            }
+        ],
+    )
+
+    with patch(
+        "lib.settings.Settings._list_resource_names",
+        return_value=["glue-job-1", "glue-job-2", "another-job"],
+    ) as mock_list_resource_names:
+        content = settings.get_monitoring_group_content("group1")
+
+    mock_list_resource_names.assert_called_once()
+    assert mock_list_resource_names.call_args.args[0] == "glue_jobs"
+    assert mock_list_resource_names.call_args.args[1]["name"] == "monitored1 [dev]"
+    # exact-job is not in the listed names of monitored1, other-job is taken as is
+    assert [
+        (x["name"], x["monitored_environment_name"]) for x in content["glue_jobs"]
+    ] == [
+        ("glue-job-1", "monitored1 [dev]"),
+        ("glue-job-2", "monitored1 [dev]"),
+        ("other-job", "monitored2 [dev]"),
+    ]
+    assert [x["name"] for x in content["lambda_functions"]] == ["lambda-1"]
+
+
+def test_processed_monitoring_groups_without_wildcards(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    settings = get_settings_with_monitoring_groups(
+        config_path,
+        [
+            {
+                "group_name": "group1",
+                "glue_jobs": [
+                    {
+                        "name": "glue-job-1",
+                        "monitored_environment_name": "monitored1 [dev]",
+                    }
+                ],
+            }
+        ],
+    )
+
+    with patch("lib.settings.Settings._list_resource_names") as mock_list:
+        content = settings.get_monitoring_group_content("group1")
+
+    mock_list.assert_not_called()
+    assert [x["name"] for x in content["glue_jobs"]] == ["glue-job-1"]
+
+
+# cached names should not be listed again, listed ones should be cached
+def test_get_all_resource_names_with_cache(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    resource_names_cache = MagicMock()
+    resource_names_cache.get.return_value = {
+        "glue_jobs": {"monitored1 [dev]": ["cached-job"]}
+    }
+    settings = get_settings_with_monitoring_groups(
+        config_path, [], resource_names_cache=resource_names_cache
+    )
+    resource_pairs = {
+        ("glue_jobs", "monitored1 [dev]"),
+        ("glue_jobs", "monitored2 [dev]"),
+        ("step_functions", "monitored1 [dev]"),
+    }
+
+    with patch(
+        "lib.settings.Settings._list_resource_names",
+        side_effect=lambda res_type, m_env: [f"{res_type}-{m_env['account_id']}"],
+    ) as mock_list:
+        result = settings._get_all_resource_names(resource_pairs)
+
+    assert mock_list.call_count == 2
+    assert result == {
+        "glue_jobs": {
+            "monitored1 [dev]": ["cached-job"],
+            "monitored2 [dev]": ["glue_jobs-0987654321"],
+        },
+        "step_functions": {"monitored1 [dev]": ["step_functions-1234567890"]},
+    }
+    resource_names_cache.get.assert_called_once_with(resource_pairs)
+    resource_names_cache.put.assert_called_once_with(
+        {
+            "glue_jobs": {"monitored2 [dev]": ["glue_jobs-0987654321"]},
+            "step_functions": {"monitored1 [dev]": ["step_functions-1234567890"]},
+        }
+    )
+
+
+def test_get_all_resource_names_unknown_environment(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    settings = get_settings_with_monitoring_groups(config_path, [])
+
+    with pytest.raises(SettingsException, match="'unknown' not found"):
+        settings._get_all_resource_names({("glue_jobs", "unknown")})
+
+
+def test_get_all_resource_names_listing_error(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    settings = get_settings_with_monitoring_groups(config_path, [])
+
+    with patch(
+        "lib.settings.Settings._list_resource_names",
+        side_effect=Exception("Access denied"),
+    ), pytest.raises(SettingsException, match="Access denied"):
+        settings._get_all_resource_names({("glue_jobs", "monitored1 [dev]")})
+
+
 ##############################################################################
 # RECIPIENTS.JSON CONTENT TESTS
 
@@ -749,3 +945,93 @@ def test_get_delivery_method(config_path_settings_tests):
     delivery_method_name = "random_method"
     result = settings.get_delivery_method(delivery_method_name=delivery_method_name)
     assert result == {}, f"result should be empty dict"
+
+
+def test_get_sla_thresholds(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    settings = get_settings_with_monitoring_groups(
+        config_path,
+        [
+            {
+                "group_name": "group1",
+                "glue_jobs": [
+                    {"name": "job-*", "sla_seconds": 600},
+                    {"name": "job-1", "sla_seconds": 60},
+                    {"name": "job-2"},
+                ],
+            },
+            {
+                "group_name": "group2",
+                "glue_jobs": [{"name": "job-3", "sla_seconds": 600}],
+                "lambda_functions": [{"name": "lambda-1", "sla_seconds": 0}],
+            },
+        ],
+    )
+
+    assert settings.get_sla_thresholds("glue_jobs") == [60, 600]
+    assert settings.get_sla_thresholds("lambda_functions") == []
+    assert settings.get_sla_thresholds("step_functions") == []
+
+
+def test_lambda_logs_subscriptions(config_path_settings_tests):
+    config_path = os.path.join(config_path_settings_tests, "config1")
+    with open(os.path.join(config_path, "general.json")) as f:
+        general = json.loads(f.read())
+    general["monitored_environments"][0]["lambda_logs_subscription"] = True
+    settings = Settings(
+        json.dumps(general),
+        json.dumps(
+            {
+                "monitoring_groups": [
+                    {
+                        "group_name": "group1",
+                        "lambda_functions": [
+                            {
+                                "name": "lambda-2",
+                                "monitored_environment_name": "monitored1 [<<env>>]",
+                            },
+                            {
+                                "name": "lambda-*",
+                                "monitored_environment_name": "monitored1 [<<env>>]",
+                            },
+                            {
+                                "name": "lambda-3",
+                                "monitored_environment_name": "monitored2 [<<env>>]",
+                            },
+                        ],
+                    },
+                    {
+                        "group_name": "group2",
+                        "lambda_functions": [
+                            {
+                                "name": "lambda-1",
+                                "monitored_environment_name": "monitored1 [<<env>>]",
+                            },
+                            {
+                                "name": "lambda-2",
+                                "monitored_environment_name": "monitored1 [<<env>>]",
+                            },
+                        ],
+                    },
+                ]
+            }
+        ),
+        "{}",
+        json.dumps({"<<env>>": "dev"}),
+        "sample",
+    )
+
+    with patch.object(
+        Settings,
+        "_get_all_resource_names",
+        return_value={
+            "lambda_functions": {"monitored1 [dev]": ["lambda-1", "lambda-4"]}
+        },
+    ):
+        settings.processed_monitoring_groups
+
+    # only the environments with subscription and the functions without wildcards
+    # (even though the wildcards have been replaced since)
+    assert settings.lambda_logs_subscriptions == {
+        "monitored1 [dev]": ["lambda-1", "lambda-2"]
+    }
@@ -71,7 +71,7 @@ def mock_settings(config_path_main_tests):
     """
     with patch(
         "lambda_alerting.Settings.from_s3_path",
-        side_effect=lambda x: Settings.from_file_path(config_path_main_tests),
+        side_effect=lambda x, **kwargs: Settings.from_file_path(config_path_main_tests),
     ) as _mock:
         yield _mock
 
@@ -11,6 +11,7 @@ from lambda_digest import (
 )
 from lib.core.constants import SettingConfigs, DigestSettings
 from lib.digest_service import SummaryEntry, AggregatedEntry
+from lib.notification_service.payload_store import NotificationPayloadStore
 
 
 STAGE_NAME = "teststage"
@@ -20,16 +21,16 @@ STAGE_NAME = "teststage"
 def os_vars_init(aws_props_init):
     # Sets up necessary lambda OS vars
     (account_id, region) = aws_props_init
-    os.environ["NOTIFICATION_QUEUE_URL"] = (
-        f"https://sqs.{region}.amazonaws.com/{account_id}/queue-salmon-notification-{STAGE_NAME}.fifo"
-    )
+    os.environ[
+        "NOTIFICATION_QUEUE_URL"
+    ] = f"https://sqs.{region}.amazonaws.com/{account_id}/queue-salmon-notification-{STAGE_NAME}.fifo"
     os.environ["SETTINGS_S3_PATH"] = f"s3://s3-salmon-settings-{STAGE_NAME}/settings/"
-    os.environ["IAMROLE_MONITORED_ACC_EXTRACT_METRICS"] = (
-        f"role-salmon-monitored-acc-extract-metrics-{STAGE_NAME}"
-    )
-    os.environ["METRICS_DB_NAME"] = (
-        f"timestream-salmon-metrics-events-storage-{STAGE_NAME}"
-    )
+    os.environ[
+        "IAMROLE_MONITORED_ACC_EXTRACT_METRICS"
+    ] = f"role-salmon-monitored-acc-extract-metrics-{STAGE_NAME}"
+    os.environ[
+        "METRICS_DB_NAME"
+    ] = f"timestream-salmon-metrics-events-storage-{STAGE_NAME}"
     os.environ["DIGEST_REPORT_PERIOD_HOURS"] = "24"
 
 
@@ -96,16 +97,36 @@ def mock_digest_extractor():
 #########################################################################################
 
 
-def test_digest_lambda_handler(os_vars_init, mock_settings, mock_digest_extractor):
+@pytest.mark.parametrize("supports_aggregated_queries", [False, True])
+def test_digest_lambda_handler(
+    os_vars_init, mock_settings, mock_digest_extractor, supports_aggregated_queries
+):
     mocked_metrics_storage = MagicMock()
+    mock_instance, mock_extractor = mock_digest_extractor
+    mock_instance.reset_mock()
+    mock_extractor.reset_mock()
+    mock_extractor.supports_aggregated_queries = supports_aggregated_queries
+    mock_extractor.extract_runs.return_value = {}
+    mock_extractor.extract_runs_summaries.return_value = {}
+
+    # every resource type is used by a monitoring group with a digest subscription
+    settings = mock_settings.from_s3_path.return_value
+    settings.get_recipients_and_groups_by_notification_type.return_value = [
+        {
+            "recipient": "recipient1",
+            "delivery_method": "aws_ses",
+            "monitoring_groups": ["group1"],
+        }
+    ]
+    settings.get_monitoring_groups_by_resource_type.return_value = ["group1"]
+    settings.get_monitoring_group_content.return_value = {}
 
     with patch(
         "lambda_digest.MetricsStorageProvider.get_metrics_storage",
         return_value=mocked_metrics_storage,
-    ):
+    ), patch("lambda_digest.append_digest_data") as mock_append_digest_data:
         lambda_handler({}, {})
 
-        mock_instance, mock_extractor = mock_digest_extractor
         resource_types = SettingConfigs.RESOURCE_TYPES
         expected_calls = []
 
@@ -118,13 +139,59 @@ def test_digest_lambda_handler(os_vars_init, mock_settings, mock_digest_extracto
             )
 
         # DigestDataExtractor called for each Resource Type
-        mock_instance.assert_has_calls(expected_calls)
+        mock_instance.assert_has_calls(expected_calls, any_order=True)
         assert mock_instance.call_count == len(resource_types)
-        assert mock_extractor.extract_runs.call_count == len(resource_types)
+        # runs are either aggregated in the metrics storage or pulled and aggregated in the lambda
+        if supports_aggregated_queries:
+            assert mock_extractor.extract_runs_summaries.call_count == len(
+                resource_types
+            )
+            mock_extractor.extract_runs.assert_not_called()
+        else:
+            assert mock_extractor.extract_runs.call_count == len(resource_types)
+            mock_extractor.extract_runs_summaries.assert_not_called()
+        # digest data is appended in the order of the resource types
+        assert [
+            x.kwargs["resource_type"] for x in mock_append_digest_data.call_args_list
+        ] == resource_types
+
+
+def test_digest_lambda_handler_skips_unused_resource_types(
+    os_vars_init, mock_settings, mock_digest_extractor
+):
+    mock_instance, mock_extractor = mock_digest_extractor
+    mock_instance.reset_mock()
+    mock_extractor.reset_mock()
+
+    settings = mock_settings.from_s3_path.return_value
+    settings.get_recipients_and_groups_by_notification_type.return_value = [
+        {
+            "recipient": "recipient1",
+            "delivery_method": "aws_ses",
+            "monitoring_groups": ["group1"],
+        }
+    ]
+    # group2 uses all the resource types, but nobody is subscribed to its digest
+    settings.get_monitoring_groups_by_resource_type.side_effect = (
+        lambda resource_type: (
+            ["group1", "group2"] if resource_type == "glue_jobs" else ["group2"]
+        )
+    )
+
+    with patch("lambda_digest.MetricsStorageProvider.get_metrics_storage"), patch(
+        "lambda_digest.append_digest_data"
+    ) as mock_append_digest_data:
+        lambda_handler({}, {})
+
+    mock_instance.assert_called_once()
+    assert mock_instance.call_args.kwargs["resource_type"] == "glue_jobs"
+    mock_append_digest_data.assert_called_once()
+    assert mock_append_digest_data.call_args.kwargs["monitoring_groups"] == ["group1"]
+    settings.get_monitoring_groups_by_resource_type.side_effect = None
 
 
 @pytest.mark.parametrize(
-    "scenario, recipients_groups, digest_data, expected_sqs_calles",
+    "scenario, recipients_groups, digest_data, expected_sqs_messages",
     [
         (
             "scen1",
@@ -190,7 +257,7 @@ def test_distribute_digest_report(
     scenario,
     recipients_groups,
     digest_data,
-    expected_sqs_calles,
+    expected_sqs_messages,
 ):
     digest_datetime = datetime(2000, 1, 1, 0, 0, 0)
     distribute_digest_report(
@@ -200,7 +267,53 @@ def test_distribute_digest_report(
         digest_end_time=digest_datetime,
         notification_queue_url="test_url",
     )
-    assert mock_send_messages_to_sqs.call_count == expected_sqs_calles
+    # all the messages are sent with one sender, each recipient group in its own message group
+    mock_send_messages_to_sqs.assert_called_once()
+    kwargs = mock_send_messages_to_sqs.return_value.send_messages.call_args.kwargs
+    assert len(kwargs["messages"]) == expected_sqs_messages
+    assert len(set(kwargs["message_group_ids"])) == expected_sqs_messages
+
+
+@patch("lib.core.constants.NotificationPayloadConfigs.MAX_INLINE_MESSAGE_BYTES", 10)
+def test_distribute_digest_report_offloads_identical_bodies(
+    mock_settings, mock_send_messages_to_sqs
+):
+    s3_manager = MagicMock()
+    payload_store = NotificationPayloadStore(
+        payloads_s3_path="s3://test-bucket/payloads", s3_manager=s3_manager
+    )
+    recipients_groups = [
+        {
+            "recipients": ["recipient1"],
+            "monitoring_groups": ["group1"],
+            "delivery_method": {"name": "ses"},
+        },
+        {
+            "recipients": ["recipient2"],
+            "monitoring_groups": ["group1"],
+            "delivery_method": {"name": "smtp"},
+        },
+    ]
+    digest_datetime = datetime(2000, 1, 1, 0, 0, 0)
+
+    distribute_digest_report(
+        recipients_groups=recipients_groups,
+        digest_data=[{"group1": {}}],
+        digest_start_time=digest_datetime,
+        digest_end_time=digest_datetime,
+        notification_queue_url="test_url",
+        payload_store=payload_store,
+    )
+
+    # both recipient groups receive the same body - it is stored once
+    s3_manager.write_compressed_file.assert_called_once()
+    s3_path = s3_manager.write_compressed_file.call_args.args[0]
+    messages = mock_send_messages_to_sqs.return_value.send_messages.call_args.kwargs[
+        "messages"
+    ]
+    for message in messages:
+        assert "message_body" not in message["message"]
+        assert message["message"]["message_body_s3_path"] == s3_path
 
 
 def test_append_digest_data(mock_settings):
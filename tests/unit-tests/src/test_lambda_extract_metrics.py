@@ -1,4 +1,6 @@
 from datetime import datetime, timezone
+import threading
+import time
 import pytest
 
 from lib.core.datetime_utils import str_utc_datetime_to_datetime
@@ -8,9 +10,20 @@ from lambda_extract_metrics import (
     process_individual_resource,
     collect_glue_data_quality_result_ids,
     get_since_time_for_individual_resource,
+    refresh_rollups,
 )
 from unittest.mock import patch, call, MagicMock
-from lib.core.constants import SettingConfigs, SettingConfigResourceTypes as types
+from botocore.exceptions import ClientError
+from lib.aws.glue_manager import GlueManagerException
+from lib.core.constants import (
+    SettingConfigs,
+    ExtractMetricsConfigs,
+    SettingsCacheConfigs,
+    SettingConfigResourceTypes as types,
+)
+from lib.metrics_extractor import MetricsExtractorException
+from lib.digest_service import MetricsRollupException
+from lib.metrics_storage import MetricsStorageWriteException
 
 # # uncomment this to see lambda's logging output
 # import logging
@@ -179,6 +192,37 @@ class TestGetSinceTimeForIndividualResource:
         )
         self.mocked_metrics_storage.get_earliest_writeable_time_for_resource_type.assert_called_once()
 
+    # we DON'T have last_update_time in JSON, but it's resolved in a batch from metrics_table
+    # expected result - since_time taken from the batch (no individual query)
+    def test_last_update_time_from_batch(self):
+        resource_type = "glue_jobs"
+        resource_name = "glue-job1"
+
+        self.mocked_metrics_storage.get_resource_last_update_time_from_json.return_value = (
+            None
+        )
+        since_time = datetime(2024, 6, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+        result = get_since_time_for_individual_resource(
+            {},
+            resource_type,
+            resource_name,
+            self.mocked_metrics_storage,
+            table_last_update_times={resource_name: since_time},
+        )
+        # resource is missing in both, payload and batch -> earliest writeable time
+        result_missing = get_since_time_for_individual_resource(
+            {},
+            resource_type,
+            "glue-job-new",
+            self.mocked_metrics_storage,
+            table_last_update_times={resource_name: since_time},
+        )
+
+        assert result == since_time
+        assert result_missing == EARLIEST_WRITEABLE_TIME
+        self.mocked_metrics_storage.get_last_update_time_from_metrics_table.assert_not_called()
+
 
 #########################################################################################
 # TESTs for process_individual_resource
@@ -311,6 +355,38 @@ class TestProcessIndividualResource:
             self.mock_boto3_client_creator.region,
         )
 
+    def test_process_with_pending_alerts(self):
+        # Arrange
+        self.mock_metrics_extractor.prepare_metrics_data.return_value = (["r1"], {})
+        self.mock_metrics_storage.get_metrics_table_name_for_resource_type.return_value = (
+            "test_metrics_table"
+        )
+        self.mock_metrics_extractor.send_alerts = MagicMock()  # enabling this method
+        pending_alerts = []
+
+        # Act
+        result = process_individual_resource(
+            monitored_environment_name="test_env",
+            resource_type="glue_workflows",
+            resource_name="workflow1",
+            boto3_client_creator=self.mock_boto3_client_creator,
+            aws_client_name="glue",
+            metrics_storage=self.mock_metrics_storage,
+            metrics_table_name="test_metrics_table",
+            last_update_times={},
+            alerts_event_bus_name="test_event_bus",
+            result_ids=[],
+            pending_alerts=pending_alerts,
+        )
+
+        # Assert - the alerts are sent once the buffered records have been written
+        assert result["alerts_sent"] is False
+        self.mock_metrics_extractor.send_alerts.assert_not_called()
+        assert len(pending_alerts) == 1
+        assert pending_alerts[0]["resource_name"] == "workflow1"
+        assert pending_alerts[0]["metrics_table_name"] == "test_metrics_table"
+        assert pending_alerts[0]["metrics_extractor"] is self.mock_metrics_extractor
+
     def test_process_glue_data_quality_with_result_ids(self):
         # Arrange
         resource_type = types.GLUE_DATA_QUALITY
@@ -444,6 +520,9 @@ class TestProcessAllResourcesByEnvAndType:
                     last_update_times=last_update_times,
                     alerts_event_bus_name=alerts_event_bus_name,
                     result_ids=self.GLUE_DQ_RESULT_IDS,
+                    table_last_update_times={},
+                    pending_alerts=None,
+                    catalog_counts_cache=None,
                 ),
                 call(
                     monitored_environment_name=monitored_environment_name,
@@ -458,6 +537,9 @@ class TestProcessAllResourcesByEnvAndType:
                     last_update_times=last_update_times,
                     alerts_event_bus_name=alerts_event_bus_name,
                     result_ids=self.GLUE_DQ_RESULT_IDS,
+                    table_last_update_times={},
+                    pending_alerts=None,
+                    catalog_counts_cache=None,
                 ),
             ]
         )
@@ -512,6 +594,9 @@ class TestProcessAllResourcesByEnvAndType:
                     last_update_times=last_update_times,
                     alerts_event_bus_name=alerts_event_bus_name,
                     result_ids=[],
+                    table_last_update_times={},
+                    pending_alerts=None,
+                    catalog_counts_cache=None,
                 ),
                 call(
                     monitored_environment_name=monitored_environment_name,
@@ -526,10 +611,154 @@ class TestProcessAllResourcesByEnvAndType:
                     last_update_times=last_update_times,
                     alerts_event_bus_name=alerts_event_bus_name,
                     result_ids=[],
+                    table_last_update_times={},
+                    pending_alerts=None,
+                    catalog_counts_cache=None,
                 ),
             ]
         )
 
+    def test_process_resources_last_update_times_resolved_at_once(self):
+        # Arrange
+        self.mock_settings.get_monitored_environment_props.return_value = (
+            "account-id",
+            "region",
+        )
+        payload_times = {"job1": EARLIEST_WRITEABLE_TIME}
+        self.mock_metrics_storage.get_resource_last_update_time_from_json.side_effect = lambda last_update_time_json, resource_type, resource_name: payload_times.get(
+            resource_name
+        )
+        table_last_update_times = {"job2": EARLIEST_WRITEABLE_TIME}
+        self.mock_metrics_storage.get_last_update_times_from_metrics_table.return_value = (
+            table_last_update_times
+        )
+
+        # Act
+        process_all_resources_by_env_and_type(
+            monitored_environment_name="test_env",
+            resource_type="glue_jobs",
+            resource_names=["job1", "job2", "job3"],
+            settings=self.mock_settings,
+            iam_role_name="test-role",
+            metrics_storage=self.mock_metrics_storage,
+            last_update_times={},
+            alerts_event_bus_name="test_event_bus",
+        )
+
+        # Assert - one lookup for all resources missing in the payload
+        self.mock_metrics_storage.get_last_update_times_from_metrics_table.assert_called_once_with(
+            resource_type="glue_jobs", resource_names=["job2", "job3"]
+        )
+        for x in self.mock_process_individual_resource_mock.call_args_list:
+            assert x.kwargs["table_last_update_times"] == table_last_update_times
+
+    def test_process_resources_failure_is_isolated(self):
+        # Arrange
+        self.mock_settings.get_monitored_environment_props.return_value = (
+            "account-id",
+            "region",
+        )
+
+        def process_side_effect(**kwargs):
+            if kwargs["resource_name"] == "job2":
+                raise Exception("Throttled")
+            return {}
+
+        self.mock_process_individual_resource_mock.side_effect = process_side_effect
+
+        # Act
+        failed_resources = process_all_resources_by_env_and_type(
+            monitored_environment_name="test_env",
+            resource_type="glue_jobs",
+            resource_names=["job1", "job2", "job3"],
+            settings=self.mock_settings,
+            iam_role_name="test-role",
+            metrics_storage=self.mock_metrics_storage,
+            last_update_times={},
+            alerts_event_bus_name="test_event_bus",
+            max_workers=3,
+        )
+
+        # Assert
+        assert failed_resources == ["job2"]
+        processed_names = {
+            x.kwargs["resource_name"]
+            for x in self.mock_process_individual_resource_mock.call_args_list
+        }
+        assert processed_names == {"job1", "job2", "job3"}
+
+    def test_process_resources_not_found_is_skipped(self):
+        # Arrange
+        self.mock_settings.get_monitored_environment_props.return_value = (
+            "account-id",
+            "region",
+        )
+
+        def process_side_effect(**kwargs):
+            try:
+                raise ClientError(
+                    {"Error": {"Code": "EntityNotFoundException"}}, "GetJobRuns"
+                )
+            except ClientError as e:
+                # the managers wrap the AWS errors into their own exceptions
+                raise GlueManagerException(f"Error getting glue job runs : {e}")
+
+        self.mock_process_individual_resource_mock.side_effect = process_side_effect
+
+        # Act
+        failed_resources = process_all_resources_by_env_and_type(
+            monitored_environment_name="test_env",
+            resource_type="glue_jobs",
+            resource_names=["misspelled-job"],
+            settings=self.mock_settings,
+            iam_role_name="test-role",
+            metrics_storage=self.mock_metrics_storage,
+            last_update_times={},
+            alerts_event_bus_name="test_event_bus",
+        )
+
+        # Assert
+        assert failed_resources == []
+
+    def test_process_resources_respects_account_cap(self):
+        # Arrange
+        self.mock_settings.get_monitored_environment_props.return_value = (
+            "account-id-capped",
+            "region",
+        )
+        lock = threading.Lock()
+        counters = {"active": 0, "max_active": 0}
+
+        def process_side_effect(**kwargs):
+            with lock:
+                counters["active"] += 1
+                counters["max_active"] = max(counters["max_active"], counters["active"])
+            time.sleep(0.05)
+            with lock:
+                counters["active"] -= 1
+            return {}
+
+        self.mock_process_individual_resource_mock.side_effect = process_side_effect
+
+        # Act
+        failed_resources = process_all_resources_by_env_and_type(
+            monitored_environment_name="test_env",
+            resource_type="glue_jobs",
+            resource_names=[f"job{i}" for i in range(8)],
+            settings=self.mock_settings,
+            iam_role_name="test-role",
+            metrics_storage=self.mock_metrics_storage,
+            last_update_times={},
+            alerts_event_bus_name="test_event_bus",
+            max_workers=8,
+            max_workers_per_account=2,
+        )
+
+        # Assert
+        assert failed_resources == []
+        assert self.mock_process_individual_resource_mock.call_count == 8
+        assert 1 < counters["max_active"] <= 2
+
 
 #########################################################################################
 
@@ -546,6 +775,8 @@ class TestLambdaHandler:
                 "IAMROLE_MONITORED_ACC_EXTRACT_METRICS": "test-iam-role",
                 "METRICS_DB_NAME": "test-db",
                 "ALERTS_EVENT_BUS_NAME": "test-event-bus",
+                "RESOURCE_NAMES_CACHE_S3_PATH": "s3://test-bucket/cache/resource_names.json",
+                "PENDING_ROLLUPS_S3_PATH": "s3://test-bucket/pending-rollups/",
             },
         )
 
@@ -558,13 +789,19 @@ class TestLambdaHandler:
         self.mock_settings = patch("lambda_extract_metrics.Settings")
         # Mock process_all_resources_by_env_and_type
         self.mock_process_all_resources = patch(
-            "lambda_extract_metrics.process_all_resources_by_env_and_type"
+            "lambda_extract_metrics.process_all_resources_by_env_and_type",
+            return_value=[],
+        )
+        # Mock refresh_rollups
+        self.mock_refresh_rollups = patch(
+            "lambda_extract_metrics.refresh_rollups", return_value=0
         )
         # Start patches
         self.mock_env.start()
         self.mock_metrics_storage_mock = self.mock_metrics_storage.start()
         self.mock_settings_mock = self.mock_settings.start()
         self.mock_process_all_resources_mock = self.mock_process_all_resources.start()
+        self.mock_refresh_rollups_mock = self.mock_refresh_rollups.start()
 
         yield
 
@@ -573,6 +810,7 @@ class TestLambdaHandler:
         self.mock_metrics_storage.stop()
         self.mock_settings.stop()
         self.mock_process_all_resources.stop()
+        self.mock_refresh_rollups.stop()
 
     def test_lambda_handler_success(self):
         # Arrange
@@ -605,6 +843,8 @@ class TestLambdaHandler:
         self.mock_settings_mock.from_s3_path.assert_called_once_with(
             "s3://test-bucket/settings.json",
             iam_role_list_monitored_res="test-iam-role",
+            resource_names_cache_path="s3://test-bucket/cache/resource_names.json",
+            max_age_seconds=SettingsCacheConfigs.SETTINGS_MAX_AGE_SECONDS,
         )
         mock_settings_instance.get_monitoring_group_content.assert_called_once_with(
             "test_group"
@@ -620,6 +860,10 @@ class TestLambdaHandler:
                     metrics_storage=self.mock_metrics_storage_mock.return_value,
                     last_update_times=event["last_update_times"],
                     alerts_event_bus_name="test-event-bus",
+                    max_workers=ExtractMetricsConfigs.MAX_WORKERS,
+                    max_workers_per_account=ExtractMetricsConfigs.MAX_WORKERS_PER_ACCOUNT,
+                    pending_alerts=[],
+                    catalog_counts_cache=None,
                 ),
                 call(
                     monitored_environment_name="env2",
@@ -630,6 +874,10 @@ class TestLambdaHandler:
                     metrics_storage=self.mock_metrics_storage_mock.return_value,
                     last_update_times=event["last_update_times"],
                     alerts_event_bus_name="test-event-bus",
+                    max_workers=ExtractMetricsConfigs.MAX_WORKERS,
+                    max_workers_per_account=ExtractMetricsConfigs.MAX_WORKERS_PER_ACCOUNT,
+                    pending_alerts=[],
+                    catalog_counts_cache=None,
                 ),
                 call(
                     monitored_environment_name="env1",
@@ -640,9 +888,16 @@ class TestLambdaHandler:
                     metrics_storage=self.mock_metrics_storage_mock.return_value,
                     last_update_times=event["last_update_times"],
                     alerts_event_bus_name="test-event-bus",
+                    max_workers=ExtractMetricsConfigs.MAX_WORKERS,
+                    max_workers_per_account=ExtractMetricsConfigs.MAX_WORKERS_PER_ACCOUNT,
+                    pending_alerts=[],
+                    catalog_counts_cache=None,
                 ),
             ]
         )
+        # records buffered across all the resources are written out once, at the end
+        assert self.mock_metrics_storage_mock.call_args.kwargs["buffer_writes"] is True
+        self.mock_metrics_storage_mock.return_value.flush.assert_called_once()
 
     def test_lambda_handler_no_resources(self):
         # Arrange
@@ -664,12 +919,202 @@ class TestLambdaHandler:
         self.mock_settings_mock.from_s3_path.assert_called_once_with(
             "s3://test-bucket/settings.json",
             iam_role_list_monitored_res="test-iam-role",
+            resource_names_cache_path="s3://test-bucket/cache/resource_names.json",
+            max_age_seconds=SettingsCacheConfigs.SETTINGS_MAX_AGE_SECONDS,
         )
         mock_settings_instance.get_monitoring_group_content.assert_called_once_with(
             "test_group"
         )
         self.mock_process_all_resources_mock.assert_not_called()
 
+    def test_lambda_handler_work_units(self):
+        # Arrange
+        event = {
+            "work_units": [
+                {
+                    "monitored_environment_name": "env1",
+                    "resource_type": "glue_jobs",
+                    "resource_names": ["glue_job1", "glue_job2"],
+                }
+            ],
+            "last_update_times": {},
+        }
+        mock_settings_instance = MagicMock()
+        self.mock_settings_mock.from_s3_path.return_value = mock_settings_instance
+
+        # Act
+        lambda_handler(event, MagicMock())
+
+        # Assert - resource names are given, so wildcards are not resolved
+        mock_settings_instance.get_monitoring_group_content.assert_not_called()
+        self.mock_process_all_resources_mock.assert_called_once()
+        call_kwargs = self.mock_process_all_resources_mock.call_args.kwargs
+        assert call_kwargs["monitored_environment_name"] == "env1"
+        assert call_kwargs["resource_type"] == "glue_jobs"
+        assert call_kwargs["resource_names"] == ["glue_job1", "glue_job2"]
+
+    def test_lambda_handler_raises_after_processing_all_groups(self):
+        # Arrange
+        event = {"monitoring_group": "test_group", "last_update_times": {}}
+        mock_settings_instance = MagicMock()
+        mock_settings_instance.get_monitoring_group_content.return_value = {
+            "group_name": "test_group",
+            "glue_jobs": [{"name": "glue_job1", "monitored_environment_name": "env1"}],
+            "glue_workflows": [
+                {"name": "glue_workflow1", "monitored_environment_name": "env1"}
+            ],
+        }
+        self.mock_settings_mock.from_s3_path.return_value = mock_settings_instance
+        self.mock_process_all_resources_mock.side_effect = [["glue_job1"], []]
+
+        # Act
+        with pytest.raises(MetricsExtractorException, match="glue_job1"):
+            lambda_handler(event, MagicMock())
+
+        # Assert - the failure hasn't stopped processing of the remaining resource types
+        assert self.mock_process_all_resources_mock.call_count == 2
+
+    def test_lambda_handler_alerts_only_written_resources(self):
+        # Arrange
+        event = {
+            "work_units": [
+                {
+                    "monitored_environment_name": "env1",
+                    "resource_type": "glue_workflows",
+                    "resource_names": ["workflow1", "workflow2"],
+                }
+            ],
+            "last_update_times": {},
+        }
+        metrics_storage = self.mock_metrics_storage_mock.return_value
+        metrics_storage.get_metrics_table_name_for_resource_type.return_value = (
+            "workflows_metrics"
+        )
+        extractors = {name: MagicMock() for name in ["workflow1", "workflow2"]}
+
+        def process_side_effect(**kwargs):
+            for name in kwargs["resource_names"]:
+                kwargs["pending_alerts"].append(
+                    {
+                        "monitored_environment_name": "env1",
+                        "resource_type": "glue_workflows",
+                        "resource_name": name,
+                        "metrics_table_name": "workflows_metrics",
+                        "metrics_extractor": extractors[name],
+                        "account_id": "account-id",
+                        "region": "region",
+                    }
+                )
+            return []
+
+        self.mock_process_all_resources_mock.side_effect = process_side_effect
+        metrics_storage.flush.side_effect = MetricsStorageWriteException(
+            "Throttled", {("workflows_metrics", "workflow1")}
+        )
+
+        # Act
+        with pytest.raises(MetricsExtractorException, match="workflow1"):
+            lambda_handler(event, MagicMock())
+
+        # Assert - the runs of workflow1 will be extracted (and alerted) again by the next run
+        extractors["workflow1"].send_alerts.assert_not_called()
+        extractors["workflow2"].send_alerts.assert_called_once_with(
+            "test-event-bus", "account-id", "region"
+        )
+
+    def test_lambda_handler_refreshes_rollups(self):
+        # Arrange
+        event = {
+            "work_units": [
+                {
+                    "monitored_environment_name": env,
+                    "resource_type": "glue_jobs",
+                    "resource_names": ["glue_job1"],
+                }
+                for env in ["env1", "env2"]
+            ],
+            "last_update_times": {},
+        }
+        mock_settings_instance = MagicMock()
+        self.mock_settings_mock.from_s3_path.return_value = mock_settings_instance
+        self.mock_refresh_rollups_mock.return_value = 2
+
+        # Act
+        with patch("lambda_extract_metrics.PendingRollupsStore") as mock_store:
+            lambda_handler(event, MagicMock())
+
+        # Assert - rollups are refreshed once per resource type (retrying the pending periods)
+        mock_store.assert_called_once_with("s3://test-bucket/pending-rollups/")
+        self.mock_refresh_rollups_mock.assert_called_once_with(
+            metrics_storage=self.mock_metrics_storage_mock.return_value,
+            settings=mock_settings_instance,
+            resource_types=["glue_jobs"],
+            pending_rollups_store=mock_store.return_value,
+        )
+        self.mock_metrics_storage_mock.return_value.flush.assert_called_once()
+
+    def test_lambda_handler_raises_on_rollups_error(self):
+        # Arrange
+        event = {"monitoring_group": "test_group", "last_update_times": {}}
+        mock_settings_instance = MagicMock()
+        mock_settings_instance.get_monitoring_group_content.return_value = {
+            "group_name": "test_group",
+            "glue_jobs": [{"name": "glue_job1", "monitored_environment_name": "env1"}],
+        }
+        self.mock_settings_mock.from_s3_path.return_value = mock_settings_instance
+        self.mock_refresh_rollups_mock.side_effect = Exception("Query failed")
+
+        # Act
+        with pytest.raises(MetricsExtractorException, match="Rollups refresh failed"):
+            lambda_handler(event, MagicMock())
+
+        # Assert - the metrics have been written out before refreshing the rollups
+        self.mock_metrics_storage_mock.return_value.flush.assert_called_once()
+
+
+def test_refresh_rollups():
+    metrics_storage = MagicMock()
+    settings = MagicMock()
+    settings.get_sla_thresholds.return_value = [60]
+    pending_rollups_store = MagicMock()
+
+    with patch("lambda_extract_metrics.MetricsRollup") as mock_rollup:
+        mock_rollup.return_value.refresh_written_runs.return_value = 3
+        result = refresh_rollups(
+            metrics_storage,
+            settings,
+            ["glue_jobs", "glue_workflows"],
+            pending_rollups_store=pending_rollups_store,
+        )
+
+    assert result == 6
+    assert [x.args for x in mock_rollup.call_args_list] == [
+        ("glue_jobs", metrics_storage),
+        ("glue_workflows", metrics_storage),
+    ]
+    mock_rollup.return_value.refresh_written_runs.assert_called_with(
+        sla_thresholds=[60], pending_rollups_store=pending_rollups_store
+    )
+
+
+def test_refresh_rollups_error_does_not_stop_other_types():
+    refreshed_types = []
+
+    def get_rollup(resource_type, metrics_storage):
+        def refresh_written_runs(**kwargs):
+            refreshed_types.append(resource_type)
+            if resource_type == "glue_jobs":
+                raise MetricsRollupException("Query failed")
+            return 2
+
+        return MagicMock(refresh_written_runs=refresh_written_runs)
+
+    with patch("lambda_extract_metrics.MetricsRollup", side_effect=get_rollup):
+        with pytest.raises(MetricsRollupException, match="glue_jobs: Query failed"):
+            refresh_rollups(MagicMock(), MagicMock(), ["glue_jobs", "glue_workflows"])
+
+    assert refreshed_types == ["glue_jobs", "glue_workflows"]
+
 
 #########################################################################################
 
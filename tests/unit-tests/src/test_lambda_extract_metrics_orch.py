@@ -5,7 +5,7 @@ import boto3
 
 from moto import mock_aws
 from lambda_extract_metrics_orch import lambda_handler
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, PropertyMock, patch, call
 
 from lib.settings.settings import Settings
 
@@ -48,12 +48,13 @@ def os_vars_init(aws_props_init):
     (account_id, region) = aws_props_init
     stage_name = "teststage"
     os.environ["SETTINGS_S3_PATH"] = f"s3://s3-salmon-settings-{stage_name}/settings/"
-    os.environ["LAMBDA_EXTRACT_METRICS_NAME"] = (
-        f"lambda-salmon-extract-metrics-{stage_name}"
-    )
-    os.environ["METRICS_DB_NAME"] = (
-        f"timestream-salmon-metrics-events-storage-{stage_name}"
-    )
+    os.environ[
+        "LAMBDA_EXTRACT_METRICS_NAME"
+    ] = f"lambda-salmon-extract-metrics-{stage_name}"
+    os.environ[
+        "METRICS_DB_NAME"
+    ] = f"timestream-salmon-metrics-events-storage-{stage_name}"
+    os.environ["IAMROLE_MONITORED_ACC_EXTRACT_METRICS"] = "test-iam-role"
 
 
 #########################################################################################
@@ -67,7 +68,7 @@ def mock_settings(config_path_main_tests):
     """
     with patch(
         "lambda_alerting.Settings.from_s3_path",
-        side_effect=lambda x: Settings.from_file_path(config_path_main_tests),
+        side_effect=lambda x, **kwargs: Settings.from_file_path(config_path_main_tests),
     ) as _mock:
         yield _mock
 
@@ -94,45 +95,115 @@ def mock_metrics_storage_retrieve_last_update_times():
         yield _mock
 
 
+MONITORING_GROUPS = [
+    {
+        "group_name": "test_group1",
+        "glue_jobs": [
+            {"name": "glue-job1", "monitored_environment_name": "env1"},
+            {"name": "glue-job2", "monitored_environment_name": "env1"},
+        ],
+    },
+    {
+        "group_name": "test_group2",
+        "glue_jobs": [
+            # the same resource in another group
+            {"name": "glue-job1", "monitored_environment_name": "env1"},
+        ],
+        "step_functions": [
+            {"name": "step-function1", "monitored_environment_name": "env1"}
+        ],
+    },
+]
+
+
+def mock_processed_monitoring_groups(monitoring_groups: list[dict]):
+    return patch.object(
+        Settings,
+        "processed_monitoring_groups",
+        new_callable=PropertyMock,
+        return_value={"monitoring_groups": monitoring_groups},
+    )
+
+
+@pytest.fixture(scope="function")
+def mock_monitoring_groups():
+    with mock_processed_monitoring_groups(MONITORING_GROUPS):
+        yield MONITORING_GROUPS
+
+
+def get_invocation_payloads(mock_lambda_invoke) -> list[dict]:
+    return [json.loads(x.kwargs["Payload"]) for x in mock_lambda_invoke.call_args_list]
+
+
 #########################################################################################
 def test_lambda_handler(
-    mock_settings, mock_lambda_invoke, mock_metrics_storage_retrieve_last_update_times
+    mock_settings,
+    mock_lambda_invoke,
+    mock_metrics_storage_retrieve_last_update_times,
+    mock_monitoring_groups,
 ):
-    monitoring_groups = ["test_group1", "test_group2"]
-    with patch(
-        "lambda_extract_metrics_orch.Settings.list_monitoring_groups",
-        return_value=monitoring_groups,
-    ) as mock_get_monitoring_group:
-        lambda_handler({}, {})
+    lambda_handler({}, {})
 
     lambda_name = os.environ["LAMBDA_EXTRACT_METRICS_NAME"]
+    payloads = get_invocation_payloads(mock_lambda_invoke)
+
+    # each resource is extracted once (even if it belongs to several groups),
+    # each work unit is small enough to be extracted by a separate invocation
+    assert mock_lambda_invoke.call_count == 2
+    for invoke_call in mock_lambda_invoke.call_args_list:
+        assert invoke_call.kwargs["FunctionName"] == lambda_name
+        assert invoke_call.kwargs["InvocationType"] == "Event"
+
+    # the most expensive unit goes first
+    assert payloads[0] == {
+        "work_units": [
+            {
+                "monitored_environment_name": "env1",
+                "resource_type": "glue_jobs",
+                "resource_names": ["glue-job1", "glue-job2"],
+            }
+        ],
+        "last_update_times": {"glue_jobs": LAST_UPDATE_TIMES_SAMPLE["glue_jobs"]},
+    }
+    assert payloads[1] == {
+        "work_units": [
+            {
+                "monitored_environment_name": "env1",
+                "resource_type": "step_functions",
+                "resource_names": ["step-function1"],
+            }
+        ],
+        "last_update_times": {
+            "step_functions": [LAST_UPDATE_TIMES_SAMPLE["step_functions"][0]]
+        },
+    }
+
+
+@patch.dict(
+    "os.environ",
+    {
+        "EXTRACT_METRICS_MAX_CONCURRENT_INVOCATIONS": "1",
+        "EXTRACT_METRICS_MAX_RESOURCES_PER_WORK_UNIT": "1",
+    },
+)
+def test_lambda_handler_concurrency_cap(
+    mock_settings,
+    mock_lambda_invoke,
+    mock_metrics_storage_retrieve_last_update_times,
+    mock_monitoring_groups,
+):
+    lambda_handler({}, {})
 
-    expected_calls = []
-    for group in monitoring_groups:
-        expected_calls.append(
-            call(
-                FunctionName=lambda_name,
-                InvocationType="Event",
-                Payload=json.dumps(
-                    {
-                        "monitoring_group": group,
-                        "last_update_times": LAST_UPDATE_TIMES_SAMPLE,
-                    }
-                ),
-            )
-        )
-
-    mock_lambda_invoke.assert_has_calls(expected_calls)
+    # 3 work units (one resource each) are extracted by the only invocation
+    mock_lambda_invoke.assert_called_once()
+    payload = get_invocation_payloads(mock_lambda_invoke)[0]
+    assert len(payload["work_units"]) == 3
 
 
 def test_lambda_handler_no_groups(
     mock_settings, mock_lambda_invoke, mock_metrics_storage_retrieve_last_update_times
 ):
-    monitoring_groups = []
-    with patch(
-        "lambda_extract_metrics_orch.Settings.list_monitoring_groups",
-        return_value=monitoring_groups,
-    ) as mock_get_monitoring_group:
+    with mock_processed_monitoring_groups([]):
         lambda_handler({}, {})
 
     mock_lambda_invoke.assert_not_called()
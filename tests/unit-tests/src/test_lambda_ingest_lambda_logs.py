@@ -0,0 +1,482 @@
+import os
+import gzip
+import json
+import base64
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from lambda_ingest_lambda_logs import (
+    extract_partial_invocations,
+    lambda_handler,
+    refresh_lambda_rollups,
+)
+from lib.aws.lambda_manager import LambdaInvocation, LambdaManager
+from lib.core.constants import SettingConfigResourceTypes as types
+from lib.metrics_extractor import LambdaLogsIngestor, PartialInvocationsStore
+from lib.metrics_storage.base_metrics_storage import MetricsStorageWriteException
+
+ACCOUNT_ID = "123456789012"
+FUNCTION_NAME = "test-lambda"
+OTHER_FUNCTION_NAME = "other-lambda"
+METRICS_TABLE_NAME = "tstable-lambda_functions-metrics"
+REQUEST_ID = "5e844c16-4356-4c04-a266-c92d590415c3"
+START = f"START RequestId: {REQUEST_ID} Version: $LATEST\n"
+END = f"END RequestId: {REQUEST_ID}\n"
+REPORT = f"REPORT RequestId: {REQUEST_ID}\tDuration: 2000.0 ms\tBilled Duration: 2000 ms\tMemory Size: 128 MB\tMax Memory Used: 80 MB\t\n"
+START_TIME = datetime.now(tz=timezone.utc)
+
+ENV_NAME = "env1"
+REGION = "eu-central-1"
+LOG_STREAM = "2024/10/01/[$LATEST]abc"
+PARTIAL_INVOCATIONS_S3_PATH = "s3://test-bucket/partial-invocations/"
+
+
+@pytest.fixture(autouse=True)
+def mock_env():
+    with patch.dict(
+        os.environ,
+        {
+            "SETTINGS_S3_PATH": "s3://test-bucket/settings/",
+            "METRICS_DB_NAME": "test-db",
+            "ALERTS_EVENT_BUS_NAME": "test-event-bus",
+            "AWS_REGION": REGION,
+        },
+    ):
+        yield
+
+
+@pytest.fixture
+def mock_settings():
+    settings = MagicMock()
+    settings.get_monitored_environment_name.return_value = ENV_NAME
+    settings.lambda_logs_subscriptions = {ENV_NAME: [FUNCTION_NAME]}
+    with patch(
+        "lambda_ingest_lambda_logs.Settings.from_s3_path", return_value=settings
+    ):
+        yield settings
+
+
+@pytest.fixture
+def mock_metrics_storage():
+    metrics_storage = MagicMock()
+    metrics_storage.get_metrics_table_name_for_resource_type.return_value = (
+        METRICS_TABLE_NAME
+    )
+    with patch(
+        "lambda_ingest_lambda_logs.MetricsStorageProvider.get_metrics_storage",
+        return_value=metrics_storage,
+    ):
+        yield metrics_storage
+
+
+@pytest.fixture
+def mock_events_manager():
+    with patch(
+        "lib.metrics_extractor.lambda_functions_metrics_extractor.EventsManager"
+    ) as mock_events_manager:
+        yield mock_events_manager.return_value
+
+
+@pytest.fixture(autouse=True)
+def mock_ingestor():
+    # a fresh ingestor (without the state of the other tests)
+    with patch("lambda_ingest_lambda_logs.LAMBDA_LOGS_INGESTOR", LambdaLogsIngestor()):
+        yield
+
+
+def get_log_event(seconds: float, message: str) -> dict:
+    timestamp = START_TIME + timedelta(seconds=seconds)
+    return {
+        "id": "1",
+        "timestamp": int(timestamp.timestamp() * 1000),
+        "message": message,
+    }
+
+
+def get_record(log_events: list, function_name: str = FUNCTION_NAME) -> dict:
+    log_data = {
+        "messageType": "DATA_MESSAGE",
+        "owner": ACCOUNT_ID,
+        "logGroup": f"/aws/lambda/{function_name}",
+        "logStream": LOG_STREAM,
+        "logEvents": log_events,
+    }
+    data = base64.b64encode(gzip.compress(json.dumps(log_data).encode())).decode()
+    return {"kinesis": {"data": data}}
+
+
+def get_event(log_events: list) -> dict:
+    return {"Records": [get_record(log_events)]}
+
+
+def get_two_functions_event() -> dict:
+    log_events = [
+        get_log_event(0, START),
+        get_log_event(2, END),
+        get_log_event(2.001, REPORT),
+    ]
+    return {
+        "Records": [
+            get_record(log_events, FUNCTION_NAME),
+            get_record(log_events, OTHER_FUNCTION_NAME),
+        ]
+    }
+
+
+def get_alerted_functions(mock_events_manager) -> list[str]:
+    return [
+        json.loads(event["Detail"])["lambdaName"]
+        for call in mock_events_manager.put_events.call_args_list
+        for event in call.kwargs["events"]
+    ]
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler(
+    mock_refresh_rollups, mock_settings, mock_metrics_storage, mock_events_manager
+):
+    event = get_event(
+        [get_log_event(0, START), get_log_event(2, END), get_log_event(2.001, REPORT)]
+    )
+
+    lambda_handler(event, MagicMock())
+
+    mock_settings.get_monitored_environment_name.assert_called_once_with(
+        ACCOUNT_ID, REGION
+    )
+    mock_metrics_storage.write_records.assert_called_once()
+    kwargs = mock_metrics_storage.write_records.call_args.kwargs
+    assert kwargs["table_name"] == METRICS_TABLE_NAME
+    assert len(kwargs["records"]) == 1
+    assert kwargs["common_attributes"]["Dimensions"] == [
+        {"Name": "monitored_environment", "Value": ENV_NAME},
+        {"Name": "resource_name", "Value": FUNCTION_NAME},
+    ]
+    events = mock_events_manager.put_events.call_args.kwargs["events"]
+    assert len(events) == 1
+    assert events[0]["EventBusName"] == "test-event-bus"
+    mock_metrics_storage.flush.assert_called_once()
+    mock_refresh_rollups.assert_called_once_with(
+        mock_metrics_storage, mock_settings, pending_rollups_store=None
+    )
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_not_subscribed_function(
+    mock_refresh_rollups, mock_settings, mock_metrics_storage, mock_events_manager
+):
+    mock_settings.lambda_logs_subscriptions = {ENV_NAME: ["other-lambda"]}
+    event = get_event([get_log_event(0, START), get_log_event(2.001, REPORT)])
+
+    lambda_handler(event, MagicMock())
+
+    mock_metrics_storage.write_records.assert_not_called()
+    mock_events_manager.put_events.assert_not_called()
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_alerts_after_flush(
+    mock_refresh_rollups, mock_settings, mock_metrics_storage, mock_events_manager
+):
+    calls = []
+    mock_metrics_storage.flush.side_effect = lambda: calls.append("flush")
+    mock_events_manager.put_events.side_effect = lambda events: calls.append("alert")
+    event = get_event(
+        [get_log_event(0, START), get_log_event(2, END), get_log_event(2.001, REPORT)]
+    )
+
+    lambda_handler(event, MagicMock())
+
+    assert calls == ["flush", "alert"]
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_function_error_does_not_stop_others(
+    mock_refresh_rollups, mock_settings, mock_metrics_storage, mock_events_manager
+):
+    mock_settings.lambda_logs_subscriptions = {
+        ENV_NAME: [FUNCTION_NAME, OTHER_FUNCTION_NAME]
+    }
+
+    def write_records(table_name, records, common_attributes):
+        if common_attributes["Dimensions"][1]["Value"] == FUNCTION_NAME:
+            raise Exception("Invalid record")
+
+    mock_metrics_storage.write_records.side_effect = write_records
+
+    # the error is not raised (the retried batch would alert the other function again)
+    lambda_handler(get_two_functions_event(), MagicMock())
+
+    assert mock_metrics_storage.write_records.call_count == 2
+    assert get_alerted_functions(mock_events_manager) == [OTHER_FUNCTION_NAME]
+    mock_refresh_rollups.assert_called_once()
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_failed_writes_not_alerted(
+    mock_refresh_rollups, mock_settings, mock_metrics_storage, mock_events_manager
+):
+    mock_settings.lambda_logs_subscriptions = {
+        ENV_NAME: [FUNCTION_NAME, OTHER_FUNCTION_NAME]
+    }
+    mock_metrics_storage.flush.side_effect = MetricsStorageWriteException(
+        "Rejected records", failed_resources={(METRICS_TABLE_NAME, FUNCTION_NAME)}
+    )
+
+    lambda_handler(get_two_functions_event(), MagicMock())
+
+    assert get_alerted_functions(mock_events_manager) == [OTHER_FUNCTION_NAME]
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_alert_error_does_not_stop_others(
+    mock_refresh_rollups, mock_settings, mock_metrics_storage, mock_events_manager
+):
+    mock_settings.lambda_logs_subscriptions = {
+        ENV_NAME: [FUNCTION_NAME, OTHER_FUNCTION_NAME]
+    }
+    mock_events_manager.put_events.side_effect = [Exception("Throttled"), None]
+
+    lambda_handler(get_two_functions_event(), MagicMock())
+
+    assert mock_events_manager.put_events.call_count == 2
+
+
+def test_lambda_handler_no_completed_invocations(mock_settings, mock_metrics_storage):
+    lambda_handler(get_event([get_log_event(0, START)]), MagicMock())
+
+    # the in-progress invocation is kept until its REPORT entry arrives
+    mock_metrics_storage.write_records.assert_not_called()
+
+
+@patch("lambda_ingest_lambda_logs.MetricsRollup")
+def test_refresh_lambda_rollups(mock_metrics_rollup, mock_metrics_storage):
+    settings = MagicMock()
+    settings.get_sla_thresholds.return_value = [60]
+    pending_rollups_store = MagicMock()
+
+    refresh_lambda_rollups(mock_metrics_storage, settings, pending_rollups_store)
+
+    mock_metrics_rollup.assert_called_once_with(
+        types.LAMBDA_FUNCTIONS, mock_metrics_storage
+    )
+    mock_metrics_rollup.return_value.refresh_written_runs.assert_called_once_with(
+        sla_thresholds=[60], pending_rollups_store=pending_rollups_store
+    )
+
+
+@patch("lambda_ingest_lambda_logs.MetricsRollup")
+def test_refresh_lambda_rollups_error_is_logged(
+    mock_metrics_rollup, mock_metrics_storage
+):
+    mock_metrics_rollup.return_value.refresh_written_runs.side_effect = Exception(
+        "Query failed"
+    )
+
+    # the invocations have already been written and alerted - the batch is not retried,
+    # the failed periods are kept by the store and refreshed by the next batch
+    refresh_lambda_rollups(mock_metrics_storage, MagicMock(), MagicMock())
+
+
+@pytest.fixture
+def mock_partial_invocations_store():
+    with patch.dict(
+        os.environ,
+        {
+            "PARTIAL_INVOCATIONS_S3_PATH": PARTIAL_INVOCATIONS_S3_PATH,
+            "IAMROLE_MONITORED_ACC_EXTRACT_METRICS": "monitored-role",
+        },
+    ), patch(
+        "lambda_ingest_lambda_logs.PartialInvocationsStore"
+    ) as mock_partial_invocations_store:
+        store = mock_partial_invocations_store.return_value
+        store.get_stored_on.side_effect = PartialInvocationsStore.get_stored_on
+        yield store
+
+
+@pytest.fixture
+def mock_extract_invocations():
+    with patch("lambda_ingest_lambda_logs.Boto3ClientCreator"), patch(
+        "lambda_ingest_lambda_logs.LambdaFunctionsMetricExtractor.extract_invocations"
+    ) as mock_extract_invocations:
+        yield mock_extract_invocations
+
+
+def get_partial_invocation(request_id: str = REQUEST_ID) -> LambdaInvocation:
+    return LambdaInvocation(
+        LambdaName=FUNCTION_NAME,
+        LogStream=LOG_STREAM,
+        RequestId=request_id,
+        StartedOn=START_TIME,
+        CompletedOn=START_TIME + timedelta(seconds=2),
+    )
+
+
+def get_extracted_invocation(request_id: str = REQUEST_ID) -> LambdaInvocation:
+    return LambdaInvocation(
+        LambdaName=FUNCTION_NAME,
+        LogStream=LOG_STREAM,
+        RequestId=request_id,
+        Status=LambdaManager.LAMBDA_FAILURE_STATE,
+        Report=REPORT.replace(REQUEST_ID, request_id),
+        Errors=["Something failed"],
+        StartedOn=START_TIME,
+        CompletedOn=START_TIME + timedelta(seconds=2),
+    )
+
+
+def get_stored_s3_path(stored_on: datetime) -> str:
+    return f"{PARTIAL_INVOCATIONS_S3_PATH}{ACCOUNT_ID}/{FUNCTION_NAME}/{int(stored_on.timestamp() * 1000)}-abc.json"
+
+
+def test_lambda_handler_stores_partial_invocations(
+    mock_settings, mock_metrics_storage, mock_partial_invocations_store
+):
+    # the START and END entries have been processed by another container
+    lambda_handler(get_event([get_log_event(2.001, REPORT)]), MagicMock())
+
+    # the status is unknown - the invocation is neither written nor alerted
+    mock_metrics_storage.write_records.assert_not_called()
+    mock_partial_invocations_store.add.assert_called_once()
+    (
+        account_id,
+        function_name,
+        invocations,
+    ) = mock_partial_invocations_store.add.call_args.args
+    assert (account_id, function_name) == (ACCOUNT_ID, FUNCTION_NAME)
+    assert [(x.LogStream, x.RequestId) for x in invocations] == [
+        (LOG_STREAM, REQUEST_ID)
+    ]
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_extracts_partial_invocations(
+    mock_refresh_rollups,
+    mock_settings,
+    mock_metrics_storage,
+    mock_events_manager,
+    mock_partial_invocations_store,
+    mock_extract_invocations,
+):
+    s3_path = get_stored_s3_path(START_TIME)
+    mock_partial_invocations_store.get.return_value = {
+        (ACCOUNT_ID, FUNCTION_NAME): ([get_partial_invocation()], [s3_path])
+    }
+    mock_extract_invocations.return_value = [
+        get_extracted_invocation(),
+        # written by the subscription already
+        get_extracted_invocation("other-request"),
+    ]
+
+    lambda_handler({"extract_partial_invocations": True}, MagicMock())
+
+    # the queried period covers the partial invocations (with a margin)
+    kwargs = mock_extract_invocations.call_args.kwargs
+    assert kwargs["since_time"] < START_TIME
+    assert kwargs["until_time"] > START_TIME + timedelta(seconds=2)
+    records = mock_metrics_storage.write_records.call_args.kwargs["records"]
+    assert len(records) == 1
+    assert records[0]["Dimensions"][0]["Value"] == REQUEST_ID
+    events = mock_events_manager.put_events.call_args.kwargs["events"]
+    assert json.loads(events[0]["Detail"])["state"] == "FAILED"
+    mock_partial_invocations_store.remove.assert_called_once_with([s3_path])
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_partial_invocations_kept_if_not_written(
+    mock_refresh_rollups,
+    mock_settings,
+    mock_metrics_storage,
+    mock_events_manager,
+    mock_partial_invocations_store,
+    mock_extract_invocations,
+):
+    mock_partial_invocations_store.get.return_value = {
+        (ACCOUNT_ID, FUNCTION_NAME): (
+            [get_partial_invocation()],
+            [get_stored_s3_path(START_TIME)],
+        )
+    }
+    mock_extract_invocations.return_value = [get_extracted_invocation()]
+    mock_metrics_storage.flush.side_effect = MetricsStorageWriteException(
+        "Rejected records", failed_resources={(METRICS_TABLE_NAME, FUNCTION_NAME)}
+    )
+
+    lambda_handler({"extract_partial_invocations": True}, MagicMock())
+
+    # extracted again by the next run (the stored partial invocations are kept instead of storing them again)
+    mock_events_manager.put_events.assert_not_called()
+    mock_partial_invocations_store.add.assert_not_called()
+    mock_partial_invocations_store.remove.assert_called_once_with([])
+
+
+@patch("lambda_ingest_lambda_logs.refresh_lambda_rollups")
+def test_lambda_handler_stores_unwritten_invocations(
+    mock_refresh_rollups,
+    mock_settings,
+    mock_metrics_storage,
+    mock_events_manager,
+    mock_partial_invocations_store,
+):
+    mock_settings.lambda_logs_subscriptions = {
+        ENV_NAME: [FUNCTION_NAME, OTHER_FUNCTION_NAME]
+    }
+    mock_metrics_storage.flush.side_effect = MetricsStorageWriteException(
+        "Rejected records", failed_resources={(METRICS_TABLE_NAME, FUNCTION_NAME)}
+    )
+
+    lambda_handler(get_two_functions_event(), MagicMock())
+
+    # the invocations which failed to be written are extracted and alerted by the scheduled run
+    mock_partial_invocations_store.add.assert_called_once()
+    (
+        account_id,
+        function_name,
+        invocations,
+    ) = mock_partial_invocations_store.add.call_args.args
+    assert (account_id, function_name) == (ACCOUNT_ID, FUNCTION_NAME)
+    assert [(x.LogStream, x.RequestId) for x in invocations] == [
+        (LOG_STREAM, REQUEST_ID)
+    ]
+    assert get_alerted_functions(mock_events_manager) == [OTHER_FUNCTION_NAME]
+
+
+def test_extract_partial_invocations_error(
+    mock_settings, mock_partial_invocations_store, mock_extract_invocations
+):
+    expired_s3_path = get_stored_s3_path(START_TIME - timedelta(days=2))
+    recent_s3_path = get_stored_s3_path(START_TIME)
+    mock_partial_invocations_store.get.return_value = {
+        (ACCOUNT_ID, FUNCTION_NAME): (
+            [get_partial_invocation()],
+            [expired_s3_path, recent_s3_path],
+        )
+    }
+    mock_extract_invocations.side_effect = Exception("Access denied")
+
+    extracted_invocations, extracted_s3_paths = extract_partial_invocations(
+        mock_partial_invocations_store, mock_settings, "monitored-role", REGION
+    )
+
+    # the recent ones are extracted by the next run, the expired ones are dropped
+    assert extracted_invocations == {}
+    assert extracted_s3_paths == {(ACCOUNT_ID, FUNCTION_NAME): [expired_s3_path]}
+
+
+def test_extract_partial_invocations_not_subscribed_function(
+    mock_settings, mock_partial_invocations_store, mock_extract_invocations
+):
+    mock_settings.lambda_logs_subscriptions = {ENV_NAME: ["other-lambda"]}
+    s3_path = get_stored_s3_path(START_TIME)
+    mock_partial_invocations_store.get.return_value = {
+        (ACCOUNT_ID, FUNCTION_NAME): ([get_partial_invocation()], [s3_path])
+    }
+
+    extracted_invocations, extracted_s3_paths = extract_partial_invocations(
+        mock_partial_invocations_store, mock_settings, "monitored-role", REGION
+    )
+
+    mock_extract_invocations.assert_not_called()
+    assert extracted_invocations == {}
+    assert extracted_s3_paths == {(ACCOUNT_ID, FUNCTION_NAME): [s3_path]}
@@ -163,3 +163,25 @@ def test_lambda_handler_no_message_body(mock_sns_publisher):
     missing_fields_check(
         str(mock_sns_publisher.call_args[0][1]), "KeyError", "Message body is not set"
     )
+
+
+def test_lambda_handler_offloaded_message_body(mock_sns_publisher, mock_sender):
+    mock_senders_get, mock_sender_instance = mock_sender
+    alert_data = copy.deepcopy(TEST_EVENT_ALERT_SES)
+    message_body = alert_data["message"].pop("message_body")
+    alert_data["message"][
+        "message_body_s3_path"
+    ] = "s3://test-bucket/payloads/hash.json.gz"
+    event = {"Records": [{"body": json.dumps(alert_data)}]}
+
+    with patch(
+        "lambda_notification.S3Manager.read_compressed_file",
+        return_value=json.dumps(message_body),
+    ) as mock_read_compressed_file:
+        lambda_handler(event, None)
+
+    mock_read_compressed_file.assert_called_once_with(
+        "s3://test-bucket/payloads/hash.json.gz"
+    )
+    mock_sender_instance.send.assert_called_once()
+    mock_sns_publisher.assert_not_called()